@@ -0,0 +1,151 @@
+# This file contains utilities to pin processes to CPUs and NUMA nodes.
+#
+# When multiple roles (e.g., proxy leaders, acceptors, and replicas) are
+# colocated on the same host, they compete for the same cores and memory
+# nodes, which hurts tail latency. An AffinityAllocator instead gives every
+# process on a host its own non-overlapping set of CPUs. If possible, all of a
+# process' CPUs are taken from a single NUMA node, and the process' memory is
+# bound to that node too. Processes are launched with numactl on hosts with
+# more than one NUMA node and with taskset otherwise.
+#
+# The affinity of every process is recorded in affinity.json in the benchmark
+# directory.
+
+from . import benchmark
+from . import host
+from typing import Callable, Dict, List, NamedTuple, Optional
+import collections
+
+
+class Affinity(NamedTuple):
+    cpus: List[int]
+    # The NUMA node that every CPU belongs to, or None if the CPUs span nodes.
+    numa_node: Optional[int]
+    # Whether the host has more than one NUMA node.
+    numa: bool
+
+    def prefix(self) -> List[str]:
+        """prefix returns the command prefix that applies this affinity."""
+        cpus = ','.join(str(cpu) for cpu in self.cpus)
+        if not self.numa:
+            return ['taskset', '-c', cpus]
+        elif self.numa_node is None:
+            return ['numactl', f'--physcpubind={cpus}']
+        else:
+            return [
+                'numactl', f'--physcpubind={cpus}',
+                f'--membind={self.numa_node}'
+            ]
+
+
+# A CpuTopology maps every NUMA node of a host to its CPUs.
+CpuTopology = Dict[int, List[int]]
+
+
+def parse_lscpu(output: str) -> CpuTopology:
+    """
+    parse_lscpu parses the output of `lscpu -p=CPU,NODE`. CPUs without a NUMA
+    node (e.g., on machines without NUMA) are put in node 0.
+    """
+    topology: CpuTopology = collections.defaultdict(list)
+    for line in output.splitlines():
+        if line.startswith('#') or line.strip() == '':
+            continue
+        (cpu, _, node) = line.strip().partition(',')
+        topology[int(node) if node != '' else 0].append(int(cpu))
+    return dict(topology)
+
+
+def discover_topology(bench: benchmark.BenchmarkDirectory,
+                      h: host.Host) -> CpuTopology:
+    """
+    discover_topology runs lscpu on `h` to find its CPUs and NUMA nodes. Like
+    everything else, the output is written to the benchmark directory, which
+    we assume every host can access.
+    """
+    label = f'lscpu_{h.ip()}'
+    p = bench.popen(host=h, label=label, cmd=['lscpu', '-p=CPU,NODE'])
+    p.wait()
+    with open(bench.abspath(f'{label}_out.txt'), 'r') as f:
+        return parse_lscpu(f.read())
+
+
+class AffinityAllocator:
+    def __init__(self,
+                 bench: benchmark.BenchmarkDirectory,
+                 cpus_per_proc: int,
+                 discover: Callable[[benchmark.BenchmarkDirectory, host.Host],
+                                    CpuTopology] = discover_topology
+                ) -> None:
+        """
+        An AffinityAllocator gives every process `cpus_per_proc` CPUs. If
+        `cpus_per_proc` is 0, processes are not pinned.
+        """
+        self._bench = bench
+        self._cpus_per_proc = cpus_per_proc
+        self._discover = discover
+        # The topology of every machine, and the CPUs of every machine that
+        # have not yet been allocated, indexed by host.machine(). We index by
+        # machine rather than by IP address, since hosts with different IP
+        # addresses (e.g., NamespaceHosts) can share a machine's CPUs.
+        self._topologies: Dict[str, CpuTopology] = dict()
+        self._free: Dict[str, Dict[int, List[int]]] = dict()
+        self._affinities: Dict[str, Dict] = dict()
+
+    def allocate(self, h: host.Host, label: str) -> Optional[Affinity]:
+        if self._cpus_per_proc <= 0:
+            return None
+
+        machine = h.machine()
+        if machine not in self._topologies:
+            self._topologies[machine] = self._discover(self._bench, h)
+            self._free[machine] = {
+                node: list(cpus)
+                for (node, cpus) in self._topologies[machine].items()
+            }
+        topology = self._topologies[machine]
+        free = self._free[machine]
+        n = self._cpus_per_proc
+        numa = len(topology) > 1
+
+        # If we run out of CPUs, we start over and processes begin to overlap.
+        if sum(len(cpus) for cpus in free.values()) < n:
+            self._bench.log(f'Machine {machine} is out of CPUs. {label} will '
+                            f'share CPUs with other processes.')
+            for (node, cpus) in topology.items():
+                free[node] = list(cpus)
+            if sum(len(cpus) for cpus in free.values()) < n:
+                raise ValueError(f'Machine {machine} has fewer than {n} CPUs.')
+
+        # We prefer the NUMA node with the fewest free CPUs that still fits
+        # the process, leaving larger nodes for later processes. If no node
+        # fits, we take CPUs from the nodes with the most free CPUs.
+        fits = [node for (node, cpus) in free.items() if len(cpus) >= n]
+        if len(fits) > 0:
+            node = min(fits, key=lambda node: (len(free[node]), node))
+            cpus = free[node][:n]
+            free[node] = free[node][n:]
+            affinity = Affinity(cpus=cpus, numa_node=node, numa=numa)
+        else:
+            cpus = []
+            for node in sorted(free, key=lambda node: -len(free[node])):
+                taken = free[node][:n - len(cpus)]
+                free[node] = free[node][len(taken):]
+                cpus += taken
+            affinity = Affinity(cpus=sorted(cpus), numa_node=None, numa=numa)
+
+        self._affinities[label] = {
+            'host': h.ip(),
+            'machine': machine,
+            **affinity._asdict()
+        }
+        self._bench.write_dict('affinity.json', self._affinities)
+        return affinity
+
+    def prefix(self, h: host.Host, label: str) -> List[str]:
+        """
+        prefix allocates CPUs for the process `label` on host `h` and returns
+        the command prefix that pins the process to them.
+        """
+        affinity = self.allocate(h, label)
+        return affinity.prefix() if affinity is not None else []
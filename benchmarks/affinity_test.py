@@ -0,0 +1,81 @@
+from . import affinity
+from . import benchmark
+from . import host
+import os
+import tempfile
+import unittest
+
+
+LSCPU_OUTPUT = """\
+# The following is the parsable format, which can be fed to other
+# programs. Each different item in every column has an unique ID
+# starting from zero.
+# CPU,Node
+0,0
+1,0
+2,0
+3,1
+4,1
+"""
+
+
+class AffinityTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.bench = benchmark.BenchmarkDirectory(
+            os.path.join(self.dir.name, 'bench'))
+
+    def tearDown(self):
+        self.bench.__exit__(None, None, None)
+        self.dir.cleanup()
+
+    def _allocator(self, cpus_per_proc: int) -> affinity.AffinityAllocator:
+        return affinity.AffinityAllocator(
+            self.bench,
+            cpus_per_proc,
+            discover=lambda bench, h: affinity.parse_lscpu(LSCPU_OUTPUT))
+
+    def test_parse_lscpu(self):
+        self.assertEqual(affinity.parse_lscpu(LSCPU_OUTPUT), {
+            0: [0, 1, 2],
+            1: [3, 4]
+        })
+        self.assertEqual(affinity.parse_lscpu('0,\n1,\n'), {0: [0, 1]})
+
+    def test_unpinned(self):
+        allocator = self._allocator(0)
+        self.assertEqual(allocator.prefix(host.FakeHost('a'), 'a'), [])
+
+    def test_best_fit(self):
+        allocator = self._allocator(2)
+        h = host.FakeHost('a')
+        # The smallest node that fits comes first.
+        self.assertEqual(allocator.prefix(h, 'a'),
+                         ['numactl', '--physcpubind=3,4', '--membind=1'])
+        self.assertEqual(allocator.prefix(h, 'b'),
+                         ['numactl', '--physcpubind=0,1', '--membind=0'])
+        # Then we run out of CPUs and start over.
+        self.assertEqual(allocator.prefix(h, 'c'),
+                         ['numactl', '--physcpubind=3,4', '--membind=1'])
+
+    def test_namespace_hosts_share_cpus(self):
+        # NamespaceHosts have their own IP addresses but share the local
+        # machine's CPUs, so they don't get the same CPUs.
+        allocator = self._allocator(2)
+        self.assertEqual(
+            allocator.prefix(host.NamespaceHost('10.77.0.2'), 'a'),
+            ['numactl', '--physcpubind=3,4', '--membind=1'])
+        self.assertEqual(
+            allocator.prefix(host.NamespaceHost('10.77.0.3'), 'b'),
+            ['numactl', '--physcpubind=0,1', '--membind=0'])
+        self.assertEqual(allocator.prefix(host.LocalHost(), 'c'),
+                         ['numactl', '--physcpubind=3,4', '--membind=1'])
+
+    def test_spans_nodes(self):
+        allocator = self._allocator(4)
+        self.assertEqual(allocator.prefix(host.FakeHost('a'), 'a'),
+                         ['numactl', '--physcpubind=0,1,2,3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,16 @@
+from .. import affinity
 from .. import benchmark
+from .. import cds
 from .. import cluster
 from .. import host
 from .. import parser_util
 from .. import pd_util
-from .. import perf_util
 from .. import proc
 from .. import prometheus
 from .. import proto_util
+from .. import roles
 from .. import util
+from .. import warm_pool
 from .. import workload
 from ..workload import Workload
 from typing import Any, Callable, Collection, Dict, List, NamedTuple, Optional
@@ -85,6 +88,11 @@ class Input(NamedTuple):
     proxy_server_options: ProxyServerOptions
     proxy_server_log_level: str
 
+    # Affinity. ################################################################
+    # If positive, every process is pinned to its own cpus_per_proc CPUs,
+    # preferably on a single NUMA node. See affinity.py.
+    cpus_per_proc: int = 0
+
 
 Output = benchmark.RecorderOutput
 
@@ -149,6 +157,8 @@ class BatchedUnreplicatedSuite(benchmark.Suite[Input, Output]):
         super().__init__()
         self._cluster = cluster.Cluster.from_json_file(self.args()['cluster'],
                                                        self._connect)
+        self._pool = (warm_pool.WarmPool()
+                      if self.args().get('warm_jvm_pool') else None)
 
     def _connect(self, address: str) -> host.Host:
         client = paramiko.SSHClient()
@@ -161,6 +171,14 @@ class BatchedUnreplicatedSuite(benchmark.Suite[Input, Output]):
 
     def run_benchmark(self, bench: benchmark.BenchmarkDirectory,
                       args: Dict[Any, Any], input: Input) -> Output:
+        launcher = roles.Launcher(
+            bench,
+            jar=args['jar'],
+            monitored=input.monitored,
+            profiled=input.profiled,
+            allocator=affinity.AffinityAllocator(bench, input.cpus_per_proc),
+            pool=self._pool,
+            jvm_flags=cds.java_flags(args))
         net = BatchedUnreplicatedNet(self._cluster, input)
 
         # Write config file.
@@ -170,130 +188,104 @@ class BatchedUnreplicatedSuite(benchmark.Suite[Input, Output]):
                            proto_util.message_to_pbtext(config))
         bench.log('Config file config.pbtxt written.')
 
-        # If we're monitoring the code, run garbage collection verbosely.
-        def java(heap_size: str) -> List[str]:
-            cmd = ['java', f'-Xms{heap_size}', f'-Xmx{heap_size}']
-            if input.monitored:
-                cmd += [
-                    '-verbose:gc',
-                    '-XX:-PrintGC',
-                    '-XX:+PrintHeapAtGC',
-                    '-XX:+PrintGCDetails',
-                    '-XX:+PrintGCTimeStamps',
-                    '-XX:+PrintGCDateStamps',
-                ]
-            return cmd
-
-        # Launch batchers.
-        batcher_procs: List[proc.Proc] = []
-        for (i, batcher) in enumerate(net.placement().batchers):
-            p = bench.popen(
-                host=batcher.host,
-                label=f'batcher_{i}',
-                cmd=java(input.batcher_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.batchedunreplicated.BatcherMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.batcher_log_level,
-                    '--prometheus_host',
-                    batcher.host.ip(),
-                    '--prometheus_port',
-                    str(batcher.port + 1) if input.monitored else '-1',
-                    '--options.batchSize',
-                    str(input.batcher_options.batch_size),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, batcher.host, p,
-                                           f'batcher_{i}')
-            batcher_procs.append(p)
-        bench.log('Batchers started.')
-
-        # Launch proxy_servers.
-        proxy_server_procs: List[proc.Proc] = []
-        for (i, proxy_server) in enumerate(net.placement().proxy_servers):
-            p = bench.popen(
-                host=proxy_server.host,
-                label=f'proxy_server_{i}',
-                cmd=java(input.proxy_server_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.batchedunreplicated.ProxyServerMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.proxy_server_log_level,
-                    '--prometheus_host',
-                    proxy_server.host.ip(),
-                    '--prometheus_port',
-                    str(proxy_server.port + 1) if input.monitored else '-1',
-                    '--options.flushEveryN',
-                    str(input.proxy_server_options.flush_every_n),
-                ],
+        # Write workload file.
+        workload_filename = bench.abspath('workload.pbtxt')
+        bench.write_string(
+            workload_filename,
+            proto_util.message_to_pbtext(input.workload.to_proto()))
+
+        # Describe roles.
+        def role(name: str,
+                 main_class: str,
+                 heap_size: str,
+                 procs: List[roles.RoleProc],
+                 log_level: str,
+                 options: Any,
+                 flags: List[str] = [],
+                 depends_on: List[str] = [],
+                 poolable: bool = True) -> roles.Role:
+            return roles.Role(
+                name=name,
+                main_class=f'frankenpaxos.batchedunreplicated.{main_class}',
+                heap_size=heap_size,
+                procs=procs,
+                flags=['--config', config_filename, '--log_level', log_level]
+                + flags + roles.options_flags(options),
+                depends_on=depends_on,
+                poolable=poolable,
             )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, proxy_server.host, p,
-                                           f'proxy_server_{i}')
-            proxy_server_procs.append(p)
-        bench.log('ProxyServers started.')
-
-        # Launch server.
-        server_proc = bench.popen(
-            host=net.placement().server.host,
-            label=f'server',
-            cmd=java(input.server_jvm_heap_size) + [
-                '-cp',
-                os.path.abspath(args['jar']),
-                'frankenpaxos.batchedunreplicated.ServerMain',
-                '--config',
-                config_filename,
-                '--log_level',
-                input.server_log_level,
-                '--state_machine',
-                input.state_machine,
-                '--prometheus_host',
-                net.placement().server.host.ip(),
-                '--prometheus_port',
-                str(net.placement().server.port +
-                    1) if input.monitored else '-1',
-                '--options.flushEveryN',
-                str(input.server_options.flush_every_n),
+
+        server_roles = [
+            role('batcher', 'BatcherMain', input.batcher_jvm_heap_size,
+                 roles.indexed('batcher', net.placement().batchers),
+                 input.batcher_log_level, input.batcher_options),
+            role('proxy_server', 'ProxyServerMain',
+                 input.proxy_server_jvm_heap_size,
+                 roles.indexed('proxy_server', net.placement().proxy_servers),
+                 input.proxy_server_log_level, input.proxy_server_options),
+            # The server is launched after everything else.
+            role('server', 'ServerMain', input.server_jvm_heap_size,
+                 [
+                     roles.RoleProc(label='server',
+                                    endpoint=net.placement().server,
+                                    flags=[])
+                 ],
+                 input.server_log_level, input.server_options,
+                 flags=['--state_machine', input.state_machine],
+                 depends_on=['batcher', 'proxy_server']),
+        ]
+
+        # TODO(mwhittaker): For now, we don't run clients with large heaps and
+        # verbose garbage collection because they are all colocated on one
+        # machine.
+        client_role = role(
+            'client', 'ClientMain', input.client_jvm_heap_size,
+            [
+                roles.RoleProc(
+                    label=f'client_{i}',
+                    endpoint=client,
+                    flags=[
+                        '--host', client.host.ip(),
+                        '--port', str(client.port),
+                        '--output_file_prefix', bench.abspath(f'client_{i}'),
+                    ])
+                for (i, client) in enumerate(net.placement().clients)
             ],
-        )
-        if input.profiled:
-            server_proc = perf_util.JavaPerfProc(bench,
-                                                 net.placement().server.host,
-                                                 server_proc, f'server')
+            input.client_log_level,
+            input.client_options,
+            flags=[
+                '--measurement_group_size',
+                f'{input.measurement_group_size}',
+                '--warmup_duration',
+                f'{input.warmup_duration.total_seconds()}s',
+                '--warmup_timeout',
+                f'{input.warmup_timeout.total_seconds()}s',
+                '--warmup_sleep',
+                f'{input.warmup_sleep.total_seconds()}s',
+                '--num_warmup_clients',
+                f'{input.num_warmup_clients_per_proc}',
+                '--duration',
+                f'{input.duration.total_seconds()}s',
+                '--timeout',
+                f'{input.timeout.total_seconds()}s',
+                '--num_clients',
+                f'{input.num_clients_per_proc}',
+                '--workload',
+                f'{workload_filename}',
+            ],
+            # Clients exit when they finish, so they can't be reused.
+            poolable=False)
+
+        # Launch servers.
+        launcher.launch(server_roles)
         bench.log('Servers started.')
 
         # Launch Prometheus.
         if input.monitored:
             prometheus_config = prometheus.prometheus_config(
-                int(input.prometheus_scrape_interval.total_seconds() * 1000), {
-                    'batchedunreplicated_client': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().clients
-                    ],
-                    'batchedunreplicated_batcher': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().batchers
-                    ],
-                    'batchedunreplicated_server': [
-                        f'{net.placement().server.host.ip()}:' +
-                        f'{net.placement().server.port+1}'
-                    ],
-                    'batchedunreplicated_proxy_server': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().proxy_servers
-                    ],
-                })
+                int(input.prometheus_scrape_interval.total_seconds() * 1000),
+                roles.prometheus_jobs('batchedunreplicated',
+                                      [client_role] + server_roles))
             bench.write_string('prometheus.yml', yaml.dump(prometheus_config))
             prometheus_server = bench.popen(
                 host=net.placement().clients[0].host,
@@ -311,66 +303,13 @@ class BatchedUnreplicatedSuite(benchmark.Suite[Input, Output]):
         bench.log('Client lag ended.')
 
         # Launch clients.
-        workload_filename = bench.abspath('workload.pbtxt')
-        bench.write_string(
-            workload_filename,
-            proto_util.message_to_pbtext(input.workload.to_proto()))
-
-        client_procs: List[proc.Proc] = []
-        for (i, client) in enumerate(net.placement().clients):
-            p = bench.popen(
-                host=client.host,
-                label=f'client_{i}',
-                # TODO(mwhittaker): For now, we don't run clients with large
-                # heaps and verbose garbage collection because they are all
-                # colocated on one machine.
-                cmd=java(input.client_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.batchedunreplicated.ClientMain',
-                    '--host',
-                    client.host.ip(),
-                    '--port',
-                    str(client.port),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.client_log_level,
-                    '--prometheus_host',
-                    client.host.ip(),
-                    '--prometheus_port',
-                    str(client.port + 1) if input.monitored else '-1',
-                    '--measurement_group_size',
-                    f'{input.measurement_group_size}',
-                    '--warmup_duration',
-                    f'{input.warmup_duration.total_seconds()}s',
-                    '--warmup_timeout',
-                    f'{input.warmup_timeout.total_seconds()}s',
-                    '--warmup_sleep',
-                    f'{input.warmup_sleep.total_seconds()}s',
-                    '--num_warmup_clients',
-                    f'{input.num_warmup_clients_per_proc}',
-                    '--duration',
-                    f'{input.duration.total_seconds()}s',
-                    '--timeout',
-                    f'{input.timeout.total_seconds()}s',
-                    '--num_clients',
-                    f'{input.num_clients_per_proc}',
-                    '--workload',
-                    f'{workload_filename}',
-                    '--output_file_prefix',
-                    bench.abspath(f'client_{i}'),
-                ])
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, client.host, p, f'client_{i}')
-            client_procs.append(p)
+        client_procs = launcher.launch([client_role])['client']
         bench.log(f'Clients started and running for {input.duration}.')
 
         # Wait for clients to finish and then terminate leaders and acceptors.
         for p in client_procs:
             p.wait()
-        for p in batcher_procs + [server_proc] + proxy_server_procs:
-            p.kill()
+        launcher.kill([r.name for r in server_roles])
         bench.log('Clients finished and processes terminated.')
 
         # Client i writes results to `client_i_data.csv`.
@@ -382,7 +321,9 @@ class BatchedUnreplicatedSuite(benchmark.Suite[Input, Output]):
             bench,
             client_csvs,
             drop_prefix=datetime.timedelta(seconds=0),
-            save_data=False)['write']
+            save_data=False,
+            correct_coordinated_omission=args.get(
+                'correct_coordinated_omission', False))['write']
 
 
 def get_parser() -> argparse.ArgumentParser:
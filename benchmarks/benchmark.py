@@ -13,9 +13,12 @@
 #
 # This file contains utilities for running and organizing benchmarks suites.
 
+from . import cluster
 from . import host
 from . import pd_util
 from . import proc
+from . import repetition
+from . import topology
 from . import util
 from typing import (Any, Collection, Dict, Generic, Iterable, IO, List,
                     NamedTuple, Optional, Sequence, Tuple, TypeVar, Union)
@@ -26,6 +29,7 @@ import datetime
 import datetime
 import json
 import os
+import numpy as np
 import pandas as pd
 import queue
 import random
@@ -117,6 +121,13 @@ class SuiteDirectory(object):
         return BenchmarkDirectory(path)
 
 
+# A Launch records how a process was launched by BenchmarkDirectory.popen.
+class Launch(NamedTuple):
+    host: host.Host
+    cmd: Union[str, Sequence[str]]
+    proc: proc.Proc
+
+
 # A BenchmarkDirectory is like a SuiteDirectory. It provides methods to record
 # information about a benchmark as well as other helpful methods. For example,
 # the popen method allows you to run an executable and record its standard out,
@@ -136,12 +147,22 @@ class BenchmarkDirectory(object):
         # on that ip address. Recording pids helps debug perf.
         self.pids: Dict[Tuple[str, int], str] = dict()
 
+        # A mapping from the label of every process launched with `popen` to
+        # how it was launched. This lets us signal and restart a process by
+        # its label (see fault_injection.py). A restarted process replaces
+        # the entry of the original.
+        self.launches: Dict[str, Launch] = dict()
+
         # A file for logging.
         self.logfile = self.create_file('log.txt')
 
         # Whether we have already exited. We want to avoid exiting twice.
         self.exited = False
 
+        # Processes may be launched from multiple threads (see roles.py), so
+        # we protect process_stack, pids, and launches with a lock.
+        self._popen_lock = threading.Lock()
+
     def __str__(self) -> str:
         return f'BenchmarkDirectory({self.path})'
 
@@ -198,13 +219,35 @@ class BenchmarkDirectory(object):
                           stdout=self.abspath(f'{label}_out.txt'),
                           stderr=self.abspath(f'{label}_err.txt'))
         self.write_string(f'{label}_cmd.txt', proc.cmd())
-        self.process_stack.enter_context(
-            _Reaped(proc, self.abspath(f'{label}_returncode.txt')))
         pid = proc.pid()
-        if pid:
-            self.pids[(host.ip(), pid)] = label
+        with self._popen_lock:
+            self.process_stack.enter_context(
+                _Reaped(proc, self.abspath(f'{label}_returncode.txt')))
+            if pid:
+                self.pids[(host.ip(), pid)] = label
+            self.launches[label] = Launch(host, cmd, proc)
         return proc
 
+    def restart(self, label: str) -> proc.Proc:
+        """Kills and relaunches the process labelled `label`.
+
+        The process is relaunched with the same command on the same host, and
+        its output is written to <label>_restart_<n>_out.txt and so on. The
+        restarted process starts from scratch; it doesn't keep any of the
+        state of the killed process.
+        """
+        launch = self.launches[label]
+        launch.proc.kill()
+        launch.proc.wait()
+        with self._popen_lock:
+            n = sum(1 for l in self.launches
+                    if l.startswith(f'{label}_restart_'))
+        restarted = self.popen(launch.host, f'{label}_restart_{n}',
+                               launch.cmd)
+        with self._popen_lock:
+            self.launches[label] = launch._replace(proc=restarted)
+        return restarted
+
 
 # A Suite represents a benchmark suite. A suite is parameterized on an input
 # type Input and output type Output. A suite must provide
@@ -255,56 +298,224 @@ class Suite(Generic[Input, Output]):
         suite_dir.write_string('inputs.txt', '\n'.join(str(i) for i in inputs))
 
         # Create file to record suite results.
-        results_file = suite_dir.create_file('results.csv')
-        results_writer = csv.writer(results_file)
+        results = self.results_file(suite_dir, args)
 
         suite_start_time = datetime.datetime.now()
+        options = self.repetition_options(args)
+        values: Dict[str, Dict[str, List[float]]] = dict()
         for (i, input) in enumerate(inputs, 1):
-            bench_start_time = datetime.datetime.now()
-            with suite_dir.benchmark_directory() as bench:
-                # Run the benchmark.
-                bench.write_string('input.txt', str(input))
-                bench.write_dict('input.json', util.tuple_to_dict(input))
-                output = self.run_benchmark(bench, args, input)
+            output = self.run_and_record(suite_dir, args, input, results, i,
+                                         len(inputs), suite_start_time)
+            if options is not None:
+                _record_repetition(values, input, output, options)
+        if options is None:
+            return
 
-                # Write the header if needed.
-                if i == 1:
-                    results_writer.writerow(
-                        util.flatten_tuple_fields(input) +
-                        util.flatten_tuple_fields(output))
+        # Repeat the inputs whose confidence intervals are too wide, in
+        # rounds, until they're all tight enough. See repetition.py.
+        distinct = list({str(input): input for input in inputs}.values())
+        i = len(inputs)
+        while True:
+            todo = [
+                input for input in distinct
+                if repetition.needs_more(values[str(input)], options)
+            ]
+            if len(todo) == 0:
+                break
+            for input in todo:
+                i += 1
+                output = self.run_and_record(suite_dir, args, input, results,
+                                             i, None, suite_start_time)
+                _record_repetition(values, input, output, options)
+        _write_repetitions(suite_dir, values, options)
+
+    def repetition_options(
+            self,
+            args: Dict[Any, Any]) -> Optional[repetition.RepetitionOptions]:
+        # If the suite is passed --repeat_until_ci, run_suite repeats inputs
+        # until the confidence intervals of the given output fields are tight
+        # enough. See repetition.py.
+        if not args.get('repeat_until_ci'):
+            return None
+        return repetition.RepetitionOptions(
+            metrics=args['repeat_until_ci'],
+            max_repetitions=args.get('max_repetitions') or 10,
+            max_ci_width=args.get('max_ci_width') or 0.05)
+
+    def results_file(self, suite_dir: SuiteDirectory,
+                     args: Dict[Any, Any]) -> 'ResultsFile':
+        """
+        results_file returns the ResultsFile of a suite. If the suite is passed
+        --calibrate_network, results_file first measures the network between
+        the suite's hosts (see network_calibration.py) and the summary of the
+        measurements is written with every result.
+        """
+        if not args.get('calibrate_network'):
+            return ResultsFile(suite_dir)
+
+        # network_calibration imports this module.
+        from . import network_calibration
+        if args.get('cluster') is None:
+            print('--calibrate_network needs a --cluster. The network is not '
+                  'calibrated.')
+            return ResultsFile(suite_dir)
+
+        print('Calibrating the network.')
+        hosts = network_calibration.cluster_hosts(args['cluster'],
+                                                  args.get('identity_file'))
+        df = network_calibration.calibrate(suite_dir, hosts)
+        network = network_calibration.network_output(df)
+        print(f'Network calibrated: {network}.')
+        return ResultsFile(suite_dir, network)
+
+    def run_and_record(self, suite_dir: SuiteDirectory, args: Dict[Any, Any],
+                       input: Input, results: 'ResultsFile', i: int,
+                       n: Optional[int],
+                       suite_start_time: datetime.datetime) -> Output:
+        """
+        run_and_record runs the i'th benchmark of a suite in a new benchmark
+        directory, appends its result to `results`, and prints a summary of the
+        benchmark. `n` is the total number of benchmarks in the suite, or None
+        if it is not known ahead of time.
+        """
+        bench_start_time = datetime.datetime.now()
+        with suite_dir.benchmark_directory() as bench:
+            # Run the benchmark.
+            bench.write_string('input.txt', str(input))
+            bench.write_dict('input.json', util.tuple_to_dict(input))
+            with self._emulate_topology(bench, args), \
+                 self._inject_faults(bench, args):
+                output = self.run_benchmark(bench, args, input)
 
-                # Write the results.
-                row = util.flatten_tuple(input) + util.flatten_tuple(output)
-                results_writer.writerow([str(x) for x in row])
-                results_file.flush()
+            # Write the results.
+            results.write(input, output)
 
-            # Display some information about the benchmark.
-            colorful.use_style('monokai')
+        # Display some information about the benchmark.
+        colorful.use_style('monokai')
 
-            # First, we show the progress of the suite.
-            n = len(inputs)
+        # First, we show the progress of the suite.
+        if n is not None:
             percent = (i / n) * 100
             info = f'{colorful.bold}[{i:03}/{n:03}{colorful.reset}; '
             info += f'{percent:#.4}%] '
+        else:
+            info = f'{colorful.bold}[{i:03}/???{colorful.reset}] '
 
-            # Next, we show the time taken to run this benchmark, the total
-            # elapsed time, and the estimated time left.
-            current_time = datetime.datetime.now()
-            bench_duration = current_time - bench_start_time
-            suite_duration = current_time - suite_start_time
-            duration_per_iteration = suite_duration / i
-            remaining_duration = (n - i) * duration_per_iteration
-
-            def round_delta(d):
-                return datetime.timedelta(seconds=int(d.total_seconds()))
+        # Next, we show the time taken to run this benchmark, the total
+        # elapsed time, and the estimated time left.
+        current_time = datetime.datetime.now()
+        bench_duration = current_time - bench_start_time
+        suite_duration = current_time - suite_start_time
 
-            info += f'{colorful.blue(round_delta(bench_duration))} / '
-            info += f'{colorful.green(round_delta(suite_duration))} + '
-            info += f'{colorful.magenta(round_delta(remaining_duration))}? '
+        def round_delta(d):
+            return datetime.timedelta(seconds=int(d.total_seconds()))
 
-            # Finally, we display a summary of the benchmark.
-            info += f'{colorful.lightGray(self.summary(input, output))}'
-            print(info)
+        info += f'{colorful.blue(round_delta(bench_duration))} / '
+        info += f'{colorful.green(round_delta(suite_duration))}'
+        if n is not None:
+            duration_per_iteration = suite_duration / i
+            remaining_duration = (n - i) * duration_per_iteration
+            info += f' + {colorful.magenta(round_delta(remaining_duration))}?'
+        info += ' '
+
+        # Finally, we display a summary of the benchmark.
+        info += f'{colorful.lightGray(self.summary(input, output))}'
+        print(info)
+        return output
+
+    def _emulate_topology(self, bench: BenchmarkDirectory,
+                          args: Dict[Any, Any]):
+        # If the suite is passed a topology (via --topology), we emulate it on
+        # the loopback device while the benchmark runs. See topology.py.
+        if args.get('topology') is None:
+            return contextlib.ExitStack()
+
+        t = topology.Topology.from_json_file(args['topology'])
+        bench.write_dict('topology.json', t._asdict())
+        if args.get('cluster') is not None:
+            c = cluster.Cluster.from_json_file(args['cluster'], host.FakeHost)
+            missing = c.addresses() - set(t.addresses)
+            if len(missing) > 0:
+                bench.log(f'Cluster addresses {sorted(missing)} are not in '
+                          f'the topology. Their traffic is not shaped.')
+        return topology.emulate(t, log=bench.log)
+
+    def _inject_faults(self, bench: BenchmarkDirectory,
+                       args: Dict[Any, Any]):
+        # If the suite is passed a fault schedule (via --faults), we inject
+        # the faults into the processes of every benchmark. See
+        # fault_injection.py.
+        if args.get('faults') is None:
+            return contextlib.ExitStack()
+
+        # fault_injection imports this module.
+        from . import fault_injection
+        faults = fault_injection.faults_from_json_file(args['faults'])
+        bench.write_dict('faults.json',
+                         {'faults': [f._asdict() for f in faults]})
+        return fault_injection.FaultInjector(bench, faults)
+
+
+def _record_repetition(values: Dict[str, Dict[str, List[float]]], input: Any,
+                       output: Any,
+                       options: repetition.RepetitionOptions) -> None:
+    fields = dict(
+        zip(util.flatten_tuple_fields(output), util.flatten_tuple(output)))
+    missing = [m for m in options.metrics if m not in fields]
+    if len(missing) > 0:
+        raise ValueError(f'Output fields {missing} do not exist. The output '
+                         f'fields are {list(fields)}.')
+    for metric in options.metrics:
+        values.setdefault(str(input), dict()).setdefault(metric, []).append(
+            float(fields[metric]))
+
+
+def _write_repetitions(suite_dir: SuiteDirectory,
+                       values: Dict[str, Dict[str, List[float]]],
+                       options: repetition.RepetitionOptions) -> None:
+    rows = []
+    for (input, metrics) in values.items():
+        row: Dict[str, Any] = {'input': input}
+        for (metric, vs) in metrics.items():
+            ci = repetition.bootstrap_ci(vs,
+                                         confidence=options.confidence,
+                                         num_resamples=options.num_resamples)
+            for (field, value) in ci._asdict().items():
+                row[f'{metric}.{field}'] = value
+        rows.append(row)
+    pd.DataFrame(rows).to_csv(suite_dir.abspath('repetitions.csv'),
+                              index=False)
+
+
+# A ResultsFile is the results.csv file of a suite. Every row holds the
+# flattened input and output of one benchmark. If `network` is not None (see
+# network_calibration.py), every row also holds it, as network.* columns.
+class ResultsFile(object):
+    def __init__(self, suite_dir: SuiteDirectory,
+                 network: Optional[Any] = None) -> None:
+        self.file = suite_dir.create_file('results.csv')
+        self.writer = csv.writer(self.file)
+        self.wrote_header = False
+        self.network = network
+
+    def write(self, input: Any, output: Any) -> None:
+        # Write the header if needed.
+        if not self.wrote_header:
+            network_fields = ([] if self.network is None else [
+                f'network.{f}'
+                for f in util.flatten_tuple_fields(self.network)
+            ])
+            self.writer.writerow(
+                util.flatten_tuple_fields(input) +
+                util.flatten_tuple_fields(output) + network_fields)
+            self.wrote_header = True
+
+        # Write the results.
+        row = util.flatten_tuple(input) + util.flatten_tuple(output)
+        if self.network is not None:
+            row += util.flatten_tuple(self.network)
+        self.writer.writerow([str(x) for x in row])
+        self.file.flush()
 
 
 class LatencyOutput(NamedTuple):
@@ -315,6 +526,12 @@ class LatencyOutput(NamedTuple):
     p90_ms: float
     p95_ms: float
     p99_ms: float
+    p999_ms: float
+    p9999_ms: float
+    # The median, over all 1 second windows, of the maximum latency of the
+    # requests started in the window. Unlike max_ms, one outlier doesn't
+    # dominate it.
+    window_max_1s_median_ms: float
 
 
 class ThroughputOutput(NamedTuple):
@@ -341,6 +558,116 @@ def _latency(s):
         p90_ms=s.quantile(.90),
         p95_ms=s.quantile(.95),
         p99_ms=s.quantile(.99),
+        p999_ms=s.quantile(.999),
+        p9999_ms=s.quantile(.9999),
+        window_max_1s_median_ms=s.resample('1s').max().median(),
+    )
+
+
+def _weighted_quantile(values: np.ndarray, weights: np.ndarray,
+                       q: float) -> float:
+    order = np.argsort(values)
+    cumulative = np.cumsum(weights[order])
+    i = np.searchsorted(cumulative, q * cumulative[-1])
+    return values[order][min(i, len(values) - 1)]
+
+
+def _client_columns(df: pd.DataFrame) -> List[str]:
+    columns = ([c for c in ['host', 'port'] if c in df.columns] or
+               ['recorder_file'])
+    if 'pseudonym' in df.columns:
+        columns.append('pseudonym')
+    return columns
+
+
+# _grouped returns whether `df` contains grouped measurements (see
+# LabeledRecorder). A group mixes the requests of many pseudonyms, so grouped
+# latencies can't be corrected for coordinated omission.
+def _grouped(df: pd.DataFrame) -> bool:
+    return ('count' in df.columns and bool((df['count'] > 1).any())) or \
+           ('pseudonym' in df.columns and bool((df['pseudonym'] < 0).any()))
+
+
+# _expected_intervals returns the expected interval, in milliseconds, of every
+# client in `df`, keyed by the client's values of _client_columns(df).
+def _expected_intervals(df: pd.DataFrame) -> Dict[Any, float]:
+    intervals: Dict[Any, float] = dict()
+    for (key, client) in df.groupby(_client_columns(df)):
+        gaps_ms = (np.diff(client.index.values).astype('timedelta64[ns]') /
+                   np.timedelta64(1, 'ms'))
+        gaps_ms = gaps_ms[gaps_ms > 0]
+        if len(gaps_ms) > 0:
+            intervals[key] = np.median(gaps_ms)
+    return intervals
+
+
+# Closed loop clients suffer from coordinated omission [1]. If a request takes
+# a long time (e.g., during a garbage collection pause), a client doesn't send
+# the requests that it would have sent in the meantime, and the latencies that
+# those requests would have had are never recorded. The recorded tail latency
+# is thus lower than the tail latency that an open loop client would observe.
+#
+# Like HdrHistogram's recordValueWithExpectedInterval, we correct for this.
+# Every closed loop client (i.e. every pseudonym of every client process) has
+# an expected interval between requests: the median time between the starts
+# of two of its consecutive requests. A client process is identified by its
+# (host, port) or, if the data doesn't have them, by its CSV file. Data
+# written before recorders recorded pseudonyms treats every client process as
+# a single client. For every request with latency L larger than twice the
+# expected interval I, we add the requests that the client should have sent
+# while it was waiting, with latencies L - I, L - 2I, ..., down to I. A
+# request can add millions of missing requests, so we represent the missing
+# requests of a request with at most `max_missing_per_request` weighted
+# samples.
+#
+# If `intervals` is None, the expected intervals are computed from `df`. A
+# LabeledRecorder's clients may issue requests with different labels, so
+# labeled_recorder_outputs computes the intervals from every label's requests.
+# `df` must not contain grouped measurements (see _grouped).
+#
+# [1]: https://www.youtube.com/watch?v=lJ8ydIuPFeU
+def _corrected_latency(df: pd.DataFrame,
+                       max_missing_per_request: int = 100,
+                       intervals: Optional[Dict[Any, float]] = None) \
+                       -> LatencyOutput:
+    if intervals is None:
+        intervals = _expected_intervals(df)
+
+    values: List[np.ndarray] = []
+    weights: List[np.ndarray] = []
+    for (key, client) in df.groupby(_client_columns(df)):
+        latency_ms = (client['latency_nanos'] / 1e6).values
+        values.append(latency_ms)
+        weights.append(np.ones(len(latency_ms)))
+
+        if key not in intervals:
+            continue
+        interval_ms = intervals[key]
+
+        num_missing = np.floor(latency_ms / interval_ms) - 1
+        stalled = num_missing > 0
+        for (l, n) in zip(latency_ms[stalled], num_missing[stalled]):
+            k = int(min(n, max_missing_per_request))
+            # k evenly spaced samples between I and L - I, each standing in
+            # for n / k missing requests.
+            values.append(np.linspace(l - interval_ms, l - n * interval_ms,
+                                      k))
+            weights.append(np.full(k, n / k))
+
+    all_values = np.concatenate(values)
+    all_weights = np.concatenate(weights)
+    s = df['latency_nanos'] / 1e6
+    return LatencyOutput(
+        mean_ms=np.average(all_values, weights=all_weights),
+        median_ms=_weighted_quantile(all_values, all_weights, .5),
+        min_ms=all_values.min(),
+        max_ms=all_values.max(),
+        p90_ms=_weighted_quantile(all_values, all_weights, .90),
+        p95_ms=_weighted_quantile(all_values, all_weights, .95),
+        p99_ms=_weighted_quantile(all_values, all_weights, .99),
+        p999_ms=_weighted_quantile(all_values, all_weights, .999),
+        p9999_ms=_weighted_quantile(all_values, all_weights, .9999),
+        window_max_1s_median_ms=s.resample('1s').max().median(),
     )
 
 
@@ -356,14 +683,20 @@ def _throughput(s):
     )
 
 
-def _wrangle_recorder_data(bench: BenchmarkDirectory,
+def wrangle_recorder_data(bench: BenchmarkDirectory,
                            filenames: Iterable[str],
                            drop_prefix: datetime.timedelta,
-                           save_data: bool = True) -> pd.DataFrame:
+                           save_data: bool = True,
+                           label_files: bool = False) -> pd.DataFrame:
+    # If `label_files` is true, every row is labelled with the index of its
+    # file in column `recorder_file`.
     bench.log('Reading recorder data from the following CSVs:')
     for filename in filenames:
         bench.log(f'- {filename}')
-    df = pd_util.read_csvs(filenames, parse_dates=['start', 'stop'])
+    index_column = 'recorder_file' if label_files else None
+    df = pd_util.read_csvs(filenames,
+                           index_column=index_column,
+                           parse_dates=['start', 'stop'])
     bench.log('Recorder data read.')
 
     bench.log('Setting aggregate recorder data index.')
@@ -405,30 +738,63 @@ def _wrangle_recorder_data(bench: BenchmarkDirectory,
 
 
 # parse_recorder_data parses and summarizes data written by a
-# frankenpaxos.BenchmarkUtil.Recorder.
+# frankenpaxos.BenchmarkUtil.Recorder. If `correct_coordinated_omission` is
+# true, latencies are corrected for coordinated omission (see
+# _corrected_latency).
 #
 # TODO(mwhittaker): Drop the first couple of seconds from the data since it
 # takes a while for the JVM to fully ramp up.
 def parse_recorder_data(bench: BenchmarkDirectory,
                         filenames: Iterable[str],
                         drop_prefix: datetime.timedelta,
-                        save_data: bool = True) -> RecorderOutput:
-    df = _wrangle_recorder_data(bench, filenames, drop_prefix, save_data)
+                        save_data: bool = True,
+                        correct_coordinated_omission: bool = False) \
+                        -> RecorderOutput:
+    df = wrangle_recorder_data(bench, filenames, drop_prefix, save_data,
+                               label_files=correct_coordinated_omission)
+    return recorder_output(df, correct_coordinated_omission)
+
+
+# recorder_output summarizes recorder data returned by wrangle_recorder_data.
+# Suites that need the recorder data for more than the summary (e.g., see
+# recovery.py) call wrangle_recorder_data and recorder_output themselves.
+def recorder_output(df: pd.DataFrame,
+                    correct_coordinated_omission: bool = False) \
+                    -> RecorderOutput:
     return RecorderOutput(
-        latency=_latency(df['latency_nanos'] / 1e6),
+        latency=(_corrected_latency(df) if correct_coordinated_omission else
+                 _latency(df['latency_nanos'] / 1e6)),
         start_throughput_1s=_throughput(pd_util.throughput(df.index, 1000)),
     )
 
 
 # parse_labeled_recorder_data parses and summarizes data written by a
 # frankenpaxos.BenchmarkUtil.LabeledRecorder. Every label gets its own set of
-# outputs.
+# outputs. See parse_recorder_data for `correct_coordinated_omission`.
 def parse_labeled_recorder_data(bench: BenchmarkDirectory,
                                 filenames: Iterable[str],
                                 drop_prefix: datetime.timedelta,
-                                save_data: bool = True) \
+                                save_data: bool = True,
+                                correct_coordinated_omission: bool = False) \
                                 -> Dict[str, RecorderOutput]:
-    df = _wrangle_recorder_data(bench, filenames, drop_prefix, save_data)
+    df = wrangle_recorder_data(bench, filenames, drop_prefix, save_data,
+                               label_files=correct_coordinated_omission)
+    return labeled_recorder_outputs(bench, df, correct_coordinated_omission)
+
+
+# labeled_recorder_outputs summarizes labeled recorder data returned by
+# wrangle_recorder_data. See recorder_output.
+def labeled_recorder_outputs(bench: BenchmarkDirectory,
+                             df: pd.DataFrame,
+                             correct_coordinated_omission: bool = False) \
+                             -> Dict[str, RecorderOutput]:
+    if correct_coordinated_omission and _grouped(df):
+        bench.log('Measurements are grouped (i.e. measurement_group_size > '
+                  '1), so latencies are not corrected for coordinated '
+                  'omission.')
+        correct_coordinated_omission = False
+    intervals = (_expected_intervals(df)
+                 if correct_coordinated_omission else None)
 
     # Record output for each label.
     outputs = dict()
@@ -437,7 +803,9 @@ def parse_labeled_recorder_data(bench: BenchmarkDirectory,
         ldf = df[df['label'] == label]
 
         bench.log(f'- Computing latency.')
-        latency = _latency(ldf['latency_nanos'] / 1e6)
+        latency = (_corrected_latency(ldf, intervals=intervals)
+                   if correct_coordinated_omission
+                   else _latency(ldf['latency_nanos'] / 1e6))
         bench.log(f'- Latency computed.')
 
         bench.log(f'- Computing 1 second start throughput.')
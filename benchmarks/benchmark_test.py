@@ -0,0 +1,100 @@
+from . import benchmark
+import os
+import pandas as pd
+import tempfile
+import unittest
+
+
+def _recorder_data(latencies_ms,
+                   interval_ms,
+                   pseudonym: int = 0,
+                   offset_ms: float = 0) -> pd.DataFrame:
+    # A closed loop client that sends a request every `interval_ms`, unless
+    # the previous request took longer.
+    starts = []
+    t = pd.Timestamp('2020-01-01') + pd.Timedelta(milliseconds=offset_ms)
+    for latency_ms in latencies_ms:
+        starts.append(t)
+        t += pd.Timedelta(milliseconds=max(latency_ms, interval_ms))
+    return pd.DataFrame({
+        'start': starts,
+        'latency_nanos': [l * 1e6 for l in latencies_ms],
+        'host': '127.0.0.1',
+        'port': 10000,
+        'pseudonym': pseudonym,
+    }).set_index('start')
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_latency(self) -> None:
+        df = _recorder_data([1] * 1999 + [1000], interval_ms=1)
+        latency = benchmark._latency(df['latency_nanos'] / 1e6)
+        self.assertEqual(latency.max_ms, 1000)
+        self.assertEqual(latency.p99_ms, 1)
+        # The first 1 second window has a max latency of 1 ms, and the second
+        # has a max latency of 1000 ms.
+        self.assertEqual(latency.window_max_1s_median_ms, 500.5)
+
+    def test_corrected_latency_without_stalls(self) -> None:
+        df = _recorder_data([1] * 1000, interval_ms=1)
+        latency = benchmark._corrected_latency(df)
+        self.assertEqual(latency.p99_ms, 1)
+        self.assertEqual(latency.max_ms, 1)
+
+    def test_corrected_latency(self) -> None:
+        # While the client waits 1 second for one request, it doesn't send the
+        # 999 requests it should have, which would have taken between 1 and
+        # 999 ms.
+        df = _recorder_data([1] * 1000 + [1000], interval_ms=1)
+        uncorrected = benchmark._latency(df['latency_nanos'] / 1e6)
+        corrected = benchmark._corrected_latency(df)
+        self.assertEqual(uncorrected.p99_ms, 1)
+        self.assertEqual(corrected.max_ms, 1000)
+        self.assertGreater(corrected.p90_ms, 100)
+        self.assertGreater(corrected.p99_ms, 900)
+        self.assertAlmostEqual(corrected.median_ms, 1, delta=20)
+
+    def test_corrected_latency_with_many_pseudonyms(self) -> None:
+        # 100 pseudonyms of one client process each send a request every 10
+        # ms. Together, they send a request every 0.1 ms, but no pseudonym
+        # stalls, so nothing is corrected.
+        df = pd.concat([
+            _recorder_data([10] * 100, interval_ms=10, pseudonym=p,
+                           offset_ms=p / 10) for p in range(100)
+        ]).sort_index()
+        latency = benchmark._corrected_latency(df)
+        self.assertEqual(latency.median_ms, 10)
+        self.assertEqual(latency.min_ms, 10)
+        self.assertEqual(latency.max_ms, 10)
+
+        # Without pseudonyms, the client process looks like a single client
+        # that sends a request every 0.1 ms and stalls on every request.
+        latency = benchmark._corrected_latency(df.drop(columns='pseudonym'))
+        self.assertLess(latency.median_ms, 10)
+
+        # One pseudonym stalls for 1 second, missing 99 requests.
+        stalled = _recorder_data([10] * 100 + [1000], interval_ms=10,
+                                 pseudonym=100)
+        latency = benchmark._corrected_latency(pd.concat([df, stalled]))
+        self.assertEqual(latency.max_ms, 1000)
+        self.assertEqual(latency.min_ms, 10)
+        self.assertGreater(latency.p999_ms, 500)
+        self.assertEqual(latency.median_ms, 10)
+
+    def test_grouped_latency_is_not_corrected(self) -> None:
+        # Groups of 10 requests mix pseudonyms (see LabeledRecorder), so they
+        # aren't corrected, even though one of them stalls.
+        df = _recorder_data([1] * 100 + [1000], interval_ms=1, pseudonym=-1)
+        df['count'] = 10
+        df['label'] = 'write'
+        with tempfile.TemporaryDirectory() as dir:
+            with benchmark.BenchmarkDirectory(os.path.join(dir,
+                                                           'bench')) as bench:
+                outputs = benchmark.labeled_recorder_outputs(
+                    bench, df, correct_coordinated_omission=True)
+        uncorrected = benchmark._latency(df['latency_nanos'] / 1e6)
+        self.assertEqual(outputs['write'].latency, uncorrected)
+
+
+if __name__ == '__main__':
+    unittest.main()
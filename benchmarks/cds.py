@@ -0,0 +1,142 @@
+# This file contains utilities to share class data between JVMs.
+#
+# Every role of every protocol is launched from the same FrankenPaxos JAR, and
+# every JVM loads, parses, and verifies the same classes when it starts.
+# Application Class Data Sharing (AppCDS) lets JVMs memory map these classes
+# from a pre-built archive instead. We build one archive per JAR checksum (so
+# that rebuilding the JAR invalidates it) and store it next to the JAR in a
+# cds/ directory. Like the JAR itself, we assume that this directory is
+# accessible from every host and that every host runs the same JVM.
+#
+# AppCDS requires Java 10 or later. With an older JVM, java_flags returns no
+# flags. Pass --class_data_sharing to a benchmark script to enable AppCDS.
+
+from typing import Any, Dict, List, Optional, Tuple
+import functools
+import hashlib
+import os
+import re
+import subprocess
+import zipfile
+
+
+@functools.lru_cache()
+def java_major_version(java: str = 'java') -> Optional[int]:
+    """
+    java_major_version returns the major version of `java` (e.g., 8 for
+    1.8.0_252 or 11 for 11.0.2), or None if it can't be determined.
+    """
+    try:
+        output = subprocess.run([java, '-version'],
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT,
+                                universal_newlines=True).stdout
+    except OSError:
+        return None
+    m = re.search(r'version "(\d+)(?:\.(\d+))?', output)
+    if m is None:
+        return None
+    major = int(m.group(1))
+    if major == 1 and m.group(2) is not None:
+        return int(m.group(2))
+    return major
+
+
+def jar_checksum(jar: str) -> str:
+    h = hashlib.sha256()
+    with open(jar, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def class_list(jar: str) -> List[str]:
+    """
+    class_list returns the classes in `jar` in the format of a CDS class list
+    (e.g., frankenpaxos/multipaxos/Acceptor).
+    """
+    with zipfile.ZipFile(jar) as z:
+        return [
+            name[:-len('.class')]
+            for name in z.namelist()
+            if name.endswith('.class') and not name.startswith('META-INF/')
+            and not name.endswith('module-info.class')
+        ]
+
+
+def _version_flags(major: int) -> List[str]:
+    # In Java 10, AppCDS has to be enabled explicitly.
+    return ['-XX:+UseAppCDS'] if major == 10 else []
+
+
+def build_archive(jar: str, java: str = 'java') -> Optional[str]:
+    """
+    build_archive builds the CDS archive of `jar`, if it doesn't already
+    exist, and returns its path. If AppCDS isn't supported or the archive
+    can't be built, build_archive returns None.
+    """
+    major = java_major_version(java)
+    if major is None or major < 10:
+        print(f'AppCDS requires Java 10 or later, but {java} is version '
+              f'{major}. Class data sharing is disabled.')
+        return None
+
+    directory = os.path.join(os.path.dirname(jar), 'cds')
+    os.makedirs(directory, exist_ok=True)
+    checksum = jar_checksum(jar)[:16]
+    archive = os.path.join(directory, f'{checksum}.jsa')
+    if os.path.exists(archive):
+        return archive
+
+    classlist = os.path.join(directory, f'{checksum}.classlist')
+    with open(classlist, 'w') as f:
+        f.write('\n'.join(class_list(jar)) + '\n')
+
+    # We dump to a temporary file and rename it, so that a partially written
+    # archive is never used.
+    tmp_archive = f'{archive}.{os.getpid()}.tmp'
+    log = os.path.join(directory, f'{checksum}_dump.txt')
+    print(f'Building class data sharing archive {archive}.')
+    with open(log, 'w') as f:
+        subprocess.run([java, '-Xshare:dump'] + _version_flags(major) + [
+            f'-XX:SharedClassListFile={classlist}',
+            f'-XX:SharedArchiveFile={tmp_archive}',
+            '-cp',
+            jar,
+        ],
+                       stdout=f,
+                       stderr=subprocess.STDOUT)
+    if not os.path.exists(tmp_archive):
+        print(f'Failed to build class data sharing archive. See {log}.')
+        return None
+    os.rename(tmp_archive, archive)
+    return archive
+
+
+# Archives (or None if AppCDS is unavailable) indexed by the path,
+# modification time, and size of a JAR.
+_archives: Dict[Tuple[str, float, int], Optional[str]] = dict()
+
+
+def java_flags(args: Dict[str, Any]) -> List[str]:
+    """
+    java_flags returns the JVM flags that enable class data sharing for the
+    JAR in `args`, building the archive if needed. If --class_data_sharing
+    isn't set, java_flags returns no flags.
+    """
+    if not args.get('class_data_sharing'):
+        return []
+
+    jar = os.path.abspath(args['jar'])
+    stat = os.stat(jar)
+    key = (jar, stat.st_mtime, stat.st_size)
+    if key not in _archives:
+        _archives[key] = build_archive(jar)
+    archive = _archives[key]
+    if archive is None:
+        return []
+
+    major = java_major_version()
+    assert major is not None
+    return (['-Xshare:auto'] + _version_flags(major) +
+            [f'-XX:SharedArchiveFile={archive}'])
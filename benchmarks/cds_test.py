@@ -0,0 +1,39 @@
+from . import cds
+import os
+import tempfile
+import unittest
+import zipfile
+
+
+class CdsTest(unittest.TestCase):
+    def test_class_list(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            jar = os.path.join(d, 'test.jar')
+            with zipfile.ZipFile(jar, 'w') as z:
+                z.writestr('META-INF/MANIFEST.MF', '')
+                z.writestr('META-INF/versions/9/module-info.class', '')
+                z.writestr('frankenpaxos/multipaxos/Acceptor.class', '')
+                z.writestr('frankenpaxos/multipaxos/Acceptor$.class', '')
+                z.writestr('frankenpaxos/multipaxos/config.proto', '')
+            self.assertEqual(cds.class_list(jar), [
+                'frankenpaxos/multipaxos/Acceptor',
+                'frankenpaxos/multipaxos/Acceptor$',
+            ])
+
+    def test_jar_checksum(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            a = os.path.join(d, 'a.jar')
+            b = os.path.join(d, 'b.jar')
+            with open(a, 'wb') as f:
+                f.write(b'foo')
+            with open(b, 'wb') as f:
+                f.write(b'bar')
+            self.assertEqual(cds.jar_checksum(a), cds.jar_checksum(a))
+            self.assertNotEqual(cds.jar_checksum(a), cds.jar_checksum(b))
+
+    def test_disabled(self) -> None:
+        self.assertEqual(cds.java_flags({'jar': 'does_not_exist.jar'}), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+# This file contains a generator of random fault schedules for benchmark
+# drivers (see matchmakermultipaxos/driver_workload.py and
+# horizontal/driver_workload.py).
+#
+# driver_workload.Chaos fails one leader, one acceptor, and one matchmaker at
+# hand-picked times. random_schedule instead draws a sequence of events
+# (leader changes, reconfigurations, and failures) from a seeded random number
+# generator, so that a suite can sweep seeds and measure throughput across
+# many failure patterns. The same seed always produces the same schedule.
+#
+# Events arrive as a Poisson process with mean period `mean_period_ms`, but
+# never less than `min_period_ms` apart, and at most `max_failures` events
+# are failures. Every failure is followed, `recover_delay_ms` later, by a
+# recovery (e.g., a reconfiguration away from a failed acceptor), and the
+# next event comes after the recovery. The schedule keeps track of which
+# nodes are alive and only draws events that leave the protocol able to make
+# progress. For example, an acceptor only fails if there are 2f + 1 other
+# live acceptors to reconfigure to.
+#
+# Network partitions aren't drawn here since the drivers can't partition the
+# network.
+
+from typing import Dict, List, NamedTuple, Set
+import random
+
+
+# Event kinds.
+BECOME_LEADER = 'become_leader'
+RECONFIGURE = 'reconfigure'
+MATCHMAKER_RECONFIGURE = 'matchmaker_reconfigure'
+KILL_LEADER = 'kill_leader'
+KILL_ACCEPTOR = 'kill_acceptor'
+KILL_MATCHMAKER = 'kill_matchmaker'
+
+# The kinds that random_schedule draws, along with their recoveries.
+LEADER_CHANGE = 'leader_change'
+RECONFIGURATION = 'reconfiguration'
+MATCHMAKER_RECONFIGURATION = 'matchmaker_reconfiguration'
+LEADER_FAILURE = 'leader_failure'
+ACCEPTOR_FAILURE = 'acceptor_failure'
+MATCHMAKER_FAILURE = 'matchmaker_failure'
+
+_FAILURES = {LEADER_FAILURE, ACCEPTOR_FAILURE, MATCHMAKER_FAILURE}
+
+
+class ChaosEvent(NamedTuple):
+    delay_ms: int
+    # One of the event kinds above.
+    kind: str
+    # The leader, acceptor, matchmaker, or reconfigurer that the event is sent
+    # to.
+    index: int
+    # The new configuration of a reconfiguration.
+    members: List[int] = []
+
+
+class _Cluster:
+    def __init__(self, f: int, num_leaders: int, num_acceptors: int,
+                 num_matchmakers: int) -> None:
+        self.f = f
+        self.leaders = set(range(num_leaders))
+        self.leader = 0
+        self.acceptors = set(range(num_acceptors))
+        self.acceptor_config = set(range(2 * f + 1))
+        self.matchmakers = set(range(num_matchmakers))
+        self.matchmaker_config = set(range(2 * f + 1))
+
+    def possible(self, kind: str) -> bool:
+        n = 2 * self.f + 1
+        if kind == LEADER_CHANGE:
+            return len(self.leaders) >= 2
+        elif kind == RECONFIGURATION:
+            return len(self.acceptors) >= n
+        elif kind == MATCHMAKER_RECONFIGURATION:
+            return len(self.matchmakers) >= n
+        elif kind == LEADER_FAILURE:
+            return len(self.leaders) >= 2
+        elif kind == ACCEPTOR_FAILURE:
+            return len(self.acceptors) >= n + 1
+        elif kind == MATCHMAKER_FAILURE:
+            return len(self.matchmakers) >= n + 1
+        else:
+            raise ValueError(f'Unknown chaos event kind {kind}.')
+
+
+def random_schedule(seed: int,
+                    f: int,
+                    num_leaders: int,
+                    num_acceptors: int,
+                    num_matchmakers: int,
+                    weights: Dict[str, float],
+                    delay_ms: int,
+                    duration_ms: int,
+                    mean_period_ms: int,
+                    min_period_ms: int,
+                    max_failures: int,
+                    recover_delay_ms: int) -> List[ChaosEvent]:
+    """
+    random_schedule returns a random schedule of events between `delay_ms`
+    and `delay_ms + duration_ms`. `weights` maps the kinds of events to draw
+    (e.g., LEADER_CHANGE or ACCEPTOR_FAILURE) to their relative likelihood.
+    """
+    rng = random.Random(seed)
+    cluster = _Cluster(f, num_leaders, num_acceptors, num_matchmakers)
+    n = 2 * f + 1
+    events: List[ChaosEvent] = []
+    num_failures = 0
+    t = float(delay_ms)
+
+    def new_leader() -> int:
+        leader = rng.choice(sorted(cluster.leaders - {cluster.leader}))
+        cluster.leader = leader
+        return leader
+
+    def new_config(alive: Set[int]) -> List[int]:
+        return sorted(rng.sample(sorted(alive), n))
+
+    while True:
+        t += max(min_period_ms, rng.expovariate(1 / mean_period_ms))
+        if t >= delay_ms + duration_ms:
+            break
+
+        kinds = [
+            k for (k, w) in sorted(weights.items())
+            if w > 0 and cluster.possible(k) and
+            (k not in _FAILURES or num_failures < max_failures)
+        ]
+        if len(kinds) == 0:
+            break
+        kind = rng.choices(kinds, [weights[k] for k in kinds])[0]
+        ms = int(t)
+        recover_ms = ms + recover_delay_ms
+
+        if kind == LEADER_CHANGE:
+            events.append(ChaosEvent(ms, BECOME_LEADER, new_leader()))
+        elif kind == RECONFIGURATION:
+            config = new_config(cluster.acceptors)
+            cluster.acceptor_config = set(config)
+            events.append(ChaosEvent(ms, RECONFIGURE, cluster.leader, config))
+        elif kind == MATCHMAKER_RECONFIGURATION:
+            config = new_config(cluster.matchmakers)
+            cluster.matchmaker_config = set(config)
+            events.append(ChaosEvent(ms, MATCHMAKER_RECONFIGURE, 0, config))
+        elif kind == LEADER_FAILURE:
+            events.append(ChaosEvent(ms, KILL_LEADER, cluster.leader))
+            cluster.leaders.remove(cluster.leader)
+            # With more than two leaders, we don't know which one wins the
+            # election, so we pick one.
+            events.append(ChaosEvent(recover_ms, BECOME_LEADER, new_leader()))
+        elif kind == ACCEPTOR_FAILURE:
+            acceptor = rng.choice(sorted(cluster.acceptor_config))
+            events.append(ChaosEvent(ms, KILL_ACCEPTOR, acceptor))
+            cluster.acceptors.remove(acceptor)
+            config = new_config(cluster.acceptors)
+            cluster.acceptor_config = set(config)
+            events.append(
+                ChaosEvent(recover_ms, RECONFIGURE, cluster.leader, config))
+        elif kind == MATCHMAKER_FAILURE:
+            matchmaker = rng.choice(sorted(cluster.matchmaker_config))
+            events.append(ChaosEvent(ms, KILL_MATCHMAKER, matchmaker))
+            cluster.matchmakers.remove(matchmaker)
+            config = new_config(cluster.matchmakers)
+            cluster.matchmaker_config = set(config)
+            events.append(
+                ChaosEvent(recover_ms, MATCHMAKER_RECONFIGURE, 0, config))
+
+        if kind in _FAILURES:
+            num_failures += 1
+            t = recover_ms
+
+    return events
+
+
+def event_to_proto(event: ChaosEvent) -> Dict:
+    """
+    event_to_proto returns the ChaosEventProto of `event`.
+    """
+    if event.kind in [RECONFIGURE, MATCHMAKER_RECONFIGURE]:
+        return {
+            'delay_ms': event.delay_ms,
+            event.kind: {
+                'index': event.index,
+                'member': event.members,
+            },
+        }
+    return {'delay_ms': event.delay_ms, event.kind: event.index}
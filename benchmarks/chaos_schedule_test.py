@@ -0,0 +1,92 @@
+from . import chaos_schedule
+from . import proto_util
+import unittest
+
+
+def _schedule(seed: int, max_failures: int = 3):
+    return chaos_schedule.random_schedule(
+        seed=seed,
+        f=1,
+        num_leaders=2,
+        num_acceptors=6,
+        num_matchmakers=6,
+        weights={
+            chaos_schedule.LEADER_CHANGE: 1,
+            chaos_schedule.RECONFIGURATION: 1,
+            chaos_schedule.MATCHMAKER_RECONFIGURATION: 1,
+            chaos_schedule.LEADER_FAILURE: 1,
+            chaos_schedule.ACCEPTOR_FAILURE: 1,
+            chaos_schedule.MATCHMAKER_FAILURE: 1,
+        },
+        delay_ms=10000,
+        duration_ms=60000,
+        mean_period_ms=2000,
+        min_period_ms=500,
+        max_failures=max_failures,
+        recover_delay_ms=1000)
+
+
+class ChaosScheduleTest(unittest.TestCase):
+    def test_deterministic(self) -> None:
+        self.assertEqual(_schedule(0), _schedule(0))
+        self.assertNotEqual(_schedule(0), _schedule(1))
+
+    def test_schedules_are_safe(self) -> None:
+        kills = [
+            chaos_schedule.KILL_LEADER, chaos_schedule.KILL_ACCEPTOR,
+            chaos_schedule.KILL_MATCHMAKER
+        ]
+        for seed in range(100):
+            events = _schedule(seed)
+            delays = [e.delay_ms for e in events]
+            self.assertEqual(delays, sorted(delays))
+            self.assertGreaterEqual(delays[0], 10000)
+            self.assertLessEqual(len([e for e in events if e.kind in kills]),
+                                 3)
+
+            dead = {kind: set() for kind in kills}
+            for e in events:
+                if e.kind in kills:
+                    dead[e.kind].add(e.index)
+                elif e.kind == chaos_schedule.BECOME_LEADER:
+                    self.assertNotIn(e.index,
+                                     dead[chaos_schedule.KILL_LEADER])
+                elif e.kind == chaos_schedule.RECONFIGURE:
+                    self.assertEqual(len(e.members), 3)
+                    self.assertNotIn(e.index,
+                                     dead[chaos_schedule.KILL_LEADER])
+                    self.assertFalse(
+                        set(e.members) & dead[chaos_schedule.KILL_ACCEPTOR])
+                elif e.kind == chaos_schedule.MATCHMAKER_RECONFIGURE:
+                    self.assertEqual(len(e.members), 3)
+                    self.assertFalse(
+                        set(e.members) & dead[chaos_schedule.KILL_MATCHMAKER])
+            # One of the two leaders is always alive.
+            self.assertLessEqual(len(dead[chaos_schedule.KILL_LEADER]), 1)
+
+    def test_no_failures(self) -> None:
+        for e in _schedule(0, max_failures=0):
+            self.assertIn(e.kind, [
+                chaos_schedule.BECOME_LEADER, chaos_schedule.RECONFIGURE,
+                chaos_schedule.MATCHMAKER_RECONFIGURE
+            ])
+
+    def test_event_to_proto(self) -> None:
+        kill = chaos_schedule.ChaosEvent(100, chaos_schedule.KILL_LEADER, 1)
+        self.assertEqual(
+            proto_util.message_to_pbtext(chaos_schedule.event_to_proto(kill)),
+            'delay_ms: 100\nkill_leader: 1')
+        reconfigure = chaos_schedule.ChaosEvent(200,
+                                                chaos_schedule.RECONFIGURE, 0,
+                                                [1, 2, 3])
+        self.assertEqual(chaos_schedule.event_to_proto(reconfigure), {
+            'delay_ms': 200,
+            'reconfigure': {
+                'index': 0,
+                'member': [1, 2, 3]
+            },
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,5 @@
 from . import host
-from typing import Any, Callable, Dict, List
+from typing import Any, Callable, Dict, List, Set
 import json
 
 
@@ -15,10 +15,15 @@ class _RemoteHostCache:
     def connect(self, address: str) -> host.Host:
         if address in self._hosts:
             return self._hosts[address]
+        elif address.startswith(host.NamespaceHost.ADDRESS_PREFIX):
+            # Namespace hosts are local, so we don't connect to them.
+            h = host.NamespaceHost.from_address(address)
+            self._hosts[address] = h
+            return h
         else:
-            host = self._connect(address)
-            self._hosts[address] = host
-            return host
+            h = self._connect(address)
+            self._hosts[address] = h
+            return h
 
 
 # Say you want to run Paxos. You need a set of acceptors, a set of replicas, a
@@ -41,6 +46,9 @@ class _RemoteHostCache:
 #   }
 #
 # Placement helps us deal with this kind of data.
+#
+# An address of the form "netns:<ip>,..." is not connected to. Instead, it
+# describes a host.NamespaceHost on the local machine.
 class Cluster:
     @staticmethod
     def _sanitize_json(data: Dict[str, Any]) -> Dict[int, Dict[str, List[str]]]:
@@ -91,6 +99,16 @@ class Cluster:
         self._cache = _RemoteHostCache(connect)
         self._cluster = cluster
 
+    def addresses(self) -> Set[str]:
+        return {
+            a for cluster in self._cluster.values()
+            for addresses in cluster.values() for a in addresses
+        }
+
+    def hosts(self) -> List[host.Host]:
+        """hosts returns the host of every distinct address, in order."""
+        return [self._cache.connect(a) for a in sorted(self.addresses())]
+
     def f(self, x: int) -> Dict[str, List[host.Host]]:
         return {
             role: [self._cache.connect(a) for a in addresses
@@ -74,6 +74,30 @@ class ClusterTest(unittest.TestCase):
     def test_bad_address(self):
         self.assertRaises(ValueError, self._test_bad_address)
 
+    def test_namespace_addresses(self):
+        json = """
+        {
+            "1": {
+                "leaders": ["netns:10.77.0.2,cpus=0-3,memory=1G,cpu_quota=2",
+                            "l0"]
+            }
+        }
+        """
+        c = cluster.Cluster.from_json_string(json, lambda a: host.FakeHost(a))
+        [ns, fake] = c.f(1)['leaders']
+        self.assertIsInstance(ns, host.NamespaceHost)
+        self.assertEqual(ns.ip(), '10.77.0.2')
+        self.assertEqual(ns.cpus, '0-3')
+        self.assertEqual(ns.memory, '1G')
+        self.assertEqual(ns.cpu_quota, 2.0)
+        self.assertEqual(fake, host.FakeHost('l0'))
+
+    def test_bad_namespace_address(self):
+        with self.assertRaises(ValueError):
+            host.NamespaceHost.from_address('netns:127.0.0.1')
+        with self.assertRaises(ValueError):
+            host.NamespaceHost.from_address('netns:10.77.0.2,cores=1')
+
 
 if __name__ == '__main__':
     unittest.main()
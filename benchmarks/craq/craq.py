@@ -1,14 +1,19 @@
+from .. import affinity
 from .. import benchmark
+from .. import cds
 from .. import cluster
 from .. import host
+from .. import load_generator
 from .. import parser_util
 from .. import pd_util
-from .. import perf_util
 from .. import proc
 from .. import prometheus
 from .. import proto_util
 from .. import read_write_workload
+from .. import roles
+from .. import trace
 from .. import util
+from .. import warm_pool
 from typing import Any, Callable, Collection, Dict, List, NamedTuple, Optional
 import argparse
 import csv
@@ -72,6 +77,15 @@ class Input(NamedTuple):
     client_options: ClientOptions
     client_log_level: str
 
+    # Load. ####################################################################
+    # Inputs default to closed loop clients. See load_generator.py.
+    load: load_generator.Load = load_generator.ClosedLoop()
+
+    # Affinity. ################################################################
+    # If positive, every process is pinned to its own cpus_per_proc CPUs,
+    # preferably on a single NUMA node. See affinity.py.
+    cpus_per_proc: int = 0
+
 
 class CraqOutput(NamedTuple):
     read_output: benchmark.RecorderOutput
@@ -125,6 +139,8 @@ class CraqSuite(benchmark.Suite[Input, Output]):
         super().__init__()
         self._cluster = cluster.Cluster.from_json_file(self.args()['cluster'],
                                                        self._connect)
+        self._pool = (warm_pool.WarmPool()
+                      if self.args().get('warm_jvm_pool') else None)
 
     def _connect(self, address: str) -> host.Host:
         client = paramiko.SSHClient()
@@ -139,18 +155,14 @@ class CraqSuite(benchmark.Suite[Input, Output]):
                       bench: benchmark.BenchmarkDirectory,
                       args: Dict[Any, Any],
                       input: Input) -> Output:
-        def java(heap_size: str) -> List[str]:
-            cmd = ['java', f'-Xms{heap_size}', f'-Xmx{heap_size}']
-            if input.monitored:
-                cmd += [
-                    '-verbose:gc',
-                    '-XX:-PrintGC',
-                    '-XX:+PrintHeapAtGC',
-                    '-XX:+PrintGCDetails',
-                    '-XX:+PrintGCTimeStamps',
-                    '-XX:+PrintGCDateStamps',
-                ]
-            return cmd
+        launcher = roles.Launcher(
+            bench,
+            jar=args['jar'],
+            monitored=input.monitored,
+            profiled=input.profiled,
+            allocator=affinity.AffinityAllocator(bench, input.cpus_per_proc),
+            pool=self._pool,
+            jvm_flags=cds.java_flags(args))
 
         # Write config file.
         net = CraqNet(self._cluster, input)
@@ -160,47 +172,77 @@ class CraqSuite(benchmark.Suite[Input, Output]):
                            proto_util.message_to_pbtext(config))
         bench.log('Config file config.pbtxt written.')
 
-        # Launch chain_nodes.
-        chain_node_procs: List[proc.Proc] = []
-        for (i, chain_node) in enumerate(net.placement().chain_nodes):
-            p = bench.popen(
-                host=chain_node.host,
-                label=f'chain_node_{i}',
-                cmd=java(input.chain_node_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.craq.ChainNodeMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.chain_node_log_level,
-                    '--prometheus_host',
-                    chain_node.host.ip(),
-                    '--prometheus_port',
-                    str(chain_node.port + 1) if input.monitored else '-1',
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, chain_node.host, p,
-                                           f'chain_node_{i}')
-            chain_node_procs.append(p)
+        # Write workload files.
+        workload_filenames = trace.write_client_workloads(
+            bench, 'workload', input.workload, input.num_client_procs)
+        load_filename = load_generator.write_client_load(
+            bench, input.load, input.num_client_procs)
+
+        # Describe roles.
+        chain_node_role = roles.Role(
+            name='chain_node',
+            main_class='frankenpaxos.craq.ChainNodeMain',
+            heap_size=input.chain_node_jvm_heap_size,
+            procs=roles.indexed('chain_node', net.placement().chain_nodes),
+            flags=[
+                '--config', config_filename,
+                '--log_level', input.chain_node_log_level,
+            ],
+        )
+
+        client_role = roles.Role(
+            name='client',
+            main_class='frankenpaxos.craq.ClientMain',
+            heap_size=input.client_jvm_heap_size,
+            procs=[
+                roles.RoleProc(
+                    label=f'client_{i}',
+                    endpoint=client,
+                    flags=[
+                        '--host', client.host.ip(),
+                        '--port', str(client.port),
+                        '--output_file_prefix', bench.abspath(f'client_{i}'),
+                        '--workload', f'{workload_filenames[i]}',
+                    ])
+                for (i, client) in enumerate(net.placement().clients)
+            ],
+            flags=[
+                '--config',
+                config_filename,
+                '--log_level',
+                input.client_log_level,
+                '--measurement_group_size',
+                f'{input.measurement_group_size}',
+                '--warmup_duration',
+                f'{input.warmup_duration.total_seconds()}s',
+                '--warmup_timeout',
+                f'{input.warmup_timeout.total_seconds()}s',
+                '--warmup_sleep',
+                f'{input.warmup_sleep.total_seconds()}s',
+                '--num_warmup_clients',
+                f'{input.num_warmup_clients_per_proc}',
+                '--duration',
+                f'{input.duration.total_seconds()}s',
+                '--timeout',
+                f'{input.timeout.total_seconds()}s',
+                '--num_clients',
+                f'{input.num_clients_per_proc}',
+                '--load',
+                f'{load_filename}',
+            ] + roles.options_flags(input.client_options),
+            # Clients exit when they finish, so they can't be reused.
+            poolable=False,
+        )
+
+        # Launch chain nodes.
+        launcher.launch([chain_node_role])
         bench.log('ChainNodes started.')
 
         # Launch Prometheus.
         if input.monitored:
             prometheus_config = prometheus.prometheus_config(
-                int(input.prometheus_scrape_interval.total_seconds() * 1000), {
-                    'craq_client': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().clients
-                    ],
-                    'craq_chain_node': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().chain_nodes
-                    ],
-                })
+                int(input.prometheus_scrape_interval.total_seconds() * 1000),
+                roles.prometheus_jobs('craq', [client_role, chain_node_role]))
             bench.write_string('prometheus.yml', yaml.dump(prometheus_config))
             prometheus_server = bench.popen(
                 host=net.placement().clients[0].host,
@@ -218,75 +260,13 @@ class CraqSuite(benchmark.Suite[Input, Output]):
         bench.log('Client lag ended.')
 
         # Launch clients.
-        workload_filename = bench.abspath('workload.pbtxt')
-        bench.write_string(
-            workload_filename,
-            proto_util.message_to_pbtext(input.workload.to_proto()))
-
-        client_procs: List[proc.Proc] = []
-        for (i, client) in enumerate(net.placement().clients):
-            p = bench.popen(
-                host=client.host,
-                label=f'client_{i}',
-                cmd=java(input.client_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.craq.ClientMain',
-                    '--host',
-                    client.host.ip(),
-                    '--port',
-                    str(client.port),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.client_log_level,
-                    '--prometheus_host',
-                    client.host.ip(),
-                    '--prometheus_port',
-                    str(client.port + 1) if input.monitored else '-1',
-                    '--measurement_group_size',
-                    f'{input.measurement_group_size}',
-                    '--warmup_duration',
-                    f'{input.warmup_duration.total_seconds()}s',
-                    '--warmup_timeout',
-                    f'{input.warmup_timeout.total_seconds()}s',
-                    '--warmup_sleep',
-                    f'{input.warmup_sleep.total_seconds()}s',
-                    '--num_warmup_clients',
-                    f'{input.num_warmup_clients_per_proc}',
-                    '--duration',
-                    f'{input.duration.total_seconds()}s',
-                    '--timeout',
-                    f'{input.timeout.total_seconds()}s',
-                    '--num_clients',
-                    f'{input.num_clients_per_proc}',
-                    '--output_file_prefix',
-                    bench.abspath(f'client_{i}'),
-                    '--workload',
-                    f'{workload_filename}',
-                    '--options.resendClientRequestPeriod',
-                    '{}s'.format(input.client_options.
-                                 resend_client_request_period.total_seconds()),
-                    '--options.resendReadRequestPeriod',
-                    '{}s'.format(input.client_options.
-                                 resend_read_request_period.total_seconds()),
-                    '--options.flushWritesEveryN',
-                    f'{input.client_options.flush_writes_every_n}',
-                    '--options.flushReadsEveryN',
-                    f'{input.client_options.flush_reads_every_n}',
-                    '--options.batchSize',
-                    f'{input.client_options.batch_size}',
-                ])
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, client.host, p, f'client_{i}')
-            client_procs.append(p)
+        client_procs = launcher.launch([client_role])['client']
         bench.log(f'Clients started and running for {input.duration}.')
 
         # Wait for clients to finish and then terminate leaders and acceptors.
         for p in client_procs:
             p.wait()
-        for p in chain_node_procs:
-            p.kill()
+        launcher.kill(['chain_node'])
         if input.monitored:
             prometheus_server.kill()
         bench.log('Clients finished and processes terminated.')
@@ -305,6 +285,9 @@ class CraqSuite(benchmark.Suite[Input, Output]):
             p90_ms = -1.0,
             p95_ms = -1.0,
             p99_ms = -1.0,
+            p999_ms = -1.0,
+            p9999_ms = -1.0,
+            window_max_1s_median_ms = -1.0,
         )
         dummy_throughput = benchmark.ThroughputOutput(
             mean = -1.0,
@@ -324,7 +307,9 @@ class CraqSuite(benchmark.Suite[Input, Output]):
             bench,
             client_csvs,
             drop_prefix=datetime.timedelta(seconds=0),
-            save_data=False)
+            save_data=False,
+            correct_coordinated_omission=args.get(
+                'correct_coordinated_omission', False))
         read_output = (labeled_data['read']
                        if 'read' in labeled_data
                        else dummy_output)
@@ -0,0 +1,80 @@
+from .craq import *
+
+
+def main(args) -> None:
+    class OpenLoopLtCraqSuite(CraqSuite):
+        def args(self) -> Dict[Any, Any]:
+            return vars(args)
+
+        def inputs(self) -> Collection[Input]:
+            return [
+                Input(
+                    f = 1,
+                    num_client_procs = 2,
+                    num_warmup_clients_per_proc = 10,
+                    # With an open loop load, num_clients_per_proc bounds the
+                    # number of pending requests per client process.
+                    num_clients_per_proc = 100,
+                    num_chain_nodes = 3,
+                    client_jvm_heap_size = '100m',
+                    chain_node_jvm_heap_size = '100m',
+                    measurement_group_size = 1,
+                    warmup_duration = datetime.timedelta(seconds=2),
+                    warmup_timeout = datetime.timedelta(seconds=3),
+                    warmup_sleep = datetime.timedelta(seconds=0),
+                    duration = datetime.timedelta(seconds=10),
+                    timeout = datetime.timedelta(seconds=15),
+                    client_lag = datetime.timedelta(seconds=3),
+                    workload_label = 'open_loop_lt',
+                    workload = read_write_workload.PointSkewedReadWriteWorkload(
+                        num_keys=10, read_fraction=read_fraction,
+                        point_fraction=0.5, write_size_mean=1,
+                        write_size_std=0),
+                    profiled = args.profile,
+                    monitored = args.monitor,
+                    prometheus_scrape_interval =
+                        datetime.timedelta(milliseconds=200),
+                    chain_node_options = ChainNodeOptions(),
+                    chain_node_log_level = args.log_level,
+                    client_options = ClientOptions(
+                        resend_client_request_period = \
+                            datetime.timedelta(seconds=1),
+                        resend_read_request_period = \
+                            datetime.timedelta(seconds=1),
+                        flush_writes_every_n = 1,
+                        flush_reads_every_n = 1,
+                        batch_size = 1,
+                    ),
+                    client_log_level = args.log_level,
+                    load = load,
+                )
+                for read_fraction in [0.0, 0.9]
+                for load in load_generator.open_loop_sweep(
+                    [500, 1000, 2500, 5000, 7500, 10000, 15000, 20000])
+            ]
+
+        def summary(self, input: Input, output: Output) -> str:
+            return str({
+                'f': input.f,
+                'num_chain_nodes': input.num_chain_nodes,
+                'target_ops_per_second': input.load.target_ops_per_second,
+                'workload': input.workload,
+                'write.latency.median_ms': \
+                    f'{output.write_output.latency.median_ms:.6}',
+                'write.latency.p99_ms': \
+                    f'{output.write_output.latency.p99_ms:.6}',
+                'write.start_throughput_1s.p90': \
+                    f'{output.write_output.start_throughput_1s.p90:.6}',
+                'read.latency.median_ms': \
+                    f'{output.read_output.latency.median_ms:.6}',
+                'read.start_throughput_1s.p90': \
+                    f'{output.read_output.start_throughput_1s.p90:.6}',
+            })
+
+    suite = OpenLoopLtCraqSuite()
+    with benchmark.SuiteDirectory(args.suite_directory, 'craq_open_loop_lt') as dir:
+        suite.run_suite(dir)
+
+
+if __name__ == '__main__':
+    main(get_parser().parse_args())
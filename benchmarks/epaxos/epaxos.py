@@ -1,10 +1,14 @@
+from .. import affinity
 from .. import benchmark
+from .. import cds
 from .. import cluster
 from .. import host
 from .. import parser_util
 from .. import prometheus
 from .. import proto_util
+from .. import roles
 from .. import util
+from .. import warm_pool
 from .. import workload
 from ..workload import Workload
 from typing import Any, Callable, Collection, Dict, List, NamedTuple, Optional
@@ -81,6 +85,11 @@ class Input(NamedTuple):
     client_options: ClientOptions
     client_log_level: str
 
+    # Affinity. ################################################################
+    # If positive, every process is pinned to its own cpus_per_proc CPUs,
+    # preferably on a single NUMA node. See affinity.py.
+    cpus_per_proc: int = 0
+
 
 Output = benchmark.RecorderOutput
 
@@ -139,6 +148,11 @@ class EPaxosNet:
 
 # Suite ########################################################################
 class EPaxosSuite(benchmark.Suite[Input, Output]):
+    def __init__(self) -> None:
+        super().__init__()
+        self._pool = (warm_pool.WarmPool()
+                      if self.args().get('warm_jvm_pool') else None)
+
     def run_benchmark(self, bench: benchmark.BenchmarkDirectory,
                       args: Dict[Any, Any], input: Input) -> Output:
         net = EPaxosNet(args['cluster'], args['identity_file'], input)
@@ -147,100 +161,92 @@ class EPaxosSuite(benchmark.Suite[Input, Output]):
     def _run_benchmark(self, bench: benchmark.BenchmarkDirectory,
                        args: Dict[Any, Any], input: Input,
                        net: EPaxosNet) -> Output:
+        launcher = roles.Launcher(
+            bench,
+            jar=args['jar'],
+            monitored=input.monitored,
+            profiled=input.profiled,
+            allocator=affinity.AffinityAllocator(bench, input.cpus_per_proc),
+            pool=self._pool,
+            jvm_flags=cds.java_flags(args))
+
         # Write config file.
         config_filename = bench.abspath('config.pbtxt')
         bench.write_string(config_filename,
                            proto_util.message_to_pbtext(net.config()))
         bench.log('Config file config.pbtxt written.')
 
+        # Write workload file.
+        workload_filename = bench.abspath('workload.pbtxt')
+        bench.write_string(
+            workload_filename,
+            proto_util.message_to_pbtext(input.workload.to_proto()))
+
+        # Describe roles. EPaxos processes run with the JVM's default heap
+        # size.
+        replica_role = roles.Role(
+            name='replica',
+            main_class='frankenpaxos.epaxos.ReplicaMain',
+            heap_size=None,
+            procs=roles.indexed('replica', net.placement().replicas),
+            flags=[
+                '--config', config_filename,
+                '--log_level', input.replica_log_level,
+                '--state_machine', input.state_machine,
+            ] + roles.options_flags(input.replica_options) +
+            roles.options_flags(input.replica_zigzag_options, '--zigzag'),
+        )
+
+        client_role = roles.Role(
+            name='client',
+            main_class='frankenpaxos.epaxos.BenchmarkClientMain',
+            heap_size=None,
+            procs=[
+                roles.RoleProc(
+                    label=f'client_{i}',
+                    endpoint=client,
+                    flags=[
+                        '--host', client.host.ip(),
+                        '--port', str(client.port),
+                        '--output_file_prefix', bench.abspath(f'client_{i}'),
+                    ])
+                for (i, client) in enumerate(net.placement().clients)
+            ],
+            flags=[
+                '--config',
+                config_filename,
+                '--log_level',
+                input.client_log_level,
+                '--warmup_duration',
+                f'{input.warmup_duration.total_seconds()}s',
+                '--warmup_timeout',
+                f'{input.warmup_timeout.total_seconds()}s',
+                '--warmup_sleep',
+                f'{input.warmup_sleep.total_seconds()}s',
+                '--num_warmup_clients',
+                f'{input.num_warmup_clients_per_proc}',
+                '--duration',
+                f'{input.duration.total_seconds()}s',
+                '--timeout',
+                f'{input.timeout.total_seconds()}s',
+                '--num_clients',
+                f'{input.num_clients_per_proc}',
+                '--workload',
+                f'{workload_filename}',
+            ] + roles.options_flags(input.client_options),
+            # Clients exit when they finish, so they can't be reused.
+            poolable=False,
+        )
+
         # Launch replicas.
-        replica_procs = []
-        for (i, replica) in enumerate(net.placement().replicas):
-            proc = bench.popen(
-                host=replica.host,
-                label=f'replica_{i}',
-                cmd=[
-                    'java',
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.epaxos.ReplicaMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.replica_log_level,
-                    '--state_machine',
-                    input.state_machine,
-                    '--prometheus_host',
-                    replica.host.ip(),
-                    '--prometheus_port',
-                    str(replica.port + 1) if input.monitored else '-1',
-                    '--options.thriftySystem',
-                    input.replica_options.thrifty_system,
-                    '--options.resendPreAcceptsTimerPeriod',
-                    '{}ms'.format(
-                        input.replica_options.resend_pre_accepts_timer_period.
-                        total_seconds() * 1000),
-                    '--options.defaultToSlowPathTimerPeriod',
-                    '{}ms'.format(
-                        input.replica_options.default_to_slow_path_timer_period.
-                        total_seconds() * 1000),
-                    '--options.resendAcceptsTimerPeriod',
-                    '{}ms'.format(input.replica_options.
-                                  resend_accepts_timer_period.total_seconds() *
-                                  1000),
-                    '--options.resendPreparesTimerPeriod',
-                    '{}ms'.format(input.replica_options.
-                                  resend_prepares_timer_period.total_seconds() *
-                                  1000),
-                    '--options.recoverInstanceTimerMinPeriod',
-                    '{}ms'.format(
-                        input.replica_options.recover_instance_timer_min_period.
-                        total_seconds() * 1000),
-                    '--options.recoverInstanceTimerMaxPeriod',
-                    '{}ms'.format(
-                        input.replica_options.recover_instance_timer_max_period.
-                        total_seconds() * 1000),
-                    '--options.unsafeSkipGraphExecution',
-                    "true" if input.replica_options.unsafe_skip_graph_execution
-                    else "false",
-                    '--options.executeGraphBatchSize',
-                    str(input.replica_options.execute_graph_batch_size),
-                    '--options.executeGraphTimerPeriod',
-                    '{}s'.format(input.replica_options.
-                                 execute_graph_timer_period.total_seconds()),
-                    '--options.numBlockers',
-                    str(input.replica_options.num_blockers),
-                    '--options.topKDependencies',
-                    str(input.replica_options.top_k_dependencies),
-                    '--options.unsafeReturnNoDependencies',
-                    "true"
-                    if input.replica_options.unsafe_return_no_dependencies else
-                    "false",
-                    '--zigzag.verticesGrowSize',
-                    str(input.replica_zigzag_options.vertices_grow_size),
-                    '--zigzag.garbageCollectEveryNCommands',
-                    str(input.replica_zigzag_options.
-                        garbage_collect_every_n_commands),
-                ],
-            )
-            replica_procs.append(proc)
+        launcher.launch([replica_role])
         bench.log('Replicas started.')
 
         # Launch Prometheus.
         if input.monitored:
             prometheus_config = prometheus.prometheus_config(
-                int(input.prometheus_scrape_interval.total_seconds() * 1000), {
-                    'epaxos_replica': [
-                        f'{e.host.ip()}:{e.port + 1}'
-                        for e in net.placement().replicas
-                    ],
-                    'epaxos_client': [
-                        f'{e.host.ip()}:{e.port + 1}'
-                        for e in net.placement().clients
-                    ],
-                })
+                int(input.prometheus_scrape_interval.total_seconds() * 1000),
+                roles.prometheus_jobs('epaxos', [replica_role, client_role]))
             bench.write_string('prometheus.yml', yaml.dump(prometheus_config))
             prometheus_server = bench.popen(
                 host=net.placement().replicas[0].host,
@@ -258,63 +264,13 @@ class EPaxosSuite(benchmark.Suite[Input, Output]):
         bench.log('Client lag ended.')
 
         # Launch clients.
-        workload_filename = bench.abspath('workload.pbtxt')
-        bench.write_string(
-            workload_filename,
-            proto_util.message_to_pbtext(input.workload.to_proto()))
-
-        client_procs = []
-        for (i, client) in enumerate(net.placement().clients):
-            proc = bench.popen(
-                host=client.host,
-                label=f'client_{i}',
-                cmd=[
-                    'java',
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.epaxos.BenchmarkClientMain',
-                    '--host',
-                    client.host.ip(),
-                    '--port',
-                    str(client.port),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.client_log_level,
-                    '--prometheus_host',
-                    client.host.ip(),
-                    '--prometheus_port',
-                    str(client.port + 1) if input.monitored else '-1',
-                    '--warmup_duration',
-                    f'{input.warmup_duration.total_seconds()}s',
-                    '--warmup_timeout',
-                    f'{input.warmup_timeout.total_seconds()}s',
-                    '--warmup_sleep',
-                    f'{input.warmup_sleep.total_seconds()}s',
-                    '--num_warmup_clients',
-                    f'{input.num_warmup_clients_per_proc}',
-                    '--duration',
-                    f'{input.duration.total_seconds()}s',
-                    '--timeout',
-                    f'{input.timeout.total_seconds()}s',
-                    '--num_clients',
-                    f'{input.num_clients_per_proc}',
-                    '--workload',
-                    f'{workload_filename}',
-                    '--output_file_prefix',
-                    bench.abspath(f'client_{i}'),
-                    '--options.reproposePeriod',
-                    '{}s'.format(
-                        input.client_options.repropose_period.total_seconds()),
-                ])
-            client_procs.append(proc)
+        client_procs = launcher.launch([client_role])['client']
         bench.log(f'Clients started and running for {input.duration}.')
 
         # Wait for clients to finish and then terminate leaders and acceptors.
         for proc in client_procs:
             proc.wait()
-        for proc in replica_procs:
-            proc.kill()
+        launcher.kill(['replica'])
         bench.log('Clients finished and processes terminated.')
 
         # Client i writes results to `client_i_data.csv`.
@@ -323,7 +279,11 @@ class EPaxosSuite(benchmark.Suite[Input, Output]):
             for i in range(input.num_client_procs)
         ]
         return benchmark.parse_recorder_data(
-            bench, client_csvs, drop_prefix=datetime.timedelta(seconds=0))
+            bench,
+            client_csvs,
+            drop_prefix=datetime.timedelta(seconds=0),
+            correct_coordinated_omission=args.get(
+                'correct_coordinated_omission', False))
 
 
 def get_parser() -> argparse.ArgumentParser:
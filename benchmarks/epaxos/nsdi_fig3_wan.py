@@ -1,3 +1,13 @@
+# To run this experiment on a single Linux machine with an emulated WAN, pass
+# the topology and cluster in this directory:
+#
+#   python -m benchmarks.epaxos.nsdi_fig3_wan \
+#       --cluster benchmarks/epaxos/wan_cluster.json \
+#       --topology benchmarks/epaxos/wan_topology.json
+#
+# wan_topology.json approximates the latencies between Virginia, California,
+# Oregon, Japan, and Ireland. See benchmarks/topology.py.
+
 from .epaxos import *
 
 
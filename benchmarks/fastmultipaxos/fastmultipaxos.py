@@ -1,11 +1,15 @@
+from .. import affinity
 from .. import benchmark
+from .. import cds
 from .. import cluster
 from .. import host
 from .. import parser_util
 from .. import pd_util
 from .. import prometheus
 from .. import proto_util
+from .. import roles
 from .. import util
+from .. import warm_pool
 from .. import workload
 from ..workload import Workload
 from typing import Any, Callable, Dict, List, NamedTuple, Optional
@@ -108,6 +112,11 @@ class Input(NamedTuple):
     client: ClientOptions = ClientOptions()
     client_log_level: str = 'debug'
 
+    # Affinity. ################################################################
+    # If positive, every process is pinned to its own cpus_per_proc CPUs,
+    # preferably on a single NUMA node. See affinity.py.
+    cpus_per_proc: int = 0
+
 
 Output = benchmark.RecorderOutput
 
@@ -196,6 +205,11 @@ class FastMultiPaxosNet:
 
 # Suite ########################################################################
 class FastMultiPaxosSuite(benchmark.Suite[Input, Output]):
+    def __init__(self) -> None:
+        super().__init__()
+        self._pool = (warm_pool.WarmPool()
+                      if self.args().get('warm_jvm_pool') else None)
+
     def run_benchmark(self, bench: benchmark.BenchmarkDirectory,
                       args: Dict[Any, Any], input: Input) -> Output:
         net = FastMultiPaxosNet(args['cluster'], args['identity_file'], input)
@@ -204,134 +218,153 @@ class FastMultiPaxosSuite(benchmark.Suite[Input, Output]):
     def _run_benchmark(self, bench: benchmark.BenchmarkDirectory,
                        args: Dict[Any, Any], input: Input,
                        net: FastMultiPaxosNet) -> Output:
+        launcher = roles.Launcher(
+            bench,
+            jar=args['jar'],
+            monitored=input.monitored,
+            profiled=input.profiled,
+            allocator=affinity.AffinityAllocator(bench, input.cpus_per_proc),
+            pool=self._pool,
+            jvm_flags=cds.java_flags(args))
+
         # Write config file.
         config_filename = bench.abspath('config.pbtxt')
         bench.write_string(config_filename,
                            proto_util.message_to_pbtext(net.config()))
         bench.log('Config file config.pbtxt written.')
 
-        # If we're monitoring the code, run garbage collection verbosely.
-        java = ['java']
-        if input.monitored:
-            java += [
-                '-verbose:gc',
-                '-XX:-PrintGC',
-                '-XX:+PrintHeapAtGC',
-                '-XX:+PrintGCDetails',
-                '-XX:+PrintGCTimeStamps',
-                '-XX:+PrintGCDateStamps',
-            ]
-        # Increase the heap size.
+        # Write workload file.
+        workload_filename = bench.abspath('workload.pbtxt')
+        bench.write_string(
+            workload_filename,
+            proto_util.message_to_pbtext(input.workload.to_proto()))
+
+        # Describe roles. Options are in milliseconds (see the TODO above
+        # ElectionOptions), so we don't use roles.options_flags.
         # TODO(mwhittaker): Right now, not much thought has been put into the
         # heap size. Think more carefully about this. We may want, for example,
         # to increase the size of the young generation.
-        java += [f'-Xms{input.jvm_heap_size}', f'-Xmx{input.jvm_heap_size}']
-
-        # Launch acceptors.
-        acceptor_procs = []
-        for (i, acceptor) in enumerate(net.placement().acceptors):
-            proc = bench.popen(
-                host=acceptor.host,
-                label=f'acceptor_{i}',
-                cmd=java + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.fastmultipaxos.AcceptorMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.acceptor_log_level,
-                    '--prometheus_host',
-                    acceptor.host.ip(),
-                    '--prometheus_port',
-                    str(acceptor.port + 1) if input.monitored else '-1',
-                    '--options.waitPeriod',
-                    f'{input.acceptor.wait_period_ms}ms',
-                    '--options.waitStagger',
-                    f'{input.acceptor.wait_stagger_ms}ms',
-                ],
-            )
-            acceptor_procs.append(proc)
-        bench.log('Acceptors started.')
-
-        # Launch leaders.
-        leader_procs = []
-        for (i, leader) in enumerate(net.placement().leaders):
-            proc = bench.popen(
-                host=leader.host,
-                label=f'leader_{i}',
-                cmd=java + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.fastmultipaxos.LeaderMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.leader_log_level,
-                    '--state_machine',
-                    input.state_machine,
-                    '--prometheus_host',
-                    leader.host.ip(),
-                    '--prometheus_port',
-                    str(leader.port + 1) if input.monitored else '-1',
-                    '--options.thriftySystem',
-                    input.leader.thrifty_system,
-                    '--options.resendPhase1asTimerPeriod',
-                    f'{input.leader.resend_phase1as_timer_period_ms}ms',
-                    '--options.resendPhase2asTimerPeriod',
-                    f'{input.leader.resend_phase2as_timer_period_ms}ms',
-                    '--options.phase2aMaxBufferSize',
-                    f'{input.leader.phase2a_max_buffer_size}',
-                    '--options.phase2aBufferFlushPeriod',
-                    f'{input.leader.phase2a_buffer_flush_period_ms}ms',
-                    '--options.valueChosenMaxBufferSize',
-                    f'{input.leader.value_chosen_max_buffer_size}',
-                    '--options.valueChosenBufferFlushPeriod',
-                    f'{input.leader.value_chosen_buffer_flush_period_ms}ms',
-                    '--options.election.pingPeriod',
-                    f'{input.leader.election.ping_period_ms}ms',
-                    '--options.election.noPingTimeoutMin',
-                    f'{input.leader.election.no_ping_timeout_min_ms}ms',
-                    '--options.election.noPingTimeoutMax',
-                    f'{input.leader.election.no_ping_timeout_max_ms}ms',
-                    '--options.election.notEnoughVotesTimeoutMin',
-                    f'{input.leader.election.not_enough_votes_timeout_min_ms}ms',
-                    '--options.election.notEnoughVotesTimeoutMax',
-                    f'{input.leader.election.not_enough_votes_timeout_max_ms}ms',
-                    '--options.heartbeat.failPeriod',
-                    f'{input.leader.heartbeat.fail_period_ms}ms',
-                    '--options.heartbeat.successPeriod',
-                    f'{input.leader.heartbeat.success_period_ms}ms',
-                    '--options.heartbeat.numRetries',
-                    str(input.leader.heartbeat.num_retries),
-                    '--options.heartbeat.networkDelayAlpha',
-                    str(input.leader.heartbeat.network_delay_alpha),
-                ],
-            )
-            leader_procs.append(proc)
-        bench.log('Leaders started.')
+        acceptor_role = roles.Role(
+            name='acceptor',
+            main_class='frankenpaxos.fastmultipaxos.AcceptorMain',
+            heap_size=input.jvm_heap_size,
+            procs=roles.indexed('acceptor', net.placement().acceptors),
+            flags=[
+                '--config',
+                config_filename,
+                '--log_level',
+                input.acceptor_log_level,
+                '--options.waitPeriod',
+                f'{input.acceptor.wait_period_ms}ms',
+                '--options.waitStagger',
+                f'{input.acceptor.wait_stagger_ms}ms',
+            ],
+        )
+
+        election = input.leader.election
+        heartbeat = input.leader.heartbeat
+        leader_role = roles.Role(
+            name='leader',
+            main_class='frankenpaxos.fastmultipaxos.LeaderMain',
+            heap_size=input.jvm_heap_size,
+            procs=roles.indexed('leader', net.placement().leaders),
+            flags=[
+                '--config',
+                config_filename,
+                '--log_level',
+                input.leader_log_level,
+                '--state_machine',
+                input.state_machine,
+                '--options.thriftySystem',
+                input.leader.thrifty_system,
+                '--options.resendPhase1asTimerPeriod',
+                f'{input.leader.resend_phase1as_timer_period_ms}ms',
+                '--options.resendPhase2asTimerPeriod',
+                f'{input.leader.resend_phase2as_timer_period_ms}ms',
+                '--options.phase2aMaxBufferSize',
+                f'{input.leader.phase2a_max_buffer_size}',
+                '--options.phase2aBufferFlushPeriod',
+                f'{input.leader.phase2a_buffer_flush_period_ms}ms',
+                '--options.valueChosenMaxBufferSize',
+                f'{input.leader.value_chosen_max_buffer_size}',
+                '--options.valueChosenBufferFlushPeriod',
+                f'{input.leader.value_chosen_buffer_flush_period_ms}ms',
+                '--options.election.pingPeriod',
+                f'{election.ping_period_ms}ms',
+                '--options.election.noPingTimeoutMin',
+                f'{election.no_ping_timeout_min_ms}ms',
+                '--options.election.noPingTimeoutMax',
+                f'{election.no_ping_timeout_max_ms}ms',
+                '--options.election.notEnoughVotesTimeoutMin',
+                f'{election.not_enough_votes_timeout_min_ms}ms',
+                '--options.election.notEnoughVotesTimeoutMax',
+                f'{election.not_enough_votes_timeout_max_ms}ms',
+                '--options.heartbeat.failPeriod',
+                f'{heartbeat.fail_period_ms}ms',
+                '--options.heartbeat.successPeriod',
+                f'{heartbeat.success_period_ms}ms',
+                '--options.heartbeat.numRetries',
+                str(heartbeat.num_retries),
+                '--options.heartbeat.networkDelayAlpha',
+                str(heartbeat.network_delay_alpha),
+            ],
+            depends_on=['acceptor'],
+        )
+
+        client_role = roles.Role(
+            name='client',
+            main_class='frankenpaxos.fastmultipaxos.BenchmarkClientMain',
+            heap_size=input.jvm_heap_size,
+            procs=[
+                roles.RoleProc(
+                    label=f'client_{i}',
+                    endpoint=client,
+                    flags=[
+                        '--host', client.host.ip(),
+                        '--port', str(client.port),
+                        '--output_file_prefix', bench.abspath(f'client_{i}'),
+                    ])
+                for (i, client) in enumerate(net.placement().clients)
+            ],
+            flags=[
+                '--config',
+                config_filename,
+                '--log_level',
+                input.client_log_level,
+                '--options.reproposePeriod',
+                f'{input.client.repropose_period_ms}ms',
+                '--warmup_duration',
+                f'{input.warmup_duration.total_seconds()}s',
+                '--warmup_timeout',
+                f'{input.warmup_timeout.total_seconds()}s',
+                '--warmup_sleep',
+                f'{input.warmup_sleep.total_seconds()}s',
+                '--num_warmup_clients',
+                f'{input.num_warmup_clients_per_proc}',
+                '--duration',
+                f'{input.duration_seconds}s',
+                '--timeout',
+                f'{input.timeout_seconds}s',
+                '--num_clients',
+                f'{input.num_clients_per_proc}',
+                '--workload',
+                f'{workload_filename}',
+            ],
+            # Clients exit when they finish, so they can't be reused.
+            poolable=False,
+        )
+
+        # Launch acceptors and then leaders.
+        launcher.launch([acceptor_role, leader_role])
+        bench.log('Acceptors and leaders started.')
 
         # Launch Prometheus.
         if input.monitored:
             prometheus_config = prometheus.prometheus_config(
-                input.prometheus_scrape_interval_ms, {
-                    'fast_multipaxos_acceptor': [
-                        f'{e.host.ip()}:{e.port + 1}'
-                        for e in net.placement().acceptors
-                    ],
-                    'fast_multipaxos_leader': [
-                        f'{e.host.ip()}:{e.port + 1}'
-                        for e in net.placement().leaders
-                    ],
-                    'fast_multipaxos_client': [
-                        f'{e.host.ip()}:{e.port + 1}'
-                        for e in net.placement().clients
-                    ],
-                })
+                input.prometheus_scrape_interval_ms,
+                roles.prometheus_jobs('fast_multipaxos',
+                                      [acceptor_role, leader_role,
+                                       client_role]))
             bench.write_string('prometheus.yml', yaml.dump(prometheus_config))
             prometheus_server = bench.popen(
                 host=net.placement().leaders[0].host,
@@ -350,61 +383,13 @@ class FastMultiPaxosSuite(benchmark.Suite[Input, Output]):
         bench.log('Client lag ended.')
 
         # Launch clients.
-        workload_filename = bench.abspath('workload.pbtxt')
-        bench.write_string(
-            workload_filename,
-            proto_util.message_to_pbtext(input.workload.to_proto()))
-
-        client_procs = []
-        for (i, client) in enumerate(net.placement().clients):
-            proc = bench.popen(
-                host=client.host,
-                label=f'client_{i}',
-                cmd=java + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.fastmultipaxos.BenchmarkClientMain',
-                    '--host',
-                    client.host.ip(),
-                    '--port',
-                    str(client.port),
-                    '--prometheus_host',
-                    client.host.ip(),
-                    '--prometheus_port',
-                    str(client.port + 1) if input.monitored else '-1',
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.client_log_level,
-                    '--options.reproposePeriod',
-                    f'{input.client.repropose_period_ms}ms',
-                    '--warmup_duration',
-                    f'{input.warmup_duration.total_seconds()}s',
-                    '--warmup_timeout',
-                    f'{input.warmup_timeout.total_seconds()}s',
-                    '--warmup_sleep',
-                    f'{input.warmup_sleep.total_seconds()}s',
-                    '--num_warmup_clients',
-                    f'{input.num_warmup_clients_per_proc}',
-                    '--duration',
-                    f'{input.duration_seconds}s',
-                    '--timeout',
-                    f'{input.timeout_seconds}s',
-                    '--num_clients',
-                    f'{input.num_clients_per_proc}',
-                    '--workload',
-                    f'{workload_filename}',
-                    '--output_file_prefix',
-                    bench.abspath(f'client_{i}'),
-                ])
-            client_procs.append(proc)
+        client_procs = launcher.launch([client_role])['client']
         bench.log('Clients started.')
 
         # Wait for clients to finish and then terminate everything.
         for proc in client_procs:
             proc.wait()
-        for proc in leader_procs + acceptor_procs:
-            proc.kill()
+        launcher.kill(['leader', 'acceptor'])
         if input.monitored:
             prometheus_server.kill()
         bench.log('Clients finished and processes terminated.')
@@ -415,7 +400,11 @@ class FastMultiPaxosSuite(benchmark.Suite[Input, Output]):
             for i in range(input.num_client_procs)
         ]
         return benchmark.parse_recorder_data(
-            bench, client_csvs, drop_prefix=datetime.timedelta(seconds=0))
+            bench,
+            client_csvs,
+            drop_prefix=datetime.timedelta(seconds=0),
+            correct_coordinated_omission=args.get(
+                'correct_coordinated_omission', False))
 
 
 def get_parser() -> argparse.ArgumentParser:
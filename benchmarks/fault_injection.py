@@ -0,0 +1,258 @@
+# This file contains utilities to inject process-level faults into a running
+# benchmark from the harness.
+#
+# Some drivers (e.g., matchmakermultipaxos/driver_workload.py) inject faults
+# from within the protocol, but most protocols (e.g., MultiPaxos, CRAQ,
+# EPaxos, FasterPaxos) don't have a driver. A FaultInjector instead injects
+# faults into the processes launched with BenchmarkDirectory.popen, by label,
+# at scheduled times. It can
+#
+#   - pause and resume a process (with SIGSTOP and SIGCONT), which looks like
+#     a long garbage collection pause or an overloaded machine;
+#   - kill a process or kill and restart it with the same command (see
+#     BenchmarkDirectory.restart); and
+#   - partition a process from some or all of the other processes and heal
+#     the partition. A partition drops every packet between the process'
+#     address and the peers' addresses with iptables rules on the process'
+#     host, so processes that share an address (e.g., every process on a
+#     LocalHost) can't be partitioned from each other. With loopback alias
+#     addresses (see topology.py) or with NamespaceHosts, every role has its
+#     own address.
+#
+# A fault schedule is written as a JSON file like this:
+#
+#   [
+#     {"time_s": 10, "kind": "pause", "label": "leader_0", "duration_s": 2},
+#     {"time_s": 20, "kind": "restart", "label": "acceptor_1"},
+#     {"time_s": 30, "kind": "partition", "label": "leader_1",
+#      "peers": ["acceptor_0", "acceptor_1"], "duration_s": 5}
+#   ]
+#
+# Times are relative to the start of the benchmark. Pass the file to a
+# benchmark with --faults. Every fault that is injected (or skipped, e.g.,
+# because no process with its label was launched yet) is logged to log.txt
+# and to faults.csv. faults.csv has the same format as a driver's
+# driver_events.csv, so the recovery of every fault can be measured with
+# recovery.py.
+#
+# Roles run in a warm JVM (see warm_pool.py) aren't launched with popen and
+# can't be targeted. When a FaultInjector is closed, paused processes are
+# resumed and partitions are healed.
+
+from . import benchmark
+from . import proc
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import csv
+import datetime
+import json
+import threading
+
+
+# Fault kinds.
+PAUSE = 'pause'
+RESUME = 'resume'
+KILL = 'kill'
+RESTART = 'restart'
+PARTITION = 'partition'
+HEAL = 'heal'
+
+_KINDS = [PAUSE, RESUME, KILL, RESTART, PARTITION, HEAL]
+
+
+class Fault(NamedTuple):
+    # Seconds since the start of the benchmark.
+    time_s: float
+    # One of the fault kinds above.
+    kind: str
+    # The label of the process, as passed to BenchmarkDirectory.popen.
+    label: str
+    # If not None, a pause is resumed and a partition is healed after
+    # `duration_s` seconds.
+    duration_s: Optional[float] = None
+    # The labels of the processes to partition from (or to heal the partition
+    # from). If empty, the process is partitioned from every other launched
+    # process.
+    peers: List[str] = []
+
+    @staticmethod
+    def from_dict(d: Dict[str, Any]) -> 'Fault':
+        fault = Fault(time_s=float(d['time_s']),
+                      kind=d['kind'],
+                      label=d['label'],
+                      duration_s=d.get('duration_s'),
+                      peers=d.get('peers', []))
+        if fault.kind not in _KINDS:
+            raise ValueError(f'Unknown fault kind {fault.kind}. Fault kinds '
+                             f'are {_KINDS}.')
+        if fault.duration_s is not None and fault.kind not in [
+                PAUSE, PARTITION
+        ]:
+            raise ValueError(f'Only {PAUSE} and {PARTITION} faults can have '
+                             f'a duration.')
+        return fault
+
+
+def faults_from_json_file(filename: str) -> List[Fault]:
+    with open(filename, 'r') as f:
+        return [Fault.from_dict(d) for d in json.load(f)]
+
+
+def _now_string() -> str:
+    # The format of an Instant, like in driver_events.csv.
+    return datetime.datetime.now(datetime.timezone.utc).strftime(
+        '%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class FaultInjector(object):
+    def __init__(self, bench: benchmark.BenchmarkDirectory,
+                 faults: List[Fault]) -> None:
+        self._bench = bench
+        self._faults = faults
+        self._lock = threading.Lock()
+        self._timers: List[threading.Timer] = []
+        self._paused: Dict[str, proc.Proc] = dict()
+        # The iptables rules of every partition, keyed by label and peers.
+        self._partitions: Dict[Tuple[str, Tuple[str, ...]],
+                               List[Tuple[Any, List[str]]]] = dict()
+        self._num_commands = 0
+        self._closed = False
+        self._events_file = bench.create_file('faults.csv')
+        self._events = csv.writer(self._events_file)
+        self._events.writerow(['time', 'event', 'label', 'detail'])
+        self._events_file.flush()
+
+    def __enter__(self) -> 'FaultInjector':
+        self.start()
+        return self
+
+    def __exit__(self, cls, exn, traceback) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """Schedules every fault, relative to now."""
+        with self._lock:
+            for fault in self._faults:
+                self._schedule(fault.time_s, fault)
+                if fault.duration_s is not None:
+                    undo = RESUME if fault.kind == PAUSE else HEAL
+                    self._schedule(fault.time_s + fault.duration_s,
+                                   fault._replace(kind=undo, duration_s=None))
+
+    def _schedule(self, delay_s: float, fault: Fault) -> None:
+        timer = threading.Timer(delay_s, self.inject, args=(fault,))
+        timer.daemon = True
+        timer.start()
+        self._timers.append(timer)
+
+    def close(self) -> None:
+        """Cancels pending faults, resumes paused processes, and heals
+        partitions."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            for timer in self._timers:
+                timer.cancel()
+            for (label, p) in self._paused.items():
+                p.resume()
+                self._record(RESUME, label, 'on close')
+            self._paused.clear()
+            for ((label, peers), rules) in self._partitions.items():
+                self._delete_rules(rules)
+                self._record(HEAL, label, 'on close ' + ' '.join(peers))
+            self._partitions.clear()
+            self._events_file.close()
+
+    def inject(self, fault: Fault) -> None:
+        """Injects `fault` now, ignoring its time and duration."""
+        with self._lock:
+            if self._closed:
+                return
+            launch = self._bench.launches.get(fault.label)
+            if launch is None:
+                self._record(fault.kind, fault.label,
+                             'skipped: no process with this label')
+                return
+
+            if fault.kind == PAUSE:
+                launch.proc.pause()
+                self._paused[fault.label] = launch.proc
+                self._record(PAUSE, fault.label, '')
+            elif fault.kind == RESUME:
+                launch.proc.resume()
+                self._paused.pop(fault.label, None)
+                self._record(RESUME, fault.label, '')
+            elif fault.kind == KILL:
+                launch.proc.kill()
+                self._record(KILL, fault.label, '')
+            elif fault.kind == RESTART:
+                # A paused process is killed all the same.
+                self._paused.pop(fault.label, None)
+                self._bench.restart(fault.label)
+                self._record(RESTART, fault.label, '')
+            elif fault.kind == PARTITION:
+                self._partition(fault)
+            elif fault.kind == HEAL:
+                self._heal(fault)
+
+    def _peer_ips(self, fault: Fault) -> List[str]:
+        ip = self._bench.launches[fault.label].host.ip()
+        if len(fault.peers) > 0:
+            launches = [self._bench.launches[l] for l in fault.peers]
+        else:
+            launches = list(self._bench.launches.values())
+        return sorted({l.host.ip() for l in launches} - {ip})
+
+    def _partition(self, fault: Fault) -> None:
+        key = (fault.label, tuple(fault.peers))
+        if key in self._partitions:
+            self._record(PARTITION, fault.label, 'skipped: already partitioned')
+            return
+
+        launch = self._bench.launches[fault.label]
+        ip = launch.host.ip()
+        peer_ips = self._peer_ips(fault)
+        if len(peer_ips) == 0:
+            self._record(PARTITION, fault.label,
+                         f'skipped: no peers with an address other than {ip}')
+            return
+
+        rules = []
+        for peer_ip in peer_ips:
+            for rule in [
+                ['INPUT', '-s', peer_ip, '-d', ip],
+                ['OUTPUT', '-s', ip, '-d', peer_ip],
+            ]:
+                rule += ['-m', 'comment', '--comment', 'frankenpaxos_fault']
+                rule += ['-j', 'DROP']
+                self._iptables(launch.host, ['-A'] + rule)
+                rules.append((launch.host, rule))
+        self._partitions[key] = rules
+        self._record(PARTITION, fault.label, ' '.join(peer_ips))
+
+    def _heal(self, fault: Fault) -> None:
+        key = (fault.label, tuple(fault.peers))
+        if key not in self._partitions:
+            self._record(HEAL, fault.label, 'skipped: not partitioned')
+            return
+        self._delete_rules(self._partitions.pop(key))
+        self._record(HEAL, fault.label, ' '.join(fault.peers))
+
+    def _delete_rules(self, rules: List[Tuple[Any, List[str]]]) -> None:
+        for (h, rule) in rules:
+            self._iptables(h, ['-D'] + rule)
+
+    def _iptables(self, h: Any, args: List[str]) -> None:
+        # We run iptables with popen, so that every command and its output is
+        # recorded in the benchmark directory.
+        label = f'fault_iptables_{self._num_commands}'
+        self._num_commands += 1
+        returncode = self._bench.popen(h, label, ['sudo', '-n', 'iptables'] +
+                                       args).wait()
+        if returncode != 0:
+            self._bench.log(f'{label} failed with return code {returncode}.')
+
+    def _record(self, event: str, label: str, detail: str) -> None:
+        self._bench.log(f'Fault {event} {label} {detail}'.rstrip() + '.')
+        self._events.writerow([_now_string(), event, label, detail])
+        self._events_file.flush()
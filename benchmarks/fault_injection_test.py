@@ -0,0 +1,89 @@
+from . import benchmark
+from . import fault_injection
+from . import host
+import os
+import pandas as pd
+import tempfile
+import time
+import unittest
+
+
+def _state(pid: int) -> str:
+    # The state of a process (e.g., 'S' for sleeping, 'T' for stopped).
+    with open(f'/proc/{pid}/stat', 'r') as f:
+        return f.read().rsplit(')', 1)[1].split()[0]
+
+
+class FaultInjectionTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bench = benchmark.BenchmarkDirectory(
+            os.path.join(self.tmp.name, 'bench'))
+        self.bench.__enter__()
+
+    def tearDown(self) -> None:
+        self.bench.__exit__(None, None, None)
+        self.tmp.cleanup()
+
+    def _events(self) -> pd.DataFrame:
+        return pd.read_csv(self.bench.abspath('faults.csv')).fillna('')
+
+    def test_pause_and_resume(self) -> None:
+        p = self.bench.popen(host.LocalHost(), 'sleeper', ['sleep', '1000'])
+        with fault_injection.FaultInjector(self.bench, []) as injector:
+            injector.inject(fault_injection.Fault(0, 'pause', 'sleeper'))
+            time.sleep(0.1)
+            self.assertEqual(_state(p.pid()), 'T')
+            injector.inject(fault_injection.Fault(0, 'resume', 'sleeper'))
+            time.sleep(0.1)
+            self.assertNotEqual(_state(p.pid()), 'T')
+        self.assertEqual(list(self._events()['event']), ['pause', 'resume'])
+
+    def test_paused_processes_are_resumed_on_close(self) -> None:
+        p = self.bench.popen(host.LocalHost(), 'sleeper', ['sleep', '1000'])
+        faults = [fault_injection.Fault(0, 'pause', 'sleeper')]
+        with fault_injection.FaultInjector(self.bench, faults):
+            time.sleep(0.2)
+            self.assertEqual(_state(p.pid()), 'T')
+        time.sleep(0.1)
+        self.assertNotEqual(_state(p.pid()), 'T')
+
+    def test_restart(self) -> None:
+        p = self.bench.popen(host.LocalHost(), 'sleeper', ['sleep', '1000'])
+        faults = [fault_injection.Fault(0.1, 'restart', 'sleeper')]
+        with fault_injection.FaultInjector(self.bench, faults):
+            time.sleep(0.5)
+        self.assertIsNotNone(p.wait())
+        restarted = self.bench.launches['sleeper'].proc
+        self.assertIsNot(restarted, p)
+        self.assertIsNone(restarted._popen.poll())
+        self.assertTrue(
+            os.path.exists(self.bench.abspath('sleeper_restart_0_cmd.txt')))
+
+    def test_unknown_label_is_skipped(self) -> None:
+        faults = [fault_injection.Fault(0, 'kill', 'nobody')]
+        with fault_injection.FaultInjector(self.bench, faults):
+            time.sleep(0.2)
+        events = self._events()
+        self.assertEqual(list(events['event']), ['kill'])
+        self.assertTrue(events['detail'][0].startswith('skipped'))
+
+    def test_from_dict(self) -> None:
+        fault = fault_injection.Fault.from_dict({
+            'time_s': 1,
+            'kind': 'partition',
+            'label': 'leader_0',
+            'duration_s': 2,
+        })
+        self.assertEqual(fault.peers, [])
+        with self.assertRaises(ValueError):
+            fault_injection.Fault.from_dict({
+                'time_s': 1,
+                'kind': 'kill',
+                'label': 'leader_0',
+                'duration_s': 2,
+            })
+
+
+if __name__ == '__main__':
+    unittest.main()
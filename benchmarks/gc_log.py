@@ -0,0 +1,182 @@
+# This file contains a parser for the garbage collection logs of our JVMs.
+#
+# When a benchmark is monitored, every role's JVM is run with -verbose:gc
+# -XX:+PrintGCDetails -XX:+PrintGCTimeStamps -XX:+PrintGCDateStamps (see
+# roles.java), and the JVM prints a line like the following to stdout (i.e. to
+# <label>_out.txt) for every collection:
+#
+#   2019-05-03T10:56:35.372-0700: 0.642: [GC (Allocation Failure)
+#   [PSYoungGen: 65536K->10728K(76288K)] 65536K->10744K(251392K), 0.0097418
+#   secs] [Times: user=0.03 sys=0.01, real=0.01 secs]
+#
+# (all on one line). parse_gc_log extracts every collection into a dataframe,
+# and role_gc_outputs summarizes the collections of every role during a window
+# of time (e.g., while the clients were running) into a GcOutput. This lets us
+# tell how much of a benchmark's tail latency comes from garbage collection
+# and which role is to blame.
+#
+# The log format is the one of Java 8. Roles that run in a warm JVM (see
+# warm_pool.py) don't write their GC logs to <label>_out.txt, so
+# roles.Launcher doesn't use warm JVMs for monitored benchmarks.
+
+from . import benchmark
+from typing import Dict, Iterable, List, NamedTuple
+import datetime
+import os
+import pandas as pd
+import re
+
+
+class GcOutput(NamedTuple):
+    num_pauses: float
+    # The fraction of time, averaged over a role's processes, that a process
+    # spent paused.
+    pause_fraction: float
+    mean_pause_ms: float
+    median_pause_ms: float
+    p90_pause_ms: float
+    p99_pause_ms: float
+    max_pause_ms: float
+    num_full_pauses: float
+    # Allocation and promotion rates are summed over a role's processes.
+    allocation_rate_mb_per_s: float
+    promotion_rate_mb_per_s: float
+
+
+dummy_gc_output = GcOutput(
+    num_pauses=-1.0,
+    pause_fraction=-1.0,
+    mean_pause_ms=-1.0,
+    median_pause_ms=-1.0,
+    p90_pause_ms=-1.0,
+    p99_pause_ms=-1.0,
+    max_pause_ms=-1.0,
+    num_full_pauses=-1.0,
+    allocation_rate_mb_per_s=-1.0,
+    promotion_rate_mb_per_s=-1.0,
+)
+
+_GC_RE = re.compile(
+    r'(?P<date>\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d+[+-]\d{4}): '
+    r'(?P<uptime>[\d.]+): '
+    r'\[(?P<kind>Full GC|GC) \((?P<cause>[^)]*)\) '
+    # The first generation is the young generation (e.g., PSYoungGen, ParNew,
+    # DefNew).
+    r'\[\w+: (?P<young_before>\d+)K->(?P<young_after>\d+)K\(\d+K\)\]'
+    r'.*? (?P<heap_before>\d+)K->(?P<heap_after>\d+)K\((?P<heap>\d+)K\)'
+    r'(?:, \[Metaspace: [^\]]*\])?, (?P<pause>[\d.]+) secs\]')
+
+_COLUMNS = [
+    'uptime_s', 'kind', 'cause', 'pause_ms', 'young_before_kb',
+    'young_after_kb', 'heap_before_kb', 'heap_after_kb', 'heap_kb',
+    'allocated_kb', 'promoted_kb'
+]
+
+
+def parse_gc_log(lines: Iterable[str]) -> pd.DataFrame:
+    """
+    parse_gc_log returns a dataframe with one row for every collection in
+    `lines`, indexed by the (UTC) time the collection started. Lines that
+    aren't collections (e.g., the role's own logging or -XX:+PrintHeapAtGC
+    output) are ignored. allocated_kb is the amount of memory allocated since
+    the previous collection, and promoted_kb is the amount of memory promoted
+    from the young to the old generation by the collection.
+    """
+    rows: List[Dict] = []
+    for line in lines:
+        m = _GC_RE.search(line)
+        if m is None:
+            continue
+        rows.append({
+            'time': pd.Timestamp(m.group('date')).tz_convert('UTC'),
+            'uptime_s': float(m.group('uptime')),
+            'kind': m.group('kind'),
+            'cause': m.group('cause'),
+            'pause_ms': float(m.group('pause')) * 1000,
+            'young_before_kb': int(m.group('young_before')),
+            'young_after_kb': int(m.group('young_after')),
+            'heap_before_kb': int(m.group('heap_before')),
+            'heap_after_kb': int(m.group('heap_after')),
+            'heap_kb': int(m.group('heap')),
+        })
+
+    if len(rows) == 0:
+        return pd.DataFrame(columns=_COLUMNS,
+                            index=pd.DatetimeIndex([], tz='UTC', name='time'))
+
+    df = pd.DataFrame(rows).set_index('time').sort_index()
+    # Everything in the young generation was allocated since the end of the
+    # previous collection. The first collection's young generation was
+    # allocated since the JVM started.
+    df['allocated_kb'] = (df['young_before_kb'] -
+                          df['young_after_kb'].shift(1).fillna(0))
+    # Whatever left the young generation but not the heap was promoted.
+    df['promoted_kb'] = ((df['young_before_kb'] - df['young_after_kb']) -
+                         (df['heap_before_kb'] - df['heap_after_kb'])).clip(
+                             lower=0)
+    return df[_COLUMNS]
+
+
+def read_gc_logs(directory: str, labels: Iterable[str]) -> pd.DataFrame:
+    """
+    read_gc_logs parses <label>_out.txt in `directory` for every label in
+    `labels` and returns the collections of all of them, with a `label`
+    column.
+    """
+    dfs = []
+    for label in labels:
+        filename = os.path.join(directory, f'{label}_out.txt')
+        if not os.path.exists(filename):
+            continue
+        with open(filename, 'r', errors='replace') as f:
+            df = parse_gc_log(f)
+        df['label'] = label
+        dfs.append(df)
+    if len(dfs) == 0:
+        return parse_gc_log([]).assign(label=[])
+    return pd.concat(dfs).sort_index()
+
+
+def gc_output(df: pd.DataFrame, num_procs: int, start: datetime.datetime,
+              stop: datetime.datetime) -> GcOutput:
+    """
+    gc_output summarizes the collections in `df` (of `num_procs` processes)
+    that started between `start` and `stop`, which must be timezone aware.
+    """
+    df = df[(df.index >= start) & (df.index <= stop)]
+    if len(df) == 0 or num_procs == 0:
+        return dummy_gc_output
+
+    duration_s = (stop - start).total_seconds()
+    pauses = df['pause_ms']
+    return GcOutput(
+        num_pauses=float(len(df)),
+        pause_fraction=pauses.sum() / 1000 / duration_s / num_procs,
+        mean_pause_ms=pauses.mean(),
+        median_pause_ms=pauses.median(),
+        p90_pause_ms=pauses.quantile(.90),
+        p99_pause_ms=pauses.quantile(.99),
+        max_pause_ms=pauses.max(),
+        num_full_pauses=float((df['kind'] == 'Full GC').sum()),
+        allocation_rate_mb_per_s=df['allocated_kb'].sum() / 1024 / duration_s,
+        promotion_rate_mb_per_s=df['promoted_kb'].sum() / 1024 / duration_s,
+    )
+
+
+def role_gc_outputs(bench: benchmark.BenchmarkDirectory,
+                    labels_by_role: Dict[str, List[str]],
+                    start: datetime.datetime,
+                    stop: datetime.datetime) -> Dict[str, GcOutput]:
+    """
+    role_gc_outputs returns the GcOutput of every role in `labels_by_role`
+    (e.g., {'acceptor': ['acceptor_0_0', 'acceptor_0_1']}) between `start`
+    and `stop`. The collections of every process are also written to
+    gc_events.csv, so that they can be lined up with the recorder data.
+    """
+    labels = [label for ls in labels_by_role.values() for label in ls]
+    df = read_gc_logs(bench.path, labels)
+    df.to_csv(bench.abspath('gc_events.csv'))
+    return {
+        role: gc_output(df[df['label'].isin(ls)], len(ls), start, stop)
+        for (role, ls) in labels_by_role.items()
+    }
@@ -0,0 +1,55 @@
+from . import gc_log
+import datetime
+import unittest
+
+
+_LOG = '''\
+[main] INFO Acceptor started.
+{Heap before GC invocations=1 (full 0):
+ PSYoungGen      total 76288K, used 65536K [0x00000007, 0x00000007, 0x00000007)
+  eden space 65536K, 100% used [0x00000007,0x00000007,0x00000007)
+2019-05-03T10:56:35.000-0700: 0.642: [GC (Allocation Failure) [PSYoungGen: 65536K->10240K(76288K)] 65536K->11264K(251392K), 0.0100000 secs] [Times: user=0.03 sys=0.01, real=0.01 secs]
+Heap after GC invocations=1 (full 0):
+ PSYoungGen      total 76288K, used 10240K [0x00000007, 0x00000007, 0x00000007)
+}
+2019-05-03T10:56:36.000-0700: 1.642: [GC (Allocation Failure) [PSYoungGen: 75776K->4096K(76288K)] 76800K->9216K(251392K), 0.0200000 secs] [Times: user=0.03 sys=0.01, real=0.02 secs]
+2019-05-03T10:56:37.000-0700: 2.642: [Full GC (Ergonomics) [PSYoungGen: 4096K->0K(141824K)] [ParOldGen: 5120K->8192K(175104K)] 9216K->8192K(316928K), [Metaspace: 2970K->2970K(1056768K)], 0.0700000 secs] [Times: user=0.1 sys=0.0, real=0.07 secs]
+'''
+
+
+class GcLogTest(unittest.TestCase):
+    def test_parse_gc_log(self) -> None:
+        df = gc_log.parse_gc_log(_LOG.splitlines())
+        self.assertEqual(list(df['kind']), ['GC', 'GC', 'Full GC'])
+        self.assertEqual(list(df['pause_ms'].round(3)), [10.0, 20.0, 70.0])
+        self.assertEqual(str(df.index[0]), '2019-05-03 17:56:35+00:00')
+        self.assertEqual(list(df['allocated_kb']), [65536, 65536, 0])
+        self.assertEqual(list(df['promoted_kb']), [1024, 4096, 3072])
+
+    def test_gc_output(self) -> None:
+        df = gc_log.parse_gc_log(_LOG.splitlines())
+        utc = datetime.timezone.utc
+        output = gc_log.gc_output(
+            df,
+            num_procs=1,
+            start=datetime.datetime(2019, 5, 3, 17, 56, 35, 500000,
+                                    tzinfo=utc),
+            stop=datetime.datetime(2019, 5, 3, 17, 56, 37, 500000,
+                                   tzinfo=utc))
+        self.assertEqual(output.num_pauses, 2)
+        self.assertEqual(output.num_full_pauses, 1)
+        self.assertAlmostEqual(output.max_pause_ms, 70)
+        self.assertAlmostEqual(output.pause_fraction, 0.045)
+        self.assertAlmostEqual(output.allocation_rate_mb_per_s, 32)
+
+    def test_empty(self) -> None:
+        df = gc_log.parse_gc_log(['no collections here'])
+        self.assertEqual(len(df), 0)
+        utc = datetime.timezone.utc
+        now = datetime.datetime.now(utc)
+        self.assertEqual(gc_log.gc_output(df, 1, now, now),
+                         gc_log.dummy_gc_output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,12 @@
 from . import proc
-from typing import Any, NamedTuple, Sequence, Union
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union
 import abc
+import atexit
+import ipaddress
+import os
 import paramiko
+import shlex
+import subprocess
 
 
 # A Host represents a machine (potentially virtual) on which you can run
@@ -17,6 +22,23 @@ class Host(abc.ABC):
               stderr: str) -> proc.Proc:
         raise NotImplementedError()
 
+    def machine(self) -> str:
+        """
+        machine identifies the physical machine that the host runs on. Hosts
+        with different IP addresses can share a machine (e.g., loopback
+        addresses or NamespaceHosts), and so share its CPUs.
+        """
+        try:
+            if ipaddress.ip_address(self.ip()).is_loopback:
+                return LOCAL_MACHINE
+        except ValueError:
+            pass
+        return self.ip()
+
+
+# The machine() of every host on the local machine.
+LOCAL_MACHINE = 'localhost'
+
 
 # An endpoint is a host and port. Typically, you launch a server that listens
 # at a particular endpoint.
@@ -66,3 +88,194 @@ class FakeHost(Host):
     def popen(self, args: Union[str, Sequence[str]], stdout: str,
               stderr: str) -> proc.Proc:
         raise NotImplementedError()
+
+
+# A NamespaceHost is a host on the local machine that runs every process in its
+# own Linux network namespace, optionally with its own CPUs and cgroup CPU and
+# memory limits. Running every role of a protocol in its own NamespaceHost
+# approximates a multi-machine deployment on a single large server: every role
+# has its own network stack and IP address instead of sharing the loopback
+# device, and roles don't fight over the same cores.
+#
+# Every namespace is connected to a bridge on the host via a veth pair. The
+# bridge has address 10.77.0.1, and namespaces have addresses in 10.77.0.0/16.
+# A NamespaceHost is described in a cluster JSON file by an address of the form
+#
+#   netns:<ip>[,cpus=<cpu list>][,memory=<bytes>][,cpu_quota=<cpus>]
+#
+# For example, "netns:10.77.0.2,cpus=0-3,memory=8G,cpu_quota=2" runs processes
+# in a namespace with IP 10.77.0.2, pinned to CPUs 0 through 3 (with taskset),
+# limited to 8 GiB of memory and 2 CPUs worth of CPU time (with cgroup v2).
+#
+# Namespaces and cgroups are created lazily and removed when Python exits.
+# Creating them requires root. If we're not root, commands are run with sudo.
+class NamespaceHost(Host):
+    ADDRESS_PREFIX = 'netns:'
+    _SUBNET = ipaddress.ip_network('10.77.0.0/16')
+    _BRIDGE = 'fpbr0'
+    _BRIDGE_ADDRESS = '10.77.0.1'
+    _CGROUP_ROOT = '/sys/fs/cgroup/frankenpaxos'
+
+    # The namespaces created so far, indexed by IP address.
+    _namespaces: Dict[str, 'NamespaceHost'] = dict()
+
+    def __init__(self,
+                 address: str,
+                 cpus: Optional[str] = None,
+                 memory: Optional[str] = None,
+                 cpu_quota: Optional[float] = None) -> None:
+        if ipaddress.ip_address(address) not in self._SUBNET:
+            raise ValueError(f'Namespace address {address} is not in '
+                             f'{self._SUBNET}.')
+        if address == self._BRIDGE_ADDRESS:
+            raise ValueError(f'Namespace address {address} is the address of '
+                             f'the bridge.')
+        self.address = address
+        self.cpus = cpus
+        self.memory = memory
+        self.cpu_quota = cpu_quota
+        self.namespace = 'fp-' + address.replace('.', '-')
+        self.cgroup: Optional[str] = None
+        if memory is not None or cpu_quota is not None:
+            self.cgroup = os.path.join(self._CGROUP_ROOT, self.namespace)
+        self._created = False
+
+    @staticmethod
+    def from_address(address: str) -> 'NamespaceHost':
+        """
+        from_address parses an address like
+        "netns:10.77.0.2,cpus=0-3,memory=8G,cpu_quota=2".
+        """
+        assert address.startswith(NamespaceHost.ADDRESS_PREFIX), address
+        [ip, *options] = address[len(NamespaceHost.ADDRESS_PREFIX):].split(',')
+        kwargs: Dict[str, Any] = dict()
+        for option in options:
+            (key, _, value) = option.partition('=')
+            if key == 'cpus':
+                kwargs['cpus'] = value
+            elif key == 'memory':
+                kwargs['memory'] = value
+            elif key == 'cpu_quota':
+                kwargs['cpu_quota'] = float(value)
+            else:
+                raise ValueError(f'Unknown namespace option {key} in address '
+                                 f'{address}.')
+        return NamespaceHost(ip, **kwargs)
+
+    def ip(self) -> str:
+        return self.address
+
+    def machine(self) -> str:
+        return LOCAL_MACHINE
+
+    def popen(self, args: Union[str, Sequence[str]], stdout: str,
+              stderr: str) -> proc.Proc:
+        self._create()
+        if isinstance(args, str):
+            cmd = args
+        else:
+            cmd = ' '.join(shlex.quote(arg) for arg in args)
+        if self.cpus is not None:
+            cmd = f'taskset -c {shlex.quote(self.cpus)} {cmd}'
+        cmd = f'exec ip netns exec {self.namespace} {cmd}'
+        if self.cgroup is not None:
+            procs = os.path.join(self.cgroup, 'cgroup.procs')
+            cmd = f'echo $$ > {procs} && {cmd}'
+        return proc.SudoPopenProc(_sudo(['sh', '-c', cmd]),
+                                  stdout=stdout,
+                                  stderr=stderr)
+
+    def _create(self) -> None:
+        if self._created:
+            return
+
+        # Two NamespaceHosts with the same address share a namespace.
+        if self.address in NamespaceHost._namespaces:
+            existing = NamespaceHost._namespaces[self.address]
+            if (existing.cpus, existing.memory, existing.cpu_quota) != (
+                    self.cpus, self.memory, self.cpu_quota):
+                raise ValueError(f'Namespace {self.address} was already '
+                                 f'created with different limits.')
+            self._created = True
+            return
+
+        if len(NamespaceHost._namespaces) == 0:
+            NamespaceHost._create_bridge()
+            atexit.register(NamespaceHost._cleanup)
+        NamespaceHost._namespaces[self.address] = self
+
+        octets = self.address.split('.')
+        veth = f'fpv{octets[2]}-{octets[3]}'
+        peer = f'fpp{octets[2]}-{octets[3]}'
+        netns = ['ip', 'netns', 'exec', self.namespace]
+        prefix = self._SUBNET.prefixlen
+        for cmd in [
+            ['ip', 'netns', 'add', self.namespace],
+            ['ip', 'link', 'add', veth, 'type', 'veth', 'peer', 'name', peer],
+            ['ip', 'link', 'set', veth, 'master', self._BRIDGE],
+            ['ip', 'link', 'set', veth, 'up'],
+            ['ip', 'link', 'set', peer, 'netns', self.namespace],
+            netns + ['ip', 'link', 'set', peer, 'name', 'eth0'],
+            netns + ['ip', 'addr', 'add', f'{self.address}/{prefix}', 'dev',
+                     'eth0'],
+            netns + ['ip', 'link', 'set', 'eth0', 'up'],
+            netns + ['ip', 'link', 'set', 'lo', 'up'],
+        ]:
+            _check_call(cmd)
+
+        if self.cgroup is not None:
+            if not os.path.exists('/sys/fs/cgroup/cgroup.controllers'):
+                raise ValueError('NamespaceHost CPU and memory limits require '
+                                 'cgroup v2.')
+            _check_call(['mkdir', '-p', self.cgroup])
+            for (parent, controllers) in [('/sys/fs/cgroup', '+cpu +memory'),
+                                          (self._CGROUP_ROOT, '+cpu +memory')]:
+                _write(os.path.join(parent, 'cgroup.subtree_control'),
+                       controllers)
+            if self.memory is not None:
+                _write(os.path.join(self.cgroup, 'memory.max'), self.memory)
+            if self.cpu_quota is not None:
+                period = 100000
+                quota = int(self.cpu_quota * period)
+                _write(os.path.join(self.cgroup, 'cpu.max'),
+                       f'{quota} {period}')
+        self._created = True
+
+    @staticmethod
+    def _create_bridge() -> None:
+        prefix = NamespaceHost._SUBNET.prefixlen
+        bridge = NamespaceHost._BRIDGE
+        if subprocess.call(_sudo(['ip', 'link', 'show', bridge]),
+                           stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL) == 0:
+            return
+        for cmd in [
+            ['ip', 'link', 'add', bridge, 'type', 'bridge'],
+            ['ip', 'addr', 'add', f'{NamespaceHost._BRIDGE_ADDRESS}/{prefix}',
+             'dev', bridge],
+            ['ip', 'link', 'set', bridge, 'up'],
+        ]:
+            _check_call(cmd)
+
+    @staticmethod
+    def _cleanup() -> None:
+        # Deleting a namespace deletes its veth pair. A cgroup can only be
+        # removed once all of its processes have exited.
+        for host in NamespaceHost._namespaces.values():
+            subprocess.call(_sudo(['ip', 'netns', 'del', host.namespace]))
+            if host.cgroup is not None:
+                subprocess.call(_sudo(['rmdir', host.cgroup]))
+        NamespaceHost._namespaces.clear()
+        subprocess.call(_sudo(['ip', 'link', 'del', NamespaceHost._BRIDGE]))
+
+
+def _sudo(cmd: List[str]) -> List[str]:
+    return cmd if os.geteuid() == 0 else ['sudo', '-n'] + cmd
+
+
+def _check_call(cmd: List[str]) -> None:
+    subprocess.check_call(_sudo(cmd))
+
+
+def _write(filename: str, s: str) -> None:
+    _check_call(['sh', '-c', f'echo {shlex.quote(s)} > {filename}'])
@@ -0,0 +1,176 @@
+# This file contains a pre-aggregated representation of recorder data.
+#
+# Our plots compute rolling statistics (e.g., the median latency over the last
+# second) over recorder data with millions of rows, like this:
+#
+#   median = s.rolling('1000ms').median()
+#   p95 = s.rolling('1000ms').quantile(0.95)
+#   ax.plot_date(s.index[::sample_every], median[::sample_every])
+#
+# This computes a statistic for every one of the millions of rows, only to
+# throw most of them away. LatencyBuckets instead aggregates the data once into
+# fixed buckets of time (e.g., 10 ms). Every bucket stores the number of
+# requests started in the bucket, the largest latency in the bucket, and a
+# latency histogram with logarithmically sized bins (e.g., every bin is 2%
+# wider than the last, like an HdrHistogram). Rolling counts, throughputs,
+# maxima, and quantiles over any window that is a multiple of the bucket size
+# are then computed from the buckets. Quantiles are accurate to within the
+# precision of the histogram.
+#
+#   buckets = latency_buckets.LatencyBuckets.from_series(s)
+#   median = buckets.rolling_quantile(0.5, '1000ms')
+#   p95 = buckets.rolling_quantile(0.95, '1000ms')
+#   ax.plot_date(median.index, median)
+
+from typing import Optional, Union
+import numpy as np
+import pandas as pd
+
+
+Window = Union[str, pd.Timedelta]
+
+
+class LatencyBuckets:
+    def __init__(self, start: pd.Timestamp, bucket: pd.Timedelta,
+                 counts: np.ndarray, maxes: np.ndarray, histograms: np.ndarray,
+                 bin_values: np.ndarray) -> None:
+        # Bucket i holds the requests that started in [start + i * bucket,
+        # start + (i + 1) * bucket). histograms[i][j] is the number of requests
+        # in bucket i with a latency in bin j, and bin_values[j] is the
+        # (geometric) middle of bin j.
+        self.start = start
+        self.bucket = bucket
+        self.counts = counts
+        self.maxes = maxes
+        self.histograms = histograms
+        self.bin_values = bin_values
+
+    @staticmethod
+    def from_series(latency: pd.Series,
+                    bucket: Window = '10ms',
+                    precision: float = 0.02,
+                    weights: Optional[pd.Series] = None) -> 'LatencyBuckets':
+        """
+        from_series aggregates latencies `latency`, indexed by the time the
+        corresponding requests started. If `weights` is not None, a latency
+        with weight w counts as w requests (see LabeledRecorder).
+        """
+        bucket = pd.Timedelta(bucket)
+        times = latency.index.values.astype('datetime64[ns]')
+        values = latency.values.astype(float)
+        w = (np.ones(len(values)) if weights is None else
+             weights.values.astype(float))
+        if len(values) == 0:
+            return LatencyBuckets(pd.Timestamp(0), bucket, np.zeros(0),
+                                  np.zeros(0), np.zeros((0, 1)), np.ones(1))
+
+        bucket_ns = bucket.value
+        start_ns = times.min().astype(np.int64) // bucket_ns * bucket_ns
+        bucket_ids = (times.astype(np.int64) - start_ns) // bucket_ns
+        num_buckets = int(bucket_ids.max()) + 1
+
+        # Bin j holds latencies in [lo * r^j, lo * r^(j + 1)).
+        positive = values[values > 0]
+        lo = positive.min() if len(positive) > 0 else 1.0
+        r = 1 + precision
+        bin_ids = np.floor(
+            np.log(np.maximum(values, lo) / lo) / np.log(r)).astype(np.int64)
+        num_bins = int(bin_ids.max()) + 1
+        bin_values = lo * r**(np.arange(num_bins) + 0.5)
+
+        counts = np.bincount(bucket_ids, weights=w, minlength=num_buckets)
+        maxes = np.full(num_buckets, np.nan)
+        np.fmax.at(maxes, bucket_ids, values)
+        histograms = np.bincount(bucket_ids * num_bins + bin_ids,
+                                 weights=w,
+                                 minlength=num_buckets * num_bins).reshape(
+                                     num_buckets, num_bins)
+        return LatencyBuckets(pd.Timestamp(start_ns), bucket, counts, maxes,
+                              histograms, bin_values)
+
+    def save(self, filename: str) -> None:
+        np.savez_compressed(filename,
+                            start=self.start.value,
+                            bucket=self.bucket.value,
+                            counts=self.counts,
+                            maxes=self.maxes,
+                            histograms=self.histograms,
+                            bin_values=self.bin_values)
+
+    @staticmethod
+    def load(filename: str) -> 'LatencyBuckets':
+        data = np.load(filename)
+        return LatencyBuckets(pd.Timestamp(int(data['start'])),
+                              pd.Timedelta(int(data['bucket'])),
+                              data['counts'], data['maxes'],
+                              data['histograms'], data['bin_values'])
+
+    def _num_buckets(self, window: Window) -> int:
+        n = pd.Timedelta(window) / self.bucket
+        if n < 1 or n != int(n):
+            raise ValueError(f'Window {window} is not a multiple of the '
+                             f'bucket size {self.bucket}.')
+        return int(n)
+
+    def _index(self) -> pd.DatetimeIndex:
+        # Like pandas' rolling windows, a window is labelled with its right
+        # edge.
+        return pd.DatetimeIndex(self.start + self.bucket *
+                                (np.arange(len(self.counts)) + 1))
+
+    @staticmethod
+    def _rolling_sum(x: np.ndarray, n: int) -> np.ndarray:
+        # The sum of every n consecutive rows of x. The first n - 1 windows
+        # are partial.
+        cumulative = np.cumsum(x, axis=0)
+        cumulative[n:] = cumulative[n:] - cumulative[:-n]
+        return cumulative
+
+    def rolling_count(self, window: Window) -> pd.Series:
+        n = self._num_buckets(window)
+        return pd.Series(self._rolling_sum(self.counts, n),
+                         index=self._index())
+
+    def throughput(self, window: Window, trim: bool = False) -> pd.Series:
+        """
+        throughput returns the number of requests per second started in every
+        window. Like pd_util.throughput, if `trim` is true, the first, partial
+        windows are dropped.
+        """
+        n = self._num_buckets(window)
+        tput = (self.rolling_count(window) /
+                pd.Timedelta(window).total_seconds())
+        return tput.iloc[n - 1:] if trim else tput
+
+    def rolling_max(self, window: Window) -> pd.Series:
+        n = self._num_buckets(window)
+        return pd.Series(self.maxes, index=self._index()).rolling(
+            n, min_periods=1).max()
+
+    def rolling_quantile(self, q: float, window: Window) -> pd.Series:
+        n = self._num_buckets(window)
+        histograms = self._rolling_sum(self.histograms, n)
+        cumulative = np.cumsum(histograms, axis=1)
+        totals = cumulative[:, -1]
+        bins = np.argmax(cumulative >= (q * totals)[:, np.newaxis], axis=1)
+        quantiles = np.where(totals > 0, self.bin_values[bins], np.nan)
+        return pd.Series(quantiles, index=self._index())
+
+    def rolling_median(self, window: Window) -> pd.Series:
+        return self.rolling_quantile(0.5, window)
+
+
+def throughput(timestamps: pd.Series,
+               window: Window,
+               bucket: Window = '10ms',
+               trim: bool = False) -> pd.Series:
+    """
+    throughput is a bucketed version of pd_util.throughput. It returns the
+    number of timestamps per second in `window` sized windows, computed every
+    `bucket`.
+    """
+    index = pd.DatetimeIndex(timestamps.values)
+    buckets = LatencyBuckets.from_series(pd.Series(np.zeros(len(index)),
+                                                   index=index),
+                                         bucket=bucket)
+    return buckets.throughput(window, trim=trim)
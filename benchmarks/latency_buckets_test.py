@@ -0,0 +1,71 @@
+from .latency_buckets import LatencyBuckets
+from . import latency_buckets
+import numpy as np
+import os
+import pandas as pd
+import tempfile
+import unittest
+
+
+def _series(latencies_ms, period_ms=1):
+    index = pd.date_range('2020-01-01', periods=len(latencies_ms),
+                          freq=f'{period_ms}ms')
+    return pd.Series(latencies_ms, index=index, dtype=float)
+
+
+class LatencyBucketsTest(unittest.TestCase):
+    def test_rolling_count_and_throughput(self) -> None:
+        buckets = LatencyBuckets.from_series(_series(np.ones(2000)))
+        count = buckets.rolling_count('1000ms')
+        self.assertEqual(len(count), 200)
+        self.assertEqual(count.iloc[0], 10)
+        self.assertEqual(count.iloc[-1], 1000)
+
+        tput = buckets.throughput('1000ms', trim=True)
+        self.assertEqual(len(tput), 101)
+        self.assertTrue((tput == 1000).all())
+
+    def test_module_throughput(self) -> None:
+        start = pd.Series(pd.date_range('2020-01-01', periods=500, freq='2ms'))
+        tput = latency_buckets.throughput(start, '100ms', trim=True)
+        self.assertTrue((tput == 500).all())
+
+    def test_rolling_quantiles_match_pandas(self) -> None:
+        rng = np.random.RandomState(0)
+        s = _series(rng.lognormal(mean=1, sigma=0.5, size=5000))
+        buckets = LatencyBuckets.from_series(s, precision=0.01)
+        for q in [0.5, 0.9, 0.99]:
+            expected = s.rolling('1000ms').quantile(q)
+            actual = buckets.rolling_quantile(q, '1000ms').iloc[100:]
+            # A bucketed window ending at t holds the requests that started
+            # before t, so it matches pandas' window at t - 1ms. We only
+            # compare full windows.
+            expected = expected[actual.index - pd.Timedelta('1ms')]
+            error = np.abs(actual.values - expected.values) / expected.values
+            self.assertLess(error.max(), 0.02)
+
+    def test_rolling_max(self) -> None:
+        latencies = np.ones(100)
+        latencies[50] = 10
+        buckets = LatencyBuckets.from_series(_series(latencies))
+        m = buckets.rolling_max('20ms')
+        self.assertEqual(list(m), [1] * 5 + [10] * 2 + [1] * 3)
+
+    def test_bad_window(self) -> None:
+        buckets = LatencyBuckets.from_series(_series(np.ones(100)))
+        with self.assertRaises(ValueError):
+            buckets.rolling_count('15ms')
+
+    def test_save_and_load(self) -> None:
+        buckets = LatencyBuckets.from_series(_series(np.arange(1, 101)))
+        with tempfile.TemporaryDirectory() as d:
+            filename = os.path.join(d, 'buckets.npz')
+            buckets.save(filename)
+            loaded = LatencyBuckets.load(filename)
+        self.assertEqual(loaded.start, buckets.start)
+        self.assertEqual(loaded.bucket, buckets.bucket)
+        np.testing.assert_array_equal(loaded.histograms, buckets.histograms)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# A load describes how benchmark clients issue requests. See
+# frankenpaxos.Load on the JVM for the details.
+#
+# With a ClosedLoop load, every client issues a request and waits for the
+# response before issuing another. With an OpenLoop load, requests arrive at a
+# fixed target rate regardless of how quickly the system responds, and
+# latencies are measured from the time a request was supposed to be sent. Open
+# loop loads expose queueing delay that closed loop loads hide, so sweeping the
+# target rate of an open loop load produces a true latency-throughput curve.
+
+from . import benchmark
+from . import proto_util
+from typing import List, NamedTuple, Union
+import enum
+
+
+class ArrivalProcess(enum.Enum):
+    # Inter-arrival times are exponentially distributed.
+    POISSON = 0
+    # Requests are evenly spaced.
+    CONSTANT = 1
+
+
+class ClosedLoop(NamedTuple):
+    # We put the name here so that it appears in benchmark outputs.
+    name: str = 'ClosedLoop'
+
+    def to_proto(self) -> proto_util.Message:
+        return {'closed_loop': {}}
+
+
+class OpenLoop(NamedTuple):
+    # The target number of operations per second summed across all client
+    # processes. Every client process issues an equal share.
+    target_ops_per_second: float
+    arrival_process: ArrivalProcess = ArrivalProcess.POISSON
+    # We put the name here so that it appears in benchmark outputs.
+    name: str = 'OpenLoop'
+
+    def to_proto(self) -> proto_util.Message:
+        return {
+            'open_loop': {
+                'target_ops_per_second': float(self.target_ops_per_second),
+                'arrival_process': self.arrival_process,
+            }
+        }
+
+
+Load = Union[ClosedLoop, OpenLoop]
+
+
+def write_client_load(bench: benchmark.BenchmarkDirectory, load: Load,
+                      num_client_procs: int) -> str:
+    """
+    write_client_load writes the load that every one of `num_client_procs`
+    client processes should run and returns its filename. An open loop load's
+    target rate is divided evenly between the client processes.
+    """
+    if isinstance(load, OpenLoop):
+        load = load._replace(target_ops_per_second=load.target_ops_per_second /
+                             num_client_procs)
+    return bench.write_string('load.pbtxt',
+                              proto_util.message_to_pbtext(load.to_proto()))
+
+
+def open_loop_sweep(
+        target_ops_per_second: List[float],
+        arrival_process: ArrivalProcess = ArrivalProcess.POISSON
+) -> List[OpenLoop]:
+    """
+    open_loop_sweep returns an open loop load for every target rate, sorted by
+    rate. Running a suite over these loads produces a latency-throughput curve.
+    """
+    return [
+        OpenLoop(target_ops_per_second=rate, arrival_process=arrival_process)
+        for rate in sorted(target_ops_per_second)
+    ]
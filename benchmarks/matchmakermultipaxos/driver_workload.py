@@ -1,3 +1,4 @@
+from .. import chaos_schedule
 from .. import proto_util
 from typing import List, NamedTuple, Union
 
@@ -173,6 +174,64 @@ class Chaos(NamedTuple):
         }
 
 
+# RandomChaos is a random schedule of leader changes, reconfigurations, and
+# failures. See chaos_schedule.py.
+class RandomChaos(NamedTuple):
+    seed: int
+    f: int
+    num_leaders: int
+    num_acceptors: int
+    delay_ms: int
+    duration_ms: int
+    mean_period_ms: int
+    min_period_ms: int
+    max_failures: int
+    recover_delay_ms: int
+    num_matchmakers: int
+    leader_change_weight: float = 1.0
+    reconfiguration_weight: float = 1.0
+    matchmaker_reconfiguration_weight: float = 1.0
+    leader_failure_weight: float = 1.0
+    acceptor_failure_weight: float = 1.0
+    matchmaker_failure_weight: float = 1.0
+    # We put the name here so that it appears in benchmark outputs.
+    name: str = 'RandomChaos'
+
+    def schedule(self) -> List[chaos_schedule.ChaosEvent]:
+        return chaos_schedule.random_schedule(
+            seed=self.seed,
+            f=self.f,
+            num_leaders=self.num_leaders,
+            num_acceptors=self.num_acceptors,
+            num_matchmakers=self.num_matchmakers,
+            weights={
+                chaos_schedule.LEADER_CHANGE: self.leader_change_weight,
+                chaos_schedule.RECONFIGURATION: self.reconfiguration_weight,
+                chaos_schedule.MATCHMAKER_RECONFIGURATION:
+                    self.matchmaker_reconfiguration_weight,
+                chaos_schedule.LEADER_FAILURE: self.leader_failure_weight,
+                chaos_schedule.ACCEPTOR_FAILURE: self.acceptor_failure_weight,
+                chaos_schedule.MATCHMAKER_FAILURE:
+                    self.matchmaker_failure_weight,
+            },
+            delay_ms=self.delay_ms,
+            duration_ms=self.duration_ms,
+            mean_period_ms=self.mean_period_ms,
+            min_period_ms=self.min_period_ms,
+            max_failures=self.max_failures,
+            recover_delay_ms=self.recover_delay_ms)
+
+    def to_proto(self) -> proto_util.Message:
+        return {
+            'random_chaos': {
+                'seed': self.seed,
+                'event': [
+                    chaos_schedule.event_to_proto(e) for e in self.schedule()
+                ],
+            }
+        }
+
+
 DriverWorkload = Union[DoNothing, RepeatedLeaderReconfiguration,
                        LeaderReconfiguration, MatchmakerReconfiguration,
-                       LeaderFailure, Chaos]
+                       LeaderFailure, Chaos, RandomChaos]
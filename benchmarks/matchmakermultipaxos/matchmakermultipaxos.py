@@ -1,14 +1,18 @@
 from . import driver_workload
+from .. import affinity
 from .. import benchmark
+from .. import cds
 from .. import cluster
 from .. import host
 from .. import parser_util
 from .. import pd_util
-from .. import perf_util
 from .. import proc
 from .. import prometheus
 from .. import proto_util
+from .. import recovery
+from .. import roles
 from .. import util
+from .. import warm_pool
 from .. import workload
 from ..workload import Workload
 from .driver_workload import DriverWorkload
@@ -154,8 +158,18 @@ class Input(NamedTuple):
     # Driver options. ##########################################################
     driver_log_level: str
 
+    # Affinity. ################################################################
+    # If positive, every process is pinned to its own cpus_per_proc CPUs,
+    # preferably on a single NUMA node. See affinity.py.
+    cpus_per_proc: int = 0
 
-Output = benchmark.RecorderOutput
+
+class Output(NamedTuple):
+    # The fields of a benchmark.RecorderOutput.
+    latency: benchmark.LatencyOutput
+    start_throughput_1s: benchmark.ThroughputOutput
+    # The recovery metrics of the driver's events.
+    recovery: recovery.RecoveryOutput
 
 
 # Networks #####################################################################
@@ -246,6 +260,9 @@ class MatchmakerMultiPaxosSuite(benchmark.Suite[Input, Output]):
         super().__init__()
         self._cluster = cluster.Cluster.from_json_file(self.args()['cluster'],
                                                        self._connect)
+        self._pool = (warm_pool.WarmPool()
+                      if self.args().get('warm_jvm_pool') else None)
+
     def _connect(self, address: str) -> host.Host:
         client = paramiko.SSHClient()
         client.set_missing_host_key_policy(paramiko.client.AutoAddPolicy)
@@ -257,6 +274,15 @@ class MatchmakerMultiPaxosSuite(benchmark.Suite[Input, Output]):
 
     def run_benchmark(self, bench: benchmark.BenchmarkDirectory,
                       args: Dict[Any, Any], input: Input) -> Output:
+        launcher = roles.Launcher(
+            bench,
+            jar=args['jar'],
+            monitored=input.monitored,
+            profiled=input.profiled,
+            allocator=affinity.AffinityAllocator(bench, input.cpus_per_proc),
+            pool=self._pool,
+            jvm_flags=cds.java_flags(args))
+
         # Write config file.
         net = MatchmakerMultiPaxosNet(self._cluster, input)
         config = net.config()
@@ -265,263 +291,139 @@ class MatchmakerMultiPaxosSuite(benchmark.Suite[Input, Output]):
                            proto_util.message_to_pbtext(config))
         bench.log('Config file config.pbtxt written.')
 
-        def java(heap_size: str) -> List[str]:
-            cmd = ['java', f'-Xms{heap_size}', f'-Xmx{heap_size}']
-            if input.monitored:
-                cmd += [
-                    '-verbose:gc',
-                    '-XX:-PrintGC',
-                    '-XX:+PrintHeapAtGC',
-                    '-XX:+PrintGCDetails',
-                    '-XX:+PrintGCTimeStamps',
-                    '-XX:+PrintGCDateStamps',
-                ]
-            return cmd
-
-        # Launch acceptors.
-        acceptor_procs: List[proc.Proc] = []
-        for (i, acceptor) in enumerate(net.placement().acceptors):
-            p = bench.popen(
-                host=acceptor.host,
-                label=f'acceptor_{i}',
-                cmd=java(input.acceptor_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.matchmakermultipaxos.AcceptorMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.acceptor_log_level,
-                    '--prometheus_host',
-                    acceptor.host.ip(),
-                    '--prometheus_port',
-                    str(acceptor.port + 1) if input.monitored else '-1',
-                    '--options.phase1aDelay',
-                    '{}s'.format(input.acceptor_options
-                                      .phase1a_delay.total_seconds()),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, acceptor.host, p,
-                                           f'acceptor_{i}')
-            acceptor_procs.append(p)
-        bench.log('Acceptors started.')
-
-        # Launch matchmakers.
-        matchmaker_procs: List[proc.Proc] = []
-        for (i, matchmaker) in enumerate(net.placement().matchmakers):
-            p = bench.popen(
-                host=matchmaker.host,
-                label=f'matchmaker_{i}',
-                cmd=java(input.matchmaker_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.matchmakermultipaxos.MatchmakerMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.matchmaker_log_level,
-                    '--prometheus_host',
-                    matchmaker.host.ip(),
-                    '--prometheus_port',
-                    str(matchmaker.port + 1) if input.monitored else '-1',
-                    '--options.matchRequestDelay',
-                    '{}s'.format(input.matchmaker_options
-                                      .match_request_delay.total_seconds()),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, matchmaker.host, p,
-                                           f'matchmaker_{i}')
-            matchmaker_procs.append(p)
-        bench.log('Matchmakers started.')
-
-        # Launch reconfigurers.
-        reconfigurer_procs: List[proc.Proc] = []
-        for (i, reconfigurer) in enumerate(net.placement().reconfigurers):
-            p = bench.popen(
-                host=reconfigurer.host,
-                label=f'reconfigurer_{i}',
-                cmd=java(input.reconfigurer_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.matchmakermultipaxos.ReconfigurerMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.reconfigurer_log_level,
-                    '--prometheus_host',
-                    reconfigurer.host.ip(),
-                    '--prometheus_port',
-                    str(reconfigurer.port + 1) if input.monitored else '-1',
-                    '--options.resendStopsPeriod',
-                    '{}s'.format(input.reconfigurer_options.resend_stops_period.
-                                 total_seconds()),
-                    '--options.resendBootstrapsPeriod',
-                    '{}s'.format(input.reconfigurer_options.
-                                 resend_bootstraps_period.total_seconds()),
-                    '--options.resendMatchPhase1asPeriod',
-                    '{}s'.format(input.reconfigurer_options.
-                                 resend_match_phase1as_period.total_seconds()),
-                    '--options.resendMatchPhase2asPeriod',
-                    '{}s'.format(input.reconfigurer_options.
-                                 resend_match_phase2as_period.total_seconds()),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, reconfigurer.host, p,
-                                           f'reconfigurer_{i}')
-            reconfigurer_procs.append(p)
-        bench.log('Reconfigurers started.')
-
-        # Launch replicas.
-        replica_procs: List[proc.Proc] = []
-        for (i, replica) in enumerate(net.placement().replicas):
-            p = bench.popen(
-                host=replica.host,
-                label=f'replica_{i}',
-                cmd=java(input.replica_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.matchmakermultipaxos.ReplicaMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.replica_log_level,
-                    '--state_machine',
-                    input.state_machine,
-                    '--prometheus_host',
-                    replica.host.ip(),
-                    '--prometheus_port',
-                    str(replica.port + 1) if input.monitored else '-1',
-                    '--options.logGrowSize',
-                    str(input.replica_options.log_grow_size),
-                    '--options.unsafeDontUseClientTable',
-                    str(input.replica_options.unsafe_dont_use_client_table),
-                    '--options.recoverLogEntryMinPeriod',
-                    '{}s'.format(input.replica_options.
-                                 recover_log_entry_min_period.total_seconds()),
-                    '--options.recoverLogEntryMaxPeriod',
-                    '{}s'.format(input.replica_options.
-                                 recover_log_entry_max_period.total_seconds()),
-                    '--options.unsafeDontRecover',
-                    str(input.replica_options.unsafe_dont_recover),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, replica.host, p,
-                                           f'replica_{i}')
-            replica_procs.append(p)
-        bench.log('Replicas started.')
-
-        # Launch leaders.
-        leader_procs: List[proc.Proc] = []
-        for (i, leader) in enumerate(net.placement().leaders):
-            p = bench.popen(
-                host=leader.host,
-                label=f'leader_{i}',
-                cmd=java(input.leader_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.matchmakermultipaxos.LeaderMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.leader_log_level,
-                    '--prometheus_host',
-                    leader.host.ip(),
-                    '--prometheus_port',
-                    str(leader.port + 1) if input.monitored else '-1',
-                    '--options.thrifty',
-                    str(input.leader_options.thrifty),
-                    '--options.resendMatchRequestsPeriod',
-                    '{}s'.format(input.leader_options.
-                                 resend_match_requests_period.total_seconds()),
-                    '--options.resendReconfigurePeriod',
-                    '{}s'.format(input.leader_options.resend_reconfigure_period.
-                                 total_seconds()),
-                    '--options.resendPhase1asPeriod',
-                    '{}s'.format(input.leader_options.resend_phase1as_period.
-                                 total_seconds()),
-                    '--options.resendPhase2asPeriod',
-                    '{}s'.format(input.leader_options.resend_phase2as_period.
-                                 total_seconds()),
-                    '--options.resendExecutedWatermarkRequestsPeriod',
-                    '{}s'.format(input.leader_options.
-                                 resend_executed_watermark_requests_period.
-                                 total_seconds()),
-                    '--options.resendPersistedPeriod',
-                    '{}s'.format(input.leader_options.resend_persisted_period.
-                                 total_seconds()),
-                    '--options.resendGarbageCollectsPeriod',
-                    '{}s'.format(
-                        input.leader_options.resend_garbage_collects_period.
-                        total_seconds()),
-                    '--options.sendChosenWatermarkEveryN',
-                    str(input.leader_options.send_chosen_watermark_every_n),
-                    '--options.stutter',
-                    str(input.leader_options.stutter),
-                    '--options.stallDuringMatchmaking',
-                    str(input.leader_options.stall_during_matchmaking),
-                    '--options.stallDuringPhase1',
-                    str(input.leader_options.stall_during_phase1),
-                    '--options.disableGc',
-                    str(input.leader_options.disable_gc),
-                    '--options.election.pingPeriod',
-                    '{}s'.format(input.leader_options.election_options.
-                                 ping_period.total_seconds()),
-                    '--options.election.noPingTimeoutMin',
-                    '{}s'.format(input.leader_options.election_options.
-                                 no_ping_timeout_min.total_seconds()),
-                    '--options.election.noPingTimeoutMax',
-                    '{}s'.format(input.leader_options.election_options.
-                                 no_ping_timeout_max.total_seconds()),
-                ],
+        # Write workload files.
+        workload_filename = bench.abspath('workload.pbtxt')
+        bench.write_string(
+            workload_filename,
+            proto_util.message_to_pbtext(input.workload.to_proto()))
+        driver_workload_filename = bench.abspath('driver_workload.pbtxt')
+        bench.write_string(
+            driver_workload_filename,
+            proto_util.message_to_pbtext(input.driver_workload.to_proto()))
+
+        # Describe roles.
+        def role(name: str,
+                 main_class: str,
+                 heap_size: str,
+                 procs: List[roles.RoleProc],
+                 log_level: str,
+                 options: Any = None,
+                 flags: List[str] = [],
+                 depends_on: List[str] = [],
+                 exports_metrics: bool = True,
+                 poolable: bool = True,
+                 profiled: bool = True) -> roles.Role:
+            return roles.Role(
+                name=name,
+                main_class=f'frankenpaxos.matchmakermultipaxos.{main_class}',
+                heap_size=heap_size,
+                procs=procs,
+                flags=['--config', config_filename, '--log_level', log_level]
+                + flags +
+                (roles.options_flags(options) if options is not None else []),
+                depends_on=depends_on,
+                exports_metrics=exports_metrics,
+                poolable=poolable,
+                profiled=profiled,
             )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, leader.host, p, f'leader_{i}')
-            leader_procs.append(p)
-        bench.log('Leaders started.')
+
+        server_roles = [
+            role('acceptor', 'AcceptorMain', input.acceptor_jvm_heap_size,
+                 roles.indexed('acceptor', net.placement().acceptors),
+                 input.acceptor_log_level, input.acceptor_options),
+            role('matchmaker', 'MatchmakerMain',
+                 input.matchmaker_jvm_heap_size,
+                 roles.indexed('matchmaker', net.placement().matchmakers),
+                 input.matchmaker_log_level, input.matchmaker_options),
+            role('reconfigurer', 'ReconfigurerMain',
+                 input.reconfigurer_jvm_heap_size,
+                 roles.indexed('reconfigurer', net.placement().reconfigurers),
+                 input.reconfigurer_log_level, input.reconfigurer_options),
+            role('replica', 'ReplicaMain', input.replica_jvm_heap_size,
+                 roles.indexed('replica', net.placement().replicas),
+                 input.replica_log_level, input.replica_options,
+                 flags=['--state_machine', input.state_machine]),
+            # Leaders are launched after everything else.
+            role('leader', 'LeaderMain', input.leader_jvm_heap_size,
+                 roles.indexed('leader', net.placement().leaders),
+                 input.leader_log_level, input.leader_options,
+                 depends_on=['acceptor', 'matchmaker', 'reconfigurer',
+                             'replica']),
+        ]
+
+        # TODO(mwhittaker): For now, we don't run clients with large heaps and
+        # verbose garbage collection because they are all colocated on one
+        # machine.
+        client_role = role(
+            'client', 'ClientMain', input.client_jvm_heap_size,
+            [
+                roles.RoleProc(
+                    label=f'client_{i}',
+                    endpoint=client,
+                    flags=[
+                        '--host', client.host.ip(),
+                        '--port', str(client.port),
+                        '--output_file_prefix', bench.abspath(f'client_{i}'),
+                    ])
+                for (i, client) in enumerate(net.placement().clients)
+            ],
+            input.client_log_level,
+            input.client_options,
+            flags=[
+                '--warmup_duration',
+                f'{input.warmup_duration.total_seconds()}s',
+                '--warmup_timeout',
+                f'{input.warmup_timeout.total_seconds()}s',
+                '--warmup_sleep',
+                f'{input.warmup_sleep.total_seconds()}s',
+                '--num_warmup_clients',
+                f'{input.num_warmup_clients_per_proc}',
+                '--duration',
+                f'{input.duration.total_seconds()}s',
+                '--timeout',
+                f'{input.timeout.total_seconds()}s',
+                '--num_clients',
+                f'{input.num_clients_per_proc}',
+                '--workload',
+                f'{workload_filename}',
+            ],
+            # Clients exit when they finish, so they can't be reused.
+            poolable=False)
+
+        driver = net.placement().driver
+        driver_role = role(
+            'driver', 'DriverMain', input.driver_jvm_heap_size,
+            [
+                roles.RoleProc(label='driver',
+                               endpoint=driver,
+                               flags=[
+                                   '--host', driver.host.ip(),
+                                   '--port', str(driver.port),
+                               ])
+            ],
+            input.driver_log_level,
+            flags=[
+                '--driver_workload',
+                f'{driver_workload_filename}',
+                '--output_file_prefix',
+                bench.abspath('driver'),
+            ],
+            exports_metrics=False,
+            # The driver's workload starts when it does, so it can't be
+            # reused either.
+            poolable=False,
+            profiled=False)
+
+        # Launch servers.
+        launcher.launch(server_roles)
+        bench.log('Servers started.')
 
         # Launch Prometheus.
         if input.monitored:
             prometheus_config = prometheus.prometheus_config(
-                int(input.prometheus_scrape_interval.total_seconds() * 1000), {
-                    'matchmakermultipaxos_client': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().clients
-                    ],
-                    'matchmakermultipaxos_leader': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().leaders
-                    ],
-                    'matchmakermultipaxos_matchmaker': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().matchmakers
-                    ],
-                    'matchmakermultipaxos_reconfigurer': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().reconfigurers
-                    ],
-                    'matchmakermultipaxos_acceptor': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().acceptors
-                    ],
-                    'matchmakermultipaxos_replica': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().replicas
-                    ],
-                })
+                int(input.prometheus_scrape_interval.total_seconds() * 1000),
+                roles.prometheus_jobs('matchmakermultipaxos',
+                                      [client_role] + server_roles))
             bench.write_string('prometheus.yml', yaml.dump(prometheus_config))
             prometheus_server = bench.popen(
                 host=net.placement().clients[0].host,
@@ -539,96 +441,19 @@ class MatchmakerMultiPaxosSuite(benchmark.Suite[Input, Output]):
         bench.log('Client lag ended.')
 
         # Launch clients.
-        workload_filename = bench.abspath('workload.pbtxt')
-        bench.write_string(
-            workload_filename,
-            proto_util.message_to_pbtext(input.workload.to_proto()))
-
-        client_procs: List[proc.Proc] = []
-        for (i, client) in enumerate(net.placement().clients):
-            p = bench.popen(
-                host=client.host,
-                label=f'client_{i}',
-                # TODO(mwhittaker): For now, we don't run clients with large
-                # heaps and verbose garbage collection because they are all
-                # colocated on one machine.
-                cmd=java(input.client_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.matchmakermultipaxos.ClientMain',
-                    '--host',
-                    client.host.ip(),
-                    '--port',
-                    str(client.port),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.client_log_level,
-                    '--prometheus_host',
-                    client.host.ip(),
-                    '--prometheus_port',
-                    str(client.port + 1) if input.monitored else '-1',
-                    '--warmup_duration',
-                    f'{input.warmup_duration.total_seconds()}s',
-                    '--warmup_timeout',
-                    f'{input.warmup_timeout.total_seconds()}s',
-                    '--warmup_sleep',
-                    f'{input.warmup_sleep.total_seconds()}s',
-                    '--num_warmup_clients',
-                    f'{input.num_warmup_clients_per_proc}',
-                    '--duration',
-                    f'{input.duration.total_seconds()}s',
-                    '--timeout',
-                    f'{input.timeout.total_seconds()}s',
-                    '--num_clients',
-                    f'{input.num_clients_per_proc}',
-                    '--workload',
-                    f'{workload_filename}',
-                    '--output_file_prefix',
-                    bench.abspath(f'client_{i}'),
-                    '--options.resendClientRequestPeriod',
-                    '{}s'.format(input.client_options.
-                                 resend_client_request_period.total_seconds()),
-                    '--options.stutter',
-                    str(input.client_options.stutter),
-                ])
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, client.host, p, f'client_{i}')
-            client_procs.append(p)
+        client_procs = launcher.launch([client_role])['client']
         bench.log(f'Clients started and running for {input.duration}.')
 
         # Launch driver.
-        driver_workload_filename = bench.abspath('driver_workload.pbtxt')
-        bench.write_string(
-            driver_workload_filename,
-            proto_util.message_to_pbtext(input.driver_workload.to_proto()))
-
-        driver_proc: proc.Proc = bench.popen(
-            host=net.placement().driver.host,
-            label=f'driver',
-            cmd=java(input.driver_jvm_heap_size) + [
-                '-cp',
-                os.path.abspath(args['jar']),
-                'frankenpaxos.matchmakermultipaxos.DriverMain',
-                '--host',
-                net.placement().driver.host.ip(),
-                '--port',
-                str(net.placement().driver.port),
-                '--config',
-                config_filename,
-                '--log_level',
-                input.driver_log_level,
-                '--driver_workload',
-                f'{driver_workload_filename}',
-            ])
+        launcher.launch([driver_role])
         bench.log('Driver started')
 
         # Wait for clients to finish and then terminate leaders and acceptors.
         for p in client_procs:
             p.wait()
-        for p in (leader_procs + matchmaker_procs + reconfigurer_procs +
-                  acceptor_procs + replica_procs + [driver_proc]):
-            p.kill()
+        launcher.kill([r.name for r in server_roles] + ['driver'])
+        if input.monitored:
+            prometheus_server.kill()
         bench.log('Clients finished and processes terminated.')
 
         # Client i writes results to `client_i_data.csv`.
@@ -636,11 +461,21 @@ class MatchmakerMultiPaxosSuite(benchmark.Suite[Input, Output]):
             bench.abspath(f'client_{i}_data.csv')
             for i in range(input.num_client_procs)
         ]
-        return benchmark.parse_recorder_data(
+        correct_coordinated_omission = args.get('correct_coordinated_omission',
+                                                False)
+        df = benchmark.wrangle_recorder_data(
             bench,
             client_csvs,
             drop_prefix=datetime.timedelta(seconds=0),
-            save_data=True)
+            save_data=True,
+            label_files=correct_coordinated_omission)
+        recorder_output = benchmark.recorder_output(
+            df, correct_coordinated_omission)
+        return Output(
+            latency=recorder_output.latency,
+            start_throughput_1s=recorder_output.start_throughput_1s,
+            recovery=recovery.driver_recovery_output(bench, df),
+        )
 
 
 def get_parser() -> argparse.ArgumentParser:
@@ -0,0 +1,145 @@
+from .matchmakermultipaxos import *
+
+
+def main(args) -> None:
+    class RandomChaosSuite(MatchmakerMultiPaxosSuite):
+        def args(self) -> Dict[Any, Any]:
+            return vars(args)
+
+        def inputs(self) -> Collection[Input]:
+            return [
+                Input(
+                    f = 1,
+                    num_client_procs = num_client_procs,
+                    num_warmup_clients_per_proc = num_clients_per_proc,
+                    num_clients_per_proc = num_clients_per_proc,
+                    num_leaders = 2,
+                    num_matchmakers = 6,
+                    num_reconfigurers = 2,
+                    num_acceptors = 6,
+                    num_replicas = 3,
+                    client_jvm_heap_size = '15g',
+                    leader_jvm_heap_size = '15g',
+                    matchmaker_jvm_heap_size = '15g',
+                    reconfigurer_jvm_heap_size = '15g',
+                    acceptor_jvm_heap_size = '15g',
+                    replica_jvm_heap_size = '15g',
+                    driver_jvm_heap_size = '15g',
+                    warmup_duration = datetime.timedelta(seconds=10),
+                    warmup_timeout = datetime.timedelta(seconds=15),
+                    warmup_sleep = datetime.timedelta(seconds=0),
+                    duration = datetime.timedelta(seconds=55),
+                    timeout = datetime.timedelta(seconds=60),
+                    client_lag = datetime.timedelta(seconds=5),
+                    state_machine = 'Noop',
+                    workload = workload.StringWorkload(size_mean=1, size_std=0),
+                    driver_workload = driver_workload.RandomChaos(
+                        seed = seed,
+                        f = 1,
+                        num_leaders = 2,
+                        num_acceptors = 6,
+                        num_matchmakers = 6,
+                        delay_ms = 10 * 1000,
+                        duration_ms = 40 * 1000,
+                        mean_period_ms = 3 * 1000,
+                        min_period_ms = 1000,
+                        max_failures = args.max_failures,
+                        recover_delay_ms = 5 * 1000,
+                    ),
+                    profiled = args.profile,
+                    monitored = args.monitor,
+                    prometheus_scrape_interval =
+                        datetime.timedelta(milliseconds=200),
+                    leader_options = LeaderOptions(
+                        resend_match_requests_period = \
+                            datetime.timedelta(milliseconds=1),
+                        resend_reconfigure_period = \
+                            datetime.timedelta(milliseconds=1),
+                        resend_phase1as_period = \
+                            datetime.timedelta(milliseconds=1),
+                        resend_phase2as_period = \
+                            datetime.timedelta(milliseconds=1),
+                        resend_executed_watermark_requests_period = \
+                            datetime.timedelta(milliseconds=1),
+                        resend_persisted_period = \
+                            datetime.timedelta(milliseconds=1),
+                        resend_garbage_collects_period = \
+                            datetime.timedelta(milliseconds=1),
+                        send_chosen_watermark_every_n = 100,
+                        stutter = 1000,
+                        election_options = ElectionOptions(
+                            ping_period = datetime.timedelta(seconds=1),
+                            no_ping_timeout_min = \
+                                datetime.timedelta(seconds=5),
+                            no_ping_timeout_max = \
+                                datetime.timedelta(seconds=5),
+                        ),
+                    ),
+                    leader_log_level = args.log_level,
+                    matchmaker_options = MatchmakerOptions(),
+                    matchmaker_log_level = args.log_level,
+                    reconfigurer_options = ReconfigurerOptions(
+                        resend_stops_period = \
+                            datetime.timedelta(milliseconds=100),
+                        resend_bootstraps_period = \
+                            datetime.timedelta(milliseconds=100),
+                        resend_match_phase1as_period = \
+                            datetime.timedelta(milliseconds=100),
+                        resend_match_phase2as_period = \
+                            datetime.timedelta(milliseconds=100),
+                    ),
+                    reconfigurer_log_level = args.log_level,
+                    acceptor_options = AcceptorOptions(),
+                    acceptor_log_level = args.log_level,
+                    replica_options = ReplicaOptions(
+                        log_grow_size = 5000,
+                        unsafe_dont_use_client_table = False,
+                        recover_log_entry_min_period = \
+                            datetime.timedelta(seconds=120),
+                        recover_log_entry_max_period = \
+                            datetime.timedelta(seconds=240),
+                        unsafe_dont_recover = False,
+                    ),
+                    replica_log_level = args.log_level,
+                    client_options = ClientOptions(
+                        resend_client_request_period = \
+                            datetime.timedelta(milliseconds=10),
+                        stutter = 1000,
+                    ),
+                    client_log_level = args.log_level,
+                    driver_log_level = args.log_level,
+                )
+                for seed in range(args.num_seeds)
+                for (num_client_procs, num_clients_per_proc) in [(4, 2)]
+            ]
+
+        def summary(self, input: Input, output: Output) -> str:
+            return str({
+                'seed': input.driver_workload.seed,
+                'latency.median_ms': f'{output.latency.median_ms:.6}',
+                'start_throughput_1s.p90': f'{output.start_throughput_1s.p90:.6}',
+                'recovery.max_time_to_recover_ms':
+                    f'{output.recovery.max_time_to_recover_ms:.6}',
+            })
+
+    suite = RandomChaosSuite()
+    with benchmark.SuiteDirectory(args.suite_directory,
+                                  'matchmaker_multipaxos_random_chaos') as dir:
+        suite.run_suite(dir)
+
+
+def get_random_chaos_parser() -> argparse.ArgumentParser:
+    parser = get_parser()
+    parser.add_argument('--num_seeds',
+                        type=int,
+                        default=10,
+                        help='Number of random chaos schedules to run')
+    parser.add_argument('--max_failures',
+                        type=int,
+                        default=3,
+                        help='Maximum number of failures per schedule')
+    return parser
+
+
+if __name__ == '__main__':
+    main(get_random_chaos_parser().parse_args())
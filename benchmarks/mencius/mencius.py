@@ -1,13 +1,16 @@
+from .. import affinity
 from .. import benchmark
+from .. import cds
 from .. import cluster
 from .. import host
 from .. import parser_util
 from .. import pd_util
-from .. import perf_util
 from .. import proc
 from .. import prometheus
 from .. import proto_util
+from .. import roles
 from .. import util
+from .. import warm_pool
 from .. import workload
 from ..workload import Workload
 from typing import Any, Callable, Collection, Dict, List, NamedTuple, Optional
@@ -142,6 +145,11 @@ class Input(NamedTuple):
     client_options: ClientOptions
     client_log_level: str
 
+    # Affinity. ################################################################
+    # If positive, every process is pinned to its own cpus_per_proc CPUs,
+    # preferably on a single NUMA node. See affinity.py.
+    cpus_per_proc: int = 0
+
 
 Output = benchmark.RecorderOutput
 
@@ -291,6 +299,11 @@ class MenciusNet:
 
 # Suite ########################################################################
 class MenciusSuite(benchmark.Suite[Input, Output]):
+    def __init__(self) -> None:
+        super().__init__()
+        self._pool = (warm_pool.WarmPool()
+                      if self.args().get('warm_jvm_pool') else None)
+
     def run_benchmark(self, bench: benchmark.BenchmarkDirectory,
                       args: Dict[Any, Any], input: Input) -> Output:
         net = MenciusNet(args['cluster'], args['identity_file'], input)
@@ -299,6 +312,15 @@ class MenciusSuite(benchmark.Suite[Input, Output]):
     def _run_benchmark(self, bench: benchmark.BenchmarkDirectory,
                        args: Dict[Any, Any], input: Input,
                        net: MenciusNet) -> Output:
+        launcher = roles.Launcher(
+            bench,
+            jar=args['jar'],
+            monitored=input.monitored,
+            profiled=input.profiled,
+            allocator=affinity.AffinityAllocator(bench, input.cpus_per_proc),
+            pool=self._pool,
+            jvm_flags=cds.java_flags(args))
+
         # Write config file.
         config = net.config()
         config_filename = bench.abspath('config.pbtxt')
@@ -306,278 +328,128 @@ class MenciusSuite(benchmark.Suite[Input, Output]):
                            proto_util.message_to_pbtext(config))
         bench.log('Config file config.pbtxt written.')
 
-        # If we're monitoring the code, run garbage collection verbosely.
-        def java(heap_size: str) -> List[str]:
-            cmd = ['java', f'-Xms{heap_size}', f'-Xmx{heap_size}']
-            if input.monitored:
-                cmd += [
-                    '-verbose:gc',
-                    '-XX:-PrintGC',
-                    '-XX:+PrintHeapAtGC',
-                    '-XX:+PrintGCDetails',
-                    '-XX:+PrintGCTimeStamps',
-                    '-XX:+PrintGCDateStamps',
-                ]
-            return cmd
-
-        # Launch batchers.
-        batcher_procs: List[proc.Proc] = []
-        for (i, batcher) in enumerate(net.placement().batchers):
-            p = bench.popen(
-                host=batcher.host,
-                label=f'batcher_{i}',
-                cmd=java(input.batcher_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.mencius.BatcherMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.batcher_log_level,
-                    '--prometheus_host',
-                    batcher.host.ip(),
-                    '--prometheus_port',
-                    str(batcher.port + 1) if input.monitored else '-1',
-                    '--options.batchSize',
-                    str(input.batcher_options.batch_size),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, batcher.host, p,
-                                           f'batcher_{i}')
-            batcher_procs.append(p)
-        bench.log('Batchers started.')
-
-        # Launch proxy_leaders.
-        proxy_leader_procs: List[proc.Proc] = []
-        for (i, proxy_leader) in enumerate(net.placement().proxy_leaders):
-            p = bench.popen(
-                host=proxy_leader.host,
-                label=f'proxy_leader_{i}',
-                cmd=java(input.proxy_leader_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.mencius.ProxyLeaderMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.proxy_leader_log_level,
-                    '--prometheus_host',
-                    proxy_leader.host.ip(),
-                    '--prometheus_port',
-                    str(proxy_leader.port + 1) if input.monitored else '-1',
-                    '--options.flushPhase2asEveryN',
-                    str(input.proxy_leader_options.flush_phase2as_every_n),
-                ],
+        # Write workload file.
+        workload_filename = bench.abspath('workload.pbtxt')
+        bench.write_string(
+            workload_filename,
+            proto_util.message_to_pbtext(input.workload.to_proto()))
+
+        # Describe roles.
+        def role(name: str,
+                 main_class: str,
+                 heap_size: str,
+                 procs: List[roles.RoleProc],
+                 log_level: str,
+                 options: Any,
+                 flags: List[str] = [],
+                 depends_on: List[str] = [],
+                 poolable: bool = True) -> roles.Role:
+            return roles.Role(
+                name=name,
+                main_class=f'frankenpaxos.mencius.{main_class}',
+                heap_size=heap_size,
+                procs=procs,
+                flags=['--config', config_filename, '--log_level', log_level]
+                + flags + roles.options_flags(options),
+                depends_on=depends_on,
+                poolable=poolable,
             )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, proxy_leader.host, p,
-                                           f'proxy_leader_{i}')
-            proxy_leader_procs.append(p)
-        bench.log('ProxyLeaders started.')
-
-        # Launch acceptors.
-        acceptor_procs: List[proc.Proc] = []
-        for (leader_group_index,
-             leader_group) in enumerate(net.placement().acceptors):
+
+        # Acceptors are grouped by leader group and then by acceptor group.
+        acceptor_procs = [
+            roles.RoleProc(
+                label=f'acceptor_{leader_group_index}_'
+                f'{acceptor_group_index}_{i}',
+                endpoint=acceptor,
+                flags=[
+                    '--leader_group_index', str(leader_group_index),
+                    '--acceptor_group_index', str(acceptor_group_index),
+                    '--index', str(i),
+                ])
+            for (leader_group_index,
+                 leader_group) in enumerate(net.placement().acceptors)
             for (acceptor_group_index,
-                 acceptor_group) in enumerate(leader_group):
-                for (i, acceptor) in enumerate(acceptor_group):
-                    label = (f'acceptor_{leader_group_index}_'
-                             f'{acceptor_group_index}_{i}')
-                    p = bench.popen(
-                        host=acceptor.host,
-                        label=label,
-                        cmd=java(input.acceptor_jvm_heap_size) + [
-                            '-cp',
-                            os.path.abspath(args['jar']),
-                            'frankenpaxos.mencius.AcceptorMain',
-                            '--leader_group_index',
-                            str(leader_group_index),
-                            '--acceptor_group_index',
-                            str(acceptor_group_index),
-                            '--index',
-                            str(i),
-                            '--config',
-                            config_filename,
-                            '--log_level',
-                            input.acceptor_log_level,
-                            '--prometheus_host',
-                            acceptor.host.ip(),
-                            '--prometheus_port',
-                            str(acceptor.port + 1) if input.monitored else '-1',
-                        ],
-                    )
-                    if input.profiled:
-                        p = perf_util.JavaPerfProc(bench, acceptor.host, p,
-                                                   label)
-                    acceptor_procs.append(p)
-        bench.log('Acceptors started.')
-
-        # Launch replicas.
-        replica_procs: List[proc.Proc] = []
-        for (i, replica) in enumerate(net.placement().replicas):
-            p = bench.popen(
-                host=replica.host,
-                label=f'replica_{i}',
-                cmd=java(input.replica_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.mencius.ReplicaMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.replica_log_level,
-                    '--state_machine',
-                    input.state_machine,
-                    '--prometheus_host',
-                    replica.host.ip(),
-                    '--prometheus_port',
-                    str(replica.port + 1) if input.monitored else '-1',
-                    '--options.logGrowSize',
-                    str(input.replica_options.log_grow_size),
-                    '--options.unsafeDontUseClientTable',
-                    str(input.replica_options.unsafe_dont_use_client_table),
-                    '--options.sendChosenWatermarkEveryNEntries',
-                    str(input.replica_options.
-                        send_chosen_watermark_every_n_entries),
-                    '--options.recoverLogEntryMinPeriod',
-                    '{}s'.format(input.replica_options.
-                                 recover_log_entry_min_period.total_seconds()),
-                    '--options.recoverLogEntryMaxPeriod',
-                    '{}s'.format(input.replica_options.
-                                 recover_log_entry_max_period.total_seconds()),
-                    '--options.unsafeDontRecover',
-                    str(input.replica_options.unsafe_dont_recover),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, replica.host, p,
-                                           f'replica_{i}')
-            replica_procs.append(p)
-        bench.log('Replicas started.')
-
-        # Launch proxy_replicas.
-        proxy_replica_procs: List[proc.Proc] = []
-        for (i, proxy_replica) in enumerate(net.placement().proxy_replicas):
-            p = bench.popen(
-                host=proxy_replica.host,
-                label=f'proxy_replica_{i}',
-                cmd=java(input.proxy_replica_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.mencius.ProxyReplicaMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.proxy_replica_log_level,
-                    '--prometheus_host',
-                    proxy_replica.host.ip(),
-                    '--prometheus_port',
-                    str(proxy_replica.port + 1) if input.monitored else '-1',
-                    '--options.flushEveryN',
-                    str(input.proxy_replica_options.flush_every_n),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, proxy_replica.host, p,
-                                           f'proxy_replica_{i}')
-            proxy_replica_procs.append(p)
-        bench.log('ProxyReplicas started.')
-
-        # Launch leaders.
-        leader_procs: List[proc.Proc] = []
-        for (group_index, group) in enumerate(net.placement().leaders):
-            for (i, leader) in enumerate(group):
-                p = bench.popen(
-                    host=leader.host,
-                    label=f'leader_{group_index}_{i}',
-                    cmd=java(input.leader_jvm_heap_size) + [
-                        '-cp',
-                        os.path.abspath(args['jar']),
-                        'frankenpaxos.mencius.LeaderMain',
-                        '--group_index',
-                        str(group_index),
-                        '--index',
-                        str(i),
-                        '--config',
-                        config_filename,
-                        '--log_level',
-                        input.leader_log_level,
-                        '--prometheus_host',
-                        leader.host.ip(),
-                        '--prometheus_port',
-                        str(leader.port + 1) if input.monitored else '-1',
-                        '--options.sendHighWatermarkEveryN',
-                        str(input.leader_options.send_high_watermark_every_n),
-                        '--options.sendNoopRangeIfLaggingBy',
-                        str(input.leader_options.send_noop_range_if_lagging_by),
-                        '--options.resendPhase1asPeriod',
-                        '{}s'.format(input.leader_options.
-                                     resend_phase1as_period.total_seconds()),
-                        '--options.flushPhase2asEveryN',
-                        str(input.leader_options.flush_phase2as_every_n),
-                        '--options.election.pingPeriod',
-                        '{}s'.format(input.leader_options.election_options.
-                                     ping_period.total_seconds()),
-                        '--options.election.noPingTimeoutMin',
-                        '{}s'.format(input.leader_options.election_options.
-                                     no_ping_timeout_min.total_seconds()),
-                        '--options.election.noPingTimeoutMax',
-                        '{}s'.format(input.leader_options.election_options.
-                                     no_ping_timeout_max.total_seconds()),
-                    ],
-                )
-                if input.profiled:
-                    p = perf_util.JavaPerfProc(bench, leader.host, p,
-                                               f'leader_{group_index}_{i}')
-                leader_procs.append(p)
-        bench.log('Leaders started.')
+                 acceptor_group) in enumerate(leader_group)
+            for (i, acceptor) in enumerate(acceptor_group)
+        ]
+
+        server_roles = [
+            role('batcher', 'BatcherMain', input.batcher_jvm_heap_size,
+                 roles.indexed('batcher', net.placement().batchers),
+                 input.batcher_log_level, input.batcher_options),
+            role('proxy_leader', 'ProxyLeaderMain',
+                 input.proxy_leader_jvm_heap_size,
+                 roles.indexed('proxy_leader', net.placement().proxy_leaders),
+                 input.proxy_leader_log_level, input.proxy_leader_options),
+            role('acceptor', 'AcceptorMain', input.acceptor_jvm_heap_size,
+                 acceptor_procs, input.acceptor_log_level,
+                 input.acceptor_options),
+            role('replica', 'ReplicaMain', input.replica_jvm_heap_size,
+                 roles.indexed('replica', net.placement().replicas),
+                 input.replica_log_level, input.replica_options,
+                 flags=['--state_machine', input.state_machine]),
+            role('proxy_replica', 'ProxyReplicaMain',
+                 input.proxy_replica_jvm_heap_size,
+                 roles.indexed('proxy_replica',
+                               net.placement().proxy_replicas),
+                 input.proxy_replica_log_level, input.proxy_replica_options),
+            # Leaders are launched after everything else.
+            role('leader', 'LeaderMain', input.leader_jvm_heap_size,
+                 roles.grouped('leader', net.placement().leaders),
+                 input.leader_log_level, input.leader_options,
+                 depends_on=['batcher', 'proxy_leader', 'acceptor',
+                             'replica', 'proxy_replica']),
+        ]
+
+        # TODO(mwhittaker): For now, we don't run clients with large heaps and
+        # verbose garbage collection because they are all colocated on one
+        # machine.
+        client_role = role(
+            'client', 'ClientMain', input.client_jvm_heap_size,
+            [
+                roles.RoleProc(
+                    label=f'client_{i}',
+                    endpoint=client,
+                    flags=[
+                        '--host', client.host.ip(),
+                        '--port', str(client.port),
+                        '--output_file_prefix', bench.abspath(f'client_{i}'),
+                    ])
+                for (i, client) in enumerate(net.placement().clients)
+            ],
+            input.client_log_level,
+            input.client_options,
+            flags=[
+                '--warmup_duration',
+                f'{input.warmup_duration.total_seconds()}s',
+                '--warmup_timeout',
+                f'{input.warmup_timeout.total_seconds()}s',
+                '--warmup_sleep',
+                f'{input.warmup_sleep.total_seconds()}s',
+                '--num_warmup_clients',
+                f'{input.num_warmup_clients_per_proc}',
+                '--duration',
+                f'{input.duration.total_seconds()}s',
+                '--timeout',
+                f'{input.timeout.total_seconds()}s',
+                '--num_clients',
+                f'{input.num_clients_per_proc}',
+                '--workload',
+                f'{workload_filename}',
+            ],
+            # Clients exit when they finish, so they can't be reused.
+            poolable=False)
+
+        # Launch servers.
+        launcher.launch(server_roles)
+        bench.log('Servers started.')
 
         # Launch Prometheus.
         if input.monitored:
             prometheus_config = prometheus.prometheus_config(
-                int(input.prometheus_scrape_interval.total_seconds() * 1000), {
-                    'mencius_client': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().clients
-                    ],
-                    'mencius_batcher': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().batchers
-                    ],
-                    'mencius_leader': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for group in net.placement().leaders
-                        for e in group
-                    ],
-                    'mencius_proxy_leader': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().proxy_leaders
-                    ],
-                    'mencius_acceptor': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for leader_group in net.placement().acceptors
-                        for acceptor_group in leader_group
-                        for e in acceptor_group
-                    ],
-                    'mencius_replica': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().replicas
-                    ],
-                    'mencius_proxy_replica': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().proxy_replicas
-                    ],
-                })
+                int(input.prometheus_scrape_interval.total_seconds() * 1000),
+                roles.prometheus_jobs('mencius',
+                                      [client_role] + server_roles))
             bench.write_string('prometheus.yml', yaml.dump(prometheus_config))
             prometheus_server = bench.popen(
                 host=net.placement().clients[0].host,
@@ -595,68 +467,15 @@ class MenciusSuite(benchmark.Suite[Input, Output]):
         bench.log('Client lag ended.')
 
         # Launch clients.
-        workload_filename = bench.abspath('workload.pbtxt')
-        bench.write_string(
-            workload_filename,
-            proto_util.message_to_pbtext(input.workload.to_proto()))
-
-        client_procs: List[proc.Proc] = []
-        for (i, client) in enumerate(net.placement().clients):
-            p = bench.popen(
-                host=client.host,
-                label=f'client_{i}',
-                # TODO(mwhittaker): For now, we don't run clients with large
-                # heaps and verbose garbage collection because they are all
-                # colocated on one machine.
-                cmd=java(input.client_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.mencius.ClientMain',
-                    '--host',
-                    client.host.ip(),
-                    '--port',
-                    str(client.port),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.client_log_level,
-                    '--prometheus_host',
-                    client.host.ip(),
-                    '--prometheus_port',
-                    str(client.port + 1) if input.monitored else '-1',
-                    '--warmup_duration',
-                    f'{input.warmup_duration.total_seconds()}s',
-                    '--warmup_timeout',
-                    f'{input.warmup_timeout.total_seconds()}s',
-                    '--warmup_sleep',
-                    f'{input.warmup_sleep.total_seconds()}s',
-                    '--num_warmup_clients',
-                    f'{input.num_warmup_clients_per_proc}',
-                    '--duration',
-                    f'{input.duration.total_seconds()}s',
-                    '--timeout',
-                    f'{input.timeout.total_seconds()}s',
-                    '--num_clients',
-                    f'{input.num_clients_per_proc}',
-                    '--workload',
-                    f'{workload_filename}',
-                    '--output_file_prefix',
-                    bench.abspath(f'client_{i}'),
-                    '--options.resendClientRequestPeriod',
-                    '{}s'.format(input.client_options.
-                                 resend_client_request_period.total_seconds()),
-                ])
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, client.host, p, f'client_{i}')
-            client_procs.append(p)
+        client_procs = launcher.launch([client_role])['client']
         bench.log(f'Clients started and running for {input.duration}.')
 
         # Wait for clients to finish and then terminate leaders and acceptors.
         for p in client_procs:
             p.wait()
-        for p in (batcher_procs + leader_procs + proxy_leader_procs +
-                  acceptor_procs + replica_procs + proxy_replica_procs):
-            p.kill()
+        launcher.kill([r.name for r in server_roles])
+        if input.monitored:
+            prometheus_server.kill()
         bench.log('Clients finished and processes terminated.')
 
         # Client i writes results to `client_i_data.csv`.
@@ -668,7 +487,9 @@ class MenciusSuite(benchmark.Suite[Input, Output]):
             bench,
             client_csvs,
             drop_prefix=datetime.timedelta(seconds=0),
-            save_data=False)
+            save_data=False,
+            correct_coordinated_omission=args.get(
+                'correct_coordinated_omission', False))
 
 
 def get_parser() -> argparse.ArgumentParser:
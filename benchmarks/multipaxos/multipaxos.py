@@ -1,14 +1,20 @@
 from .. import benchmark
+from .. import affinity
+from .. import cds
 from .. import cluster
+from .. import gc_log
 from .. import host
+from .. import load_generator
 from .. import parser_util
 from .. import pd_util
-from .. import perf_util
 from .. import proc
 from .. import prometheus
 from .. import proto_util
 from .. import read_write_workload
+from .. import roles
+from .. import trace
 from .. import util
+from .. import warm_pool
 from typing import Any, Callable, Collection, Dict, List, NamedTuple, Optional
 import argparse
 import csv
@@ -171,10 +177,32 @@ class Input(NamedTuple):
     client_options: ClientOptions
     client_log_level: str
 
+    # Load. ####################################################################
+    # Inputs default to closed loop clients. See load_generator.py.
+    load: load_generator.Load = load_generator.ClosedLoop()
+
+    # Affinity. ################################################################
+    # If positive, every process is pinned to its own cpus_per_proc CPUs,
+    # preferably on a single NUMA node. See affinity.py.
+    cpus_per_proc: int = 0
+
+
+# The garbage collection pauses of every role while clients were running. See
+# gc_log.py. Unmonitored benchmarks have dummy outputs.
+class MultiPaxosGcOutput(NamedTuple):
+    batcher: gc_log.GcOutput
+    read_batcher: gc_log.GcOutput
+    leader: gc_log.GcOutput
+    proxy_leader: gc_log.GcOutput
+    acceptor: gc_log.GcOutput
+    replica: gc_log.GcOutput
+    proxy_replica: gc_log.GcOutput
+
 
 class MultiPaxosOutput(NamedTuple):
     read_output: benchmark.RecorderOutput
     write_output: benchmark.RecorderOutput
+    gc_output: MultiPaxosGcOutput
 
 
 Output = MultiPaxosOutput
@@ -294,6 +322,8 @@ class MultiPaxosSuite(benchmark.Suite[Input, Output]):
         super().__init__()
         self._cluster = cluster.Cluster.from_json_file(self.args()['cluster'],
                                                        self._connect)
+        self._pool = (warm_pool.WarmPool()
+                      if self.args().get('warm_jvm_pool') else None)
 
     def _connect(self, address: str) -> host.Host:
         client = paramiko.SSHClient()
@@ -308,18 +338,14 @@ class MultiPaxosSuite(benchmark.Suite[Input, Output]):
                       bench: benchmark.BenchmarkDirectory,
                       args: Dict[Any, Any],
                       input: Input) -> Output:
-        def java(heap_size: str) -> List[str]:
-            cmd = ['java', f'-Xms{heap_size}', f'-Xmx{heap_size}']
-            if input.monitored:
-                cmd += [
-                    '-verbose:gc',
-                    '-XX:-PrintGC',
-                    '-XX:+PrintHeapAtGC',
-                    '-XX:+PrintGCDetails',
-                    '-XX:+PrintGCTimeStamps',
-                    '-XX:+PrintGCDateStamps',
-                ]
-            return cmd
+        launcher = roles.Launcher(
+            bench,
+            jar=args['jar'],
+            monitored=input.monitored,
+            profiled=input.profiled,
+            allocator=affinity.AffinityAllocator(bench, input.cpus_per_proc),
+            pool=self._pool,
+            jvm_flags=cds.java_flags(args))
 
         # Write config file.
         net = MultiPaxosNet(self._cluster, input)
@@ -329,290 +355,133 @@ class MultiPaxosSuite(benchmark.Suite[Input, Output]):
                            proto_util.message_to_pbtext(config))
         bench.log('Config file config.pbtxt written.')
 
-        # Launch acceptors.
-        acceptor_procs: List[proc.Proc] = []
-        for (group_index, group) in enumerate(net.placement().acceptors):
-            for (i, acceptor) in enumerate(group):
-                p = bench.popen(
-                    host=acceptor.host,
-                    label=f'acceptor_{group_index}_{i}',
-                    cmd=java(input.acceptor_jvm_heap_size) + [
-                        '-cp',
-                        os.path.abspath(args['jar']),
-                        'frankenpaxos.multipaxos.AcceptorMain',
-                        '--group_index',
-                        str(group_index),
-                        '--index',
-                        str(i),
-                        '--config',
-                        config_filename,
-                        '--log_level',
-                        input.acceptor_log_level,
-                        '--prometheus_host',
-                        acceptor.host.ip(),
-                        '--prometheus_port',
-                        str(acceptor.port + 1) if input.monitored else '-1',
-                    ],
-                )
-                if input.profiled:
-                    p = perf_util.JavaPerfProc(bench, acceptor.host, p,
-                                               f'acceptor_{group_index}_{i}')
-                acceptor_procs.append(p)
-        bench.log('Acceptors started.')
-
-        # Launch batchers.
-        batcher_procs: List[proc.Proc] = []
-        for (i, batcher) in enumerate(net.placement().batchers):
-            p = bench.popen(
-                host=batcher.host,
-                label=f'batcher_{i}',
-                cmd=java(input.batcher_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.multipaxos.BatcherMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.batcher_log_level,
-                    '--prometheus_host',
-                    batcher.host.ip(),
-                    '--prometheus_port',
-                    str(batcher.port + 1) if input.monitored else '-1',
-                    '--options.batchSize',
-                    str(input.batcher_options.batch_size),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, batcher.host, p,
-                                           f'batcher_{i}')
-            batcher_procs.append(p)
-        bench.log('Batchers started.')
-
-        # Launch read_batchers.
-        read_batcher_procs: List[proc.Proc] = []
-        for (i, read_batcher) in enumerate(net.placement().read_batchers):
-            p = bench.popen(
-                host=read_batcher.host,
-                label=f'read_batcher_{i}',
-                cmd=java(input.read_batcher_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.multipaxos.ReadBatcherMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.read_batcher_log_level,
-                    '--prometheus_host',
-                    read_batcher.host.ip(),
-                    '--prometheus_port',
-                    str(read_batcher.port + 1) if input.monitored else '-1',
-                    '--options.readBatchingScheme',
-                    f'{input.read_batcher_options.read_batching_scheme}',
-                    '--options.unsafeReadAtFirstSlot',
-                    f'{input.read_batcher_options.unsafe_read_at_first_slot}',
-                    '--options.unsafeReadAtI',
-                    f'{input.read_batcher_options.unsafe_read_at_i}',
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, read_batcher.host, p,
-                                           f'read_batcher_{i}')
-            read_batcher_procs.append(p)
-        bench.log('ReadBatchers started.')
-
-        # Launch proxy_leaders.
-        proxy_leader_procs: List[proc.Proc] = []
-        for (i, proxy_leader) in enumerate(net.placement().proxy_leaders):
-            p = bench.popen(
-                host=proxy_leader.host,
-                label=f'proxy_leader_{i}',
-                cmd=java(input.proxy_leader_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.multipaxos.ProxyLeaderMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.proxy_leader_log_level,
-                    '--prometheus_host',
-                    proxy_leader.host.ip(),
-                    '--prometheus_port',
-                    str(proxy_leader.port + 1) if input.monitored else '-1',
-                    '--options.flushPhase2asEveryN',
-                    str(input.proxy_leader_options.flush_phase2as_every_n),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, proxy_leader.host, p,
-                                           f'proxy_leader_{i}')
-            proxy_leader_procs.append(p)
-        bench.log('ProxyLeaders started.')
-
-        # Launch replicas.
-        replica_procs: List[proc.Proc] = []
-        for (i, replica) in enumerate(net.placement().replicas):
-            p = bench.popen(
-                host=replica.host,
-                label=f'replica_{i}',
-                cmd=java(input.replica_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.multipaxos.ReplicaMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.replica_log_level,
-                    '--state_machine',
-                    input.state_machine,
-                    '--prometheus_host',
-                    replica.host.ip(),
-                    '--prometheus_port',
-                    str(replica.port + 1) if input.monitored else '-1',
-                    '--options.logGrowSize',
-                    str(input.replica_options.log_grow_size),
-                    '--options.unsafeDontUseClientTable',
-                    str(input.replica_options.unsafe_dont_use_client_table),
-                    '--options.sendChosenWatermarkEveryNEntries',
-                    str(input.replica_options.
-                        send_chosen_watermark_every_n_entries),
-                    '--options.recoverLogEntryMinPeriod',
-                    '{}s'.format(input.replica_options.
-                                 recover_log_entry_min_period.total_seconds()),
-                    '--options.recoverLogEntryMaxPeriod',
-                    '{}s'.format(input.replica_options.
-                                 recover_log_entry_max_period.total_seconds()),
-                    '--options.unsafeDontRecover',
-                    str(input.replica_options.unsafe_dont_recover),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, replica.host, p,
-                                           f'replica_{i}')
-            replica_procs.append(p)
-        bench.log('Replicas started.')
-
-        # Launch proxy_replicas.
-        proxy_replica_procs: List[proc.Proc] = []
-        for (i, proxy_replica) in enumerate(net.placement().proxy_replicas):
-            p = bench.popen(
-                host=proxy_replica.host,
-                label=f'proxy_replica_{i}',
-                cmd=java(input.proxy_replica_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.multipaxos.ProxyReplicaMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.proxy_replica_log_level,
-                    '--prometheus_host',
-                    proxy_replica.host.ip(),
-                    '--prometheus_port',
-                    str(proxy_replica.port + 1) if input.monitored else '-1',
-                    '--options.flushEveryN',
-                    str(input.proxy_replica_options.flush_every_n),
-                    '--options.batchFlush',
-                    str(input.proxy_replica_options.batch_flush),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, proxy_replica.host, p,
-                                           f'proxy_replica_{i}')
-            proxy_replica_procs.append(p)
-        bench.log('ProxyReplicas started.')
-
-        # Launch leaders.
-        leader_procs: List[proc.Proc] = []
-        for (i, leader) in enumerate(net.placement().leaders):
-            p = bench.popen(
-                host=leader.host,
-                label=f'leader_{i}',
-                cmd=java(input.leader_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.multipaxos.LeaderMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.leader_log_level,
-                    '--prometheus_host',
-                    leader.host.ip(),
-                    '--prometheus_port',
-                    str(leader.port + 1) if input.monitored else '-1',
-                    '--options.resendPhase1asPeriod',
-                    '{}s'.format(input.leader_options.resend_phase1as_period.
-                                 total_seconds()),
-                    '--options.flushPhase2asEveryN',
-                    str(input.leader_options.flush_phase2as_every_n),
-                    '--options.noopFlushPeriod',
-                    '{}s'.format(input.leader_options.noop_flush_period.
-                                 total_seconds()),
-                    '--options.election.pingPeriod',
-                    '{}s'.format(input.leader_options.election_options.
-                                 ping_period.total_seconds()),
-                    '--options.election.noPingTimeoutMin',
-                    '{}s'.format(input.leader_options.election_options.
-                                 no_ping_timeout_min.total_seconds()),
-                    '--options.election.noPingTimeoutMax',
-                    '{}s'.format(input.leader_options.election_options.
-                                 no_ping_timeout_max.total_seconds()),
-                ],
+        # Write client workload and load files.
+        workload_filenames = trace.write_client_workloads(
+            bench, 'workload', input.workload, input.num_client_procs)
+        read_workload_filename = bench.abspath('read_workload.pbtxt')
+        bench.write_string(
+            read_workload_filename,
+            proto_util.message_to_pbtext(input.read_workload.to_proto()))
+        write_workload_filename = bench.abspath('write_workload.pbtxt')
+        bench.write_string(
+            write_workload_filename,
+            proto_util.message_to_pbtext(input.write_workload.to_proto()))
+        load_filename = load_generator.write_client_load(
+            bench, input.load, input.num_client_procs)
+
+        # Describe roles.
+        def role(name: str,
+                 main_class: str,
+                 heap_size: str,
+                 procs: List[roles.RoleProc],
+                 log_level: str,
+                 options: Any,
+                 flags: List[str] = [],
+                 depends_on: List[str] = [],
+                 poolable: bool = True) -> roles.Role:
+            return roles.Role(
+                name=name,
+                main_class=f'frankenpaxos.multipaxos.{main_class}',
+                heap_size=heap_size,
+                procs=procs,
+                flags=['--config', config_filename, '--log_level', log_level]
+                + flags + roles.options_flags(options),
+                depends_on=depends_on,
+                poolable=poolable,
             )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, leader.host, p, f'leader_{i}')
-            leader_procs.append(p)
-        bench.log('Leaders started.')
+
+        server_roles = [
+            role('acceptor', 'AcceptorMain', input.acceptor_jvm_heap_size,
+                 roles.grouped('acceptor', net.placement().acceptors),
+                 input.acceptor_log_level, input.acceptor_options),
+            role('batcher', 'BatcherMain', input.batcher_jvm_heap_size,
+                 roles.indexed('batcher', net.placement().batchers),
+                 input.batcher_log_level, input.batcher_options),
+            role('read_batcher', 'ReadBatcherMain',
+                 input.read_batcher_jvm_heap_size,
+                 roles.indexed('read_batcher', net.placement().read_batchers),
+                 input.read_batcher_log_level, input.read_batcher_options),
+            role('proxy_leader', 'ProxyLeaderMain',
+                 input.proxy_leader_jvm_heap_size,
+                 roles.indexed('proxy_leader', net.placement().proxy_leaders),
+                 input.proxy_leader_log_level, input.proxy_leader_options),
+            role('replica', 'ReplicaMain', input.replica_jvm_heap_size,
+                 roles.indexed('replica', net.placement().replicas),
+                 input.replica_log_level, input.replica_options,
+                 flags=['--state_machine', input.state_machine]),
+            role('proxy_replica', 'ProxyReplicaMain',
+                 input.proxy_replica_jvm_heap_size,
+                 roles.indexed('proxy_replica',
+                               net.placement().proxy_replicas),
+                 input.proxy_replica_log_level, input.proxy_replica_options),
+            # Leaders are launched after everything else.
+            role('leader', 'LeaderMain', input.leader_jvm_heap_size,
+                 roles.indexed('leader', net.placement().leaders),
+                 input.leader_log_level, input.leader_options,
+                 depends_on=['acceptor', 'batcher', 'read_batcher',
+                             'proxy_leader', 'replica', 'proxy_replica']),
+        ]
+
+        # TODO(mwhittaker): For now, we don't run clients with large heaps and
+        # verbose garbage collection because they are all colocated on one
+        # machine.
+        client_role = role(
+            'client', 'ClientMain', input.client_jvm_heap_size,
+            [
+                roles.RoleProc(
+                    label=f'client_{i}',
+                    endpoint=client,
+                    flags=[
+                        '--host', client.host.ip(),
+                        '--port', str(client.port),
+                        '--output_file_prefix', bench.abspath(f'client_{i}'),
+                        '--workload', workload_filenames[i],
+                    ])
+                for (i, client) in enumerate(net.placement().clients)
+            ],
+            input.client_log_level,
+            input.client_options,
+            flags=[
+                '--measurement_group_size',
+                f'{input.measurement_group_size}',
+                '--warmup_duration',
+                f'{input.warmup_duration.total_seconds()}s',
+                '--warmup_timeout',
+                f'{input.warmup_timeout.total_seconds()}s',
+                '--warmup_sleep',
+                f'{input.warmup_sleep.total_seconds()}s',
+                '--num_warmup_clients',
+                f'{input.num_warmup_clients_per_proc}',
+                '--duration',
+                f'{input.duration.total_seconds()}s',
+                '--timeout',
+                f'{input.timeout.total_seconds()}s',
+                '--num_clients',
+                f'{input.num_clients_per_proc}',
+                '--read_consistency',
+                f'{input.read_consistency}',
+                '--predetermined_read_fraction',
+                f'{input.predetermined_read_fraction}',
+                '--read_workload',
+                f'{read_workload_filename}',
+                '--write_workload',
+                f'{write_workload_filename}',
+                '--load',
+                f'{load_filename}',
+            ],
+            # Clients exit when they finish, so they can't be reused.
+            poolable=False)
+
+        # Launch servers.
+        launcher.launch(server_roles)
+        bench.log('Servers started.')
 
         # Launch Prometheus.
         if input.monitored:
             prometheus_config = prometheus.prometheus_config(
-                int(input.prometheus_scrape_interval.total_seconds() * 1000), {
-                    'multipaxos_client': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().clients
-                    ],
-                    'multipaxos_batcher': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().batchers
-                    ],
-                    'multipaxos_read_batcher': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().read_batchers
-                    ],
-                    'multipaxos_leader': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().leaders
-                    ],
-                    'multipaxos_proxy_leader': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().proxy_leaders
-                    ],
-                    'multipaxos_acceptor': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for group in net.placement().acceptors
-                        for e in group
-                    ],
-                    'multipaxos_replica': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().replicas
-                    ],
-                    'multipaxos_proxy_replica': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().proxy_replicas
-                    ],
-                })
+                int(input.prometheus_scrape_interval.total_seconds() * 1000),
+                roles.prometheus_jobs('multipaxos',
+                                      [client_role] + server_roles))
             bench.write_string('prometheus.yml', yaml.dump(prometheus_config))
             prometheus_server = bench.popen(
                 host=net.placement().clients[0].host,
@@ -630,109 +499,15 @@ class MultiPaxosSuite(benchmark.Suite[Input, Output]):
         bench.log('Client lag ended.')
 
         # Launch clients.
-        workload_filename = bench.abspath('workload.pbtxt')
-        bench.write_string(
-            workload_filename,
-            proto_util.message_to_pbtext(input.workload.to_proto()))
-        read_workload_filename = bench.abspath('read_workload.pbtxt')
-        bench.write_string(
-            read_workload_filename,
-            proto_util.message_to_pbtext(input.read_workload.to_proto()))
-        write_workload_filename = bench.abspath('write_workload.pbtxt')
-        bench.write_string(
-            write_workload_filename,
-            proto_util.message_to_pbtext(input.write_workload.to_proto()))
-
-        client_procs: List[proc.Proc] = []
-        for (i, client) in enumerate(net.placement().clients):
-            p = bench.popen(
-                host=client.host,
-                label=f'client_{i}',
-                # TODO(mwhittaker): For now, we don't run clients with large
-                # heaps and verbose garbage collection because they are all
-                # colocated on one machine.
-                cmd=java(input.client_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.multipaxos.ClientMain',
-                    '--host',
-                    client.host.ip(),
-                    '--port',
-                    str(client.port),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.client_log_level,
-                    '--prometheus_host',
-                    client.host.ip(),
-                    '--prometheus_port',
-                    str(client.port + 1) if input.monitored else '-1',
-                    '--measurement_group_size',
-                    f'{input.measurement_group_size}',
-                    '--warmup_duration',
-                    f'{input.warmup_duration.total_seconds()}s',
-                    '--warmup_timeout',
-                    f'{input.warmup_timeout.total_seconds()}s',
-                    '--warmup_sleep',
-                    f'{input.warmup_sleep.total_seconds()}s',
-                    '--num_warmup_clients',
-                    f'{input.num_warmup_clients_per_proc}',
-                    '--duration',
-                    f'{input.duration.total_seconds()}s',
-                    '--timeout',
-                    f'{input.timeout.total_seconds()}s',
-                    '--num_clients',
-                    f'{input.num_clients_per_proc}',
-                    '--output_file_prefix',
-                    bench.abspath(f'client_{i}'),
-                    '--read_consistency',
-                    f'{input.read_consistency}',
-                    '--predetermined_read_fraction',
-                    f'{input.predetermined_read_fraction}',
-                    '--workload',
-                    f'{workload_filename}',
-                    '--read_workload',
-                    f'{read_workload_filename}',
-                    '--write_workload',
-                    f'{write_workload_filename}',
-                    '--options.resendClientRequestPeriod',
-                    '{}s'.format(input.client_options.
-                                 resend_client_request_period.total_seconds()),
-                    '--options.resendMaxSlotRequestsPeriod',
-                    '{}s'.format(input.client_options.
-                                 resend_max_slot_requests_period.total_seconds()),
-                    '--options.resendReadRequestPeriod',
-                    '{}s'.format(input.client_options.
-                                 resend_read_request_period.total_seconds()),
-                    '--options.resendSequentialReadRequestPeriod',
-                    '{}s'.format(input.client_options.
-                                 resend_sequential_read_request_period.
-                                 total_seconds()),
-                    '--options.resendEventualReadRequestPeriod',
-                    '{}s'.format(input.client_options.
-                                 resend_eventual_read_request_period.
-                                 total_seconds()),
-                    '--options.unsafeReadAtFirstSlot',
-                    f'{input.client_options.unsafe_read_at_first_slot}',
-                    '--options.unsafeReadAtI',
-                    f'{input.client_options.unsafe_read_at_i}',
-                    '--options.flushWritesEveryN',
-                    f'{input.client_options.flush_writes_every_n}',
-                    '--options.flushReadsEveryN',
-                    f'{input.client_options.flush_reads_every_n}',
-                ])
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, client.host, p, f'client_{i}')
-            client_procs.append(p)
+        clients_start = datetime.datetime.now(datetime.timezone.utc)
+        client_procs = launcher.launch([client_role])['client']
         bench.log(f'Clients started and running for {input.duration}.')
 
-        # Wait for clients to finish and then terminate leaders and acceptors.
+        # Wait for clients to finish and then terminate the servers.
         for p in client_procs:
             p.wait()
-        for p in (batcher_procs + read_batcher_procs + leader_procs +
-                  proxy_leader_procs + acceptor_procs + replica_procs +
-                  proxy_replica_procs):
-            p.kill()
+        clients_stop = datetime.datetime.now(datetime.timezone.utc)
+        launcher.kill([r.name for r in server_roles])
         if input.monitored:
             prometheus_server.kill()
         bench.log('Clients finished and processes terminated.')
@@ -751,6 +526,9 @@ class MultiPaxosSuite(benchmark.Suite[Input, Output]):
             p90_ms = -1.0,
             p95_ms = -1.0,
             p99_ms = -1.0,
+            p999_ms = -1.0,
+            p9999_ms = -1.0,
+            window_max_1s_median_ms = -1.0,
         )
         dummy_throughput = benchmark.ThroughputOutput(
             mean = -1.0,
@@ -770,15 +548,32 @@ class MultiPaxosSuite(benchmark.Suite[Input, Output]):
             bench,
             client_csvs,
             drop_prefix=datetime.timedelta(seconds=0),
-            save_data=False)
+            save_data=False,
+            correct_coordinated_omission=args.get(
+                'correct_coordinated_omission', False))
         read_output = (labeled_data['read']
                        if 'read' in labeled_data
                        else dummy_output)
         write_output = (labeled_data['write']
                         if 'write' in labeled_data
                         else dummy_output)
+
+        if input.monitored:
+            bench.log('Parsing garbage collection logs.')
+            gc_outputs = gc_log.role_gc_outputs(
+                bench,
+                {r.name: [p.label for p in r.procs] for r in server_roles},
+                start=clients_start,
+                stop=clients_stop)
+            gc_output = MultiPaxosGcOutput(**gc_outputs)
+            bench.log('Garbage collection logs parsed.')
+        else:
+            gc_output = MultiPaxosGcOutput(
+                *[gc_log.dummy_gc_output] * len(MultiPaxosGcOutput._fields))
+
         return MultiPaxosOutput(read_output = read_output,
-                                write_output = write_output)
+                                write_output = write_output,
+                                gc_output = gc_output)
 
 
 def get_parser() -> argparse.ArgumentParser:
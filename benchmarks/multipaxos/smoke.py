@@ -1,3 +1,9 @@
+# To approximate a multi-machine deployment on a single server, run every role
+# in its own network namespace (see host.NamespaceHost):
+#
+#   python -m benchmarks.multipaxos.smoke \
+#       --cluster benchmarks/multipaxos/netns_cluster.json
+
 from .multipaxos import *
 
 
@@ -0,0 +1,243 @@
+# This file contains a network calibration stage that runs before a suite.
+#
+# Benchmarks run on different days and on different clusters aren't
+# comparable unless we know what the network was like. With
+# --calibrate_network, a suite first measures the network between every pair
+# of its cluster's hosts with scripts/latency_client.py and
+# scripts/latency_server.py:
+#
+#   - the round trip time: one connection sends 16 byte messages, one at a
+#     time; and
+#   - the bandwidth: one connection keeps `bandwidth_depth` large messages in
+#     flight.
+#
+# Pairs are measured in rounds. Every host is in at most one pair per round,
+# and the pairs of a round are measured in parallel. This is a lot faster
+# than measuring one pair at a time, and pairs don't compete for a host's
+# network. If the cluster has a single host, it is measured against itself.
+#
+# The measurements of every pair are written to network_calibration.csv in the
+# suite directory, along with an RTT matrix (network_rtt_us.csv, the median
+# RTT in microseconds) and a bandwidth matrix (network_bandwidth_mbit.csv). The
+# processes' output is written to the network_calibration directory. The
+# measurements are summarized into a NetworkOutput, which is appended to every
+# row of the suite's results.csv as network.* columns.
+#
+# Like the jar (see --jar), the scripts must be at the same path on every
+# host.
+
+from . import benchmark
+from . import cluster
+from . import host
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import concurrent.futures
+import datetime
+import json
+import numpy as np
+import os
+import pandas as pd
+import paramiko
+import time
+
+
+_SCRIPTS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+
+
+class CalibrationOptions(NamedTuple):
+    python: str = 'python3'
+    port: int = 18000
+    latency_measurements: int = 1000
+    bandwidth_measurements: int = 2000
+    bandwidth_payload_size: int = 65536
+    bandwidth_depth: int = 16
+    server_startup: datetime.timedelta = datetime.timedelta(seconds=1)
+
+
+class NetworkOutput(NamedTuple):
+    num_pairs: float
+    median_rtt_us: float
+    max_rtt_us: float
+    max_p99_rtt_us: float
+    median_bandwidth_mbit: float
+    min_bandwidth_mbit: float
+
+
+dummy_network_output = NetworkOutput(
+    num_pairs=-1.0,
+    median_rtt_us=-1.0,
+    max_rtt_us=-1.0,
+    max_p99_rtt_us=-1.0,
+    median_bandwidth_mbit=-1.0,
+    min_bandwidth_mbit=-1.0,
+)
+
+_COLUMNS = [
+    'src', 'dst', 'rtt_mean_us', 'rtt_p50_us', 'rtt_p99_us', 'bandwidth_mbit'
+]
+
+
+def rounds(n: int) -> List[List[Tuple[int, int]]]:
+    """
+    rounds returns every pair (i, j) with i < j < n, split into rounds in which
+    no index appears twice (a round-robin tournament). If n is 1, the only
+    round is [(0, 0)].
+    """
+    if n == 1:
+        return [[(0, 0)]]
+
+    # The circle method: fix the first player and rotate the rest. With an
+    # odd number of players, the player paired with None sits out.
+    players: List[Optional[int]] = list(range(n))
+    if n % 2 == 1:
+        players.append(None)
+    m = len(players)
+    result = []
+    for _ in range(m - 1):
+        pairs = []
+        for k in range(m // 2):
+            (a, b) = (players[k], players[m - 1 - k])
+            if a is not None and b is not None:
+                pairs.append((min(a, b), max(a, b)))
+        result.append(sorted(pairs))
+        players = [players[0], players[-1]] + players[1:-1]
+    return result
+
+
+def cluster_hosts(cluster_file: str,
+                  identity_file: Optional[str]) -> List[host.Host]:
+    """
+    cluster_hosts connects to every distinct address in `cluster_file`, like
+    the suites do.
+    """
+    def connect(address: str) -> host.Host:
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.client.AutoAddPolicy)
+        if identity_file:
+            client.connect(address, key_filename=identity_file)
+        else:
+            client.connect(address)
+        return host.RemoteHost(client)
+
+    return cluster.Cluster.from_json_file(cluster_file, connect).hosts()
+
+
+def _client_summary(bench: benchmark.BenchmarkDirectory, h: host.Host,
+                    label: str, cmd: List[str]) -> Optional[Dict]:
+    returncode = bench.popen(h, label, cmd).wait()
+    try:
+        with open(bench.abspath(f'{label}_out.txt'), 'r') as f:
+            summary = json.loads(f.read().strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        summary = None
+    if returncode != 0 or summary is None:
+        bench.log(f'{label} failed with return code {returncode}.')
+        return None
+    return summary
+
+
+def _measure_pair(bench: benchmark.BenchmarkDirectory, src: host.Host,
+                  dst: host.Host, label: str,
+                  options: CalibrationOptions) -> Dict:
+    client = [
+        options.python,
+        os.path.join(_SCRIPTS_DIR, 'latency_client.py'),
+        '--host',
+        dst.ip(),
+        '--port',
+        str(options.port),
+        '--json',
+    ]
+    rtt = _client_summary(
+        bench, src, f'{label}_latency',
+        client + ['-n', str(options.latency_measurements)])
+    bandwidth = _client_summary(
+        bench, src, f'{label}_bandwidth', client + [
+            '-n',
+            str(options.bandwidth_measurements),
+            '--payload_size',
+            str(options.bandwidth_payload_size),
+            '--depth',
+            str(options.bandwidth_depth),
+        ])
+    return {
+        'src': src.ip(),
+        'dst': dst.ip(),
+        'rtt_mean_us': rtt['mean_us'] if rtt else np.nan,
+        'rtt_p50_us': rtt['p50_us'] if rtt else np.nan,
+        'rtt_p99_us': rtt['p99_us'] if rtt else np.nan,
+        'bandwidth_mbit':
+            bandwidth['throughput_mbit'] if bandwidth else np.nan,
+    }
+
+
+def calibrate(suite_dir: benchmark.SuiteDirectory,
+              hosts: List[host.Host],
+              options: CalibrationOptions = CalibrationOptions()) \
+              -> pd.DataFrame:
+    """
+    calibrate measures the network between every pair of `hosts` and writes
+    the measurements to `suite_dir`. It returns a dataframe with one row per
+    pair.
+    """
+    bench = benchmark.BenchmarkDirectory(
+        suite_dir.abspath('network_calibration'))
+    with bench:
+        for (i, h) in enumerate(hosts):
+            bench.popen(h, f'server_{i}', [
+                options.python,
+                os.path.join(_SCRIPTS_DIR, 'latency_server.py'),
+                '--host',
+                h.ip(),
+                '--port',
+                str(options.port),
+            ])
+        time.sleep(options.server_startup.total_seconds())
+
+        rows: List[Dict] = []
+        for (r, pairs) in enumerate(rounds(len(hosts))):
+            bench.log(f'Measuring round {r}: {pairs}.')
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=len(pairs)) as executor:
+                futures = [
+                    executor.submit(_measure_pair, bench, hosts[i], hosts[j],
+                                    f'client_{i}_{j}', options)
+                    for (i, j) in pairs
+                ]
+                rows += [f.result() for f in futures]
+
+    df = pd.DataFrame(rows, columns=_COLUMNS)
+    df.to_csv(suite_dir.abspath('network_calibration.csv'), index=False)
+
+    # Every pair is measured once, in one direction, but round trips and
+    # echoed bandwidth are symmetric.
+    addresses = [h.ip() for h in hosts]
+    both = pd.concat([df, df.rename(columns={'src': 'dst', 'dst': 'src'})])
+    for (column, filename) in [('rtt_p50_us', 'network_rtt_us.csv'),
+                               ('bandwidth_mbit',
+                                'network_bandwidth_mbit.csv')]:
+        matrix = both.pivot_table(index='src',
+                                  columns='dst',
+                                  values=column,
+                                  aggfunc='first',
+                                  dropna=False)
+        matrix = matrix.reindex(index=addresses, columns=addresses)
+        matrix.to_csv(suite_dir.abspath(filename))
+    return df
+
+
+def network_output(df: pd.DataFrame) -> NetworkOutput:
+    """
+    network_output summarizes the measurements returned by calibrate.
+    """
+    if len(df) == 0:
+        return dummy_network_output
+
+    return NetworkOutput(
+        num_pairs=float(len(df)),
+        median_rtt_us=df['rtt_p50_us'].median(),
+        max_rtt_us=df['rtt_p50_us'].max(),
+        max_p99_rtt_us=df['rtt_p99_us'].max(),
+        median_bandwidth_mbit=df['bandwidth_mbit'].median(),
+        min_bandwidth_mbit=df['bandwidth_mbit'].min(),
+    )
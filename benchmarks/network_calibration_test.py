@@ -0,0 +1,46 @@
+from . import benchmark
+from . import host
+from . import network_calibration
+import datetime
+import itertools
+import os
+import sys
+import tempfile
+import unittest
+
+
+class NetworkCalibrationTest(unittest.TestCase):
+    def test_rounds(self) -> None:
+        for n in range(2, 8):
+            rounds = network_calibration.rounds(n)
+            pairs = [p for r in rounds for p in r]
+            self.assertEqual(sorted(pairs),
+                             list(itertools.combinations(range(n), 2)))
+            for r in rounds:
+                indexes = [i for p in r for i in p]
+                self.assertEqual(len(indexes), len(set(indexes)))
+        self.assertEqual(network_calibration.rounds(1), [[(0, 0)]])
+
+    def test_calibrate_local_host(self) -> None:
+        options = network_calibration.CalibrationOptions(
+            python=sys.executable,
+            port=18123,
+            latency_measurements=100,
+            bandwidth_measurements=100,
+            bandwidth_payload_size=1024,
+            server_startup=datetime.timedelta(seconds=0.5))
+        with tempfile.TemporaryDirectory() as d:
+            suite_dir = benchmark.SuiteDirectory(d)
+            df = network_calibration.calibrate(suite_dir, [host.LocalHost()],
+                                               options)
+            self.assertTrue(
+                os.path.exists(suite_dir.abspath('network_rtt_us.csv')))
+        self.assertEqual(len(df), 1)
+        output = network_calibration.network_output(df)
+        self.assertEqual(output.num_pairs, 1)
+        self.assertGreater(output.median_rtt_us, 0)
+        self.assertGreater(output.min_bandwidth_mbit, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
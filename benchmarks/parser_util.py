@@ -49,6 +49,45 @@ def get_benchmark_parser() -> argparse.ArgumentParser:
     parser.add_argument('-i',
                         '--identity_file',
                         help='SSH identity file for remote benchmarks')
+    parser.add_argument('--topology',
+                        type=str,
+                        default=None,
+                        help='A JSON file with an emulated WAN topology '
+                        '(see topology.py)')
+    parser.add_argument('--faults',
+                        type=str,
+                        default=None,
+                        help='A JSON file with faults to inject into every '
+                        'benchmark (see fault_injection.py)')
+    parser.add_argument('--calibrate_network',
+                        action='store_true',
+                        help='Measure the network between every pair of '
+                        'hosts before the suite (see network_calibration.py)')
+    parser.add_argument('--repeat_until_ci',
+                        nargs='+',
+                        default=None,
+                        help='Repeat inputs until the confidence intervals of '
+                        'these output fields (e.g., start_throughput_1s.p90) '
+                        'are tight enough (see repetition.py)')
+    parser.add_argument('--max_repetitions',
+                        type=int,
+                        default=10,
+                        help='The most times --repeat_until_ci runs an input')
+    parser.add_argument('--max_ci_width',
+                        type=float,
+                        default=0.05,
+                        help='The widest --repeat_until_ci confidence '
+                        'interval, relative to the mean')
+    parser.add_argument('--warm_jvm_pool',
+                        action='store_true',
+                        help='Reuse JVMs across benchmarks (see warm_pool.py)')
+    parser.add_argument('--class_data_sharing',
+                        action='store_true',
+                        help='Share class data between JVMs (see cds.py)')
+    parser.add_argument('--correct_coordinated_omission',
+                        action='store_true',
+                        help='Correct latencies for coordinated omission '
+                        '(see benchmark._corrected_latency)')
     return parser
 
 
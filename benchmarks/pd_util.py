@@ -1,17 +1,23 @@
-from typing import Iterable, List
+from typing import Iterable, List, Optional
 import numpy as np
 import pandas as pd
 
 
-def read_csvs(filenames: Iterable[str], **kwargs) -> pd.DataFrame:
+def read_csvs(filenames: Iterable[str],
+              index_column: Optional[str] = None,
+              **kwargs) -> pd.DataFrame:
     """
     pd.read_csv reads in a _single_ CSV file and converts it to a dataframe.
     read_csvs reads in a _set_ of CSVs, concatenates them together, and
-    converts the concatenation to a dataframe.
+    converts the concatenation to a dataframe. If `index_column` is not None,
+    every row is labelled with the index of its file in that column.
     """
     dfs: List[pd.DataFrame] = []
-    for filename in filenames:
-        dfs.append(pd.read_csv(filename, header=0, **kwargs))
+    for (i, filename) in enumerate(filenames):
+        df = pd.read_csv(filename, header=0, **kwargs)
+        if index_column is not None:
+            df[index_column] = i
+        dfs.append(df)
     return pd.concat(dfs, ignore_index=True)
 
 
@@ -137,3 +143,65 @@ def rate(s: pd.Series, window_size_ms: float) -> pd.Series:
     # the rate in the window is ill defined.
     return (s.sort_index(0).rolling(f'{window_size_ms}ms',
                                     min_periods=2).apply(_dxdt, raw=False))
+
+
+def gaps(s: pd.Series, min_gap: pd.Timedelta) -> pd.DataFrame:
+    """
+    Consider a sorted series of timestamps, like the start times of the
+    requests of a benchmark during which the leader fails:
+
+          timestamp
+        0 12:00:00.0
+        1 12:00:00.1
+        2 12:00:03.0
+        3 12:00:03.1
+        4 12:00:05.0
+
+    `gaps(s, pd.Timedelta('1s'))` returns one row for every gap between two
+    consecutive timestamps that is longer than one second:
+
+          position  outage_start  recovery    duration
+        0 2         12:00:00.1    12:00:03.0  00:00:02.9
+        1 4         12:00:03.1    12:00:05.0  00:00:01.9
+
+    `position` is the position of the first timestamp after the gap (i.e. the
+    recovery point), so `s.iloc[:position]` is everything before the gap.
+    Gaps are found in one vectorized pass.
+    """
+    values = s.values
+    deltas = values[1:] - values[:-1]
+    positions = np.nonzero(deltas > pd.Timedelta(min_gap).to_timedelta64())[0] + 1
+    return pd.DataFrame({
+        'position': positions,
+        'outage_start': s.iloc[positions - 1].reset_index(drop=True),
+        'recovery': s.iloc[positions].reset_index(drop=True),
+        'duration': deltas[positions - 1],
+    })
+
+
+def segments(s: pd.Series, min_gap: pd.Timedelta) -> pd.DataFrame:
+    """
+    segments splits a sorted series of timestamps at every gap longer than
+    `min_gap` (see gaps). It returns one row for every segment of `s` between
+    two gaps, with the segment's positions [begin, end), its first and last
+    timestamps, and the duration of the outage that preceded it. In the
+    example above, `segments(s, pd.Timedelta('1s'))` returns the following:
+
+          begin  end  start       stop        outage_before
+        0 0      2    12:00:00.0  12:00:00.1  00:00:00
+        1 2      4    12:00:03.0  12:00:03.1  00:00:02.9
+        2 4      5    12:00:05.0  12:00:05.0  00:00:01.9
+    """
+    g = gaps(s, min_gap)
+    begins = np.concatenate([[0], g['position'].values]).astype(int)
+    ends = np.concatenate([g['position'].values, [len(s)]]).astype(int)
+    if len(s) == 0:
+        begins = ends = np.array([], dtype=int)
+    return pd.DataFrame({
+        'begin': begins,
+        'end': ends,
+        'start': s.iloc[begins].reset_index(drop=True),
+        'stop': s.iloc[ends - 1].reset_index(drop=True),
+        'outage_before': np.concatenate([[np.timedelta64(0, 'ns')],
+                                         g['duration'].values])[:len(begins)],
+    })
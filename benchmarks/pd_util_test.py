@@ -0,0 +1,45 @@
+from . import pd_util
+import pandas as pd
+import unittest
+
+
+def _timestamps(seconds):
+    return pd.Series([
+        pd.Timestamp('2020-01-01 12:00:00') + pd.Timedelta(seconds=x)
+        for x in seconds
+    ])
+
+
+class PdUtilTest(unittest.TestCase):
+    def test_gaps(self) -> None:
+        s = _timestamps([0, 0.1, 3, 3.1, 5])
+        g = pd_util.gaps(s, pd.Timedelta('1s'))
+        self.assertEqual(list(g['position']), [2, 4])
+        self.assertEqual(list(g['outage_start']), [s[1], s[3]])
+        self.assertEqual(list(g['recovery']), [s[2], s[4]])
+        self.assertEqual(list(g['duration']),
+                         [pd.Timedelta('2.9s'), pd.Timedelta('1.9s')])
+
+    def test_no_gaps(self) -> None:
+        s = _timestamps([0, 0.5, 1, 1.5])
+        self.assertEqual(len(pd_util.gaps(s, pd.Timedelta('1s'))), 0)
+        self.assertEqual(len(pd_util.gaps(s.iloc[:0], pd.Timedelta('1s'))), 0)
+
+    def test_segments(self) -> None:
+        s = _timestamps([0, 0.1, 3, 3.1, 5])
+        seg = pd_util.segments(s, pd.Timedelta('1s'))
+        self.assertEqual(list(seg['begin']), [0, 2, 4])
+        self.assertEqual(list(seg['end']), [2, 4, 5])
+        self.assertEqual(list(seg['start']), [s[0], s[2], s[4]])
+        self.assertEqual(list(seg['stop']), [s[1], s[3], s[4]])
+        self.assertEqual(list(seg['outage_before']), [
+            pd.Timedelta(0),
+            pd.Timedelta('2.9s'),
+            pd.Timedelta('1.9s'),
+        ])
+        self.assertEqual(len(pd_util.segments(s.iloc[:0],
+                                              pd.Timedelta('1s'))), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
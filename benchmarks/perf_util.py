@@ -67,6 +67,9 @@ class JavaPerfProc(proc.Proc):
     def wait(self) -> Optional[int]:
         return self._proc.wait()
 
+    def signal(self, sig: int) -> None:
+        self._proc.signal(sig)
+
     def kill(self) -> None:
         # If we've already killed everything, don't do it again.
         if self._killed:
@@ -2,7 +2,7 @@
 import matplotlib
 matplotlib.use('pdf')
 
-from . import pd_util
+from . import latency_buckets
 import argparse
 import matplotlib.pyplot as plt
 import numpy as np
@@ -11,18 +11,13 @@ import pandas as pd
 
 
 def plot_latency(ax: plt.Axes, latency_ms: pd.Series) -> None:
-    ax.plot_date(latency_ms.index,
-                 latency_ms.rolling('500ms').median(),
-                 label='median (500ms)',
-                 fmt='-')
-    ax.plot_date(latency_ms.index,
-                 latency_ms.rolling('500ms').quantile(0.9),
-                 label='90% (500ms)',
-                 fmt='-')
-    ax.plot_date(latency_ms.index,
-                 latency_ms.rolling('500ms').quantile(0.99),
-                 label='99% (500ms)',
-                 fmt='-')
+    buckets = latency_buckets.LatencyBuckets.from_series(latency_ms)
+    median = buckets.rolling_median('500ms')
+    ax.plot_date(median.index, median, label='median (500ms)', fmt='-')
+    p90 = buckets.rolling_quantile(0.9, '500ms')
+    ax.plot_date(p90.index, p90, label='90% (500ms)', fmt='-')
+    p99 = buckets.rolling_quantile(0.99, '500ms')
+    ax.plot_date(p99.index, p99, label='99% (500ms)', fmt='-')
     ax.set_title('Latency')
     ax.set_xlabel('Time')
     ax.set_ylabel('Latency (ms)')
@@ -30,12 +25,14 @@ def plot_latency(ax: plt.Axes, latency_ms: pd.Series) -> None:
 
 def plot_throughput(ax: plt.Axes, start: pd.Series, stop: pd.Series) -> None:
     # Plot throughput.
-    ax.plot_date(pd_util.throughput(start, 1000, trim=True).index,
-                 pd_util.throughput(start, 1000, trim=True),
+    start_throughput = latency_buckets.throughput(start, '1000ms', trim=True)
+    ax.plot_date(start_throughput.index,
+                 start_throughput,
                  label='start',
                  fmt='-')
-    ax.plot_date(pd_util.throughput(stop, 1000, trim=True).index,
-                 pd_util.throughput(stop, 1000, trim=True),
+    stop_throughput = latency_buckets.throughput(stop, '1000ms', trim=True)
+    ax.plot_date(stop_throughput.index,
+                 stop_throughput,
                  label='stop',
                  fmt='-',
                  alpha=0.7)
@@ -1,7 +1,9 @@
-from typing import Optional, Sequence, Union
+from typing import Dict, List, Optional, Sequence, Union
 import abc
+import os
 import paramiko
 import random
+import signal
 import string
 import subprocess
 import time
@@ -60,6 +62,20 @@ class Proc(abc.ABC):
     def kill(self) -> None:
         raise NotImplementedError()
 
+    # `signal` sends signal `sig` (e.g., signal.SIGSTOP) to the process. Unlike
+    # `kill`, which is used to tear down a process at the end of a benchmark,
+    # `signal` is used to inject faults while a benchmark is running (see
+    # fault_injection.py).
+    @abc.abstractmethod
+    def signal(self, sig: int) -> None:
+        raise NotImplementedError()
+
+    def pause(self) -> None:
+        self.signal(signal.SIGSTOP)
+
+    def resume(self) -> None:
+        self.signal(signal.SIGCONT)
+
 
 # A PopenProc is just a wrapper around a locally run subprocess.Popen.
 class PopenProc(Proc):
@@ -83,6 +99,56 @@ class PopenProc(Proc):
     def kill(self) -> None:
         self._popen.kill()
 
+    def signal(self, sig: int) -> None:
+        self._popen.send_signal(sig)
+
+
+def _descendants(pid: int) -> List[int]:
+    """_descendants returns the pids of every local descendant of `pid`."""
+    children: Dict[int, List[int]] = dict()
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                # The command name is in parentheses and may contain spaces.
+                fields = f.read().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            # The process exited.
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+
+    descendants: List[int] = []
+    frontier = [pid]
+    while len(frontier) > 0:
+        p = frontier.pop()
+        descendants += children.get(p, [])
+        frontier += children.get(p, [])
+    return descendants
+
+
+# A SudoPopenProc is a PopenProc whose command may run as root (e.g., with
+# `sudo -n`; see host.NamespaceHost). Signaling the Popen signals sudo, not the
+# command: sudo doesn't relay SIGKILL or SIGSTOP, and with sudo's use_pty
+# option the command isn't even in sudo's process group, so killpg misses it
+# too. Instead, we signal the process and all of its descendants, with sudo if
+# we're not root.
+class SudoPopenProc(PopenProc):
+    def kill(self) -> None:
+        self.signal(signal.SIGKILL)
+
+    def signal(self, sig: int) -> None:
+        if self._popen.poll() is not None:
+            return
+        pid = self._popen.pid
+        cmd = ['kill', f'-{int(sig)}']
+        cmd += [str(p) for p in [pid] + _descendants(pid)]
+        if os.geteuid() != 0:
+            cmd = ['sudo', '-n'] + cmd
+        subprocess.run(cmd,
+                       stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+
 
 # A ParamikoProc is a process run on a remote machine over SSH via paramiko.
 # Paramiko makes it easy to run commands on another machine. You simply get a
@@ -193,3 +259,13 @@ class ParamikoProc(Proc):
 
         self._channel.close()
         self._killed = True
+
+    def signal(self, sig: int) -> None:
+        # Like `kill`, we signal the whole process group.
+        if self._killed or self._channel.exit_status_ready():
+            return
+        pgid = self.pgid()
+        if pgid:
+            _, out, _ = self._client.exec_command(
+                f'sudo kill -{int(sig)} -- -{pgid}')
+            out.channel.recv_exit_status()
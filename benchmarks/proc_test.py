@@ -1,6 +1,8 @@
 from . import proc
 import os
 import paramiko
+import tempfile
+import time
 import unittest
 
 
@@ -46,5 +48,42 @@ class ParamikoProcTest(unittest.TestCase):
         p.kill()
 
 
+class SudoPopenProcTest(unittest.TestCase):
+    def _state(self, pid: int) -> str:
+        with open(f'/proc/{pid}/stat', 'r') as f:
+            return f.read().rsplit(')', 1)[1].split()[0]
+
+    def _children(self, pid: int) -> list:
+        # Wait for the shell to fork its child.
+        for _ in range(100):
+            children = proc._descendants(pid)
+            if len(children) > 0:
+                return children
+            time.sleep(0.01)
+        self.fail(f'Process {pid} has no children.')
+
+    def test_signals_descendants(self):
+        with tempfile.TemporaryDirectory() as d:
+            p = proc.SudoPopenProc(['sh', '-c', 'sleep 1000 & wait'],
+                                   stdout=os.path.join(d, 'out.txt'),
+                                   stderr=os.path.join(d, 'err.txt'))
+            [child] = self._children(p.pid())
+
+            p.pause()
+            time.sleep(0.1)
+            self.assertEqual(self._state(child), 'T')
+            p.resume()
+            time.sleep(0.1)
+            self.assertNotEqual(self._state(child), 'T')
+
+            p.kill()
+            p.wait()
+            time.sleep(0.1)
+            self.assertFalse(os.path.exists(f'/proc/{child}') and
+                             self._state(child) != 'Z')
+            # Killing a dead process is a noop.
+            p.kill()
+
+
 if __name__ == '__main__':
     unittest.main()
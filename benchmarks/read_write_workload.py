@@ -64,6 +64,118 @@ class UniformMultiKeyReadWriteWorkload(NamedTuple):
         }
 
 
+class ZipfianReadWriteWorkload(NamedTuple):
+    num_keys: int
+    read_fraction: float
+    # Zipfian skew in the range (0, 1). YCSB uses 0.99 by default.
+    theta: float
+    write_size_mean: int
+    write_size_std: int
+    # We put the name here so that it appears in benchmark outputs.
+    name: str = 'ZipfianReadWriteWorkload'
+
+    def to_proto(self) -> proto_util.Message:
+        return {
+            'zipfian_read_write_workload': {
+                'num_keys': self.num_keys,
+                'read_fraction': self.read_fraction,
+                'theta': self.theta,
+                'write_size_mean': self.write_size_mean,
+                'write_size_std': self.write_size_std,
+            }
+        }
+
+
+class ScrambledZipfianReadWriteWorkload(NamedTuple):
+    num_keys: int
+    read_fraction: float
+    # Zipfian skew in the range (0, 1). YCSB uses 0.99 by default.
+    theta: float
+    write_size_mean: int
+    write_size_std: int
+    # We put the name here so that it appears in benchmark outputs.
+    name: str = 'ScrambledZipfianReadWriteWorkload'
+
+    def to_proto(self) -> proto_util.Message:
+        return {
+            'scrambled_zipfian_read_write_workload': {
+                'num_keys': self.num_keys,
+                'read_fraction': self.read_fraction,
+                'theta': self.theta,
+                'write_size_mean': self.write_size_mean,
+                'write_size_std': self.write_size_std,
+            }
+        }
+
+
+class LatestReadWriteWorkload(NamedTuple):
+    num_keys: int
+    read_fraction: float
+    # Zipfian skew in the range (0, 1) of how far behind the most recently
+    # written key a read is.
+    theta: float
+    write_size_mean: int
+    write_size_std: int
+    # We put the name here so that it appears in benchmark outputs.
+    name: str = 'LatestReadWriteWorkload'
+
+    def to_proto(self) -> proto_util.Message:
+        return {
+            'latest_read_write_workload': {
+                'num_keys': self.num_keys,
+                'read_fraction': self.read_fraction,
+                'theta': self.theta,
+                'write_size_mean': self.write_size_mean,
+                'write_size_std': self.write_size_std,
+            }
+        }
+
+
+class HotspotReadWriteWorkload(NamedTuple):
+    num_keys: int
+    read_fraction: float
+    # `hot_operation_fraction` of all operations are to the first
+    # `hot_set_fraction` of the keys.
+    hot_set_fraction: float
+    hot_operation_fraction: float
+    write_size_mean: int
+    write_size_std: int
+    # We put the name here so that it appears in benchmark outputs.
+    name: str = 'HotspotReadWriteWorkload'
+
+    def to_proto(self) -> proto_util.Message:
+        return {
+            'hotspot_read_write_workload': {
+                'num_keys': self.num_keys,
+                'read_fraction': self.read_fraction,
+                'hot_set_fraction': self.hot_set_fraction,
+                'hot_operation_fraction': self.hot_operation_fraction,
+                'write_size_mean': self.write_size_mean,
+                'write_size_std': self.write_size_std,
+            }
+        }
+
+
+class TraceReplayWorkload(NamedTuple):
+    # A trace file written by trace.write_trace. The benchmark harness shards
+    # the trace across client processes (see trace.shard_workload).
+    trace_filename: str
+    # Every client replays its shard of the trace with the trace's original
+    # inter-arrival times divided by `time_compression`. For example, a
+    # `time_compression` of 2 replays the trace twice as fast.
+    time_compression: float = 1.0
+    # We put the name here so that it appears in benchmark outputs.
+    name: str = 'TraceReplayWorkload'
+
+    def to_proto(self) -> proto_util.Message:
+        return {
+            'trace_replay_read_write_workload': {
+                'trace_filename': self.trace_filename,
+                'time_compression': self.time_compression,
+            }
+        }
+
+
 class WriteOnlyStringWorkload(NamedTuple):
     workload: workload.StringWorkload
     # We put the name here so that it appears in benchmark outputs.
@@ -105,6 +217,11 @@ class WriteOnlyBernoulliSingleKeyWorkload(NamedTuple):
 ReadWriteWorkload = Union[UniformReadWriteWorkload,
                           PointSkewedReadWriteWorkload,
                           UniformMultiKeyReadWriteWorkload,
+                          ZipfianReadWriteWorkload,
+                          ScrambledZipfianReadWriteWorkload,
+                          LatestReadWriteWorkload,
+                          HotspotReadWriteWorkload,
+                          TraceReplayWorkload,
                           WriteOnlyStringWorkload,
                           WriteOnlyUniformSingleKeyWorkload,
                           WriteOnlyBernoulliSingleKeyWorkload]
@@ -0,0 +1,309 @@
+# This file contains recovery and availability metrics for benchmarks with a
+# driver (e.g., matchmakermultipaxos/driver_workload.py).
+#
+# A driver injects events (e.g., a leader failure or a reconfiguration) while
+# the clients are running and records the time of every event in
+# driver_events.csv (see frankenpaxos.BenchmarkUtil.EventRecorder). For every
+# event, event_recovery lines the event up with the recorder data and
+# computes
+#
+#   - the baseline throughput and p99 latency: the median throughput (in
+#     `bucket` sized buckets) and the p99 latency of the requests that started
+#     in the `baseline` before the event;
+#   - the time to recover: the time from the event until throughput is at
+#     least `threshold` of the baseline throughput for `stable` straight;
+#   - the dip depth: the largest drop in throughput while recovering, as a
+#     fraction of the baseline throughput (0 means no dip, 1 means throughput
+#     dropped to zero);
+#   - the dip area: the number of requests that weren't processed while
+#     recovering, compared to the baseline throughput; and
+#   - the latency inflation: the p99 latency of the requests that started
+#     while recovering, divided by the baseline p99 latency.
+#
+# An event recovers before the next event or within `max_recovery`, or it
+# doesn't recover at all. The per-event metrics are written to
+# recovery_events.csv, and recovery_output summarizes them into a
+# RecoveryOutput that is part of a benchmark's output (and results.csv).
+#
+# Faults injected by the harness (see fault_injection.py) are recorded in
+# faults.csv and are treated like driver events. Benchmarks of protocols
+# without a driver can be analyzed after the fact:
+#
+#   python -m benchmarks.recovery /tmp/2021-01-01_00:00:00.000000/001
+
+from . import benchmark
+from . import fault_injection
+from . import latency_buckets
+from . import spike_attribution
+from typing import Dict, List, NamedTuple
+import argparse
+import datetime
+import numpy as np
+import os
+import pandas as pd
+
+
+class RecoveryOptions(NamedTuple):
+    bucket: datetime.timedelta = datetime.timedelta(milliseconds=100)
+    baseline: datetime.timedelta = datetime.timedelta(seconds=5)
+    threshold: float = 0.9
+    stable: datetime.timedelta = datetime.timedelta(seconds=1)
+    max_recovery: datetime.timedelta = datetime.timedelta(seconds=30)
+
+
+class RecoveryOutput(NamedTuple):
+    num_events: float
+    num_unrecovered: float
+    mean_time_to_recover_ms: float
+    max_time_to_recover_ms: float
+    mean_dip_depth: float
+    max_dip_depth: float
+    mean_dip_area: float
+    max_dip_area: float
+    mean_latency_inflation: float
+    max_latency_inflation: float
+
+
+dummy_recovery_output = RecoveryOutput(
+    num_events=-1.0,
+    num_unrecovered=-1.0,
+    mean_time_to_recover_ms=-1.0,
+    max_time_to_recover_ms=-1.0,
+    mean_dip_depth=-1.0,
+    max_dip_depth=-1.0,
+    mean_dip_area=-1.0,
+    max_dip_area=-1.0,
+    mean_latency_inflation=-1.0,
+    max_latency_inflation=-1.0,
+)
+
+_COLUMNS = [
+    'time', 'event', 'recovered', 'time_to_recover_ms', 'baseline_throughput',
+    'min_throughput', 'dip_depth', 'dip_area', 'baseline_p99_latency_ms',
+    'p99_latency_ms', 'latency_inflation'
+]
+
+
+def _naive_utc(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    # Depending on the version of pandas, ISO 8601 timestamps with a Z are
+    # parsed as UTC or as naive timestamps.
+    if index.tz is None:
+        return index
+    return index.tz_convert('UTC').tz_localize(None)
+
+
+def read_driver_events(filename: str) -> pd.DataFrame:
+    """
+    read_driver_events reads the events written by an EventRecorder into a
+    dataframe with `time` and `event` columns.
+    """
+    df = pd.read_csv(filename)
+    # Instant.toString omits a fractional second of zero, so we parse every
+    # timestamp on its own.
+    times = pd.DatetimeIndex([pd.Timestamp(t) for t in df['time']])
+    df['time'] = _naive_utc(times)
+    return df.sort_values('time').reset_index(drop=True)
+
+
+def read_fault_events(filename: str) -> pd.DataFrame:
+    """
+    read_fault_events reads the faults written by a FaultInjector (see
+    fault_injection.py) like read_driver_events. Only the faults that disrupt
+    a benchmark (pauses, kills, restarts, and partitions) are returned, and
+    every event is named after its fault and label (e.g., 'pause leader_0').
+    """
+    df = read_driver_events(filename)
+    disruptive = [
+        fault_injection.PAUSE, fault_injection.KILL, fault_injection.RESTART,
+        fault_injection.PARTITION
+    ]
+    skipped = df['detail'].fillna('').str.startswith('skipped')
+    df = df[df['event'].isin(disruptive) & ~skipped]
+    df = df.assign(event=df['event'] + ' ' + df['label'])
+    return df[['time', 'event']].reset_index(drop=True)
+
+
+def read_events(bench_path: str) -> pd.DataFrame:
+    """
+    read_events returns the driver events and the injected faults of the
+    benchmark in `bench_path`, sorted by time.
+    """
+    dfs = []
+    filename = os.path.join(bench_path, 'driver_events.csv')
+    if os.path.exists(filename):
+        dfs.append(read_driver_events(filename)[['time', 'event']])
+    filename = os.path.join(bench_path, 'faults.csv')
+    if os.path.exists(filename):
+        dfs.append(read_fault_events(filename))
+    if len(dfs) == 0:
+        return pd.DataFrame(columns=['time', 'event'])
+    return pd.concat(dfs).sort_values('time').reset_index(drop=True)
+
+
+def event_recovery(df: pd.DataFrame,
+                   events: pd.DataFrame,
+                   options: RecoveryOptions = RecoveryOptions()) \
+                   -> pd.DataFrame:
+    """
+    event_recovery returns the recovery metrics of every event in `events`
+    (see read_driver_events) given recorder data `df` (see
+    benchmark.wrangle_recorder_data). Events outside of the recorder data are
+    skipped.
+    """
+    if len(df) == 0 or len(events) == 0:
+        return pd.DataFrame(columns=_COLUMNS)
+
+    starts = _naive_utc(pd.DatetimeIndex(df.index))
+    latency_ms = df['latency_nanos'].values / 1e6
+    bucket = pd.Timedelta(options.bucket)
+    # With grouped measurements (see LabeledRecorder), every row is `count`
+    # requests.
+    weights = df['count'] if 'count' in df.columns else None
+    buckets = latency_buckets.LatencyBuckets.from_series(
+        pd.Series(latency_ms, index=starts), bucket, weights=weights)
+    tput = buckets.throughput(bucket)
+    # Bucket i covers [bucket_starts[i], bucket_starts[i] + bucket).
+    bucket_starts = tput.index - bucket
+    tput_values = tput.values
+    num_stable = max(1, int(pd.Timedelta(options.stable) / bucket))
+
+    times = list(events['time'])
+    rows: List[Dict] = []
+    for (i, (time, event)) in enumerate(zip(times, events['event'])):
+        if time < starts[0] or time > starts[-1]:
+            continue
+
+        baseline = ((bucket_starts >= time - pd.Timedelta(options.baseline)) &
+                    (bucket_starts + bucket <= time))
+        baseline_latency = latency_ms[
+            (starts >= time - pd.Timedelta(options.baseline)) &
+            (starts < time)]
+        if baseline.sum() == 0 or len(baseline_latency) == 0:
+            continue
+        baseline_throughput = np.median(tput_values[baseline])
+        baseline_p99_ms = np.percentile(baseline_latency, 99)
+
+        # The buckets after the event, up to the next event.
+        horizon = time + pd.Timedelta(options.max_recovery)
+        if i + 1 < len(times):
+            horizon = min(horizon, times[i + 1])
+        first = int(np.searchsorted(bucket_starts + bucket, time, 'right'))
+        last = int(np.searchsorted(bucket_starts, horizon, 'left'))
+        ok = tput_values >= options.threshold * baseline_throughput
+        recovery = None
+        for j in range(first, last):
+            if j + num_stable <= len(ok) and ok[j:j + num_stable].all():
+                recovery = j
+                break
+
+        recovered = recovery is not None
+        end = recovery if recovered else last
+        dip = tput_values[first:max(end, first + 1)]
+        recovery_time = (max(bucket_starts[end], time) if recovered else
+                         horizon)
+        latency = latency_ms[(starts >= time) & (starts < max(
+            recovery_time, time + bucket))]
+        p99_ms = (np.percentile(latency, 99) if len(latency) > 0 else np.nan)
+        rows.append({
+            'time': time,
+            'event': event,
+            'recovered': recovered,
+            'time_to_recover_ms':
+                (recovery_time - time) / pd.Timedelta(milliseconds=1),
+            'baseline_throughput': baseline_throughput,
+            'min_throughput': dip.min(),
+            'dip_depth': max(0.0, 1 - dip.min() / baseline_throughput),
+            'dip_area': (np.clip(baseline_throughput - dip, 0, None).sum() *
+                         bucket.total_seconds()),
+            'baseline_p99_latency_ms': baseline_p99_ms,
+            'p99_latency_ms': p99_ms,
+            'latency_inflation': p99_ms / baseline_p99_ms,
+        })
+    return pd.DataFrame(rows, columns=_COLUMNS)
+
+
+def recovery_output(recovery: pd.DataFrame) -> RecoveryOutput:
+    """
+    recovery_output summarizes the per-event metrics returned by
+    event_recovery.
+    """
+    if len(recovery) == 0:
+        return dummy_recovery_output
+
+    return RecoveryOutput(
+        num_events=float(len(recovery)),
+        num_unrecovered=float((~recovery['recovered'].astype(bool)).sum()),
+        mean_time_to_recover_ms=recovery['time_to_recover_ms'].mean(),
+        max_time_to_recover_ms=recovery['time_to_recover_ms'].max(),
+        mean_dip_depth=recovery['dip_depth'].mean(),
+        max_dip_depth=recovery['dip_depth'].max(),
+        mean_dip_area=recovery['dip_area'].mean(),
+        max_dip_area=recovery['dip_area'].max(),
+        mean_latency_inflation=recovery['latency_inflation'].mean(),
+        max_latency_inflation=recovery['latency_inflation'].max(),
+    )
+
+
+def driver_recovery_output(bench: benchmark.BenchmarkDirectory,
+                           df: pd.DataFrame,
+                           options: RecoveryOptions = RecoveryOptions()) \
+                           -> RecoveryOutput:
+    """
+    driver_recovery_output computes the recovery metrics of the events in
+    the benchmark's driver_events.csv and faults.csv (see read_events), writes
+    them to recovery_events.csv, and summarizes them. If there are no events
+    (e.g., it's an old driver), driver_recovery_output returns
+    dummy_recovery_output.
+    """
+    events = read_events(bench.path)
+    if len(events) == 0:
+        bench.log(f'No driver events or faults found in {bench.path}. '
+                  f'Recovery metrics not computed.')
+        return dummy_recovery_output
+
+    recovery = event_recovery(df, events, options)
+    recovery.to_csv(bench.abspath('recovery_events.csv'), index=False)
+    bench.log('Recovery metrics written to recovery_events.csv.')
+    return recovery_output(recovery)
+
+
+def main(args) -> None:
+    df = spike_attribution.read_recorder_data(args.benchmark_directory,
+                                              args.label)
+    options = RecoveryOptions(
+        bucket=datetime.timedelta(milliseconds=args.bucket_ms),
+        threshold=args.threshold)
+    recovery = event_recovery(df, read_events(args.benchmark_directory),
+                              options)
+    filename = os.path.join(args.benchmark_directory, 'recovery_events.csv')
+    recovery.to_csv(filename, index=False)
+    print(recovery.to_string())
+    print(recovery_output(recovery))
+    print(f'Wrote recovery metrics to {filename}.')
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('benchmark_directory',
+                        type=str,
+                        help='Benchmark directory')
+    parser.add_argument('--label',
+                        type=str,
+                        default=None,
+                        help='Only analyze recorder data with this label '
+                             '(e.g., write)')
+    parser.add_argument('--bucket_ms',
+                        type=float,
+                        default=100,
+                        help='Throughput bucket size in milliseconds')
+    parser.add_argument('--threshold',
+                        type=float,
+                        default=0.9,
+                        help='An event has recovered once throughput is this '
+                             'fraction of the baseline throughput')
+    return parser
+
+
+if __name__ == '__main__':
+    parser = get_parser()
+    main(parser.parse_args())
@@ -0,0 +1,105 @@
+from . import recovery
+import numpy as np
+import os
+import pandas as pd
+import tempfile
+import unittest
+
+
+def _recorder_data() -> pd.DataFrame:
+    # One 1 ms request every millisecond for 10 seconds, except that nothing
+    # completes between 5 and 6 seconds. The 10 requests that start at 5
+    # seconds are stuck until 6 seconds.
+    t0 = pd.Timestamp('2020-01-01 12:00:00')
+    ms = np.arange(10000)
+    ms = ms[(ms < 5000) | (ms >= 6000)]
+    starts = [t0 + pd.Timedelta(milliseconds=int(x)) for x in ms]
+    latencies = [1e6] * len(starts)
+    starts += [t0 + pd.Timedelta(seconds=5)] * 10
+    latencies += [1000e6] * 10
+    df = pd.DataFrame({'start': starts, 'latency_nanos': latencies})
+    return df.set_index('start').sort_index()
+
+
+class RecoveryTest(unittest.TestCase):
+    def test_event_recovery(self) -> None:
+        t0 = pd.Timestamp('2020-01-01 12:00:00')
+        events = pd.DataFrame({
+            'time': [
+                t0 + pd.Timedelta(seconds=5),
+                t0 + pd.Timedelta(seconds=8),
+                t0 + pd.Timedelta(seconds=60),
+            ],
+            'event': ['failure', 'reconfiguration', 'too late'],
+        })
+        r = recovery.event_recovery(_recorder_data(), events)
+        self.assertEqual(list(r['event']), ['failure', 'reconfiguration'])
+        self.assertTrue(r['recovered'].all())
+
+        failure = r.iloc[0]
+        self.assertEqual(failure['baseline_throughput'], 1000)
+        self.assertEqual(failure['time_to_recover_ms'], 1000)
+        self.assertEqual(failure['dip_depth'], 1)
+        self.assertAlmostEqual(failure['dip_area'], 1000 - 10)
+        self.assertAlmostEqual(failure['latency_inflation'], 1000)
+
+        reconfiguration = r.iloc[1]
+        self.assertEqual(reconfiguration['time_to_recover_ms'], 0)
+        self.assertEqual(reconfiguration['dip_depth'], 0)
+        self.assertEqual(reconfiguration['dip_area'], 0)
+        self.assertAlmostEqual(reconfiguration['latency_inflation'], 1)
+
+        output = recovery.recovery_output(r)
+        self.assertEqual(output.num_events, 2)
+        self.assertEqual(output.num_unrecovered, 0)
+        self.assertEqual(output.max_time_to_recover_ms, 1000)
+
+    def test_unrecovered(self) -> None:
+        df = _recorder_data()
+        df = df[df.index < pd.Timestamp('2020-01-01 12:00:05')]
+        events = pd.DataFrame({
+            'time': [pd.Timestamp('2020-01-01 12:00:04.5')],
+            'event': ['failure'],
+        })
+        options = recovery.RecoveryOptions(threshold=2)
+        r = recovery.event_recovery(df, events, options)
+        self.assertFalse(r['recovered'].any())
+        self.assertEqual(recovery.recovery_output(r).num_unrecovered, 1)
+
+    def test_read_driver_events(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            filename = os.path.join(d, 'driver_events.csv')
+            with open(filename, 'w') as f:
+                f.write('time,event\n')
+                f.write('2020-01-01T12:00:08.000000001Z,b\n')
+                f.write('2020-01-01T12:00:05Z,a\n')
+            events = recovery.read_driver_events(filename)
+        self.assertEqual(list(events['event']), ['a', 'b'])
+        self.assertEqual(events['time'][0], pd.Timestamp('2020-01-01 12:00:05'))
+
+    def test_read_events(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            with open(os.path.join(d, 'driver_events.csv'), 'w') as f:
+                f.write('time,event\n')
+                f.write('2020-01-01T12:00:05Z,a\n')
+            with open(os.path.join(d, 'faults.csv'), 'w') as f:
+                f.write('time,event,label,detail\n')
+                f.write('2020-01-01T12:00:01.000000Z,pause,leader_0,\n')
+                f.write('2020-01-01T12:00:02.000000Z,resume,leader_0,\n')
+                f.write('2020-01-01T12:00:03.000000Z,kill,client,'
+                        'skipped: no process with this label\n')
+                f.write('2020-01-01T12:00:09.000000Z,partition,leader_1,'
+                        '127.0.1.1\n')
+            events = recovery.read_events(d)
+        self.assertEqual(list(events['event']),
+                         ['pause leader_0', 'a', 'partition leader_1'])
+
+    def test_no_events(self) -> None:
+        r = recovery.event_recovery(_recorder_data(),
+                                    pd.DataFrame(columns=['time', 'event']))
+        self.assertEqual(recovery.recovery_output(r),
+                         recovery.dummy_recovery_output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,219 @@
+# This file contains an analysis of repeated benchmark inputs.
+#
+# Suites repeat every input a few times (e.g., `] * 3`) to average out noise,
+# and our plots show the mean plus or minus the standard deviation of every
+# input. That doesn't tell us whether two inputs really perform differently,
+# and three repetitions may be too few for a noisy input and too many for a
+# quiet one. This file computes bootstrap confidence intervals instead. For a
+# set of values (e.g., the p90 throughput of every repetition of an input),
+# bootstrap_ci resamples the values with replacement many times, computes a
+# statistic (e.g., the mean) of every resample, and returns the percentiles
+# of the statistics. compare computes the confidence interval of the
+# difference between two inputs; if it doesn't contain zero, the two inputs
+# differ.
+#
+# A suite can also use confidence intervals to decide how many times to repeat
+# every input. With --repeat_until_ci (e.g., --repeat_until_ci
+# start_throughput_1s.p90 latency.p99_ms), Suite.run_suite first runs the
+# suite's inputs as usual. Then, it repeats the inputs whose confidence
+# interval of any of the given output fields is wider than --max_ci_width
+# (relative to the mean), in rounds, until every interval is tight enough or
+# the input has been run --max_repetitions times. The intervals are written to
+# repetitions.csv in the suite directory.
+#
+# The repetitions of a suite that already ran can be analyzed like this:
+#
+#   python -m benchmarks.repetition /tmp/2021-01-01_00:00:00.000000_ABCDEFGHIJ \
+#       --metrics start_throughput_1s.p90 latency.p99_ms
+
+from . import results_db
+from typing import Callable, Dict, List, NamedTuple, Sequence
+import argparse
+import numpy as np
+import os
+import pandas as pd
+
+
+# A statistic maps an array of resamples (one per row) to one value per row.
+Statistic = Callable[[np.ndarray], np.ndarray]
+
+
+def mean(x: np.ndarray) -> np.ndarray:
+    return np.mean(x, axis=1)
+
+
+def median(x: np.ndarray) -> np.ndarray:
+    return np.median(x, axis=1)
+
+
+class ConfidenceInterval(NamedTuple):
+    estimate: float
+    low: float
+    high: float
+    n: int
+
+    def relative_width(self) -> float:
+        if self.estimate == 0:
+            return 0.0 if self.high == self.low else float('inf')
+        return (self.high - self.low) / abs(self.estimate)
+
+    def contains(self, x: float) -> bool:
+        return self.low <= x <= self.high
+
+
+class RepetitionOptions(NamedTuple):
+    # The flattened output fields (e.g., 'start_throughput_1s.p90') whose
+    # confidence intervals must be tight enough.
+    metrics: List[str]
+    max_repetitions: int = 10
+    # The largest acceptable confidence interval width, relative to the mean.
+    max_ci_width: float = 0.05
+    confidence: float = 0.95
+    num_resamples: int = 1000
+
+
+def bootstrap_ci(values: Sequence[float],
+                 statistic: Statistic = mean,
+                 confidence: float = 0.95,
+                 num_resamples: int = 1000,
+                 seed: int = 0) -> ConfidenceInterval:
+    """
+    bootstrap_ci returns the percentile bootstrap confidence interval of
+    `statistic` of `values`. NaNs are ignored.
+    """
+    x = np.asarray(values, dtype=float)
+    x = x[~np.isnan(x)]
+    if len(x) == 0:
+        return ConfidenceInterval(np.nan, np.nan, np.nan, 0)
+
+    estimate = float(statistic(x[np.newaxis, :])[0])
+    rand = np.random.RandomState(seed)
+    resamples = x[rand.randint(0, len(x), size=(num_resamples, len(x)))]
+    stats = statistic(resamples)
+    alpha = (1 - confidence) / 2
+    return ConfidenceInterval(estimate=estimate,
+                              low=float(np.percentile(stats, 100 * alpha)),
+                              high=float(
+                                  np.percentile(stats, 100 * (1 - alpha))),
+                              n=len(x))
+
+
+def compare(a: Sequence[float],
+            b: Sequence[float],
+            statistic: Statistic = mean,
+            confidence: float = 0.95,
+            num_resamples: int = 1000,
+            seed: int = 0) -> ConfidenceInterval:
+    """
+    compare returns the bootstrap confidence interval of statistic(b) -
+    statistic(a), resampling `a` and `b` independently. If the interval
+    doesn't contain 0, `a` and `b` differ.
+    """
+    x = np.asarray(a, dtype=float)
+    y = np.asarray(b, dtype=float)
+    x = x[~np.isnan(x)]
+    y = y[~np.isnan(y)]
+    if len(x) == 0 or len(y) == 0:
+        return ConfidenceInterval(np.nan, np.nan, np.nan, 0)
+
+    rand = np.random.RandomState(seed)
+    xs = x[rand.randint(0, len(x), size=(num_resamples, len(x)))]
+    ys = y[rand.randint(0, len(y), size=(num_resamples, len(y)))]
+    diffs = statistic(ys) - statistic(xs)
+    alpha = (1 - confidence) / 2
+    return ConfidenceInterval(
+        estimate=float(statistic(y[np.newaxis, :])[0] -
+                       statistic(x[np.newaxis, :])[0]),
+        low=float(np.percentile(diffs, 100 * alpha)),
+        high=float(np.percentile(diffs, 100 * (1 - alpha))),
+        n=min(len(x), len(y)))
+
+
+def needs_more(values: Dict[str, List[float]],
+               options: RepetitionOptions) -> bool:
+    """
+    needs_more returns whether an input with output values `values` (one list
+    per metric, one value per repetition) should be repeated again.
+    """
+    n = max([len(v) for v in values.values()] + [0])
+    if n >= options.max_repetitions:
+        return False
+    for metric in options.metrics:
+        ci = bootstrap_ci(values.get(metric, []),
+                          confidence=options.confidence,
+                          num_resamples=options.num_resamples)
+        # We can't tell how noisy an input is from fewer than two values.
+        if ci.n < 2 or ci.relative_width() > options.max_ci_width:
+            return True
+    return False
+
+
+def summarize(df: pd.DataFrame,
+              by: List[str],
+              metrics: List[str],
+              statistic: Statistic = mean,
+              confidence: float = 0.95,
+              num_resamples: int = 1000) -> pd.DataFrame:
+    """
+    summarize groups the rows of `df` (e.g., a results.csv) by the columns
+    `by` and returns the confidence interval of every metric of every group,
+    as <metric>.estimate, <metric>.low, <metric>.high, and <metric>.n columns.
+    """
+    rows = []
+    for (key, group) in df.groupby(by, sort=False):
+        key = key if isinstance(key, tuple) else (key,)
+        row = dict(zip(by, key))
+        for metric in metrics:
+            ci = bootstrap_ci(group[metric],
+                              statistic=statistic,
+                              confidence=confidence,
+                              num_resamples=num_resamples)
+            for (field, value) in ci._asdict().items():
+                row[f'{metric}.{field}'] = value
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def summarize_suite(suite_path: str,
+                    metrics: List[str],
+                    confidence: float = 0.95) -> pd.DataFrame:
+    """
+    summarize_suite summarizes the results.csv of a suite directory, grouped
+    by the suite's input columns.
+    """
+    df = pd.read_csv(os.path.join(suite_path, 'results.csv'))
+    inputs = results_db.input_fields(suite_path)
+    by = [c for (c, f) in zip(df.columns, inputs) if c == f]
+    if len(by) == 0:
+        raise ValueError(f'{suite_path} has no benchmark with an input.json, '
+                         f'so its input columns are unknown.')
+    # Unhashable or missing inputs can't be grouped, so we group on strings.
+    df[by] = df[by].astype(str)
+    return summarize(df, by, metrics, confidence=confidence)
+
+
+def main(args) -> None:
+    df = summarize_suite(args.suite_directory, args.metrics, args.confidence)
+    print(df.to_string())
+    filename = os.path.join(args.suite_directory, 'repetitions.csv')
+    df.to_csv(filename, index=False)
+    print(f'Wrote confidence intervals to {filename}.')
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('suite_directory', type=str, help='Suite directory')
+    parser.add_argument('--metrics',
+                        nargs='+',
+                        required=True,
+                        help='Output fields (e.g., start_throughput_1s.p90)')
+    parser.add_argument('--confidence',
+                        type=float,
+                        default=0.95,
+                        help='Confidence level')
+    return parser
+
+
+if __name__ == '__main__':
+    parser = get_parser()
+    main(parser.parse_args())
@@ -0,0 +1,99 @@
+from . import benchmark
+from . import repetition
+from typing import Any, Dict, List, NamedTuple
+import numpy as np
+import pandas as pd
+import tempfile
+import unittest
+
+
+class Input(NamedTuple):
+    noise: float
+
+
+class Output(NamedTuple):
+    throughput: float
+
+
+# A suite whose throughput is 100 plus uniform noise of +/- `noise` percent.
+class NoisySuite(benchmark.Suite[Input, Output]):
+    def __init__(self, inputs: List[Input], args: Dict[str, Any]) -> None:
+        self._inputs = inputs
+        self._args = args
+        self._rand = np.random.RandomState(0)
+
+    def args(self) -> Dict[Any, Any]:
+        return self._args
+
+    def inputs(self) -> List[Input]:
+        return self._inputs
+
+    def summary(self, input: Input, output: Output) -> str:
+        return str(output)
+
+    def run_benchmark(self, bench: benchmark.BenchmarkDirectory,
+                      args: Dict[Any, Any], input: Input) -> Output:
+        return Output(throughput=100 *
+                      (1 + input.noise * self._rand.uniform(-1, 1)))
+
+
+class RepetitionTest(unittest.TestCase):
+    def test_bootstrap_ci(self) -> None:
+        values = np.random.RandomState(0).normal(100, 10, 100)
+        ci = repetition.bootstrap_ci(values)
+        self.assertEqual(ci.n, 100)
+        self.assertTrue(ci.low < np.mean(values) < ci.high)
+        self.assertTrue(ci.contains(100))
+        self.assertLess(ci.relative_width(), 0.1)
+
+        ci = repetition.bootstrap_ci([1, 2, 3], statistic=repetition.median)
+        self.assertEqual(ci.estimate, 2)
+
+    def test_compare(self) -> None:
+        rand = np.random.RandomState(0)
+        a = rand.normal(100, 10, 20)
+        b = rand.normal(150, 10, 20)
+        c = a[::-1]
+        self.assertFalse(repetition.compare(a, b).contains(0))
+        self.assertTrue(repetition.compare(a, c).contains(0))
+
+    def test_needs_more(self) -> None:
+        options = repetition.RepetitionOptions(metrics=['x'],
+                                               max_repetitions=5,
+                                               max_ci_width=0.05)
+        self.assertTrue(repetition.needs_more({'x': [100]}, options))
+        self.assertTrue(repetition.needs_more({'x': [50, 150]}, options))
+        self.assertFalse(repetition.needs_more({'x': [100, 100]}, options))
+        self.assertFalse(repetition.needs_more({'x': [50, 150] * 3},
+                                               options))
+
+    def test_summarize(self) -> None:
+        df = pd.DataFrame({
+            'f': [1, 1, 1, 2, 2, 2],
+            'throughput': [1, 2, 3, 10, 10, 10],
+        })
+        s = repetition.summarize(df, ['f'], ['throughput'])
+        self.assertEqual(list(s['f']), [1, 2])
+        self.assertEqual(list(s['throughput.estimate']), [2, 10])
+        self.assertEqual(list(s['throughput.n']), [3, 3])
+
+    def test_run_suite_repeats_noisy_inputs(self) -> None:
+        quiet = Input(noise=0)
+        noisy = Input(noise=0.5)
+        suite = NoisySuite([quiet, noisy] * 2, {
+            'repeat_until_ci': ['throughput'],
+            'max_repetitions': 6,
+        })
+        with tempfile.TemporaryDirectory() as d:
+            suite_dir = benchmark.SuiteDirectory(d)
+            suite.run_suite(suite_dir)
+            results = pd.read_csv(suite_dir.abspath('results.csv'))
+            repetitions = pd.read_csv(suite_dir.abspath('repetitions.csv'))
+        counts = results.groupby('noise').size()
+        self.assertEqual(counts[0], 2)
+        self.assertEqual(counts[0.5], 6)
+        self.assertEqual(list(repetitions['throughput.n']), [2, 6])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,371 @@
+# This file contains a results warehouse: a SQLite database of the results of
+# many suites.
+#
+# Every suite writes its own results.csv with flattened input and output
+# columns (see benchmark.ResultsFile), and plot scripts read them one file at
+# a time, hardcoding paths and normalizing column names by hand (e.g.,
+# df['throughput'] = df['write_output.start_throughput_1s.p90']). A ResultsDb
+# instead ingests whole suite directories (their args.json, results.csv, and
+# the schema of their inputs and outputs) into one file, and lets us query the
+# results of many suites, across protocols and runs, as a single dataframe:
+#
+#   db = results_db.ResultsDb('results.db')
+#   db.ingest_all('/mnt/nfs/tmp')
+#   df = db.results(
+#       protocols=['multipaxos', 'craq'],
+#       columns=['num_client_procs'],
+#       aliases={'throughput': ['write_output.start_throughput_1s.p90',
+#                               'start_throughput_1s.p90']})
+#
+# Results are stored in long format (one row per result and column), so
+# suites with different inputs and outputs share the same tables. Every
+# column is labelled with its kind: 'input', 'output', or 'network' (see
+# network_calibration.py). Values are stored as text and, if they parse, as
+# numbers. A suite's protocol defaults to the first word of its name (e.g.,
+# 'multipaxos' for a suite directory named <time>_<id>_multipaxos_lt).
+#
+# The database can also be used from the command line:
+#
+#   python -m benchmarks.results_db results.db ingest /mnt/nfs/tmp/*
+#   python -m benchmarks.results_db results.db suites
+
+from typing import Any, Dict, List, Optional, Sequence
+import argparse
+import datetime
+import json
+import os
+import pandas as pd
+import sqlite3
+
+
+_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS suites (
+        suite_id INTEGER PRIMARY KEY,
+        path TEXT UNIQUE NOT NULL,
+        name TEXT,
+        protocol TEXT,
+        start_time TEXT,
+        args TEXT,
+        ingest_time TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS columns (
+        suite_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        PRIMARY KEY (suite_id, name)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS results (
+        suite_id INTEGER NOT NULL,
+        row INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        text TEXT,
+        number REAL,
+        PRIMARY KEY (suite_id, row, name)
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS results_by_name ON results (name, suite_id)',
+]
+
+
+def _flatten_dict(d: Dict[str, Any], prefix: str = '') -> List[str]:
+    # The flattened keys of a nested dict, like util.flatten_tuple_fields.
+    keys: List[str] = []
+    for (k, v) in d.items():
+        if isinstance(v, dict):
+            keys += _flatten_dict(v, f'{prefix}{k}.')
+        else:
+            keys.append(f'{prefix}{k}')
+    return keys
+
+
+def _number(s: str) -> Optional[float]:
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+def _suite_name(path: str) -> str:
+    # Suite directories are named <date>_<time>_<random id>[_<name>]. See
+    # benchmark.SuiteDirectory.
+    parts = os.path.basename(os.path.normpath(path)).split('_', 3)
+    return parts[3] if len(parts) == 4 else ''
+
+
+def input_fields(path: str) -> List[str]:
+    """
+    input_fields returns the flattened input fields of the first benchmark of
+    the suite directory `path` (e.g., ['f', 'client_options.lag']). These are
+    the leading columns of the suite's results.csv.
+    """
+    for entry in sorted(os.listdir(path)):
+        filename = os.path.join(path, entry, 'input.json')
+        if os.path.exists(filename):
+            with open(filename, 'r') as f:
+                return _flatten_dict(json.load(f))
+    return []
+
+
+def is_suite_directory(path: str) -> bool:
+    return (os.path.isdir(path) and
+            os.path.exists(os.path.join(path, 'args.json')) and
+            os.path.exists(os.path.join(path, 'results.csv')))
+
+
+class ResultsDb(object):
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        with self.connection:
+            for statement in _SCHEMA:
+                self.connection.execute(statement)
+
+    def __enter__(self) -> 'ResultsDb':
+        return self
+
+    def __exit__(self, cls, exn, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def ingest(self,
+               path: str,
+               protocol: Optional[str] = None,
+               replace: bool = False) -> Optional[int]:
+        """
+        ingest ingests the suite directory `path` and returns its suite id. A
+        suite that was already ingested is skipped (and None is returned)
+        unless `replace` is true.
+        """
+        path = os.path.abspath(path)
+        existing = self.connection.execute(
+            'SELECT suite_id FROM suites WHERE path = ?', (path,)).fetchone()
+        if existing is not None:
+            if not replace:
+                return None
+            self.delete(existing[0])
+
+        with open(os.path.join(path, 'args.json'), 'r') as f:
+            args = json.load(f)
+        start_time = None
+        if os.path.exists(os.path.join(path, 'start_time.txt')):
+            with open(os.path.join(path, 'start_time.txt'), 'r') as f:
+                start_time = f.read().strip()
+        name = _suite_name(path)
+        if protocol is None:
+            protocol = name.split('_')[0]
+
+        df = pd.read_csv(os.path.join(path, 'results.csv'),
+                         dtype=str,
+                         keep_default_na=False)
+        # results.csv doesn't say which columns are inputs, so we match its
+        # leading columns against the fields of a benchmark's input.json.
+        fields = input_fields(path)
+        num_inputs = 0
+        for (column, field) in zip(df.columns, fields):
+            if column != field:
+                break
+            num_inputs += 1
+
+        def kind(position: int, column: str) -> str:
+            if position < num_inputs:
+                return 'input'
+            elif column.startswith('network.'):
+                return 'network'
+            else:
+                return 'output'
+
+        with self.connection:
+            cursor = self.connection.execute(
+                'INSERT INTO suites (path, name, protocol, start_time, args, '
+                'ingest_time) VALUES (?, ?, ?, ?, ?, ?)',
+                (path, name, protocol, start_time, json.dumps(args),
+                 str(datetime.datetime.now())))
+            suite_id = cursor.lastrowid
+            self.connection.executemany(
+                'INSERT INTO columns VALUES (?, ?, ?, ?)',
+                [(suite_id, column, kind(i, column), i)
+                 for (i, column) in enumerate(df.columns)])
+            self.connection.executemany(
+                'INSERT INTO results VALUES (?, ?, ?, ?, ?)',
+                ((suite_id, row, column, value, _number(value))
+                 for (row, values) in enumerate(df.itertuples(index=False))
+                 for (column, value) in zip(df.columns, values)))
+        return suite_id
+
+    def ingest_all(self, root: str, replace: bool = False) -> List[int]:
+        """
+        ingest_all ingests every suite directory in or below `root` and
+        returns the ids of the newly ingested suites.
+        """
+        suite_ids = []
+        for (dirpath, dirnames, _) in os.walk(root):
+            if is_suite_directory(dirpath):
+                # Benchmark directories within a suite aren't suites.
+                dirnames.clear()
+                suite_id = self.ingest(dirpath, replace=replace)
+                if suite_id is not None:
+                    suite_ids.append(suite_id)
+        return suite_ids
+
+    def delete(self, suite_id: int) -> None:
+        with self.connection:
+            for table in ['results', 'columns', 'suites']:
+                self.connection.execute(
+                    f'DELETE FROM {table} WHERE suite_id = ?', (suite_id,))
+
+    def suites(self) -> pd.DataFrame:
+        """suites returns every ingested suite, indexed by suite id."""
+        df = pd.read_sql_query('SELECT * FROM suites', self.connection)
+        return df.set_index('suite_id')
+
+    def columns(self, suite_ids: Optional[Sequence[int]] = None) \
+            -> pd.DataFrame:
+        """
+        columns returns every column of the suites `suite_ids` (or of every
+        suite), its kind, and the number of suites that have it.
+        """
+        query = 'SELECT name, kind, suite_id FROM columns'
+        params: List[Any] = []
+        if suite_ids is not None:
+            query += (' WHERE suite_id IN (' +
+                      ', '.join('?' for _ in suite_ids) + ')')
+            params = list(suite_ids)
+        df = pd.read_sql_query(query, self.connection, params=params)
+        return (df.groupby(['name', 'kind']).size().rename(
+            'num_suites').reset_index())
+
+    def results(self,
+                suite_ids: Optional[Sequence[int]] = None,
+                protocols: Optional[Sequence[str]] = None,
+                columns: Optional[Sequence[str]] = None,
+                aliases: Optional[Dict[str, Sequence[str]]] = None,
+                where: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """
+        results returns the results of the suites `suite_ids` (or of every
+        suite) of protocols `protocols` (or of every protocol), one row per
+        result, with suite_id, protocol, and suite name columns.
+
+          - `columns` are the columns to return (all of them if None). A column
+            named args.<x> is argument <x> of the suite's args.json.
+          - `aliases` maps new column names to lists of existing columns. The
+            new column is the first existing column that isn't null, which
+            lets us normalize the outputs of different protocols (e.g., a
+            'throughput' column).
+          - `where` maps columns (or aliases) to values. Only results with
+            these values are returned.
+
+        Columns whose values are all numbers are returned as floats.
+        """
+        aliases = aliases or dict()
+        where = where or dict()
+        suites = self.suites()
+        if suite_ids is not None:
+            suites = suites[suites.index.isin(suite_ids)]
+        if protocols is not None:
+            suites = suites[suites['protocol'].isin(protocols)]
+
+        names: Optional[List[str]] = None
+        if columns is not None:
+            names = list(columns) + list(where)
+            names += [c for cs in aliases.values() for c in cs]
+        stored = ([n for n in names if not n.startswith('args.')]
+                  if names is not None else None)
+
+        query = ('SELECT suite_id, row, name, text, number FROM results '
+                 'WHERE suite_id IN (' +
+                 ', '.join(str(int(i)) for i in suites.index) + ')')
+        params: List[Any] = []
+        if stored is not None:
+            query += (' AND name IN (' + ', '.join('?' for _ in stored) +
+                      ')')
+            params = stored
+        long = pd.read_sql_query(query, self.connection, params=params)
+        if len(long) == 0:
+            return pd.DataFrame(columns=['suite_id', 'row', 'protocol',
+                                         'suite'] + list(columns or []) +
+                                list(aliases))
+
+        df = long.pivot_table(index=['suite_id', 'row'],
+                              columns='name',
+                              values='text',
+                              aggfunc='first')
+        df.columns.name = None
+        for column in df.columns:
+            numbers = long[long['name'] == column]
+            if numbers['number'].notna().all():
+                df[column] = pd.to_numeric(df[column])
+        df = df.reset_index()
+
+        # Add the suites' protocol, name, and arguments.
+        df['protocol'] = df['suite_id'].map(suites['protocol'])
+        df['suite'] = df['suite_id'].map(suites['name'])
+        args = {i: json.loads(a) for (i, a) in suites['args'].items()}
+        for name in (names or sorted({
+                f'args.{k}' for a in args.values() for k in a
+        })):
+            if name.startswith('args.'):
+                df[name] = df['suite_id'].map(
+                    lambda i: args[i].get(name[len('args.'):]))
+
+        for (alias, candidates) in aliases.items():
+            value: Optional[pd.Series] = None
+            for c in candidates:
+                if c not in df.columns:
+                    continue
+                value = (df[c] if value is None else value.where(
+                    value.notna(), df[c]))
+            df[alias] = value if value is not None else float('nan')
+
+        for (column, value) in where.items():
+            if column not in df.columns:
+                return df.iloc[0:0]
+            df = df[df[column] == value]
+
+        if columns is not None:
+            keep = ['suite_id', 'row', 'protocol', 'suite']
+            keep += [c for c in list(columns) + list(aliases)
+                     if c in df.columns and c not in keep]
+            df = df[keep]
+        return df.reset_index(drop=True)
+
+
+def main(args) -> None:
+    with ResultsDb(args.database) as db:
+        if args.command == 'ingest':
+            for path in args.paths:
+                suite_ids = db.ingest_all(path, replace=args.replace)
+                print(f'Ingested {len(suite_ids)} suite(s) from {path}.')
+        elif args.command == 'suites':
+            print(db.suites()[['name', 'protocol', 'start_time',
+                               'path']].to_string())
+        elif args.command == 'columns':
+            print(db.columns().to_string())
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('database', type=str, help='SQLite database file')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    ingest = subparsers.add_parser('ingest', help='Ingest suite directories')
+    ingest.add_argument('paths',
+                        nargs='+',
+                        help='Suite directories or directories of suites')
+    ingest.add_argument('--replace',
+                        action='store_true',
+                        help='Re-ingest suites that were already ingested')
+    subparsers.add_parser('suites', help='List ingested suites')
+    subparsers.add_parser('columns', help='List the columns of every suite')
+    return parser
+
+
+if __name__ == '__main__':
+    parser = get_parser()
+    main(parser.parse_args())
@@ -0,0 +1,82 @@
+from . import results_db
+import json
+import os
+import tempfile
+import unittest
+
+
+def _write_suite(root: str, name: str, args: dict, input: dict,
+                 results: str) -> str:
+    path = os.path.join(root, f'2020-01-01_00:00:00.000000_ABCDEFGHIJ_{name}')
+    os.makedirs(os.path.join(path, '001'))
+    with open(os.path.join(path, 'args.json'), 'w') as f:
+        json.dump(args, f)
+    with open(os.path.join(path, '001', 'input.json'), 'w') as f:
+        json.dump(input, f)
+    with open(os.path.join(path, 'results.csv'), 'w') as f:
+        f.write(results)
+    return path
+
+
+class ResultsDbTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        _write_suite(
+            self.tmp.name, 'multipaxos_lt', {'jar': 'a.jar'}, {
+                'f': 1,
+                'num_clients': 1,
+                'client_options': {'lag': '0:00:01'},
+            }, 'f,num_clients,client_options.lag,'
+            'write_output.start_throughput_1s.p90\n'
+            '1,1,0:00:01,100.0\n'
+            '1,2,0:00:01,200.0\n')
+        _write_suite(
+            self.tmp.name, 'craq_lt', {'jar': 'b.jar'}, {
+                'f': 1,
+                'num_clients': 4,
+            }, 'f,num_clients,start_throughput_1s.p90\n'
+            '1,4,400.0\n')
+        self.db = results_db.ResultsDb(':memory:')
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_ingest_all(self) -> None:
+        self.assertEqual(len(self.db.ingest_all(self.tmp.name)), 2)
+        # Suites are only ingested once.
+        self.assertEqual(len(self.db.ingest_all(self.tmp.name)), 0)
+        suites = self.db.suites()
+        self.assertEqual(sorted(suites['protocol']), ['craq', 'multipaxos'])
+
+        columns = self.db.columns()
+        kinds = dict(zip(columns['name'], columns['kind']))
+        self.assertEqual(kinds['client_options.lag'], 'input')
+        self.assertEqual(kinds['write_output.start_throughput_1s.p90'],
+                         'output')
+
+    def test_results(self) -> None:
+        self.db.ingest_all(self.tmp.name)
+        df = self.db.results(
+            columns=['num_clients', 'args.jar'],
+            aliases={
+                'throughput': [
+                    'write_output.start_throughput_1s.p90',
+                    'start_throughput_1s.p90'
+                ]
+            })
+        df = df.sort_values('num_clients')
+        self.assertEqual(list(df['num_clients']), [1, 2, 4])
+        self.assertEqual(list(df['throughput']), [100, 200, 400])
+        self.assertEqual(list(df['protocol']),
+                         ['multipaxos', 'multipaxos', 'craq'])
+        self.assertEqual(list(df['args.jar']), ['a.jar', 'a.jar', 'b.jar'])
+
+        df = self.db.results(protocols=['multipaxos'],
+                             where={'num_clients': 2})
+        self.assertEqual(len(df), 1)
+        self.assertEqual(df['client_options.lag'][0], '0:00:01')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,337 @@
+# This file contains a declarative way to launch the processes of a protocol.
+#
+# Every protocol's run_benchmark used to launch its roles by hand: for every
+# role, it looped over the role's placement, built a `java ...` command line,
+# called bench.popen, optionally wrapped the process in a JavaPerfProc, and
+# listed the role in the Prometheus configuration. Instead, a protocol can now
+# describe its roles as data. For example,
+#
+#   acceptors = roles.Role(
+#       name='acceptor',
+#       main_class='frankenpaxos.multipaxos.AcceptorMain',
+#       heap_size=input.acceptor_jvm_heap_size,
+#       procs=roles.grouped('acceptor', net.placement().acceptors),
+#       flags=['--config', config_filename,
+#              '--log_level', input.acceptor_log_level] +
+#             roles.options_flags(input.acceptor_options),
+#   )
+#
+# and a Launcher launches, profiles, pins, and kills them. Roles are launched
+# in dependency order, and the processes of roles that don't depend on one
+# another are launched in parallel. Because every protocol goes through the
+# Launcher, launch-time improvements (e.g., CPU pinning or warm JVMs) apply to
+# all of them.
+#
+# The Launcher also records the startup time of every process (the time from
+# launching it until its port accepts connections) in startup_times.json. This
+# makes the effect of things like class data sharing (see cds.py) visible.
+
+from . import affinity
+from . import benchmark
+from . import host
+from . import perf_util
+from . import proc
+from . import warm_pool
+from typing import Any, Dict, List, NamedTuple, Optional
+import concurrent.futures
+import datetime
+import os
+import socket
+import threading
+import time
+
+
+class RoleProc(NamedTuple):
+    label: str
+    endpoint: host.Endpoint
+    # Flags specific to this process (e.g., --index).
+    flags: List[str]
+
+
+class Role(NamedTuple):
+    # The name of the role (e.g., 'proxy_leader').
+    name: str
+    main_class: str
+    # The JVM's heap size (e.g., '1g'). If it's None, the role runs with the
+    # JVM's default heap size and without verbose garbage collection, even
+    # when monitored. Clients that are all colocated on one machine do this.
+    heap_size: Optional[str]
+    procs: List[RoleProc]
+    # Flags passed to every process of the role.
+    flags: List[str] = []
+    # The names of the roles that must be launched before this one.
+    depends_on: List[str] = []
+    # Whether the role exports Prometheus metrics. If it does, it is passed
+    # --prometheus_host and --prometheus_port flags, and it serves metrics on
+    # the port after its own.
+    exports_metrics: bool = True
+    # Whether the role can run in a warm JVM (see warm_pool.py). Roles that
+    # exit on their own, like clients, cannot.
+    poolable: bool = True
+    # Whether the role is profiled when the benchmark is. Auxiliary roles,
+    # like drivers, aren't.
+    profiled: bool = True
+
+
+def indexed(name: str, endpoints: List[host.Endpoint]) -> List[RoleProc]:
+    """indexed returns processes name_0, name_1, ... with --index flags."""
+    return [
+        RoleProc(label=f'{name}_{i}',
+                 endpoint=endpoint,
+                 flags=['--index', str(i)])
+        for (i, endpoint) in enumerate(endpoints)
+    ]
+
+
+def grouped(name: str, groups: List[List[host.Endpoint]]) -> List[RoleProc]:
+    """
+    grouped returns processes name_0_0, name_0_1, ..., name_1_0, ... with
+    --group_index and --index flags.
+    """
+    return [
+        RoleProc(label=f'{name}_{group_index}_{i}',
+                 endpoint=endpoint,
+                 flags=['--group_index', str(group_index), '--index', str(i)])
+        for (group_index, group) in enumerate(groups)
+        for (i, endpoint) in enumerate(group)
+    ]
+
+
+def _camel_case(s: str) -> str:
+    (first, *rest) = s.split('_')
+    return first + ''.join(word.capitalize() for word in rest)
+
+
+def flag_value(x: Any) -> str:
+    if isinstance(x, datetime.timedelta):
+        return f'{x.total_seconds()}s'
+    return str(x)
+
+
+def options_flags(options: Any, prefix: str = '--options') -> List[str]:
+    """
+    options_flags converts an options NamedTuple into flags. Field names are
+    converted to camel case, and nested options are flattened with their
+    `_options` suffix dropped. For example, LeaderOptions(
+    flush_phase2as_every_n=1, election_options=ElectionOptions(...)) becomes
+
+        ['--options.flushPhase2asEveryN', '1',
+         '--options.election.pingPeriod', '1.0s', ...]
+    """
+    flags: List[str] = []
+    for (field, value) in options._asdict().items():
+        if hasattr(value, '_asdict'):
+            name = field[:-len('_options')] if field.endswith('_options') \
+                   else field
+            flags += options_flags(value, f'{prefix}.{_camel_case(name)}')
+        else:
+            flags += [f'{prefix}.{_camel_case(field)}', flag_value(value)]
+    return flags
+
+
+def java(heap_size: Optional[str],
+         monitored: bool,
+         jvm_flags: List[str] = []) -> List[str]:
+    cmd = ['java'] + jvm_flags
+    if heap_size is not None:
+        cmd += [f'-Xms{heap_size}', f'-Xmx{heap_size}']
+    if monitored:
+        cmd += [
+            '-verbose:gc',
+            '-XX:-PrintGC',
+            '-XX:+PrintHeapAtGC',
+            '-XX:+PrintGCDetails',
+            '-XX:+PrintGCTimeStamps',
+            '-XX:+PrintGCDateStamps',
+        ]
+    return cmd
+
+
+def prometheus_jobs(job_prefix: str,
+                    roles: List[Role]) -> Dict[str, List[str]]:
+    """
+    prometheus_jobs returns the Prometheus jobs of `roles` (e.g.,
+    'multipaxos_acceptor'), as expected by prometheus.prometheus_config.
+    """
+    return {
+        f'{job_prefix}_{role.name}': [
+            f'{p.endpoint.host.ip()}:{p.endpoint.port + 1}' for p in role.procs
+        ] for role in roles if role.exports_metrics
+    }
+
+
+class Launcher:
+    def __init__(self,
+                 bench: benchmark.BenchmarkDirectory,
+                 jar: str,
+                 monitored: bool,
+                 profiled: bool,
+                 allocator: Optional[affinity.AffinityAllocator] = None,
+                 pool: Optional[warm_pool.WarmPool] = None,
+                 jvm_flags: List[str] = [],
+                 startup_timeout: float = 60) -> None:
+        self._bench = bench
+        self._jar = os.path.abspath(jar)
+        self._monitored = monitored
+        self._profiled = profiled
+        self._allocator = allocator
+        # A warm JVM prints its garbage collection log to its own stdout
+        # rather than to <label>_out.txt, where gc_log.py reads it. Monitored
+        # benchmarks thus launch fresh JVMs.
+        if pool is not None and monitored:
+            bench.log('The benchmark is monitored, so the warm JVM pool is '
+                      'not used.')
+            pool = None
+        self._pool = pool
+        # Extra JVM flags passed to every process (e.g., cds.java_flags).
+        self._jvm_flags = jvm_flags
+        self._startup_timeout = startup_timeout
+        # The startup time of every process, in seconds, indexed by label.
+        self.startup_times: Dict[str, float] = dict()
+        self._startup_lock = threading.Lock()
+        # The processes of every launched role, in launch order.
+        self.procs: Dict[str, List[proc.Proc]] = dict()
+
+    def args(self, role: Role, p: RoleProc) -> List[str]:
+        args = p.flags + role.flags
+        if role.exports_metrics:
+            args += [
+                '--prometheus_host',
+                p.endpoint.host.ip(),
+                '--prometheus_port',
+                str(p.endpoint.port + 1) if self._monitored else '-1',
+            ]
+        return args
+
+    def _java(self, role: Role) -> List[str]:
+        return java(role.heap_size,
+                    self._monitored and role.heap_size is not None,
+                    self._jvm_flags)
+
+    def command(self, role: Role, p: RoleProc) -> List[str]:
+        return self._java(role) + [
+            '-cp',
+            self._jar,
+            role.main_class,
+        ] + self.args(role, p)
+
+    def _launch_one(self, role: Role, p: RoleProc,
+                    pin: List[str]) -> proc.Proc:
+        # `pin` is the command prefix that pins the process to its CPUs.
+        start = time.time()
+        if self._pool is not None and role.poolable:
+            process: proc.Proc = self._pool.launch(
+                self._bench,
+                endpoint=p.endpoint,
+                label=p.label,
+                prefix=pin + self._java(role),
+                jar=self._jar,
+                main_class=role.main_class,
+                args=self.args(role, p))
+        else:
+            process = self._bench.popen(host=p.endpoint.host,
+                                        label=p.label,
+                                        cmd=pin + self.command(role, p))
+        if self._profiled and role.profiled:
+            process = perf_util.JavaPerfProc(self._bench, p.endpoint.host,
+                                             process, p.label)
+        threading.Thread(target=self._record_startup,
+                         args=(p, start),
+                         daemon=True).start()
+        return process
+
+    def _record_startup(self, p: RoleProc, start: float) -> None:
+        # We poll the process' port in the background, so that recording
+        # startup times doesn't delay launching other processes.
+        deadline = start + self._startup_timeout
+        address = (p.endpoint.host.ip(), p.endpoint.port)
+        while time.time() < deadline:
+            try:
+                with socket.create_connection(address, timeout=1):
+                    pass
+            except OSError:
+                time.sleep(0.05)
+                continue
+
+            with self._startup_lock:
+                self.startup_times[p.label] = time.time() - start
+                self._bench.write_dict('startup_times.json',
+                                       self.startup_times)
+            return
+        if not self._bench.logfile.closed:
+            self._bench.log(f'{p.label} did not accept connections within '
+                            f'{self._startup_timeout} seconds.')
+
+    def _pin(self, p: RoleProc) -> List[str]:
+        if self._allocator is None:
+            return []
+        return self._allocator.prefix(p.endpoint.host, p.label)
+
+    def _waves(self, roles: List[Role]) -> List[List[Role]]:
+        # We group roles into waves. Every role is in the first wave after all
+        # of the roles that it depends on. Dependencies on roles that were
+        # already launched (or that aren't being launched) are ignored.
+        names = {role.name for role in roles}
+        wave_index: Dict[str, int] = dict()
+        remaining = list(roles)
+        while len(remaining) > 0:
+            ready = [
+                role for role in remaining
+                if all(d in wave_index or d not in names
+                       for d in role.depends_on)
+            ]
+            if len(ready) == 0:
+                raise ValueError(f'Roles {[r.name for r in remaining]} have '
+                                 f'cyclic dependencies.')
+            for role in ready:
+                wave_index[role.name] = 1 + max(
+                    [wave_index[d] for d in role.depends_on if d in names],
+                    default=-1)
+                remaining.remove(role)
+
+        waves: List[List[Role]] = [[] for _ in range(max(wave_index.values()) +
+                                                     1)]
+        for role in roles:
+            waves[wave_index[role.name]].append(role)
+        return waves
+
+    def launch(self, roles: List[Role]) -> Dict[str, List[proc.Proc]]:
+        """
+        launch launches `roles` and returns the processes of every role,
+        indexed by role name. Processes are returned in the same order as
+        role.procs.
+        """
+        launched: Dict[str, List[proc.Proc]] = dict()
+        if len(roles) == 0:
+            return launched
+
+        for wave in self._waves(roles):
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=max(sum(len(r.procs) for r in wave),
+                                    1)) as executor:
+                # We allocate CPUs sequentially and only launch processes in
+                # parallel.
+                futures = {
+                    role.name: [
+                        executor.submit(self._launch_one, role, p,
+                                        self._pin(p))
+                        for p in role.procs
+                    ] for role in wave
+                }
+                for role in wave:
+                    launched[role.name] = [
+                        f.result() for f in futures[role.name]
+                    ]
+                    self._bench.log(f'{role.name} processes started.')
+
+        self.procs.update(launched)
+        return launched
+
+    def kill(self, names: Optional[List[str]] = None) -> None:
+        """
+        kill kills the processes of the roles in `names`, or of every launched
+        role if `names` is None.
+        """
+        for name in (names if names is not None else list(self.procs)):
+            for p in self.procs.get(name, []):
+                p.kill()
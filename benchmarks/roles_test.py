@@ -0,0 +1,134 @@
+from . import benchmark
+from . import host
+from . import roles
+from . import warm_pool
+from typing import List, NamedTuple
+import datetime
+import os
+import tempfile
+import unittest
+
+
+class ElectionOptions(NamedTuple):
+    ping_period: datetime.timedelta = datetime.timedelta(seconds=1)
+
+
+class LeaderOptions(NamedTuple):
+    flush_phase2as_every_n: int = 1
+    unsafe_read_at_i: bool = False
+    election_options: ElectionOptions = ElectionOptions()
+
+
+# A Launcher that launches `sleep` instead of the JVM.
+class SleepLauncher(roles.Launcher):
+    def command(self, role: roles.Role, p: roles.RoleProc) -> List[str]:
+        return ['sleep', '0']
+
+
+class RolesTest(unittest.TestCase):
+    def test_options_flags(self):
+        self.assertEqual(roles.options_flags(LeaderOptions()), [
+            '--options.flushPhase2asEveryN', '1',
+            '--options.unsafeReadAtI', 'False',
+            '--options.election.pingPeriod', '1.0s',
+        ])
+
+    def test_prometheus_jobs(self):
+        h = host.FakeHost('10.0.0.1')
+        acceptor = roles.Role(
+            name='acceptor',
+            main_class='AcceptorMain',
+            heap_size='1g',
+            procs=roles.grouped('acceptor', [[host.Endpoint(h, 10000)],
+                                             [host.Endpoint(h, 10100)]]))
+        self.assertEqual([p.label for p in acceptor.procs],
+                         ['acceptor_0_0', 'acceptor_1_0'])
+        self.assertEqual(roles.prometheus_jobs('multipaxos', [acceptor]), {
+            'multipaxos_acceptor': ['10.0.0.1:10001', '10.0.0.1:10101'],
+        })
+
+    def test_command(self):
+        h = host.FakeHost('10.0.0.1')
+        with tempfile.TemporaryDirectory() as dir:
+            with benchmark.BenchmarkDirectory(os.path.join(dir,
+                                                           'bench')) as bench:
+                launcher = roles.Launcher(bench,
+                                          jar='/jar',
+                                          monitored=True,
+                                          profiled=False)
+                server = roles.Role(name='server',
+                                    main_class='ServerMain',
+                                    heap_size='1g',
+                                    procs=[])
+                client = server._replace(name='client',
+                                         main_class='ClientMain',
+                                         heap_size=None)
+                p = roles.RoleProc(label='p',
+                                   endpoint=host.Endpoint(h, 10000),
+                                   flags=['--index', '0'])
+                self.assertEqual(launcher.command(server, p)[:4],
+                                 ['java', '-Xms1g', '-Xmx1g', '-verbose:gc'])
+                self.assertEqual(launcher.command(client, p), [
+                    'java', '-cp', '/jar', 'ClientMain', '--index', '0',
+                    '--prometheus_host', '10.0.0.1', '--prometheus_port',
+                    '10001'
+                ])
+
+    def test_monitored_launches_skip_pool(self):
+        with tempfile.TemporaryDirectory() as dir:
+            with benchmark.BenchmarkDirectory(os.path.join(dir,
+                                                           'bench')) as bench:
+                pool = warm_pool.WarmPool()
+                launcher = SleepLauncher(bench,
+                                         jar='jar',
+                                         monitored=True,
+                                         profiled=False,
+                                         pool=pool)
+                role = roles.Role(name='acceptor',
+                                  main_class='AcceptorMain',
+                                  heap_size='1g',
+                                  procs=roles.indexed('acceptor', [
+                                      host.Endpoint(host.LocalHost(), 10000)
+                                  ]))
+                (p,) = launcher.launch([role])['acceptor']
+                self.assertEqual(p.wait(), 0)
+                self.assertEqual(len(bench.pids), 1)
+                pool.close()
+
+    def test_launch(self):
+        h = host.LocalHost()
+
+        def role(name: str, n: int, depends_on: List[str] = []) -> roles.Role:
+            endpoints = [host.Endpoint(h, 10000 + i) for i in range(n)]
+            return roles.Role(name=name,
+                              main_class=name,
+                              heap_size='1g',
+                              procs=roles.indexed(name, endpoints),
+                              depends_on=depends_on)
+
+        with tempfile.TemporaryDirectory() as dir:
+            with benchmark.BenchmarkDirectory(os.path.join(dir,
+                                                           'bench')) as bench:
+                launcher = SleepLauncher(bench,
+                                         jar='jar',
+                                         monitored=False,
+                                         profiled=False)
+                rs = [
+                    role('leader', 1, depends_on=['acceptor', 'replica']),
+                    role('acceptor', 3),
+                    role('replica', 2),
+                ]
+                self.assertEqual(
+                    [[r.name for r in wave] for wave in launcher._waves(rs)],
+                    [['acceptor', 'replica'], ['leader']])
+                procs = launcher.launch(rs)
+                self.assertEqual(list(procs), ['acceptor', 'replica', 'leader'])
+                self.assertEqual([len(ps) for ps in procs.values()], [3, 2, 1])
+                for ps in procs.values():
+                    for p in ps:
+                        self.assertEqual(p.wait(), 0)
+                self.assertEqual(len(bench.pids), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
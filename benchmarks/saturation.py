@@ -0,0 +1,171 @@
+# This file contains a SaturationSuite, a benchmark suite that searches for
+# the saturation point of a system rather than running a hand-written list of
+# inputs.
+#
+# Latency-throughput benchmarks typically sweep over a long list of client
+# configurations, many of which are either far below or far above the point at
+# which the system saturates. A SaturationSuite instead raises the offered load
+# geometrically (e.g., 1, 2, 4, 8, ... clients, or 1000, 2000, 4000, ...
+# operations per second) until throughput stops growing or until p99 latency
+# exceeds a service level objective (SLO). Throughput stops growing somewhere
+# between the load before the last load that increased throughput and the
+# first load that did not, so the suite then densifies its samples in that
+# interval to find the knee of the latency-throughput curve.
+#
+# Every benchmark is recorded in results.csv like any other suite. In
+# addition, the suite writes saturation.json, which lists the load,
+# throughput, and p99 latency of every sample as well as the peak throughput
+# found.
+
+from . import benchmark
+from typing import Any, Dict, List, NamedTuple, Optional
+import datetime
+
+
+class SaturationOptions(NamedTuple):
+    # The first offered load.
+    initial_load: float
+    # The offered load is never raised above max_load.
+    max_load: float
+    # During exploration, the offered load is multiplied by growth_factor after
+    # every benchmark.
+    growth_factor: float = 2.0
+    # Throughput has plateaued if a benchmark's throughput is not at least
+    # (1 + plateau_threshold) times the best throughput seen so far.
+    plateau_threshold: float = 0.05
+    # Exploration stops once throughput plateaus `patience` times in a row.
+    patience: int = 1
+    # If not None, exploration also stops once p99 latency exceeds slo_p99_ms.
+    slo_p99_ms: Optional[float] = None
+    # The number of additional loads sampled evenly around the knee.
+    num_knee_samples: int = 4
+
+
+class SaturationSample(NamedTuple):
+    load: float
+    throughput: float
+    p99_ms: float
+
+
+class SaturationResult(NamedTuple):
+    samples: List[SaturationSample]
+    # The sample with the highest throughput that meets the SLO, if any.
+    peak: Optional[SaturationSample]
+
+
+# A SaturationSuite is a Suite whose inputs are chosen adaptively. Instead of
+# `inputs`, a SaturationSuite must provide
+#
+#  - `saturation_options`, which configures the search;
+#  - `input_at(load)`, which returns the input that offers `load`; and
+#  - `throughput(output)` and `p99_ms(output)`, which extract the throughput
+#    and p99 latency of a benchmark.
+#
+# Loads are floats. A suite that sweeps over client counts can round them.
+# Two loads that map to the same input are benchmarked only once.
+class SaturationSuite(benchmark.Suite[benchmark.Input, benchmark.Output]):
+    def saturation_options(self) -> SaturationOptions:
+        raise NotImplementedError("")
+
+    def input_at(self, load: float) -> benchmark.Input:
+        raise NotImplementedError("")
+
+    def throughput(self, output: benchmark.Output) -> float:
+        raise NotImplementedError("")
+
+    def p99_ms(self, output: benchmark.Output) -> float:
+        raise NotImplementedError("")
+
+    def run_suite(self, suite_dir: benchmark.SuiteDirectory) -> None:
+        self.run_search(suite_dir)
+
+    def run_search(self,
+                   suite_dir: benchmark.SuiteDirectory) -> SaturationResult:
+        print(f'Running saturation search in {suite_dir.path}.')
+        options = self.saturation_options()
+        assert 0 < options.initial_load <= options.max_load, options
+        assert options.growth_factor > 1, options
+        assert options.patience >= 1, options
+
+        args = self.args()
+        suite_dir.write_dict('args.json', args)
+        suite_dir.write_dict('saturation_options.json', options._asdict())
+        inputs_file = suite_dir.create_file('inputs.txt')
+        results = self.results_file(suite_dir, args)
+        suite_start_time = datetime.datetime.now()
+
+        # We memoize samples by input, so that two loads that map to the same
+        # input are not benchmarked twice.
+        samples: Dict[Any, SaturationSample] = dict()
+
+        def sample(load: float) -> SaturationSample:
+            input = self.input_at(load)
+            if input in samples:
+                return samples[input]
+            inputs_file.write(str(input) + '\n')
+            inputs_file.flush()
+            output = self.run_and_record(suite_dir, args, input, results,
+                                         len(samples) + 1, None,
+                                         suite_start_time)
+            s = SaturationSample(load=load,
+                                 throughput=self.throughput(output),
+                                 p99_ms=self.p99_ms(output))
+            samples[input] = s
+            return s
+
+        def meets_slo(s: SaturationSample) -> bool:
+            return options.slo_p99_ms is None or s.p99_ms <= options.slo_p99_ms
+
+        # Explore. We raise the load until throughput plateaus, the SLO is
+        # violated, or we hit the maximum load. `knee_low` is the load before
+        # the last load that increased throughput while meeting the SLO, and
+        # `knee_high` is the first load after it.
+        load = options.initial_load
+        best: Optional[SaturationSample] = None
+        best_load: Optional[float] = None
+        knee_low: Optional[float] = None
+        knee_high: Optional[float] = None
+        num_plateaus = 0
+        while True:
+            s = sample(load)
+            if not meets_slo(s):
+                knee_high = load if knee_high is None else knee_high
+                break
+            elif (best is None or s.throughput >=
+                  (1 + options.plateau_threshold) * best.throughput):
+                best = s
+                knee_low = best_load
+                best_load = load
+                knee_high = None
+                num_plateaus = 0
+            else:
+                knee_high = load if knee_high is None else knee_high
+                num_plateaus += 1
+                if num_plateaus >= options.patience:
+                    break
+
+            if load >= options.max_load:
+                break
+            load = min(load * options.growth_factor, options.max_load)
+
+        # Densify. If the knee is below the initial load, we search down to
+        # zero. If we never plateaued, the knee is at or above max_load, and
+        # there is nothing to refine.
+        if knee_high is not None:
+            low = knee_low if knee_low is not None else 0
+            step = (knee_high - low) / (options.num_knee_samples + 1)
+            for i in range(1, options.num_knee_samples + 1):
+                sample(low + i * step)
+
+        sorted_samples = sorted(samples.values(), key=lambda s: s.load)
+        feasible = [s for s in sorted_samples if meets_slo(s)]
+        peak = (max(feasible, key=lambda s: s.throughput)
+                if len(feasible) > 0 else None)
+        result = SaturationResult(samples=sorted_samples, peak=peak)
+        suite_dir.write_dict(
+            'saturation.json', {
+                'samples': [s._asdict() for s in result.samples],
+                'peak': peak._asdict() if peak is not None else None,
+            })
+        print(f'Peak throughput: {peak}.')
+        return result
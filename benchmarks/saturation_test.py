@@ -0,0 +1,108 @@
+from . import benchmark
+from . import saturation
+from typing import Any, Dict, NamedTuple, Tuple
+import io
+import tempfile
+import unittest
+import unittest.mock
+
+
+class Input(NamedTuple):
+    load: int
+
+
+class Output(NamedTuple):
+    throughput: float
+    p99_ms: float
+
+
+# A fake system that saturates at 100 operations per second. Past saturation,
+# latency grows with load.
+class FakeSuite(saturation.SaturationSuite[Input, Output]):
+    def __init__(self, options: saturation.SaturationOptions) -> None:
+        self.options = options
+        self.loads = []
+
+    def args(self) -> Dict[Any, Any]:
+        return {}
+
+    def summary(self, input: Input, output: Output) -> str:
+        return str(output)
+
+    def run_benchmark(self, bench: benchmark.BenchmarkDirectory,
+                      args: Dict[Any, Any], input: Input) -> Output:
+        self.loads.append(input.load)
+        return Output(throughput=min(input.load, 100),
+                      p99_ms=1 if input.load <= 100 else input.load / 10)
+
+    def saturation_options(self) -> saturation.SaturationOptions:
+        return self.options
+
+    def input_at(self, load: float) -> Input:
+        return Input(load=int(load))
+
+    def throughput(self, output: Output) -> float:
+        return output.throughput
+
+    def p99_ms(self, output: Output) -> float:
+        return output.p99_ms
+
+
+class SaturationTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def _search(self,
+                **kwargs) -> Tuple[FakeSuite, saturation.SaturationResult]:
+        suite = FakeSuite(saturation.SaturationOptions(**kwargs))
+        with unittest.mock.patch('sys.stdout', new=io.StringIO()):
+            with benchmark.SuiteDirectory(self.dir.name) as suite_dir:
+                result = suite.run_search(suite_dir)
+        return (suite, result)
+
+    def test_plateau(self):
+        (suite, result) = self._search(initial_load=10,
+                                       max_load=10000,
+                                       num_knee_samples=3)
+        # Throughput grows until 160 and plateaus at 320, so we densify
+        # between 80 and 320.
+        self.assertEqual(suite.loads, [10, 20, 40, 80, 160, 320, 140, 200, 260])
+        self.assertEqual(result.peak.load, 140)
+        self.assertEqual(result.peak.throughput, 100)
+
+    def test_slo(self):
+        (suite, result) = self._search(initial_load=10,
+                                       max_load=10000,
+                                       slo_p99_ms=5,
+                                       num_knee_samples=0)
+        self.assertEqual(suite.loads, [10, 20, 40, 80, 160])
+        self.assertEqual(result.peak.load, 80)
+
+    def test_max_load(self):
+        (suite, result) = self._search(initial_load=10,
+                                       max_load=50,
+                                       num_knee_samples=3)
+        self.assertEqual(suite.loads, [10, 20, 40, 50])
+        self.assertEqual(result.peak.load, 50)
+
+    def test_duplicate_inputs(self):
+        (suite, result) = self._search(initial_load=80,
+                                       max_load=10000,
+                                       growth_factor=1.5,
+                                       num_knee_samples=100)
+        self.assertEqual(len(suite.loads), len(set(suite.loads)))
+
+    def test_slo_violated_at_initial_load(self):
+        (suite, result) = self._search(initial_load=200,
+                                       max_load=10000,
+                                       slo_p99_ms=5,
+                                       num_knee_samples=1)
+        self.assertEqual(suite.loads, [200, 100])
+        self.assertEqual(result.peak.load, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,16 @@
+from .. import affinity
 from .. import benchmark
+from .. import cds
 from .. import cluster
 from .. import host
 from .. import parser_util
 from .. import pd_util
-from .. import perf_util
 from .. import proc
 from .. import prometheus
 from .. import proto_util
+from .. import roles
 from .. import util
+from .. import warm_pool
 from .. import workload
 from ..workload import Workload
 from typing import Any, Callable, Collection, Dict, List, NamedTuple, Optional
@@ -133,6 +136,11 @@ class Input(NamedTuple):
     client_options: ClientOptions
     client_log_level: str
 
+    # Affinity. ################################################################
+    # If positive, every process is pinned to its own cpus_per_proc CPUs,
+    # preferably on a single NUMA node. See affinity.py.
+    cpus_per_proc: int = 0
+
 
 Output = benchmark.RecorderOutput
 
@@ -229,6 +237,11 @@ class SimpleGcBPaxosNet:
 
 # Suite ########################################################################
 class SimpleGcBPaxosSuite(benchmark.Suite[Input, Output]):
+    def __init__(self) -> None:
+        super().__init__()
+        self._pool = (warm_pool.WarmPool()
+                      if self.args().get('warm_jvm_pool') else None)
+
     def run_benchmark(self, bench: benchmark.BenchmarkDirectory,
                       args: Dict[Any, Any], input: Input) -> Output:
         net = SimpleGcBPaxosNet(args['cluster'], args['identity_file'], input)
@@ -237,6 +250,15 @@ class SimpleGcBPaxosSuite(benchmark.Suite[Input, Output]):
     def _run_benchmark(self, bench: benchmark.BenchmarkDirectory,
                        args: Dict[Any, Any], input: Input,
                        net: SimpleGcBPaxosNet) -> Output:
+        launcher = roles.Launcher(
+            bench,
+            jar=args['jar'],
+            monitored=input.monitored,
+            profiled=input.profiled,
+            allocator=affinity.AffinityAllocator(bench, input.cpus_per_proc),
+            pool=self._pool,
+            jvm_flags=cds.java_flags(args))
+
         # Write config file.
         config = net.config()
         config_filename = bench.abspath('config.pbtxt')
@@ -244,288 +266,120 @@ class SimpleGcBPaxosSuite(benchmark.Suite[Input, Output]):
                            proto_util.message_to_pbtext(config))
         bench.log('Config file config.pbtxt written.')
 
-        # If we're monitoring the code, run garbage collection verbosely.
-        java = ['java']
-        if input.monitored:
-            java += [
-                '-verbose:gc',
-                '-XX:-PrintGC',
-                '-XX:+PrintHeapAtGC',
-                '-XX:+PrintGCDetails',
-                '-XX:+PrintGCTimeStamps',
-                '-XX:+PrintGCDateStamps',
-            ]
-        # Increase the heap size.
+        # Write workload file.
+        workload_filename = bench.abspath('workload.pbtxt')
+        bench.write_string(
+            workload_filename,
+            proto_util.message_to_pbtext(input.workload.to_proto()))
+
+        # Describe roles.
         # TODO(mwhittaker): Right now, not much thought has been put into the
         # heap size. Think more carefully about this. We may want, for example,
         # to increase the size of the young generation.
-        java += [f'-Xms{input.jvm_heap_size}', f'-Xmx{input.jvm_heap_size}']
-
-        # Launch dep service nodes.
-        dep_service_node_procs: List[proc.Proc] = []
-        for (i, dep) in enumerate(net.placement().dep_service_nodes):
-            p = bench.popen(
-                host=dep.host,
-                label=f'dep_service_node_{i}',
-                cmd=java + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.simplegcbpaxos.DepServiceNodeMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.dep_service_node_log_level,
-                    '--state_machine',
-                    input.state_machine,
-                    '--prometheus_host',
-                    dep.host.ip(),
-                    '--prometheus_port',
-                    str(dep.port + 1) if input.monitored else '-1',
-                    '--options.topKDependencies',
-                    str(input.dep_service_node_options.top_k_dependencies),
-                    '--options.garbageCollectEveryNCommands',
-                    str(input.dep_service_node_options.
-                        garbage_collect_every_n_commands),
-                    '--options.unsafeReturnNoDependencies',
-                    str(input.dep_service_node_options.
-                        unsafe_return_no_dependencies),
-                    '--options.measureLatencies',
-                    str(input.dep_service_node_options.measure_latencies),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, dep.host, p,
-                                           f'dep_service_node_{i}')
-            dep_service_node_procs.append(p)
-        bench.log('DepServiceNodes started.')
-
-        # Launch acceptors.
-        acceptor_procs: List[proc.Proc] = []
-        for (i, acceptor) in enumerate(net.placement().acceptors):
-            p = bench.popen(
-                host=acceptor.host,
-                label=f'acceptor_{i}',
-                cmd=java + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.simplegcbpaxos.AcceptorMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.acceptor_log_level,
-                    '--prometheus_host',
-                    acceptor.host.ip(),
-                    '--prometheus_port',
-                    str(acceptor.port + 1) if input.monitored else '-1',
-                    '--options.statesGrowSize',
-                    str(input.acceptor_options.states_grow_size),
-                    '--options.measureLatencies',
-                    str(input.acceptor_options.measure_latencies),
-                ],
+        def role(name: str,
+                 main_class: str,
+                 heap_size: Optional[str],
+                 procs: List[roles.RoleProc],
+                 log_level: str,
+                 options: Any,
+                 flags: List[str] = [],
+                 depends_on: List[str] = [],
+                 poolable: bool = True) -> roles.Role:
+            return roles.Role(
+                name=name,
+                main_class=f'frankenpaxos.simplegcbpaxos.{main_class}',
+                heap_size=heap_size,
+                procs=procs,
+                flags=['--config', config_filename, '--log_level', log_level]
+                + flags + roles.options_flags(options),
+                depends_on=depends_on,
+                poolable=poolable,
             )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, acceptor.host, p,
-                                           f'acceptor_{i}')
-            acceptor_procs.append(p)
-        bench.log('Acceptors started.')
-
-        # Launch replicas.
-        replica_procs: List[proc.Proc] = []
-        for (i, replica) in enumerate(net.placement().replicas):
-            p = bench.popen(
-                host=replica.host,
-                label=f'replica_{i}',
-                cmd=java + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.simplegcbpaxos.ReplicaMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.replica_log_level,
-                    '--state_machine',
-                    input.state_machine,
-                    '--prometheus_host',
-                    replica.host.ip(),
-                    '--prometheus_port',
-                    str(replica.port + 1) if input.monitored else '-1',
-                    '--options.commandsGrowSize',
-                    str(input.replica_options.commands_grow_size),
-                    '--options.recoverVertexTimerMinPeriod',
-                    '{}s'.format(
-                        input.replica_options.recover_vertex_timer_min_period.
-                        total_seconds()),
-                    '--options.recoverVertexTimerMaxPeriod',
-                    '{}s'.format(
-                        input.replica_options.recover_vertex_timer_max_period.
-                        total_seconds()),
-                    '--options.unsafeSkipGraphExecution',
-                    "true" if input.replica_options.unsafe_skip_graph_execution
-                    else "false",
-                    '--options.numBlockers',
-                    str(input.replica_options.num_blockers),
-                    '--options.executeGraphBatchSize',
-                    str(input.replica_options.execute_graph_batch_size),
-                    '--options.executeGraphTimerPeriod',
-                    '{}s'.format(input.replica_options.
-                                 execute_graph_timer_period.total_seconds()),
-                    '--options.sendWatermarkEveryNCommands',
-                    str(input.replica_options.send_watermark_every_n_commands),
-                    '--options.sendSnapshotEveryNCommands',
-                    str(input.replica_options.send_snapshot_every_n_commands),
-                    '--options.measureLatencies',
-                    str(input.replica_options.measure_latencies),
-                    '--options.unsafeDontRecover',
-                    str(input.replica_options.unsafe_dont_recover),
-                    '--zigzag.verticesGrowSize',
-                    str(input.replica_zigzag_options.vertices_grow_size),
-                    '--zigzag.garbageCollectEveryNCommands',
-                    str(input.replica_zigzag_options.
-                        garbage_collect_every_n_commands),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, replica.host, p,
-                                           f'replica_{i}')
-            replica_procs.append(p)
-        bench.log('Replicas started.')
-
-        # Launch garbage collectors.
-        garbage_collector_procs: List[proc.Proc] = []
-        for (i, collector) in enumerate(net.placement().garbage_collectors):
-            p = bench.popen(
-                host=collector.host,
-                label=f'garbage_collector_{i}',
-                cmd=java + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.simplegcbpaxos.GarbageCollectorMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.garbage_collector_log_level,
-                    '--prometheus_host',
-                    collector.host.ip(),
-                    '--prometheus_port',
-                    str(collector.port + 1) if input.monitored else '-1',
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, collector.host, p,
-                                           f'garbage_collector_{i}')
-            garbage_collector_procs.append(p)
-        bench.log('GarbageCollectors started.')
-
-        # Launch proposers.
-        proposer_procs: List[proc.Proc] = []
-        for (i, proposer) in enumerate(net.placement().proposers):
-            p = bench.popen(
-                host=proposer.host,
-                label=f'proposer_{i}',
-                cmd=java + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.simplegcbpaxos.ProposerMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.proposer_log_level,
-                    '--prometheus_host',
-                    proposer.host.ip(),
-                    '--prometheus_port',
-                    str(proposer.port + 1) if input.monitored else '-1',
-                    '--options.thriftySystem',
-                    input.proposer_options.thrifty_system,
-                    '--options.resendPhase1asTimerPeriod',
-                    '{}s'.format(input.proposer_options.
-                                 resend_phase1as_timer_period.total_seconds()),
-                    '--options.resendPhase2asTimerPeriod',
-                    '{}s'.format(input.proposer_options.
-                                 resend_phase2as_timer_period.total_seconds()),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, proposer.host, p,
-                                           f'proposer_{i}')
-            proposer_procs.append(p)
-        bench.log('Proposers started.')
-
-        # Launch leaders.
-        leader_procs: List[proc.Proc] = []
-        for (i, leader) in enumerate(net.placement().leaders):
-            p = bench.popen(
-                host=leader.host,
-                label=f'leader_{i}',
-                cmd=java + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.simplegcbpaxos.LeaderMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.leader_log_level,
-                    '--prometheus_host',
-                    leader.host.ip(),
-                    '--prometheus_port',
-                    str(leader.port + 1) if input.monitored else '-1',
-                    '--options.thriftySystem',
-                    input.leader_options.thrifty_system,
-                    '--options.resendDependencyRequestsTimerPeriod',
-                    '{}s'.format(input.leader_options.
-                                 resend_dependency_requests_timer_period.
-                                 total_seconds()),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, leader.host, p, f'leader_{i}')
-            leader_procs.append(p)
-        bench.log('Leaders started.')
+
+        server_roles = [
+            role('dep_service_node', 'DepServiceNodeMain', input.jvm_heap_size,
+                 roles.indexed('dep_service_node',
+                               net.placement().dep_service_nodes),
+                 input.dep_service_node_log_level,
+                 input.dep_service_node_options,
+                 flags=['--state_machine', input.state_machine]),
+            role('acceptor', 'AcceptorMain', input.jvm_heap_size,
+                 roles.indexed('acceptor', net.placement().acceptors),
+                 input.acceptor_log_level, input.acceptor_options),
+            role('replica', 'ReplicaMain', input.jvm_heap_size,
+                 roles.indexed('replica', net.placement().replicas),
+                 input.replica_log_level, input.replica_options,
+                 flags=['--state_machine', input.state_machine] +
+                 roles.options_flags(input.replica_zigzag_options,
+                                     '--zigzag')),
+            role('garbage_collector', 'GarbageCollectorMain',
+                 input.jvm_heap_size,
+                 roles.indexed('garbage_collector',
+                               net.placement().garbage_collectors),
+                 input.garbage_collector_log_level,
+                 input.garbage_collector_options,
+                 depends_on=['replica']),
+            role('proposer', 'ProposerMain', input.jvm_heap_size,
+                 roles.indexed('proposer', net.placement().proposers),
+                 input.proposer_log_level, input.proposer_options,
+                 depends_on=['dep_service_node', 'acceptor', 'replica',
+                             'garbage_collector']),
+            # Leaders are launched after everything else.
+            role('leader', 'LeaderMain', input.jvm_heap_size,
+                 roles.indexed('leader', net.placement().leaders),
+                 input.leader_log_level, input.leader_options,
+                 depends_on=['dep_service_node', 'acceptor', 'replica',
+                             'garbage_collector', 'proposer']),
+        ]
+
+        # TODO(mwhittaker): For now, we don't run clients with large heaps and
+        # verbose garbage collection because they are all colocated on one
+        # machine.
+        client_role = role(
+            'client', 'BenchmarkClientMain', None,
+            [
+                roles.RoleProc(
+                    label=f'client_{i}',
+                    endpoint=client,
+                    flags=[
+                        '--host', client.host.ip(),
+                        '--port', str(client.port),
+                        '--output_file_prefix', bench.abspath(f'client_{i}'),
+                    ])
+                for (i, client) in enumerate(net.placement().clients)
+            ],
+            input.client_log_level,
+            input.client_options,
+            flags=[
+                '--warmup_duration',
+                f'{input.warmup_duration.total_seconds()}s',
+                '--warmup_timeout',
+                f'{input.warmup_timeout.total_seconds()}s',
+                '--warmup_sleep',
+                f'{input.warmup_sleep.total_seconds()}s',
+                '--num_warmup_clients',
+                f'{input.num_warmup_clients_per_proc}',
+                '--duration',
+                f'{input.duration.total_seconds()}s',
+                '--timeout',
+                f'{input.timeout.total_seconds()}s',
+                '--num_clients',
+                f'{input.num_clients_per_proc}',
+                '--workload',
+                f'{workload_filename}',
+            ],
+            # Clients exit when they finish, so they can't be reused.
+            poolable=False)
+
+        # Launch servers.
+        launcher.launch(server_roles)
+        bench.log('Servers started.')
 
         # Launch Prometheus.
         if input.monitored:
             prometheus_config = prometheus.prometheus_config(
-                int(input.prometheus_scrape_interval.total_seconds() * 1000), {
-                    'bpaxos_leader': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().leaders
-                    ],
-                    'bpaxos_proposer': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().proposers
-                    ],
-                    'bpaxos_acceptor': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().acceptors
-                    ],
-                    'bpaxos_client': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().clients
-                    ],
-                    'bpaxos_dep_service_node': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().dep_service_nodes
-                    ],
-                    'bpaxos_replica': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().replicas
-                    ],
-                    'bpaxos_garbage_collector': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().garbage_collectors
-                    ],
-                })
+                int(input.prometheus_scrape_interval.total_seconds() * 1000),
+                roles.prometheus_jobs('bpaxos', [client_role] + server_roles))
             bench.write_string('prometheus.yml', yaml.dump(prometheus_config))
             prometheus_server = bench.popen(
                 host=net.placement().clients[0].host,
@@ -543,70 +397,13 @@ class SimpleGcBPaxosSuite(benchmark.Suite[Input, Output]):
         bench.log('Client lag ended.')
 
         # Launch clients.
-        workload_filename = bench.abspath('workload.pbtxt')
-        bench.write_string(
-            workload_filename,
-            proto_util.message_to_pbtext(input.workload.to_proto()))
-
-        client_procs: List[proc.Proc] = []
-        for (i, client) in enumerate(net.placement().clients):
-            p = bench.popen(
-                host=client.host,
-                label=f'client_{i}',
-                # TODO(mwhittaker): For now, we don't run clients with large
-                # heaps and verbose garbage collection because they are all
-                # colocated on one machine.
-                cmd=[
-                    'java',
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.simplegcbpaxos.BenchmarkClientMain',
-                    '--host',
-                    client.host.ip(),
-                    '--port',
-                    str(client.port),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.client_log_level,
-                    '--prometheus_host',
-                    client.host.ip(),
-                    '--prometheus_port',
-                    str(client.port + 1) if input.monitored else '-1',
-                    '--warmup_duration',
-                    f'{input.warmup_duration.total_seconds()}s',
-                    '--warmup_timeout',
-                    f'{input.warmup_timeout.total_seconds()}s',
-                    '--warmup_sleep',
-                    f'{input.warmup_sleep.total_seconds()}s',
-                    '--num_warmup_clients',
-                    f'{input.num_warmup_clients_per_proc}',
-                    '--duration',
-                    f'{input.duration.total_seconds()}s',
-                    '--timeout',
-                    f'{input.timeout.total_seconds()}s',
-                    '--num_clients',
-                    f'{input.num_clients_per_proc}',
-                    '--workload',
-                    f'{workload_filename}',
-                    '--output_file_prefix',
-                    bench.abspath(f'client_{i}'),
-                    '--options.reproposePeriod',
-                    '{}s'.format(
-                        input.client_options.repropose_period.total_seconds()),
-                ])
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, client.host, p, f'client_{i}')
-            client_procs.append(p)
+        client_procs = launcher.launch([client_role])['client']
         bench.log(f'Clients started and running for {input.duration}.')
 
         # Wait for clients to finish and then terminate leaders and acceptors.
         for p in client_procs:
             p.wait()
-        for p in (leader_procs + proposer_procs + acceptor_procs +
-                  dep_service_node_procs + replica_procs +
-                  garbage_collector_procs):
-            p.kill()
+        launcher.kill([r.name for r in server_roles])
         bench.log('Clients finished and processes terminated.')
 
         # Client i writes results to `client_i_data.csv`.
@@ -615,7 +412,11 @@ class SimpleGcBPaxosSuite(benchmark.Suite[Input, Output]):
             for i in range(input.num_client_procs)
         ]
         return benchmark.parse_recorder_data(
-            bench, client_csvs, drop_prefix=datetime.timedelta(seconds=0))
+            bench,
+            client_csvs,
+            drop_prefix=datetime.timedelta(seconds=0),
+            correct_coordinated_omission=args.get(
+                'correct_coordinated_omission', False))
 
 
 def get_parser() -> argparse.ArgumentParser:
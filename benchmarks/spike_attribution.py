@@ -0,0 +1,388 @@
+# This file contains a tool that explains latency spikes in a benchmark.
+#
+# When the tail latency of a benchmark blows up, the evidence of why is spread
+# across the benchmark directory: the client's recorder data (data.csv.gz),
+# the garbage collection logs of every role (see gc_log.py), the Prometheus
+# data of every role, and the log of the driver (see
+# matchmakermultipaxos/driver_workload.py). This tool joins them. It
+#
+#   1. splits the recorder data into fixed windows (e.g., 100 ms) and finds
+#      spikes: runs of windows whose p99 latency is much larger than the
+#      median p99 latency of all windows;
+#   2. collects candidate causes: garbage collection pauses, leader changes
+#      and queue buildup (from Prometheus), driver events (e.g., a leader
+#      failure), and faults injected by the harness (see
+#      fault_injection.py); and
+#   3. ranks the candidate causes of every spike by how close they are to the
+#      spike and how large they are.
+#
+# For example:
+#
+#   python -m benchmarks.spike_attribution /tmp/2021-01-01_00:00:00.000000/001
+#
+# prints a report and writes it to spike_report.txt in the benchmark directory.
+
+from . import gc_log
+from . import prometheus
+from typing import Dict, List, NamedTuple, Optional
+import argparse
+import datetime
+import math
+import os
+import pandas as pd
+import re
+
+
+class Spike(NamedTuple):
+    start: pd.Timestamp
+    stop: pd.Timestamp
+    # The largest p99 latency of any window in the spike.
+    p99_ms: float
+    # The median p99 latency of all windows.
+    baseline_p99_ms: float
+    num_samples: int
+
+
+class Cause(NamedTuple):
+    # One of 'gc', 'leader_change', 'queue', 'driver', and 'fault'.
+    kind: str
+    # The process or metric that the cause comes from (e.g., 'leader_0').
+    source: str
+    time: pd.Timestamp
+    duration_ms: float
+    # How large the cause is, between 0 and 1. For example, a garbage
+    # collection pause that is as long as the spike's excess latency has a
+    # magnitude of 1.
+    magnitude: float
+    description: str
+
+
+class RankedCause(NamedTuple):
+    cause: Cause
+    # magnitude, discounted by the distance between the cause and the spike.
+    score: float
+
+
+def _utc(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    if index.tz is None:
+        return index.tz_localize('UTC')
+    return index.tz_convert('UTC')
+
+
+def read_recorder_data(bench_path: str,
+                       label: Optional[str] = None) -> pd.DataFrame:
+    """
+    read_recorder_data reads the recorder data of a benchmark (see
+    benchmark.wrangle_recorder_data), indexed by UTC start time.
+    """
+    for filename in ['data.csv', 'data.csv.gz']:
+        path = os.path.join(bench_path, filename)
+        if os.path.exists(path):
+            break
+    else:
+        raise ValueError(f'{bench_path} has no recorder data. Benchmarks '
+                         f'that don\'t save their recorder data (e.g., '
+                         f'save_data=False) can\'t be analyzed.')
+
+    df = pd.read_csv(path, parse_dates=['start', 'stop'])
+    if label is not None:
+        df = df[df['label'] == label]
+    df = df.set_index('start').sort_index()
+    df.index = _utc(df.index)
+    return df
+
+
+def find_spikes(df: pd.DataFrame,
+                window: datetime.timedelta = datetime.timedelta(
+                    milliseconds=100),
+                threshold: float = 3,
+                min_samples: int = 10) -> List[Spike]:
+    """
+    find_spikes returns the spikes in recorder data `df`. A window is part of
+    a spike if it has at least `min_samples` samples and its p99 latency is
+    at least `threshold` times the median p99 latency of all windows.
+    Consecutive spiking windows form a single spike.
+    """
+    latency_ms = df['latency_nanos'] / 1e6
+    grouped = latency_ms.groupby(latency_ms.index.floor(window))
+    counts = grouped.count()
+    p99s = grouped.quantile(0.99)[counts >= min_samples]
+    if len(p99s) == 0:
+        return []
+    baseline = p99s.median()
+
+    spikes: List[Spike] = []
+    spiking = p99s[p99s >= threshold * baseline]
+    # Every run of consecutive windows gets its own run id.
+    run_ids = (spiking.index.to_series().diff() != window).cumsum()
+    for (_, run) in spiking.groupby(run_ids.values):
+        spikes.append(
+            Spike(start=run.index[0],
+                  stop=run.index[-1] + window,
+                  p99_ms=run.max(),
+                  baseline_p99_ms=baseline,
+                  num_samples=int(counts[run.index].sum())))
+    return spikes
+
+
+def gc_causes(bench_path: str) -> List[Cause]:
+    """gc_causes returns the garbage collection pauses of every role."""
+    filename = os.path.join(bench_path, 'gc_events.csv')
+    if os.path.exists(filename):
+        df = pd.read_csv(filename, index_col=0, parse_dates=True)
+        df.index = _utc(pd.DatetimeIndex(df.index))
+    else:
+        labels = [
+            f[:-len('_out.txt')]
+            for f in os.listdir(bench_path)
+            if f.endswith('_out.txt')
+        ]
+        df = gc_log.read_gc_logs(bench_path, labels)
+
+    return [
+        Cause(kind='gc',
+              source=row['label'],
+              time=time,
+              duration_ms=row['pause_ms'],
+              magnitude=0,
+              description=f'{row["kind"]} ({row["cause"]}) paused for '
+              f'{row["pause_ms"]:.1f} ms')
+        for (time, row) in df.iterrows()
+    ]
+
+
+def prometheus_causes(
+        bench_path: str,
+        queue_metrics: str = '.*(pending|queue).*',
+        queue_threshold: float = 2) -> List[Cause]:
+    """
+    prometheus_causes returns the leader changes (i.e. increases in any
+    *_leader_changes_total counter) and queue buildup (i.e. samples of a gauge
+    matching `queue_metrics` that are at least `queue_threshold` times the
+    gauge's median) recorded by Prometheus.
+    """
+    tsdb = os.path.join(bench_path, 'prometheus_data')
+    if not os.path.exists(tsdb):
+        return []
+
+    causes: List[Cause] = []
+    with prometheus.PrometheusQueryer(tsdb) as queryer:
+        df = queryer.query('{__name__=~".*leader_changes_total"}[100d]')
+        for labels in df.columns:
+            labels_dict = dict(labels)
+            s = df[labels].dropna().astype(float).diff()
+            for (time, changes) in s[s > 0].items():
+                causes.append(
+                    Cause(kind='leader_change',
+                          source=labels_dict.get('instance', ''),
+                          time=time,
+                          duration_ms=0,
+                          magnitude=1,
+                          description=f'{labels_dict["__name__"]} increased '
+                          f'by {changes:.0f}'))
+
+        df = queryer.query(f'{{__name__=~"{queue_metrics}", '
+                           f'__name__!~".*_total"}}[100d]')
+        for labels in df.columns:
+            labels_dict = dict(labels)
+            s = df[labels].dropna().astype(float)
+            median = s.median()
+            if median <= 0:
+                continue
+            for (time, value) in s[s >= queue_threshold * median].items():
+                ratio = value / median
+                causes.append(
+                    Cause(kind='queue',
+                          source=labels_dict.get('instance', ''),
+                          time=time,
+                          duration_ms=0,
+                          magnitude=min(1, (ratio - 1) / 4),
+                          description=f'{labels_dict["__name__"]} is '
+                          f'{value:.0f} ({ratio:.1f}x its median)'))
+    return causes
+
+
+# A log line of a frankenpaxos.PrintLogger, possibly with color codes. For
+# example, "[Jan 01 10:00:00.123456789] [INFO] [Thread 1] Hello".
+_LOG_RE = re.compile(r'\[(?P<time>\w{3} \d\d \d\d:\d\d:\d\d)\.(?P<nanos>\d+)\] '
+                     r'\[(?P<level>\w+)\] \[Thread \d+\] (?:\x1b\[0m)?'
+                     r'(?P<message>.*)')
+
+
+def driver_causes(bench_path: str,
+                  year: int,
+                  label: str = 'driver',
+                  pattern: str = 'triggered') -> List[Cause]:
+    """
+    driver_causes returns the events logged by the driver (i.e. log lines in
+    <label>_out.txt that match `pattern`). PrintLogger timestamps are in the
+    local timezone and have no year, so we assume the local timezone of this
+    machine and use `year`.
+    """
+    filename = os.path.join(bench_path, f'{label}_out.txt')
+    if not os.path.exists(filename):
+        return []
+
+    local = datetime.datetime.now().astimezone().tzinfo
+    causes: List[Cause] = []
+    with open(filename, 'r', errors='replace') as f:
+        for line in f:
+            m = _LOG_RE.search(line)
+            if m is None or not re.search(pattern, m.group('message')):
+                continue
+            time = datetime.datetime.strptime(
+                f'{year} {m.group("time")}.{m.group("nanos")[:6]}',
+                '%Y %b %d %H:%M:%S.%f').replace(tzinfo=local)
+            causes.append(
+                Cause(kind='driver',
+                      source=label,
+                      time=pd.Timestamp(time).tz_convert('UTC'),
+                      duration_ms=0,
+                      magnitude=1,
+                      description=m.group('message').strip()))
+    return causes
+
+
+def fault_causes(bench_path: str) -> List[Cause]:
+    """
+    fault_causes returns the faults injected into the benchmark (see
+    fault_injection.py), other than the ones that were skipped.
+    """
+    filename = os.path.join(bench_path, 'faults.csv')
+    if not os.path.exists(filename):
+        return []
+
+    df = pd.read_csv(filename).fillna('')
+    causes: List[Cause] = []
+    for (_, row) in df.iterrows():
+        if row['detail'].startswith('skipped'):
+            continue
+        causes.append(
+            Cause(kind='fault',
+                  source=row['label'],
+                  time=_utc(pd.DatetimeIndex([pd.Timestamp(row['time'])]))[0],
+                  duration_ms=0,
+                  magnitude=1,
+                  description=f'{row["event"]} {row["detail"]}'.strip()))
+    return causes
+
+
+def rank(spike: Spike,
+         causes: List[Cause],
+         slack: datetime.timedelta = datetime.timedelta(seconds=1),
+         max_causes: int = 5) -> List[RankedCause]:
+    """
+    rank returns the `max_causes` highest scoring causes of `spike`. A cause
+    that overlaps the spike is scored by its magnitude. A cause that ends
+    before the spike is discounted exponentially by its distance to the
+    spike, in units of `slack`. Causes after the spike are ignored.
+    """
+    excess_ms = max(spike.p99_ms - spike.baseline_p99_ms, 1)
+    ranked: List[RankedCause] = []
+    for cause in causes:
+        end = cause.time + pd.Timedelta(milliseconds=cause.duration_ms)
+        if cause.time > spike.stop:
+            continue
+        distance = max((spike.start - end).total_seconds(), 0)
+        if distance > 5 * slack.total_seconds():
+            continue
+
+        magnitude = cause.magnitude
+        if cause.kind == 'gc':
+            # A pause that explains all of the spike's excess latency gets a
+            # magnitude of 1.
+            magnitude = min(1, cause.duration_ms / excess_ms)
+        score = magnitude * math.exp(-distance / slack.total_seconds())
+        if score > 0:
+            ranked.append(RankedCause(cause=cause, score=score))
+
+    ranked.sort(key=lambda r: r.score, reverse=True)
+    return ranked[:max_causes]
+
+
+def analyze(bench_path: str,
+            label: Optional[str] = None,
+            window: datetime.timedelta = datetime.timedelta(milliseconds=100),
+            threshold: float = 3,
+            use_prometheus: bool = True) -> Dict[Spike, List[RankedCause]]:
+    """
+    analyze finds the spikes of the benchmark in `bench_path` and ranks their
+    causes.
+    """
+    df = read_recorder_data(bench_path, label)
+    spikes = find_spikes(df, window=window, threshold=threshold)
+    if len(spikes) == 0:
+        return dict()
+
+    causes = gc_causes(bench_path)
+    causes += driver_causes(bench_path, year=df.index[0].year)
+    causes += fault_causes(bench_path)
+    if use_prometheus:
+        causes += prometheus_causes(bench_path)
+    return {spike: rank(spike, causes) for spike in spikes}
+
+
+def report(analysis: Dict[Spike, List[RankedCause]]) -> str:
+    if len(analysis) == 0:
+        return 'No latency spikes found.'
+
+    lines = [f'{len(analysis)} latency spike(s) found.', '']
+    for (spike, ranked) in analysis.items():
+        duration_ms = (spike.stop - spike.start).total_seconds() * 1000
+        lines.append(f'{spike.start} (+{duration_ms:.0f} ms): p99 '
+                     f'{spike.p99_ms:.2f} ms vs. baseline '
+                     f'{spike.baseline_p99_ms:.2f} ms over '
+                     f'{spike.num_samples} samples.')
+        if len(ranked) == 0:
+            lines.append('    No candidate causes.')
+        for r in ranked:
+            offset_ms = (r.cause.time - spike.start).total_seconds() * 1000
+            lines.append(f'    [{r.score:.2f}] {r.cause.kind} on '
+                         f'{r.cause.source} at {offset_ms:+.0f} ms: '
+                         f'{r.cause.description}')
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def main(args) -> None:
+    analysis = analyze(args.benchmark_directory,
+                       label=args.label,
+                       window=datetime.timedelta(milliseconds=args.window_ms),
+                       threshold=args.threshold,
+                       use_prometheus=not args.no_prometheus)
+    s = report(analysis)
+    print(s)
+    filename = os.path.join(args.benchmark_directory, 'spike_report.txt')
+    with open(filename, 'w') as f:
+        f.write(s + '\n')
+    print(f'Wrote report to {filename}.')
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('benchmark_directory',
+                        type=str,
+                        help='Benchmark directory')
+    parser.add_argument('--label',
+                        type=str,
+                        default=None,
+                        help='Only analyze recorder data with this label '
+                             '(e.g., write)')
+    parser.add_argument('--window_ms',
+                        type=float,
+                        default=100,
+                        help='Window size in milliseconds')
+    parser.add_argument('--threshold',
+                        type=float,
+                        default=3,
+                        help='A window spikes if its p99 latency is this many '
+                             'times the median p99 latency')
+    parser.add_argument('--no_prometheus',
+                        action='store_true',
+                        help='Don\'t read Prometheus data')
+    return parser
+
+
+if __name__ == '__main__':
+    parser = get_parser()
+    main(parser.parse_args())
@@ -0,0 +1,74 @@
+from . import spike_attribution
+import datetime
+import os
+import pandas as pd
+import tempfile
+import unittest
+
+
+def _recorder_data(spike_start_s: float) -> pd.DataFrame:
+    # One request every 10 ms for 10 seconds. Requests take 1 ms, except for
+    # requests in [spike_start_s, spike_start_s + 0.2), which take 50 ms.
+    start = pd.Timestamp('2020-01-01 00:00:00', tz='UTC')
+    rows = []
+    for i in range(1000):
+        t = i * 0.01
+        latency_ms = 50 if spike_start_s <= t < spike_start_s + 0.2 else 1
+        rows.append({
+            'start': start + pd.Timedelta(seconds=t),
+            'stop': start + pd.Timedelta(seconds=t, milliseconds=latency_ms),
+            'latency_nanos': latency_ms * 1e6,
+            'host': '127.0.0.1',
+            'port': 10000,
+        })
+    return pd.DataFrame(rows)
+
+
+class SpikeAttributionTest(unittest.TestCase):
+    def test_find_spikes(self) -> None:
+        df = _recorder_data(5).set_index('start')
+        spikes = spike_attribution.find_spikes(df)
+        self.assertEqual(len(spikes), 1)
+        self.assertEqual(spikes[0].start,
+                         pd.Timestamp('2020-01-01 00:00:05', tz='UTC'))
+        self.assertEqual(spikes[0].stop,
+                         pd.Timestamp('2020-01-01 00:00:05.2', tz='UTC'))
+        self.assertAlmostEqual(spikes[0].p99_ms, 50)
+        self.assertAlmostEqual(spikes[0].baseline_p99_ms, 1)
+
+    def test_analyze(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            _recorder_data(5).to_csv(os.path.join(d, 'data.csv'),
+                                      index=False,
+                                      date_format='%Y-%m-%dT%H:%M:%S.%fZ')
+
+            # A 45 ms pause on acceptor_0_0 right before the spike, and a
+            # short pause on replica_0 after it.
+            with open(os.path.join(d, 'acceptor_0_0_out.txt'), 'w') as f:
+                f.write('2020-01-01T00:00:04.990+0000: 4.990: [GC (Allocation '
+                        'Failure) [PSYoungGen: 1000K->100K(2000K)] '
+                        '1000K->200K(4000K), 0.0450000 secs]\n')
+            with open(os.path.join(d, 'replica_0_out.txt'), 'w') as f:
+                f.write('2020-01-01T00:00:08.000+0000: 8.000: [GC (Allocation '
+                        'Failure) [PSYoungGen: 1000K->100K(2000K)] '
+                        '1000K->200K(4000K), 0.0010000 secs]\n')
+
+            # A driver event in the middle of the spike.
+            local = pd.Timestamp('2020-01-01 00:00:05.100',
+                                 tz='UTC').tz_convert(
+                                     datetime.datetime.now().astimezone(
+                                     ).tzinfo)
+            with open(os.path.join(d, 'driver_out.txt'), 'w') as f:
+                f.write(f'[{local.strftime("%b %d %H:%M:%S.%f")}000] [INFO] '
+                        f'[Thread 1] LeaderFailure failure triggered!\n')
+
+            analysis = spike_attribution.analyze(d, use_prometheus=False)
+            self.assertEqual(len(analysis), 1)
+            [ranked] = analysis.values()
+            self.assertEqual([(r.cause.kind, r.cause.source) for r in ranked],
+                             [('driver', 'driver'), ('gc', 'acceptor_0_0')])
+            self.assertIn('LeaderFailure', spike_attribution.report(analysis))
+
+
+if __name__ == '__main__':
+    unittest.main()
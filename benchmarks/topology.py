@@ -0,0 +1,167 @@
+# This file contains utilities to emulate wide area network (WAN) topologies on
+# a single Linux machine.
+#
+# A Topology is a set of sites. Every site has a loopback address (e.g.,
+# 127.0.1.1, 127.0.1.2, ...). On Linux, every address in 127.0.0.0/8 is routed
+# over the loopback device without any configuration, so a cluster JSON file
+# that assigns roles to these addresses runs every role on the local machine.
+# A Topology also has a matrix for the one-way delay, jitter, bandwidth, and
+# loss of every link between sites. We emulate these links with tc netem. For
+# every pair of sites, we create an htb class, attach a netem qdisc to it, and
+# route packets from the source address to the destination address through it
+# using a u32 filter. All other loopback traffic (e.g., 127.0.0.1) is left
+# alone.
+#
+# A topology is written as a JSON file like this:
+#
+#   {
+#     "addresses": ["127.0.1.1", "127.0.1.2"],
+#     "delay_ms": [[0, 50], [50, 0]],
+#     "jitter_ms": [[0, 5], [5, 0]],
+#     "rate_mbit": [[null, 100], [100, null]],
+#     "loss_percent": [[0, 0.1], [0.1, 0]]
+#   }
+#
+# Entry [i][j] of a matrix describes the link from site i to site j. Every
+# matrix other than delay_ms is optional. A null rate means the link is not
+# rate limited. Pass the file to a benchmark with --topology.
+
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+import contextlib
+import json
+import os
+import subprocess
+
+
+class Link(NamedTuple):
+    delay_ms: float
+    jitter_ms: float = 0
+    rate_mbit: Optional[float] = None
+    loss_percent: float = 0
+
+    def is_noop(self) -> bool:
+        return (self.delay_ms == 0 and self.jitter_ms == 0 and
+                self.rate_mbit is None and self.loss_percent == 0)
+
+
+class Topology(NamedTuple):
+    addresses: List[str]
+    delay_ms: List[List[float]]
+    jitter_ms: Optional[List[List[float]]] = None
+    rate_mbit: Optional[List[List[Optional[float]]]] = None
+    loss_percent: Optional[List[List[float]]] = None
+
+    @staticmethod
+    def from_dict(d: Dict[str, Any]) -> 'Topology':
+        topology = Topology(addresses=d['addresses'],
+                            delay_ms=d['delay_ms'],
+                            jitter_ms=d.get('jitter_ms'),
+                            rate_mbit=d.get('rate_mbit'),
+                            loss_percent=d.get('loss_percent'))
+        topology.validate()
+        return topology
+
+    @staticmethod
+    def from_json_file(filename: str) -> 'Topology':
+        with open(filename, 'r') as f:
+            return Topology.from_dict(json.load(f))
+
+    def validate(self) -> None:
+        n = len(self.addresses)
+        if len(set(self.addresses)) != n:
+            raise ValueError(f'Topology addresses {self.addresses} are not '
+                             f'unique.')
+        for (name, matrix) in self._asdict().items():
+            if name == 'addresses' or matrix is None:
+                continue
+            if len(matrix) != n or any(len(row) != n for row in matrix):
+                raise ValueError(f'Topology matrix {name} is not {n}x{n}.')
+
+    def link(self, i: int, j: int) -> Link:
+        return Link(
+            delay_ms=self.delay_ms[i][j],
+            jitter_ms=self.jitter_ms[i][j] if self.jitter_ms else 0,
+            rate_mbit=self.rate_mbit[i][j] if self.rate_mbit else None,
+            loss_percent=self.loss_percent[i][j] if self.loss_percent else 0,
+        )
+
+
+# The rate of links that are not rate limited. It has to be something. htb
+# derives a class's quantum from its rate, which for a rate this large is too
+# big, so we set the quantum explicitly.
+_UNLIMITED_RATE = '100gbit'
+_QUANTUM = '65536'
+
+
+def tc_commands(topology: Topology, device: str = 'lo') -> List[List[str]]:
+    """
+    tc_commands returns the tc commands that emulate `topology` on `device`.
+    """
+    commands = [
+        ['tc', 'qdisc', 'add', 'dev', device, 'root', 'handle', '1:', 'htb',
+         'default', '1'],
+        ['tc', 'class', 'add', 'dev', device, 'parent', '1:', 'classid', '1:1',
+         'htb', 'rate', _UNLIMITED_RATE, 'quantum', _QUANTUM],
+    ]
+
+    # Class minor numbers and qdisc handles are hexadecimal. Class 1:1 is the
+    # default class, so links start at 2.
+    k = 2
+    for (i, src) in enumerate(topology.addresses):
+        for (j, dst) in enumerate(topology.addresses):
+            link = topology.link(i, j)
+            if link.is_noop():
+                continue
+
+            netem = ['delay', f'{link.delay_ms}ms']
+            if link.jitter_ms > 0:
+                netem += [f'{link.jitter_ms}ms']
+            if link.loss_percent > 0:
+                netem += ['loss', f'{link.loss_percent}%']
+            if link.rate_mbit is not None:
+                netem += ['rate', f'{link.rate_mbit}mbit']
+            # netem's default queue of 1000 packets is easily overrun by a
+            # benchmark on a long link.
+            netem += ['limit', '100000']
+
+            commands += [
+                ['tc', 'class', 'add', 'dev', device, 'parent', '1:',
+                 'classid', f'1:{k:x}', 'htb', 'rate', _UNLIMITED_RATE,
+                 'quantum', _QUANTUM],
+                ['tc', 'qdisc', 'add', 'dev', device, 'parent', f'1:{k:x}',
+                 'handle', f'{k:x}:', 'netem'] + netem,
+                ['tc', 'filter', 'add', 'dev', device, 'protocol', 'ip',
+                 'parent', '1:', 'prio', '1', 'u32', 'match', 'ip', 'src',
+                 f'{src}/32', 'match', 'ip', 'dst', f'{dst}/32', 'flowid',
+                 f'1:{k:x}'],
+            ]
+            k += 1
+    return commands
+
+
+def _run(cmd: List[str], log: Callable[[str], None], check: bool) -> None:
+    # tc requires root.
+    if os.geteuid() != 0:
+        cmd = ['sudo', '-n'] + cmd
+    log(' '.join(cmd))
+    subprocess.run(cmd,
+                   check=check,
+                   stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL if not check else None)
+
+
+@contextlib.contextmanager
+def emulate(topology: Topology,
+            device: str = 'lo',
+            log: Callable[[str], None] = lambda _: None) -> Iterator[None]:
+    """
+    emulate emulates `topology` on `device` for the duration of the context.
+    Any existing root qdisc on `device` is replaced.
+    """
+    _run(['tc', 'qdisc', 'del', 'dev', device, 'root'], log, check=False)
+    try:
+        for cmd in tc_commands(topology, device):
+            _run(cmd, log, check=True)
+        yield
+    finally:
+        _run(['tc', 'qdisc', 'del', 'dev', device, 'root'], log, check=False)
@@ -0,0 +1,43 @@
+from . import topology
+import unittest
+
+
+class TopologyTest(unittest.TestCase):
+    def test_bad_matrix(self):
+        with self.assertRaises(ValueError):
+            topology.Topology.from_dict({
+                'addresses': ['127.0.1.1', '127.0.1.2'],
+                'delay_ms': [[0, 1]],
+            })
+
+    def test_duplicate_addresses(self):
+        with self.assertRaises(ValueError):
+            topology.Topology.from_dict({
+                'addresses': ['127.0.1.1', '127.0.1.1'],
+                'delay_ms': [[0, 1], [1, 0]],
+            })
+
+    def test_tc_commands(self):
+        t = topology.Topology.from_dict({
+            'addresses': ['127.0.1.1', '127.0.1.2'],
+            'delay_ms': [[0, 10], [20, 0]],
+            'loss_percent': [[0, 0], [1, 0]],
+            'rate_mbit': [[None, 100], [None, None]],
+        })
+        commands = [' '.join(cmd) for cmd in topology.tc_commands(t)]
+        # A root qdisc and default class, plus a class, qdisc, and filter for
+        # each of the two links.
+        self.assertEqual(len(commands), 8)
+        self.assertIn(
+            'tc qdisc add dev lo parent 1:2 handle 2: netem delay 10ms '
+            'rate 100mbit limit 100000', commands)
+        self.assertIn(
+            'tc qdisc add dev lo parent 1:3 handle 3: netem delay 20ms '
+            'loss 1% limit 100000', commands)
+        self.assertIn(
+            'tc filter add dev lo protocol ip parent 1: prio 1 u32 match ip '
+            'src 127.0.1.2/32 match ip dst 127.0.1.1/32 flowid 1:3', commands)
+
+
+if __name__ == '__main__':
+    unittest.main()
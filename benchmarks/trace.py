@@ -0,0 +1,223 @@
+# This file contains utilities for working with command traces. A command trace
+# is a recording of the commands that clients issued to some production
+# service. We replay traces using a read_write_workload.TraceReplayWorkload to
+# benchmark protocols against a realistic request mix.
+#
+# A trace is stored in a compact binary file. The file begins with an 8 byte
+# magic string followed by the trace's start time (a little-endian int64 number
+# of nanoseconds). Next are the records. Every record is stored as a
+# little-endian int64 timestamp (in nanoseconds), a uint8 op type (0 for reads,
+# 1 for writes), an int64 key, and an int32 value size. This format is read by
+# frankenpaxos.Trace on the JVM.
+#
+# You can convert a CSV with columns timestamp_nanos, op, key, and value_size
+# (where op is either "read" or "write") into a trace like this:
+#
+#   python -m benchmarks.trace trace.csv trace.bin
+
+from . import benchmark
+from . import proto_util
+from . import read_write_workload
+from typing import BinaryIO, Iterable, Iterator, List, NamedTuple, Optional
+import argparse
+import csv
+import enum
+import itertools
+import struct
+
+_MAGIC = b'FPTRACE1'
+_HEADER = struct.Struct('<q')
+_RECORD = struct.Struct('<qBqi')
+
+
+class Op(enum.IntEnum):
+    READ = 0
+    WRITE = 1
+
+
+class TraceRecord(NamedTuple):
+    timestamp_nanos: int
+    op: Op
+    key: int
+    value_size: int
+
+
+def _write_header(f: BinaryIO, start_nanos: int) -> None:
+    f.write(_MAGIC)
+    f.write(_HEADER.pack(start_nanos))
+
+
+def _read_header(f: BinaryIO) -> int:
+    magic = f.read(len(_MAGIC))
+    if magic != _MAGIC:
+        raise ValueError(f'{f.name} is not a trace file. Its magic string is '
+                         f'{magic!r} instead of {_MAGIC!r}.')
+    (start_nanos,) = _HEADER.unpack(f.read(_HEADER.size))
+    return start_nanos
+
+
+def write_trace(filename: str,
+                records: Iterable[TraceRecord],
+                start_nanos: Optional[int] = None) -> int:
+    """
+    write_trace writes `records` to the trace file `filename` and returns the
+    number of records written. Records must be sorted by timestamp. If
+    `start_nanos` is None, the trace starts at its first record.
+    """
+    # We peek at the first record to find the start of the trace.
+    rest = iter(records)
+    first = next(rest, None)
+    if first is None:
+        all_records: Iterator[TraceRecord] = iter([])
+    else:
+        all_records = itertools.chain([first], rest)
+    if start_nanos is None:
+        start_nanos = first.timestamp_nanos if first is not None else 0
+
+    n = 0
+    previous_timestamp_nanos = start_nanos
+    with open(filename, 'wb') as f:
+        _write_header(f, start_nanos)
+        for record in all_records:
+            if record.timestamp_nanos < previous_timestamp_nanos:
+                raise ValueError(
+                    f'Trace record {record} is earlier than the previous '
+                    f'record or the start of the trace. Records must be '
+                    f'sorted by timestamp.')
+            previous_timestamp_nanos = record.timestamp_nanos
+            f.write(
+                _RECORD.pack(record.timestamp_nanos, record.op, record.key,
+                             record.value_size))
+            n += 1
+    return n
+
+
+def read_trace_start(filename: str) -> int:
+    """read_trace_start returns the start time of a trace in nanoseconds."""
+    with open(filename, 'rb') as f:
+        return _read_header(f)
+
+
+def read_trace(filename: str) -> Iterator[TraceRecord]:
+    """read_trace lazily reads the records in the trace file `filename`."""
+    with open(filename, 'rb') as f:
+        _read_header(f)
+        while True:
+            data = f.read(_RECORD.size)
+            if len(data) == 0:
+                return
+            if len(data) != _RECORD.size:
+                raise ValueError(f'Trace {filename} has a truncated record.')
+            (timestamp_nanos, op, key, value_size) = _RECORD.unpack(data)
+            yield TraceRecord(timestamp_nanos=timestamp_nanos,
+                              op=Op(op),
+                              key=key,
+                              value_size=value_size)
+
+
+def shard_trace(filename: str, shard_filenames: List[str]) -> List[int]:
+    """
+    shard_trace splits the trace in `filename` into len(shard_filenames)
+    shards, returning the number of records in each shard. Records are dealt
+    out round-robin, so every shard sees roughly the same arrival rate and the
+    same request mix. Every shard keeps the start time of the original trace,
+    so replaying all the shards concurrently reproduces the original
+    interleaving of requests.
+    """
+    assert len(shard_filenames) > 0
+    start_nanos = read_trace_start(filename)
+    shards = [open(shard, 'wb') for shard in shard_filenames]
+    counts = [0] * len(shards)
+    try:
+        for shard in shards:
+            _write_header(shard, start_nanos)
+        for (i, record) in enumerate(read_trace(filename)):
+            shards[i % len(shards)].write(
+                _RECORD.pack(record.timestamp_nanos, record.op, record.key,
+                             record.value_size))
+            counts[i % len(shards)] += 1
+    finally:
+        for shard in shards:
+            shard.close()
+    return counts
+
+
+def shard_workload(
+        bench: benchmark.BenchmarkDirectory,
+        workload: read_write_workload.TraceReplayWorkload,
+        num_shards: int) -> List[read_write_workload.TraceReplayWorkload]:
+    """
+    shard_workload shards a trace replay workload into one workload per client
+    process. The shards are written to the benchmark directory, which every
+    client host can read.
+    """
+    shard_filenames = [
+        bench.abspath(f'trace_shard_{i}.bin') for i in range(num_shards)
+    ]
+    bench.log(f'Sharding trace {workload.trace_filename} into {num_shards} '
+              f'shards.')
+    counts = shard_trace(workload.trace_filename, shard_filenames)
+    bench.log(f'Trace sharded. Shard sizes: {counts}.')
+    return [
+        workload._replace(trace_filename=shard_filename)
+        for shard_filename in shard_filenames
+    ]
+
+
+def write_client_workloads(bench: benchmark.BenchmarkDirectory,
+                           label: str,
+                           workload: read_write_workload.ReadWriteWorkload,
+                           num_client_procs: int) -> List[str]:
+    """
+    write_client_workloads writes the workload files for `num_client_procs`
+    client processes and returns the filename of every client's workload.
+    Most workloads are shared by every client, so we write a single
+    `<label>.pbtxt` file. A trace replay workload, on the other hand, is
+    sharded, and client i is given `<label>_i.pbtxt`.
+    """
+    if isinstance(workload, read_write_workload.TraceReplayWorkload):
+        filenames: List[str] = []
+        shards = shard_workload(bench, workload, num_client_procs)
+        for (i, shard) in enumerate(shards):
+            filenames.append(
+                bench.write_string(f'{label}_{i}.pbtxt',
+                                   proto_util.message_to_pbtext(
+                                       shard.to_proto())))
+        return filenames
+    else:
+        filename = bench.write_string(
+            f'{label}.pbtxt',
+            proto_util.message_to_pbtext(workload.to_proto()))
+        return [filename] * num_client_procs
+
+
+def _csv_to_trace(csv_filename: str, trace_filename: str) -> int:
+    def records() -> Iterator[TraceRecord]:
+        with open(csv_filename, 'r') as f:
+            for row in csv.DictReader(f):
+                yield TraceRecord(timestamp_nanos=int(row['timestamp_nanos']),
+                                  op=Op[row['op'].upper()],
+                                  key=int(row['key']),
+                                  value_size=int(row['value_size']))
+
+    return write_trace(trace_filename, records())
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description='Convert a CSV command log into a binary trace.')
+    parser.add_argument('csv',
+                        type=str,
+                        help='CSV with columns timestamp_nanos, op, key, and '
+                        'value_size')
+    parser.add_argument('trace', type=str, help='Output trace file')
+    return parser
+
+
+def main(args) -> None:
+    n = _csv_to_trace(args.csv, args.trace)
+    print(f'Wrote {n} records to {args.trace}.')
+
+
+if __name__ == '__main__':
+    main(get_parser().parse_args())
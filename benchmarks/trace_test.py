@@ -0,0 +1,66 @@
+from . import trace
+import os
+import tempfile
+import unittest
+
+
+class TraceTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.records = [
+            trace.TraceRecord(100, trace.Op.READ, 1, 0),
+            trace.TraceRecord(150, trace.Op.WRITE, 2, 16),
+            trace.TraceRecord(150, trace.Op.READ, 2, 0),
+            trace.TraceRecord(300, trace.Op.WRITE, 3, 32),
+            trace.TraceRecord(400, trace.Op.WRITE, 1, 8),
+        ]
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.dir.name, filename)
+
+    def test_round_trip(self):
+        filename = self._path('trace.bin')
+        self.assertEqual(trace.write_trace(filename, self.records), 5)
+        self.assertEqual(trace.read_trace_start(filename), 100)
+        self.assertEqual(list(trace.read_trace(filename)), self.records)
+
+    def test_explicit_start(self):
+        filename = self._path('trace.bin')
+        trace.write_trace(filename, self.records, start_nanos=50)
+        self.assertEqual(trace.read_trace_start(filename), 50)
+
+    def test_empty_trace(self):
+        filename = self._path('trace.bin')
+        self.assertEqual(trace.write_trace(filename, []), 0)
+        self.assertEqual(list(trace.read_trace(filename)), [])
+
+    def test_unsorted_trace(self):
+        filename = self._path('trace.bin')
+        with self.assertRaises(ValueError):
+            trace.write_trace(filename, reversed(self.records))
+
+    def test_not_a_trace(self):
+        filename = self._path('trace.bin')
+        with open(filename, 'wb') as f:
+            f.write(b'not a trace file')
+        with self.assertRaises(ValueError):
+            list(trace.read_trace(filename))
+
+    def test_shard(self):
+        filename = self._path('trace.bin')
+        trace.write_trace(filename, self.records)
+        shards = [self._path(f'shard_{i}.bin') for i in range(2)]
+        self.assertEqual(trace.shard_trace(filename, shards), [3, 2])
+        self.assertEqual(list(trace.read_trace(shards[0])),
+                         [self.records[0], self.records[2], self.records[4]])
+        self.assertEqual(list(trace.read_trace(shards[1])),
+                         [self.records[1], self.records[3]])
+        for shard in shards:
+            self.assertEqual(trace.read_trace_start(shard), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
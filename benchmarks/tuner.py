@@ -0,0 +1,257 @@
+# This file contains a TuningSuite, a benchmark suite that searches for the
+# protocol options that maximize throughput subject to a latency constraint.
+#
+# Protocol options (e.g., LeaderOptions.flush_phase2as_every_n or
+# BatcherOptions.batch_size) are typically tuned by hand with a grid search,
+# which is slow and has to be redone for every new cluster. A TuningSuite
+# instead starts from a base input and treats a set of fields of the input as
+# a search space. Every field is identified by a dotted path (e.g.,
+# 'leader_options.flush_phase2as_every_n' or 'num_proxy_leaders') and ranges
+# over a finite list of values.
+#
+# The first few trials are chosen at random. After that, we fit a Gaussian
+# process to the trials run so far and run the untried configuration with the
+# highest expected improvement (i.e., Bayesian optimization). The objective of
+# a trial is its throughput. If a trial violates the p99 latency SLO, its
+# throughput is scaled down by slo_p99_ms / p99_ms so that the search is
+# steered towards configurations that meet the SLO.
+#
+# Every trial is recorded in results.csv like any other suite. In addition,
+# the suite writes trials.json, which lists the parameters and score of every
+# trial, and best.json, which contains the best configuration that meets the
+# SLO.
+
+from . import benchmark
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import datetime
+import itertools
+import math
+import numpy as np
+import random
+
+
+class Parameter(NamedTuple):
+    # A dotted path into the input (e.g., 'leader_options.batch_size').
+    path: str
+    values: List[Any]
+
+
+class TunerOptions(NamedTuple):
+    num_trials: int
+    # The number of trials chosen at random before we start to model the
+    # objective.
+    num_random_trials: int = 5
+    # If not None, trials with a p99 latency above slo_p99_ms are penalized.
+    slo_p99_ms: Optional[float] = None
+    # The number of untried configurations that we consider for every trial.
+    num_candidates: int = 1000
+    seed: int = 0
+
+
+class Trial(NamedTuple):
+    params: Dict[str, Any]
+    throughput: float
+    p99_ms: float
+    score: float
+
+
+class TuningResult(NamedTuple):
+    trials: List[Trial]
+    # The trial with the highest throughput that meets the SLO, if any.
+    best: Optional[Trial]
+
+
+def get_path(t: Any, path: str) -> Any:
+    """get_path(t, 'a.b') returns t.a.b."""
+    for field in path.split('.'):
+        t = getattr(t, field)
+    return t
+
+
+def replace_path(t: Any, path: str, value: Any) -> Any:
+    """
+    replace_path(t, 'a.b', x) returns a copy of the nested NamedTuple t with
+    t.a.b replaced by x.
+    """
+    (field, _, rest) = path.partition('.')
+    if rest == '':
+        return t._replace(**{field: value})
+    return t._replace(**{field: replace_path(getattr(t, field), rest, value)})
+
+
+def options_search_space(input: Any, path: str,
+                         values: List[int]) -> List[Parameter]:
+    """
+    options_search_space returns a parameter for every int field of the
+    options NamedTuple at `path` in `input`. Every parameter ranges over
+    `values`. For example,
+
+        options_search_space(input, 'proxy_replica_options', [1, 2, 4, 8])
+
+    searches over proxy_replica_options.flush_every_n.
+    """
+    options = get_path(input, path)
+    return [
+        Parameter(path=f'{path}.{field}', values=values)
+        for (field, value) in options._asdict().items()
+        if isinstance(value, int) and not isinstance(value, bool)
+    ]
+
+
+def _expected_improvement(x_train: np.ndarray, y_train: np.ndarray,
+                          x_test: np.ndarray) -> np.ndarray:
+    # We standardize scores and fit a Gaussian process with a squared
+    # exponential kernel. Parameters are encoded in [0, 1], so a fixed length
+    # scale works well enough.
+    length_scale = 0.3
+    noise = 1e-2
+    y_mean = y_train.mean()
+    y_std = y_train.std() if y_train.std() > 0 else 1
+    y = (y_train - y_mean) / y_std
+
+    def kernel(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        d = ((a[:, None, :] - b[None, :, :])**2).sum(axis=2)
+        return np.exp(-d / (2 * length_scale**2))
+
+    k = kernel(x_train, x_train) + noise * np.eye(len(x_train))
+    k_inv = np.linalg.inv(k)
+    k_test = kernel(x_test, x_train)
+    mu = k_test @ k_inv @ y
+    var = 1 - (k_test @ k_inv * k_test).sum(axis=1)
+    sigma = np.sqrt(np.maximum(var, 1e-12))
+
+    z = (mu - y.max()) / sigma
+    cdf = 0.5 * (1 + np.array([math.erf(x / math.sqrt(2)) for x in z]))
+    pdf = np.exp(-z**2 / 2) / math.sqrt(2 * math.pi)
+    return (mu - y.max()) * cdf + sigma * pdf
+
+
+# A TuningSuite is a Suite whose inputs are chosen by a tuner. Instead of
+# `inputs`, a TuningSuite must provide
+#
+#  - `tuner_options`, which configures the tuner;
+#  - `base_input`, the input that every trial modifies;
+#  - `search_space`, the parameters to tune; and
+#  - `throughput(output)` and `p99_ms(output)`, which extract the throughput
+#    and p99 latency of a benchmark.
+class TuningSuite(benchmark.Suite[benchmark.Input, benchmark.Output]):
+    def tuner_options(self) -> TunerOptions:
+        raise NotImplementedError("")
+
+    def base_input(self) -> benchmark.Input:
+        raise NotImplementedError("")
+
+    def search_space(self) -> List[Parameter]:
+        raise NotImplementedError("")
+
+    def throughput(self, output: benchmark.Output) -> float:
+        raise NotImplementedError("")
+
+    def p99_ms(self, output: benchmark.Output) -> float:
+        raise NotImplementedError("")
+
+    def run_suite(self, suite_dir: benchmark.SuiteDirectory) -> None:
+        self.run_tuner(suite_dir)
+
+    def run_tuner(self, suite_dir: benchmark.SuiteDirectory) -> TuningResult:
+        print(f'Running tuner in {suite_dir.path}.')
+        options = self.tuner_options()
+        base_input = self.base_input()
+        space = self.search_space()
+        assert options.num_trials > 0, options
+        assert len(space) > 0, space
+        assert all(len(p.values) > 0 for p in space), space
+        rand = random.Random(options.seed)
+
+        args = self.args()
+        suite_dir.write_dict('args.json', args)
+        suite_dir.write_dict('tuner_options.json', options._asdict())
+        suite_dir.write_dict('search_space.json',
+                             {p.path: p.values for p in space})
+        inputs_file = suite_dir.create_file('inputs.txt')
+        results = self.results_file(suite_dir, args)
+        suite_start_time = datetime.datetime.now()
+
+        # A configuration is a tuple of indexes into the values of every
+        # parameter. We encode it as a point in [0, 1]^n for the model.
+        num_configs = 1
+        for p in space:
+            num_configs *= len(p.values)
+
+        def encode(config: Tuple[int, ...]) -> List[float]:
+            return [
+                i / (len(p.values) - 1) if len(p.values) > 1 else 0
+                for (i, p) in zip(config, space)
+            ]
+
+        def random_config() -> Tuple[int, ...]:
+            return tuple(rand.randrange(len(p.values)) for p in space)
+
+        def score(throughput: float, p99_ms: float) -> float:
+            if options.slo_p99_ms is None or p99_ms <= options.slo_p99_ms:
+                return throughput
+            return throughput * options.slo_p99_ms / p99_ms
+
+        def next_config(
+                tried: Dict[Tuple[int, ...], Trial]) -> Tuple[int, ...]:
+            untried: List[Tuple[int, ...]] = []
+            seen = set(tried.keys())
+            for _ in range(options.num_candidates):
+                config = random_config()
+                if config not in seen:
+                    untried.append(config)
+                    seen.add(config)
+            if len(untried) == 0:
+                # The random candidates all collided with tried
+                # configurations, so we enumerate the untried ones.
+                untried = [
+                    config
+                    for config in itertools.product(
+                        *[range(len(p.values)) for p in space])
+                    if config not in tried
+                ]
+            if len(tried) < options.num_random_trials:
+                return untried[0]
+
+            x_train = np.array([encode(c) for c in tried.keys()])
+            y_train = np.array([t.score for t in tried.values()])
+            x_test = np.array([encode(c) for c in untried])
+            ei = _expected_improvement(x_train, y_train, x_test)
+            return untried[int(np.argmax(ei))]
+
+        tried: Dict[Tuple[int, ...], Trial] = dict()
+        num_trials = min(options.num_trials, num_configs)
+        for i in range(1, num_trials + 1):
+            config = next_config(tried)
+            params = {
+                p.path: p.values[index]
+                for (index, p) in zip(config, space)
+            }
+            input = base_input
+            for (path, value) in params.items():
+                input = replace_path(input, path, value)
+
+            inputs_file.write(str(input) + '\n')
+            inputs_file.flush()
+            output = self.run_and_record(suite_dir, args, input, results, i,
+                                         num_trials, suite_start_time)
+            throughput = self.throughput(output)
+            p99_ms = self.p99_ms(output)
+            tried[config] = Trial(params=params,
+                                  throughput=throughput,
+                                  p99_ms=p99_ms,
+                                  score=score(throughput, p99_ms))
+            suite_dir.write_dict('trials.json',
+                                 [t._asdict() for t in tried.values()])
+
+        trials = list(tried.values())
+        feasible = [
+            t for t in trials
+            if options.slo_p99_ms is None or t.p99_ms <= options.slo_p99_ms
+        ]
+        best = (max(feasible, key=lambda t: t.throughput)
+                if len(feasible) > 0 else None)
+        suite_dir.write_dict('best.json',
+                             best._asdict() if best is not None else {})
+        print(f'Best configuration: {best}.')
+        return TuningResult(trials=trials, best=best)
@@ -0,0 +1,116 @@
+from . import benchmark
+from . import tuner
+from typing import Any, Dict, List, NamedTuple
+import io
+import json
+import tempfile
+import unittest
+import unittest.mock
+
+
+class Options(NamedTuple):
+    batch_size: int = 1
+    flush_every_n: int = 1
+    unsafe: bool = False
+
+
+class Input(NamedTuple):
+    num_proxies: int
+    options: Options
+
+
+class Output(NamedTuple):
+    throughput: float
+    p99_ms: float
+
+
+# A fake system whose throughput peaks at a batch size of 8 and a flush
+# frequency of 4. Bigger batches increase latency.
+class FakeSuite(tuner.TuningSuite[Input, Output]):
+    def __init__(self, options: tuner.TunerOptions) -> None:
+        self.options = options
+        self.inputs_run: List[Input] = []
+
+    def args(self) -> Dict[Any, Any]:
+        return {}
+
+    def summary(self, input: Input, output: Output) -> str:
+        return str(output)
+
+    def run_benchmark(self, bench: benchmark.BenchmarkDirectory,
+                      args: Dict[Any, Any], input: Input) -> Output:
+        self.inputs_run.append(input)
+        b = input.options.batch_size
+        n = input.options.flush_every_n
+        return Output(throughput=1000 - (b - 8)**2 - (n - 4)**2,
+                      p99_ms=b)
+
+    def tuner_options(self) -> tuner.TunerOptions:
+        return self.options
+
+    def base_input(self) -> Input:
+        return Input(num_proxies=2, options=Options())
+
+    def search_space(self) -> List[tuner.Parameter]:
+        return tuner.options_search_space(self.base_input(), 'options',
+                                          [1, 2, 4, 8, 16])
+
+    def throughput(self, output: Output) -> float:
+        return output.throughput
+
+    def p99_ms(self, output: Output) -> float:
+        return output.p99_ms
+
+
+class TunerTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def _tune(self, **kwargs):
+        suite = FakeSuite(tuner.TunerOptions(**kwargs))
+        with unittest.mock.patch('sys.stdout', new=io.StringIO()):
+            with benchmark.SuiteDirectory(self.dir.name) as suite_dir:
+                result = suite.run_tuner(suite_dir)
+        return (suite, suite_dir, result)
+
+    def test_replace_path(self):
+        input = Input(num_proxies=2, options=Options())
+        self.assertEqual(tuner.replace_path(input, 'num_proxies', 3),
+                         Input(num_proxies=3, options=Options()))
+        self.assertEqual(
+            tuner.replace_path(input, 'options.batch_size', 3),
+            Input(num_proxies=2, options=Options(batch_size=3)))
+        self.assertEqual(tuner.get_path(input, 'options.flush_every_n'), 1)
+
+    def test_options_search_space(self):
+        space = tuner.options_search_space(
+            Input(num_proxies=2, options=Options()), 'options', [1, 2])
+        self.assertEqual([p.path for p in space],
+                         ['options.batch_size', 'options.flush_every_n'])
+
+    def test_finds_optimum(self):
+        (suite, suite_dir, result) = self._tune(num_trials=15)
+        self.assertEqual(len(suite.inputs_run), 15)
+        self.assertEqual(len(set(suite.inputs_run)), 15)
+        self.assertEqual(result.best.params, {
+            'options.batch_size': 8,
+            'options.flush_every_n': 4
+        })
+        with open(suite_dir.abspath('trials.json')) as f:
+            self.assertEqual(len(json.load(f)), 15)
+
+    def test_slo(self):
+        (suite, suite_dir, result) = self._tune(num_trials=15, slo_p99_ms=4)
+        self.assertLessEqual(result.best.params['options.batch_size'], 4)
+
+    def test_exhausts_search_space(self):
+        (suite, suite_dir, result) = self._tune(num_trials=100)
+        self.assertEqual(len(suite.inputs_run), 25)
+        self.assertEqual(len(set(suite.inputs_run)), 25)
+
+
+if __name__ == '__main__':
+    unittest.main()
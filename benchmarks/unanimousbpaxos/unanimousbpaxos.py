@@ -1,11 +1,15 @@
+from .. import affinity
 from .. import benchmark
+from .. import cds
 from .. import cluster
 from .. import host
 from .. import parser_util
 from .. import pd_util
 from .. import prometheus
 from .. import proto_util
+from .. import roles
 from .. import util
+from .. import warm_pool
 from .. import workload
 from ..workload import Workload
 from typing import Any, Callable, Collection, Dict, List, NamedTuple, Optional
@@ -80,6 +84,11 @@ class Input(NamedTuple):
     client_options: ClientOptions
     client_log_level: str
 
+    # Affinity. ################################################################
+    # If positive, every process is pinned to its own cpus_per_proc CPUs,
+    # preferably on a single NUMA node. See affinity.py.
+    cpus_per_proc: int = 0
+
 
 Output = benchmark.RecorderOutput
 
@@ -151,6 +160,11 @@ class UnanimousBPaxosNet:
 
 # Suite ########################################################################
 class UnanimousBPaxosSuite(benchmark.Suite[Input, Output]):
+    def __init__(self) -> None:
+        super().__init__()
+        self._pool = (warm_pool.WarmPool()
+                      if self.args().get('warm_jvm_pool') else None)
+
     def run_benchmark(self, bench: benchmark.BenchmarkDirectory,
                       args: Dict[Any, Any], input: Input) -> Output:
         net = UnanimousBPaxosNet(args['cluster'], args['identity_file'], input)
@@ -159,135 +173,101 @@ class UnanimousBPaxosSuite(benchmark.Suite[Input, Output]):
     def _run_benchmark(self, bench: benchmark.BenchmarkDirectory,
                        args: Dict[Any, Any], input: Input,
                        net: UnanimousBPaxosNet) -> Output:
+        launcher = roles.Launcher(
+            bench,
+            jar=args['jar'],
+            monitored=input.monitored,
+            profiled=input.profiled,
+            allocator=affinity.AffinityAllocator(bench, input.cpus_per_proc),
+            pool=self._pool,
+            jvm_flags=cds.java_flags(args))
+
         # Write config file.
         config_filename = bench.abspath('config.pbtxt')
         bench.write_string(config_filename,
                            proto_util.message_to_pbtext(net.config()))
         bench.log('Config file config.pbtxt written.')
 
-        # Launch leaders.
-        leader_procs = []
-        for (i, leader) in enumerate(net.placement().leaders):
-            proc = bench.popen(
-                host=leader.host,
-                label=f'leader_{i}',
-                cmd=[
-                    'java',
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.unanimousbpaxos.LeaderMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.leader_log_level,
-                    '--state_machine',
-                    input.state_machine,
-                    '--dependency_graph',
-                    input.leader_dependency_graph,
-                    '--prometheus_host',
-                    leader.host.ip(),
-                    '--prometheus_port',
-                    str(leader.port + 1) if input.monitored else '-1',
-                    '--options.resendDependencyRequestsTimerPeriod',
-                    '{}s'.format(input.leader_options.
-                                 resend_dependency_requests_timer_period.
-                                 total_seconds()),
-                    '--options.resendPhase1asTimerPeriod',
-                    '{}s'.format(input.leader_options.
-                                 resend_phase1as_timer_period.total_seconds()),
-                    '--options.resendPhase2asTimerPeriod',
-                    '{}s'.format(input.leader_options.
-                                 resend_phase2as_timer_period.total_seconds()),
-                    '--options.recoverVertexTimerMinPeriod',
-                    '{}s'.format(
-                        input.leader_options.recover_vertex_timer_min_period.
-                        total_seconds()),
-                    '--options.recoverVertexTimerMaxPeriod',
-                    '{}s'.format(
-                        input.leader_options.recover_vertex_timer_max_period.
-                        total_seconds()),
-                ],
-            )
-            leader_procs.append(proc)
-        bench.log('Leaders started.')
-
-        # Launch acceptors.
-        acceptor_procs = []
-        for (i, acceptor) in enumerate(net.placement().acceptors):
-            proc = bench.popen(
-                host=acceptor.host,
-                label=f'acceptor_{i}',
-                cmd=[
-                    'java',
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.unanimousbpaxos.AcceptorMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.acceptor_log_level,
-                    '--prometheus_host',
-                    acceptor.host.ip(),
-                    '--prometheus_port',
-                    str(acceptor.port + 1) if input.monitored else '-1',
-                ],
-            )
-            acceptor_procs.append(proc)
-        bench.log('Acceptors started.')
-
-        # Launch dep service nodes.
-        dep_service_node_procs = []
-        for (i, dep) in enumerate(net.placement().dep_service_nodes):
-            proc = bench.popen(
-                host=dep.host,
-                label=f'dep_service_node_{i}',
-                cmd=[
-                    'java',
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.unanimousbpaxos.DepServiceNodeMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.dep_service_node_log_level,
-                    '--state_machine',
-                    input.state_machine,
-                    '--prometheus_host',
-                    dep.host.ip(),
-                    '--prometheus_port',
-                    str(dep.port + 1) if input.monitored else '-1',
-                ],
+        # Write workload file.
+        workload_filename = bench.abspath('workload.pbtxt')
+        bench.write_string(
+            workload_filename,
+            proto_util.message_to_pbtext(input.workload.to_proto()))
+
+        # Describe roles.
+        def role(name: str,
+                 main_class: str,
+                 procs: List[roles.RoleProc],
+                 log_level: str,
+                 options: Any,
+                 flags: List[str] = [],
+                 poolable: bool = True) -> roles.Role:
+            return roles.Role(
+                name=name,
+                main_class=f'frankenpaxos.unanimousbpaxos.{main_class}',
+                heap_size=None,
+                procs=procs,
+                flags=['--config', config_filename, '--log_level', log_level]
+                + flags + roles.options_flags(options),
+                poolable=poolable,
             )
-            dep_service_node_procs.append(proc)
-        bench.log('DepServiceNodes started.')
+
+        server_roles = [
+            role('leader', 'LeaderMain',
+                 roles.indexed('leader', net.placement().leaders),
+                 input.leader_log_level, input.leader_options,
+                 flags=[
+                     '--state_machine', input.state_machine,
+                     '--dependency_graph', input.leader_dependency_graph,
+                 ]),
+            role('acceptor', 'AcceptorMain',
+                 roles.indexed('acceptor', net.placement().acceptors),
+                 input.acceptor_log_level, input.acceptor_options),
+            role('dep_service_node', 'DepServiceNodeMain',
+                 roles.indexed('dep_service_node',
+                               net.placement().dep_service_nodes),
+                 input.dep_service_node_log_level,
+                 input.dep_service_node_options,
+                 flags=['--state_machine', input.state_machine]),
+        ]
+
+        client_role = role(
+            'client', 'BenchmarkClientMain',
+            [
+                roles.RoleProc(
+                    label=f'client_{i}',
+                    endpoint=client,
+                    flags=[
+                        '--host', client.host.ip(),
+                        '--port', str(client.port),
+                        '--output_file_prefix', bench.abspath(f'client_{i}'),
+                    ])
+                for (i, client) in enumerate(net.placement().clients)
+            ],
+            input.client_log_level,
+            input.client_options,
+            flags=[
+                '--duration',
+                f'{input.duration.total_seconds()}s',
+                '--timeout',
+                f'{input.timeout.total_seconds()}s',
+                '--num_clients',
+                f'{input.num_clients_per_proc}',
+                '--workload',
+                f'{workload_filename}',
+            ],
+            # Clients exit when they finish, so they can't be reused.
+            poolable=False)
+
+        # Launch leaders, acceptors, and dep service nodes.
+        launcher.launch(server_roles)
+        bench.log('Leaders, acceptors, and dep service nodes started.')
 
         # Launch Prometheus.
         if input.monitored:
             prometheus_config = prometheus.prometheus_config(
-                int(input.prometheus_scrape_interval.total_seconds() * 1000), {
-                    'bpaxos_leader': [
-                        f'{e.host.ip()}:{e.port + 1}'
-                        for e in net.placement().leaders
-                    ],
-                    'bpaxos_acceptor': [
-                        f'{e.host.ip()}:{e.port + 1}'
-                        for e in net.placement().acceptors
-                    ],
-                    'bpaxos_client': [
-                        f'{e.host.ip()}:{e.port + 1}'
-                        for e in net.placement().clients
-                    ],
-                    'bpaxos_dep_service_node': [
-                        f'{e.host.ip()}:{e.port + 1}'
-                        for e in net.placement().dep_service_nodes
-                    ],
-                })
+                int(input.prometheus_scrape_interval.total_seconds() * 1000),
+                roles.prometheus_jobs('bpaxos', [client_role] + server_roles))
             bench.write_string('prometheus.yml', yaml.dump(prometheus_config))
             prometheus_server = bench.popen(
                 host=net.placement().leaders[0].host,
@@ -305,55 +285,13 @@ class UnanimousBPaxosSuite(benchmark.Suite[Input, Output]):
         bench.log('Client lag ended.')
 
         # Launch clients.
-        workload_filename = bench.abspath('workload.pbtxt')
-        bench.write_string(
-            workload_filename,
-            proto_util.message_to_pbtext(input.workload.to_proto()))
-
-        client_procs = []
-        for (i, client) in enumerate(net.placement().clients):
-            proc = bench.popen(
-                host=client.host,
-                label=f'client_{i}',
-                cmd=[
-                    'java',
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.unanimousbpaxos.BenchmarkClientMain',
-                    '--host',
-                    client.host.ip(),
-                    '--port',
-                    str(client.port),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.client_log_level,
-                    '--prometheus_host',
-                    client.host.ip(),
-                    '--prometheus_port',
-                    str(client.port + 1) if input.monitored else '-1',
-                    '--duration',
-                    f'{input.duration.total_seconds()}s',
-                    '--timeout',
-                    f'{input.timeout.total_seconds()}s',
-                    '--num_clients',
-                    f'{input.num_clients_per_proc}',
-                    '--workload',
-                    f'{workload_filename}',
-                    '--output_file_prefix',
-                    bench.abspath(f'client_{i}'),
-                    '--options.reproposePeriod',
-                    '{}s'.format(
-                        input.client_options.repropose_period.total_seconds()),
-                ])
-            client_procs.append(proc)
+        client_procs = launcher.launch([client_role])['client']
         bench.log(f'Clients started and running for {input.duration}.')
 
         # Wait for clients to finish and then terminate leaders and acceptors.
         for proc in client_procs:
             proc.wait()
-        for proc in leader_procs + acceptor_procs + dep_service_node_procs:
-            proc.kill()
+        launcher.kill([r.name for r in server_roles])
         bench.log('Clients finished and processes terminated.')
 
         # Client i writes results to `client_i_data.csv`.
@@ -363,7 +301,11 @@ class UnanimousBPaxosSuite(benchmark.Suite[Input, Output]):
         ]
         # TODO(mwhittaker): Add warmup.
         return benchmark.parse_recorder_data(
-            bench, client_csvs, drop_prefix=datetime.timedelta(seconds=0))
+            bench,
+            client_csvs,
+            drop_prefix=datetime.timedelta(seconds=0),
+            correct_coordinated_omission=args.get(
+                'correct_coordinated_omission', False))
 
 
 def get_parser() -> argparse.ArgumentParser:
@@ -0,0 +1,56 @@
+from .unreplicated import *
+
+
+def main(args) -> None:
+    class OpenLoopLtUnreplicatedSuite(UnreplicatedSuite):
+        def args(self) -> Dict[Any, Any]:
+            return vars(args)
+
+        def inputs(self) -> Collection[Input]:
+            return [
+                Input(
+                    num_client_procs=2,
+                    num_warmup_clients_per_proc=10,
+                    # With an open loop load, num_clients_per_proc bounds the
+                    # number of pending requests per client process.
+                    num_clients_per_proc=100,
+                    jvm_heap_size='100m',
+                    measurement_group_size=1,
+                    warmup_duration=datetime.timedelta(seconds=2),
+                    warmup_timeout=datetime.timedelta(seconds=3),
+                    warmup_sleep=datetime.timedelta(seconds=0),
+                    duration=datetime.timedelta(seconds=10),
+                    timeout=datetime.timedelta(seconds=15),
+                    client_lag=datetime.timedelta(seconds=0),
+                    state_machine='Noop',
+                    workload=workload.StringWorkload(size_mean=1, size_std=0),
+                    profiled=args.profile,
+                    monitored=args.monitor,
+                    prometheus_scrape_interval=datetime.timedelta(
+                        milliseconds=200),
+                    client_options=ClientOptions(),
+                    client_log_level=args.log_level,
+                    server_options=ServerOptions(),
+                    server_log_level=args.log_level,
+                    load=load,
+                )
+                for load in load_generator.open_loop_sweep(
+                    [1000, 5000, 10000, 25000, 50000, 75000, 100000])
+            ]
+
+        def summary(self, input: Input, output: Output) -> str:
+            return str({
+                'target_ops_per_second': input.load.target_ops_per_second,
+                'latency.median_ms': f'{output.latency.median_ms:.6}',
+                'latency.p99_ms': f'{output.latency.p99_ms:.6}',
+                'start_throughput_1s.p90': f'{output.start_throughput_1s.p90:.6}',
+            })
+
+    suite = OpenLoopLtUnreplicatedSuite()
+    with benchmark.SuiteDirectory(args.suite_directory,
+                                  'unreplicated_open_loop_lt') as dir:
+        suite.run_suite(dir)
+
+
+if __name__ == '__main__':
+    main(get_parser().parse_args())
@@ -1,13 +1,17 @@
+from .. import affinity
 from .. import benchmark
+from .. import cds
 from .. import cluster
 from .. import host
+from .. import load_generator
 from .. import parser_util
 from .. import pd_util
-from .. import perf_util
 from .. import proc
 from .. import prometheus
 from .. import proto_util
+from .. import roles
 from .. import util
+from .. import warm_pool
 from .. import workload
 from ..workload import Workload
 from typing import Any, Callable, Collection, Dict, List, NamedTuple, Optional
@@ -64,6 +68,15 @@ class Input(NamedTuple):
     server_options: ServerOptions
     server_log_level: str
 
+    # Load. ####################################################################
+    # Inputs default to closed loop clients. See load_generator.py.
+    load: load_generator.Load = load_generator.ClosedLoop()
+
+    # Affinity. ################################################################
+    # If positive, every process is pinned to its own cpus_per_proc CPUs,
+    # preferably on a single NUMA node. See affinity.py.
+    cpus_per_proc: int = 0
+
 
 Output = benchmark.RecorderOutput
 
@@ -104,6 +117,8 @@ class UnreplicatedSuite(benchmark.Suite[Input, Output]):
         super().__init__()
         self._cluster = cluster.Cluster.from_json_file(self.args()['cluster'],
                                                        self._connect)
+        self._pool = (warm_pool.WarmPool()
+                      if self.args().get('warm_jvm_pool') else None)
 
     def _connect(self, address: str) -> host.Host:
         client = paramiko.SSHClient()
@@ -116,69 +131,107 @@ class UnreplicatedSuite(benchmark.Suite[Input, Output]):
 
     def run_benchmark(self, bench: benchmark.BenchmarkDirectory,
                       args: Dict[Any, Any], input: Input) -> Output:
+        launcher = roles.Launcher(
+            bench,
+            jar=args['jar'],
+            monitored=input.monitored,
+            profiled=input.profiled,
+            allocator=affinity.AffinityAllocator(bench, input.cpus_per_proc),
+            pool=self._pool,
+            jvm_flags=cds.java_flags(args))
         net = UnreplicatedNet(self._cluster, input)
+        server = net.placement().server
 
-        # If we're monitoring the code, run garbage collection verbosely.
-        java = ['java']
-        if input.monitored:
-            java += [
-                '-verbose:gc',
-                '-XX:-PrintGC',
-                '-XX:+PrintHeapAtGC',
-                '-XX:+PrintGCDetails',
-                '-XX:+PrintGCTimeStamps',
-                '-XX:+PrintGCDateStamps',
-            ]
-        # Increase the heap size.
+        # Write workload files.
+        workload_filename = bench.abspath('workload.pbtxt')
+        bench.write_string(
+            workload_filename,
+            proto_util.message_to_pbtext(input.workload.to_proto()))
+        load_filename = load_generator.write_client_load(
+            bench, input.load, input.num_client_procs)
+
+        # Describe roles.
         # TODO(mwhittaker): Right now, not much thought has been put into the
         # heap size. Think more carefully about this. We may want, for example,
         # to increase the size of the young generation.
-        java += [f'-Xms{input.jvm_heap_size}', f'-Xmx{input.jvm_heap_size}']
+        server_role = roles.Role(
+            name='server',
+            main_class='frankenpaxos.unreplicated.ServerMain',
+            heap_size=input.jvm_heap_size,
+            procs=[
+                roles.RoleProc(label='server',
+                               endpoint=server,
+                               flags=[
+                                   '--host', server.host.ip(),
+                                   '--port', str(server.port),
+                               ])
+            ],
+            flags=[
+                '--log_level', input.server_log_level,
+                '--state_machine', input.state_machine,
+            ] + roles.options_flags(input.server_options),
+        )
 
-        # Launch server.
-        server_proc = bench.popen(
-            host=net.placement().server.host,
-            label=f'server',
-            cmd=java + [
-                '-cp',
-                os.path.abspath(args['jar']),
-                'frankenpaxos.unreplicated.ServerMain',
-                '--host',
-                net.placement().server.host.ip(),
-                '--port',
-                str(net.placement().server.port),
+        # TODO(mwhittaker): For now, we don't run clients with large heaps and
+        # verbose garbage collection because they are all colocated on one
+        # machine.
+        client_role = roles.Role(
+            name='client',
+            main_class='frankenpaxos.unreplicated.ClientMain',
+            heap_size=None,
+            procs=[
+                roles.RoleProc(
+                    label=f'client_{i}',
+                    endpoint=client,
+                    flags=[
+                        '--host', client.host.ip(),
+                        '--port', str(client.port),
+                        '--output_file_prefix', bench.abspath(f'client_{i}'),
+                    ])
+                for (i, client) in enumerate(net.placement().clients)
+            ],
+            flags=[
+                '--server_host',
+                server.host.ip(),
+                '--server_port',
+                str(server.port),
                 '--log_level',
-                input.server_log_level,
-                '--state_machine',
-                input.state_machine,
-                '--prometheus_host',
-                net.placement().server.host.ip(),
-                '--prometheus_port',
-                str(net.placement().server.port +
-                    1) if input.monitored else '-1',
-                '--options.flushEveryN',
-                str(input.server_options.flush_every_n),
+                input.client_log_level,
+                '--measurement_group_size',
+                f'{input.measurement_group_size}',
+                '--warmup_duration',
+                f'{input.warmup_duration.total_seconds()}s',
+                '--warmup_timeout',
+                f'{input.warmup_timeout.total_seconds()}s',
+                '--warmup_sleep',
+                f'{input.warmup_sleep.total_seconds()}s',
+                '--num_warmup_clients',
+                f'{input.num_warmup_clients_per_proc}',
+                '--duration',
+                f'{input.duration.total_seconds()}s',
+                '--timeout',
+                f'{input.timeout.total_seconds()}s',
+                '--num_clients',
+                f'{input.num_clients_per_proc}',
+                '--workload',
+                f'{workload_filename}',
+                '--load',
+                f'{load_filename}',
             ],
+            # Clients exit when they finish, so they can't be reused.
+            poolable=False,
         )
-        if input.profiled:
-            server_proc = perf_util.JavaPerfProc(bench,
-                                                 net.placement().server.host,
-                                                 server_proc, f'server')
+
+        # Launch server.
+        launcher.launch([server_role])
         bench.log('Servers started.')
 
         # Launch Prometheus.
         if input.monitored:
             prometheus_config = prometheus.prometheus_config(
-                int(input.prometheus_scrape_interval.total_seconds() * 1000), {
-                    'unreplicated_client': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().clients
-                    ],
-                    'unreplicated_server': [
-                        f'{net.placement().server.host.ip()}:' +
-                        f'{net.placement().server.port+1}'
-                    ],
-                })
+                int(input.prometheus_scrape_interval.total_seconds() * 1000),
+                roles.prometheus_jobs('unreplicated',
+                                      [client_role, server_role]))
             bench.write_string('prometheus.yml', yaml.dump(prometheus_config))
             prometheus_server = bench.popen(
                 host=net.placement().clients[0].host,
@@ -196,68 +249,13 @@ class UnreplicatedSuite(benchmark.Suite[Input, Output]):
         bench.log('Client lag ended.')
 
         # Launch clients.
-        workload_filename = bench.abspath('workload.pbtxt')
-        bench.write_string(
-            workload_filename,
-            proto_util.message_to_pbtext(input.workload.to_proto()))
-
-        client_procs: List[proc.Proc] = []
-        for (i, client) in enumerate(net.placement().clients):
-            p = bench.popen(
-                host=client.host,
-                label=f'client_{i}',
-                # TODO(mwhittaker): For now, we don't run clients with large
-                # heaps and verbose garbage collection because they are all
-                # colocated on one machine.
-                cmd=[
-                    'java',
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.unreplicated.ClientMain',
-                    '--host',
-                    client.host.ip(),
-                    '--port',
-                    str(client.port),
-                    '--server_host',
-                    net.placement().server.host.ip(),
-                    '--server_port',
-                    str(net.placement().server.port),
-                    '--log_level',
-                    input.client_log_level,
-                    '--prometheus_host',
-                    client.host.ip(),
-                    '--prometheus_port',
-                    str(client.port + 1) if input.monitored else '-1',
-                    '--measurement_group_size',
-                    f'{input.measurement_group_size}',
-                    '--warmup_duration',
-                    f'{input.warmup_duration.total_seconds()}s',
-                    '--warmup_timeout',
-                    f'{input.warmup_timeout.total_seconds()}s',
-                    '--warmup_sleep',
-                    f'{input.warmup_sleep.total_seconds()}s',
-                    '--num_warmup_clients',
-                    f'{input.num_warmup_clients_per_proc}',
-                    '--duration',
-                    f'{input.duration.total_seconds()}s',
-                    '--timeout',
-                    f'{input.timeout.total_seconds()}s',
-                    '--num_clients',
-                    f'{input.num_clients_per_proc}',
-                    '--workload',
-                    f'{workload_filename}',
-                    '--output_file_prefix',
-                    bench.abspath(f'client_{i}'),
-                ])
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, client.host, p, f'client_{i}')
-            client_procs.append(p)
+        client_procs = launcher.launch([client_role])['client']
         bench.log(f'Clients started and running for {input.duration}.')
 
         # Wait for clients to finish and then terminate leaders and acceptors.
         for p in client_procs:
             p.wait()
-        server_proc.kill()
+        launcher.kill(['server'])
         bench.log('Clients finished and processes terminated.')
 
         # Client i writes results to `client_i_data.csv`.
@@ -270,7 +268,9 @@ class UnreplicatedSuite(benchmark.Suite[Input, Output]):
             bench,
             client_csvs,
             drop_prefix=datetime.timedelta(seconds=0),
-            save_data=False)['write']
+            save_data=False,
+            correct_coordinated_omission=args.get(
+                'correct_coordinated_omission', False))['write']
 
 
 def get_parser() -> argparse.ArgumentParser:
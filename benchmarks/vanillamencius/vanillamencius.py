@@ -1,13 +1,16 @@
+from .. import affinity
 from .. import benchmark
+from .. import cds
 from .. import cluster
 from .. import host
 from .. import parser_util
 from .. import pd_util
-from .. import perf_util
 from .. import proc
 from .. import prometheus
 from .. import proto_util
+from .. import roles
 from .. import util
+from .. import warm_pool
 from .. import workload
 from typing import Any, Callable, Collection, Dict, List, NamedTuple, Optional
 import argparse
@@ -84,6 +87,11 @@ class Input(NamedTuple):
     client_options: ClientOptions
     client_log_level: str
 
+    # Affinity. ################################################################
+    # If positive, every process is pinned to its own cpus_per_proc CPUs,
+    # preferably on a single NUMA node. See affinity.py.
+    cpus_per_proc: int = 0
+
 
 class VanillaMenciusOutput(NamedTuple):
     output: benchmark.RecorderOutput
@@ -144,6 +152,8 @@ class VanillaMenciusSuite(benchmark.Suite[Input, Output]):
         super().__init__()
         self._cluster = cluster.Cluster.from_json_file(self.args()['cluster'],
                                                        self._connect)
+        self._pool = (warm_pool.WarmPool()
+                      if self.args().get('warm_jvm_pool') else None)
 
     def _connect(self, address: str) -> host.Host:
         client = paramiko.SSHClient()
@@ -158,18 +168,14 @@ class VanillaMenciusSuite(benchmark.Suite[Input, Output]):
                       bench: benchmark.BenchmarkDirectory,
                       args: Dict[Any, Any],
                       input: Input) -> Output:
-        def java(heap_size: str) -> List[str]:
-            cmd = ['java', f'-Xms{heap_size}', f'-Xmx{heap_size}']
-            if input.monitored:
-                cmd += [
-                    '-verbose:gc',
-                    '-XX:-PrintGC',
-                    '-XX:+PrintHeapAtGC',
-                    '-XX:+PrintGCDetails',
-                    '-XX:+PrintGCTimeStamps',
-                    '-XX:+PrintGCDateStamps',
-                ]
-            return cmd
+        launcher = roles.Launcher(
+            bench,
+            jar=args['jar'],
+            monitored=input.monitored,
+            profiled=input.profiled,
+            allocator=affinity.AffinityAllocator(bench, input.cpus_per_proc),
+            pool=self._pool,
+            jvm_flags=cds.java_flags(args))
 
         # Write config file.
         net = VanillaMenciusNet(self._cluster, input)
@@ -179,85 +185,81 @@ class VanillaMenciusSuite(benchmark.Suite[Input, Output]):
                            proto_util.message_to_pbtext(config))
         bench.log('Config file config.pbtxt written.')
 
+        # Write workload file.
+        workload_filename = bench.abspath('workload.pbtxt')
+        bench.write_string(
+            workload_filename,
+            proto_util.message_to_pbtext(input.workload.to_proto()))
+
+        # Describe roles.
+        server_role = roles.Role(
+            name='server',
+            main_class='frankenpaxos.vanillamencius.ServerMain',
+            heap_size=input.server_jvm_heap_size,
+            procs=roles.indexed('server', net.placement().servers),
+            flags=[
+                '--config',
+                config_filename,
+                '--log_level',
+                input.server_log_level,
+                '--state_machine',
+                input.state_machine,
+            ] + roles.options_flags(input.server_options),
+        )
+
+        client_role = roles.Role(
+            name='client',
+            main_class='frankenpaxos.vanillamencius.ClientMain',
+            heap_size=input.client_jvm_heap_size,
+            procs=[
+                roles.RoleProc(
+                    label=f'client_{i}',
+                    endpoint=client,
+                    flags=[
+                        '--host', client.host.ip(),
+                        '--port', str(client.port),
+                        '--output_file_prefix', bench.abspath(f'client_{i}'),
+                    ])
+                for (i, client) in enumerate(net.placement().clients)
+            ],
+            flags=[
+                '--config',
+                config_filename,
+                '--log_level',
+                input.client_log_level,
+                '--measurement_group_size',
+                f'{input.measurement_group_size}',
+                '--warmup_duration',
+                f'{input.warmup_duration.total_seconds()}s',
+                '--warmup_timeout',
+                f'{input.warmup_timeout.total_seconds()}s',
+                '--warmup_sleep',
+                f'{input.warmup_sleep.total_seconds()}s',
+                '--num_warmup_clients',
+                f'{input.num_warmup_clients_per_proc}',
+                '--duration',
+                f'{input.duration.total_seconds()}s',
+                '--timeout',
+                f'{input.timeout.total_seconds()}s',
+                '--num_clients',
+                f'{input.num_clients_per_proc}',
+                '--workload',
+                f'{workload_filename}',
+            ] + roles.options_flags(input.client_options),
+            # Clients exit when they finish, so they can't be reused.
+            poolable=False,
+        )
+
         # Launch servers.
-        server_procs: List[proc.Proc] = []
-        for (i, server) in enumerate(net.placement().servers):
-            p = bench.popen(
-                host=server.host,
-                label=f'server_{i}',
-                cmd=java(input.server_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.vanillamencius.ServerMain',
-                    '--index',
-                    str(i),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.server_log_level,
-                    '--state_machine',
-                    input.state_machine,
-                    '--prometheus_host',
-                    server.host.ip(),
-                    '--prometheus_port',
-                    str(server.port + 1) if input.monitored else '-1',
-                    '--options.beta',
-                    str(input.server_options.beta),
-                    '--options.resendPhase1asPeriod',
-                    '{}s'.format(input.server_options
-                                      .resend_phase1as_period
-                                      .total_seconds()),
-                    '--options.flushSkipSlotsPeriod',
-                    '{}s'.format(input.server_options
-                                      .flush_skip_slots_period
-                                      .total_seconds()),
-                    '--options.revokeMinPeriod',
-                    '{}s'.format(input.server_options
-                                      .revoke_min_period
-                                      .total_seconds()),
-                    '--options.revokeMaxPeriod',
-                    '{}s'.format(input.server_options
-                                      .revoke_max_period
-                                      .total_seconds()),
-                    '--options.logGrowSize',
-                    str(input.server_options.log_grow_size),
-                    '--options.heartbeat.failPeriod',
-                    '{}s'.format(input.server_options
-                                      .heartbeat_options
-                                      .fail_period
-                                      .total_seconds()),
-                    '--options.heartbeat.successPeriod',
-                    '{}s'.format(input.server_options
-                                      .heartbeat_options
-                                      .success_period
-                                      .total_seconds()),
-                    '--options.heartbeat.numRetries',
-                    str(input.server_options.heartbeat_options.num_retries),
-                    '--options.heartbeat.networkDelayAlpha',
-                    str(input.server_options
-                             .heartbeat_options
-                             .network_delay_alpha),
-                ],
-            )
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, server.host, p,
-                                           f'server_{i}')
-            server_procs.append(p)
+        launcher.launch([server_role])
         bench.log('Servers started.')
 
         # Launch Prometheus.
         if input.monitored:
             prometheus_config = prometheus.prometheus_config(
-                int(input.prometheus_scrape_interval.total_seconds() * 1000), {
-                    'vanillamencius_client': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().clients
-                    ],
-                    'vanillamencius_server': [
-                        f'{e.host.ip()}:{e.port+1}'
-                        for e in net.placement().servers
-                    ],
-                })
+                int(input.prometheus_scrape_interval.total_seconds() * 1000),
+                roles.prometheus_jobs('vanillamencius',
+                                      [client_role, server_role]))
             bench.write_string('prometheus.yml', yaml.dump(prometheus_config))
             prometheus_server = bench.popen(
                 host=net.placement().clients[0].host,
@@ -275,66 +277,13 @@ class VanillaMenciusSuite(benchmark.Suite[Input, Output]):
         bench.log('Client lag ended.')
 
         # Launch clients.
-        workload_filename = bench.abspath('workload.pbtxt')
-        bench.write_string(
-            workload_filename,
-            proto_util.message_to_pbtext(input.workload.to_proto()))
-
-        client_procs: List[proc.Proc] = []
-        for (i, client) in enumerate(net.placement().clients):
-            p = bench.popen(
-                host=client.host,
-                label=f'client_{i}',
-                cmd=java(input.client_jvm_heap_size) + [
-                    '-cp',
-                    os.path.abspath(args['jar']),
-                    'frankenpaxos.vanillamencius.ClientMain',
-                    '--host',
-                    client.host.ip(),
-                    '--port',
-                    str(client.port),
-                    '--config',
-                    config_filename,
-                    '--log_level',
-                    input.client_log_level,
-                    '--prometheus_host',
-                    client.host.ip(),
-                    '--prometheus_port',
-                    str(client.port + 1) if input.monitored else '-1',
-                    '--measurement_group_size',
-                    f'{input.measurement_group_size}',
-                    '--warmup_duration',
-                    f'{input.warmup_duration.total_seconds()}s',
-                    '--warmup_timeout',
-                    f'{input.warmup_timeout.total_seconds()}s',
-                    '--warmup_sleep',
-                    f'{input.warmup_sleep.total_seconds()}s',
-                    '--num_warmup_clients',
-                    f'{input.num_warmup_clients_per_proc}',
-                    '--duration',
-                    f'{input.duration.total_seconds()}s',
-                    '--timeout',
-                    f'{input.timeout.total_seconds()}s',
-                    '--num_clients',
-                    f'{input.num_clients_per_proc}',
-                    '--output_file_prefix',
-                    bench.abspath(f'client_{i}'),
-                    '--workload',
-                    f'{workload_filename}',
-                    '--options.resendClientRequestPeriod',
-                    '{}s'.format(input.client_options.
-                                 resend_client_request_period.total_seconds()),
-                ])
-            if input.profiled:
-                p = perf_util.JavaPerfProc(bench, client.host, p, f'client_{i}')
-            client_procs.append(p)
+        client_procs = launcher.launch([client_role])['client']
         bench.log(f'Clients started and running for {input.duration}.')
 
         # Wait for clients to finish and then terminate leaders and acceptors.
         for p in client_procs:
             p.wait()
-        for p in server_procs:
-            p.kill()
+        launcher.kill(['server'])
         if input.monitored:
             prometheus_server.kill()
         bench.log('Clients finished and processes terminated.')
@@ -349,7 +298,9 @@ class VanillaMenciusSuite(benchmark.Suite[Input, Output]):
             bench,
             client_csvs,
             drop_prefix=datetime.timedelta(seconds=0),
-            save_data=False)
+            save_data=False,
+            correct_coordinated_omission=args.get(
+                'correct_coordinated_omission', False))
         output = labeled_data['write']
         return VanillaMenciusOutput(output = output)
 
@@ -4,7 +4,7 @@ matplotlib.use('pdf')
 font = {'size': 14}
 matplotlib.rc('font', **font)
 
-from ... import pd_util
+from ... import latency_buckets
 from typing import Any, List, Tuple
 import argparse
 import datetime
@@ -38,24 +38,25 @@ def read_data(file,
 
 
 def plot_throughput(ax: plt.Axes, label: str, color: str,
-                    s: pd.Series, sample_every: int) -> None:
-    tput = pd_util.throughput(s, 250, trim=True)[::sample_every]
+                    s: pd.Series, bucket: str) -> None:
+    tput = latency_buckets.throughput(s, '250ms', bucket=bucket, trim=True)
     ax.plot_date(tput.index, tput,
                  fmt='-', color=color, markevery=0.4, label='_nolegend_')
 
 
 def plot_latency(ax: plt.Axes, label: str, color: str,
-                 s: pd.Series, sample_every: int) -> None:
-    median = s.rolling('500ms').median()
-    max_latency = s.rolling('500ms').max()
+                 s: pd.Series, bucket: str) -> None:
+    buckets = latency_buckets.LatencyBuckets.from_series(s, bucket=bucket)
+    median = buckets.rolling_median('500ms')
+    max_latency = buckets.rolling_max('500ms')
 
     # ax.set_yscale('log')
-    line = ax.plot_date(s.index[::sample_every], median[::sample_every],
+    line = ax.plot_date(median.index, median,
                         fmt='-', color=color, markevery=0.2, label=label)[0]
-    # ax.plot_date(s.index[::sample_every], max_latency[::sample_every],
+    # ax.plot_date(median.index, max_latency,
     #              fmt='--', color=color, label='_nolegend_')
-    ax.fill_between(s.index[::sample_every], median[::sample_every],
-                    max_latency[::sample_every], color=line.get_color())
+    ax.fill_between(median.index, median,
+                    max_latency, color=line.get_color())
 
 
 def plot(baseline: pd.DataFrame,
@@ -64,7 +65,7 @@ def plot(baseline: pd.DataFrame,
          matchmaking: pd.DataFrame,
          output_filename: str,
          start_time,
-         sample_every: int):
+         bucket: str):
     # Create figure.
     num_rows = 2
     num_columns = 4
@@ -93,14 +94,14 @@ def plot(baseline: pd.DataFrame,
                              alpha=0.5)
 
     # Plot data.
-    plot_latency(ax[0][0], 'No Opts', 'C0', baseline['latency_nanos'] / 1e6, sample_every)
-    plot_latency(ax[0][1], 'Opt 3', 'C1', gc['latency_nanos'] / 1e6, sample_every)
-    plot_latency(ax[0][2], 'Opt 2,3', 'C2', phase1['latency_nanos'] / 1e6, sample_every)
-    plot_latency(ax[0][3], 'Opt 1,2,3', 'C3', matchmaking['latency_nanos'] / 1e6, sample_every)
-    plot_throughput(ax[1][0], 'No Opts', 'C0', baseline['delta'], sample_every)
-    plot_throughput(ax[1][1], 'Opt 3', 'C1', gc['delta'], sample_every)
-    plot_throughput(ax[1][2], 'Opt 2,3', 'C2', phase1['delta'], sample_every)
-    plot_throughput(ax[1][3], 'Opt 1,2,3', 'C3', matchmaking['delta'], sample_every)
+    plot_latency(ax[0][0], 'No Opts', 'C0', baseline['latency_nanos'] / 1e6, bucket)
+    plot_latency(ax[0][1], 'Opt 3', 'C1', gc['latency_nanos'] / 1e6, bucket)
+    plot_latency(ax[0][2], 'Opt 2,3', 'C2', phase1['latency_nanos'] / 1e6, bucket)
+    plot_latency(ax[0][3], 'Opt 1,2,3', 'C3', matchmaking['latency_nanos'] / 1e6, bucket)
+    plot_throughput(ax[1][0], 'No Opts', 'C0', baseline['delta'], bucket)
+    plot_throughput(ax[1][1], 'Opt 3', 'C1', gc['delta'], bucket)
+    plot_throughput(ax[1][2], 'Opt 2,3', 'C2', phase1['delta'], bucket)
+    plot_throughput(ax[1][3], 'Opt 1,2,3', 'C3', matchmaking['delta'], bucket)
 
     # Format x ticks nicely.
     for row in ax:
@@ -147,7 +148,7 @@ def main(args) -> None:
         matchmaking=matchmaking,
         output_filename=args.output,
         start_time=start_time,
-        sample_every=args.sample_every,
+        bucket=args.bucket,
     )
 
 
@@ -165,10 +166,10 @@ def get_parser() -> argparse.ArgumentParser:
         default=0,
         help='Drop this number of seconds from the tail of the benchmark.')
     parser.add_argument(
-        '--sample_every',
-        type=int,
-        default=1,
-        help='Sample every n.')
+        '--bucket',
+        type=str,
+        default='10ms',
+        help='Compute rolling statistics every bucket of this width.')
 
     parser.add_argument('--baseline',
                         type=argparse.FileType('r'),
@@ -5,7 +5,7 @@ set -euo pipefail
 main() {
     local -r d="$(dirname $0)"
     python -m benchmarks.vldb20_matchmaker.ablation.plot \
-        --sample_every "100" \
+        --bucket "50ms" \
         --drop_head "19" \
         --drop_tail "17" \
         --baseline <(gunzip -c "$d/baseline.csv.gz") \
@@ -5,7 +5,7 @@ set -euo pipefail
 main() {
     local -r d="$(dirname $0)"
     python -m benchmarks.vldb20_matchmaker.chaos.plot \
-        --sample_every "100" \
+        --bucket "50ms" \
         --drop_head "10" \
         --drop_tail "10" \
         --n1 <(gunzip -c "$d/n1.csv.gz") \
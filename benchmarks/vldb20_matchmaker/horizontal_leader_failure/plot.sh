@@ -5,7 +5,7 @@ set -euo pipefail
 main() {
     local -r d="$(dirname $0)"
     python -m benchmarks.vldb20_matchmaker.horizontal_leader_failure.plot \
-        --sample_every "100" \
+        --bucket "50ms" \
         --drop_head "12" \
         --drop_tail "3" \
         --f1n1 <(gunzip -c "$d/f=1_n=1.csv.gz") \
@@ -4,6 +4,7 @@ matplotlib.use('pdf')
 font = {'size': 14}
 matplotlib.rc('font', **font)
 
+from ... import latency_buckets
 from ... import pd_util
 from typing import Any, List, Tuple
 import argparse
@@ -42,54 +43,60 @@ def read_data(file,
 
 
 def split(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    for i in range(len(df)):
-        if i == 0:
-            continue
-
-        if df.iloc[i]['start'] - df.iloc[i - 1]['start'] > pd.Timedelta('1s'):
-            return df.iloc[:i], df[i:]
-
-    raise ValueError("No split found.")
+    # Split the data at the first gap longer than 1 second.
+    gaps = pd_util.gaps(df['start'], pd.Timedelta('1s'))
+    if len(gaps) == 0:
+        raise ValueError("No split found.")
+    i = gaps['position'].iloc[0]
+    return df.iloc[:i], df[i:]
 
 
 def plot_throughput(ax: plt.Axes, n: int, before: pd.Series, after: pd.Series,
-                    sample_every: int, marker: str) -> None:
-    tput_before = pd_util.throughput(before, 1000, trim=True)[::sample_every]
+                    bucket: str, marker: str) -> None:
+    tput_before = latency_buckets.throughput(before, '1000ms',
+                                             bucket=bucket,
+                                             trim=True)
     line = ax.plot_date(tput_before.index, tput_before, fmt='-', marker=marker,
                         markevery=0.1) [0]
-    tput_after = pd_util.throughput(after, 1000, trim=False)[::sample_every]
+    tput_after = latency_buckets.throughput(after, '1000ms',
+                                            bucket=bucket,
+                                            trim=False)
     line = ax.plot_date(tput_after.index, tput_after, fmt='-', marker=marker,
                         markevery=0.1, color=line.get_color())
 
 
 def plot_latency(ax: plt.Axes, n: int, before: pd.Series, after: pd.Series,
-                 sample_every: int, marker: str) -> None:
-    median_before = before.rolling('1000ms').median()
-    p95_before = before.rolling('1000ms').quantile(0.95)
-    line = ax.plot_date(before.index[::sample_every],
-                        median_before[::sample_every],
+                 bucket: str, marker: str) -> None:
+    buckets_before = latency_buckets.LatencyBuckets.from_series(
+        before, bucket=bucket)
+    median_before = buckets_before.rolling_median('1000ms')
+    p95_before = buckets_before.rolling_quantile(0.95, '1000ms')
+    line = ax.plot_date(median_before.index,
+                        median_before,
                         label='_nolegend_',
                         fmt='-',
                         marker=marker,
                         markevery=0.1)[0]
-    ax.fill_between(before.index[::sample_every],
-                    median_before[::sample_every],
-                    p95_before[::sample_every],
+    ax.fill_between(median_before.index,
+                    median_before,
+                    p95_before,
                     color=line.get_color(), alpha=0.25)
 
-    median_after = after.rolling('1000ms').median()
-    p95_after = after.rolling('1000ms').quantile(0.95)
+    buckets_after = latency_buckets.LatencyBuckets.from_series(
+        after, bucket=bucket)
+    median_after = buckets_after.rolling_median('1000ms')
+    p95_after = buckets_after.rolling_quantile(0.95, '1000ms')
     label = '1 client' if n == 1 else f'{n} clients'
-    ax.plot_date(after.index[::sample_every],
-                 median_after[::sample_every],
+    ax.plot_date(median_after.index,
+                 median_after,
                  label=label,
                  color = line.get_color(),
                  fmt='-',
                  marker=marker,
                  markevery=0.1)
-    ax.fill_between(after.index[::sample_every],
-                    median_after[::sample_every],
-                    p95_after[::sample_every],
+    ax.fill_between(median_after.index,
+                    median_after,
+                    p95_after,
                     color=line.get_color(), alpha=0.25)
 
 
@@ -98,7 +105,7 @@ def plot(n1: pd.DataFrame,
          n8: pd.DataFrame,
          output_filename: str,
          start_time,
-         sample_every: int):
+         bucket: str):
     # Create figure.
     num_plots = 2
     fig, ax = plt.subplots(num_plots, 1, figsize=(6.4, num_plots * 4.8 * 0.5),
@@ -114,19 +121,19 @@ def plot(n1: pd.DataFrame,
 
     # Plot data.
     plot_latency(ax[0], 1, n1_before['latency_nanos'] / 1e6,
-                 n1_after['latency_nanos'] / 1e6, sample_every, next(MARKERS))
+                 n1_after['latency_nanos'] / 1e6, bucket, next(MARKERS))
     plot_latency(ax[0], 4, n4_before['latency_nanos'] / 1e6,
-                 n4_after['latency_nanos'] / 1e6, sample_every, next(MARKERS))
+                 n4_after['latency_nanos'] / 1e6, bucket, next(MARKERS))
     plot_latency(ax[0], 8, n8_before['latency_nanos'] / 1e6,
-                 n8_after['latency_nanos'] / 1e6, sample_every, next(MARKERS))
+                 n8_after['latency_nanos'] / 1e6, bucket, next(MARKERS))
     ax[0].set_ylim([0, 2.0])
 
     plot_throughput(ax[1], 1, n1_before['delta'], n1_after['delta'],
-                    sample_every, next(MARKERS))
+                    bucket, next(MARKERS))
     plot_throughput(ax[1], 4, n4_before['delta'], n4_after['delta'],
-                    sample_every, next(MARKERS))
+                    bucket, next(MARKERS))
     plot_throughput(ax[1], 8, n8_before['delta'], n8_after['delta'],
-                    sample_every, next(MARKERS))
+                    bucket, next(MARKERS))
 
     # Format x ticks nicely.
     for axes in ax:
@@ -184,7 +191,7 @@ def main(args) -> None:
         n8=n8,
         output_filename=args.output,
         start_time=start_time,
-        sample_every=args.sample_every,
+        bucket=args.bucket,
     )
 
 
@@ -202,10 +209,10 @@ def get_parser() -> argparse.ArgumentParser:
         default=0,
         help='Drop this number of seconds from the tail of the benchmark.')
     parser.add_argument(
-        '--sample_every',
-        type=int,
-        default=1,
-        help='Sample every n.')
+        '--bucket',
+        type=str,
+        default='10ms',
+        help='Compute rolling statistics every bucket of this width.')
 
     parser.add_argument('--n1',
                         type=argparse.FileType('r'),
@@ -5,7 +5,7 @@ set -euo pipefail
 main() {
     local -r d="$(dirname $0)"
     python -m benchmarks.vldb20_matchmaker.leader_failure.plot \
-        --sample_every "100" \
+        --bucket "50ms" \
         --drop_head "12" \
         --drop_tail "3" \
         --n1 <(gunzip -c "$d/n1.csv.gz") \
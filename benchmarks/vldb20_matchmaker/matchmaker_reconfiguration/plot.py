@@ -4,6 +4,7 @@ matplotlib.use('pdf')
 font = {'size': 14}
 matplotlib.rc('font', **font)
 
+from ... import latency_buckets
 from ... import pd_util
 from typing import Any, List, Tuple
 import argparse
@@ -75,26 +76,27 @@ def report_stats(df: pd.DataFrame, f: int, n: int) -> None:
     report(f'[f={f}, n={n}] latency during', latency_during)
 
 
-def plot_throughput(ax: plt.Axes, n: int, s: pd.Series, sample_every: int,
+def plot_throughput(ax: plt.Axes, n: int, s: pd.Series, bucket: str,
                     marker: str) -> None:
-    tput = pd_util.throughput(s, 1000, trim=True)[::sample_every]
+    tput = latency_buckets.throughput(s, '1000ms', bucket=bucket, trim=True)
     ax.plot_date(tput.index, tput, fmt='-', marker=marker, markevery=0.1,
                  label=f'{n} clients')
 
 
-def plot_latency(ax: plt.Axes, n: int, s: pd.Series, sample_every: int,
+def plot_latency(ax: plt.Axes, n: int, s: pd.Series, bucket: str,
                  marker: str) -> None:
-    median = s.rolling('1000ms').median()
-    p95 = s.rolling('1000ms').quantile(0.95)
+    buckets = latency_buckets.LatencyBuckets.from_series(s, bucket=bucket)
+    median = buckets.rolling_median('1000ms')
+    p95 = buckets.rolling_quantile(0.95, '1000ms')
     label = '1 client' if n == 1 else f'{n} clients'
-    line = ax.plot_date(s.index[::sample_every],
-                        median[::sample_every],
+    line = ax.plot_date(median.index,
+                        median,
                         label=label,
                         fmt='-',
                         marker=marker,
                         markevery=0.1)[0]
-    ax.fill_between(s.index[::sample_every], median[::sample_every],
-                    p95[::sample_every], color=line.get_color(), alpha=0.25)
+    ax.fill_between(median.index, median,
+                    p95, color=line.get_color(), alpha=0.25)
 
 
 def plot(n1: pd.DataFrame,
@@ -103,19 +105,19 @@ def plot(n1: pd.DataFrame,
          output_filename: str,
          f: int,
          start_time,
-         sample_every: int):
+         bucket: str):
     # Create figure.
     num_plots = 2
     fig, ax = plt.subplots(num_plots, 1, figsize=(6.4, num_plots * 4.8 * 0.5),
                            sharex=True)
 
     # Plot data.
-    plot_latency(ax[0], 1, n1['latency_nanos'] / 1e6, sample_every, next(MARKERS))
-    plot_latency(ax[0], 4, n4['latency_nanos'] / 1e6, sample_every, next(MARKERS))
-    plot_latency(ax[0], 8, n8['latency_nanos'] / 1e6, sample_every, next(MARKERS))
-    plot_throughput(ax[1], 1, n1['delta'], sample_every, next(MARKERS))
-    plot_throughput(ax[1], 4, n4['delta'], sample_every, next(MARKERS))
-    plot_throughput(ax[1], 8, n8['delta'], sample_every, next(MARKERS))
+    plot_latency(ax[0], 1, n1['latency_nanos'] / 1e6, bucket, next(MARKERS))
+    plot_latency(ax[0], 4, n4['latency_nanos'] / 1e6, bucket, next(MARKERS))
+    plot_latency(ax[0], 8, n8['latency_nanos'] / 1e6, bucket, next(MARKERS))
+    plot_throughput(ax[1], 1, n1['delta'], bucket, next(MARKERS))
+    plot_throughput(ax[1], 4, n4['delta'], bucket, next(MARKERS))
+    plot_throughput(ax[1], 8, n8['delta'], bucket, next(MARKERS))
 
     # Format x ticks nicely.
     for axes in ax:
@@ -191,7 +193,7 @@ def main(args) -> None:
         output_filename=args.output_f1,
         f=1,
         start_time=start_time,
-        sample_every=args.sample_every,
+        bucket=args.bucket,
     )
     plot(
         n1=f2n1,
@@ -200,7 +202,7 @@ def main(args) -> None:
         output_filename=args.output_f2,
         f=2,
         start_time=start_time,
-        sample_every=args.sample_every,
+        bucket=args.bucket,
     )
 
     # Report stats.
@@ -226,10 +228,10 @@ def get_parser() -> argparse.ArgumentParser:
         default=0,
         help='Drop this number of seconds from the tail of the benchmark.')
     parser.add_argument(
-        '--sample_every',
-        type=int,
-        default=1,
-        help='Sample every n.')
+        '--bucket',
+        type=str,
+        default='10ms',
+        help='Compute rolling statistics every bucket of this width.')
 
     parser.add_argument('--f1n1',
                         type=argparse.FileType('r'),
@@ -5,7 +5,7 @@ set -euo pipefail
 main() {
     local -r d="$(dirname $0)"
     python -m benchmarks.vldb20_matchmaker.matchmaker_reconfiguration.plot \
-        --sample_every "100" \
+        --bucket "50ms" \
         --drop_head "15" \
         --drop_tail "15" \
         --f1n1 <(gunzip -c "$d/f1n1.csv.gz") \
@@ -4,7 +4,7 @@ matplotlib.use('pdf')
 font = {'size': 14}
 matplotlib.rc('font', **font)
 
-from ... import pd_util
+from ... import latency_buckets
 from typing import Any, List, Tuple
 import argparse
 import datetime
@@ -36,21 +36,22 @@ def read_data(file,
     return (df, new_start_time)
 
 
-def plot_throughput(ax: plt.Axes, s: pd.Series, sample_every: int) -> None:
-    tput = pd_util.throughput(s, 1000, trim=True)[::sample_every]
+def plot_throughput(ax: plt.Axes, s: pd.Series, bucket: str) -> None:
+    tput = latency_buckets.throughput(s, '1000ms', bucket=bucket, trim=True)
     ax.plot_date(tput.index, tput, fmt='-', label='100 clients')
 
 
-def plot_latency(ax: plt.Axes, s: pd.Series, sample_every: int) -> None:
-    median = s.rolling('1000ms').median()
-    p95 = s.rolling('1000ms').quantile(0.95)
-    line = ax.plot_date(s.index[::sample_every],
-                        median[::sample_every],
+def plot_latency(ax: plt.Axes, s: pd.Series, bucket: str) -> None:
+    buckets = latency_buckets.LatencyBuckets.from_series(s, bucket=bucket)
+    median = buckets.rolling_median('1000ms')
+    p95 = buckets.rolling_quantile(0.95, '1000ms')
+    line = ax.plot_date(median.index,
+                        median,
                         label='100 clients',
                         fmt='-')[0]
-    ax.fill_between(s.index[::sample_every],
-                    median[::sample_every],
-                    p95[::sample_every],
+    ax.fill_between(median.index,
+                    median,
+                    p95,
                     color=line.get_color(),
                     alpha=0.25)
 
@@ -58,15 +59,15 @@ def plot_latency(ax: plt.Axes, s: pd.Series, sample_every: int) -> None:
 def plot(df: pd.DataFrame,
          output_filename: str,
          start_time,
-         sample_every: int) -> None:
+         bucket: str) -> None:
     # Create figure.
     num_plots = 2
     fig, ax = plt.subplots(num_plots, 1, figsize=(6.4, num_plots * 4.8 * 0.5),
                            sharex=True)
 
     # Plot data.
-    plot_latency(ax[0], df['latency_nanos'] / 1e6, sample_every)
-    plot_throughput(ax[1], df['delta'], sample_every)
+    plot_latency(ax[0], df['latency_nanos'] / 1e6, bucket)
+    plot_throughput(ax[1], df['delta'], bucket)
 
     # Format x ticks nicely.
     for axes in ax:
@@ -122,7 +123,7 @@ def main(args) -> None:
     plot(df=df,
          output_filename=args.output,
          start_time=start_time,
-         sample_every=args.sample_every)
+         bucket=args.bucket)
 
 
 def get_parser() -> argparse.ArgumentParser:
@@ -139,10 +140,10 @@ def get_parser() -> argparse.ArgumentParser:
         default=0,
         help='Drop this number of seconds from the tail of the benchmark.')
     parser.add_argument(
-        '--sample_every',
-        type=int,
-        default=1,
-        help='Sample every n.')
+        '--bucket',
+        type=str,
+        default='10ms',
+        help='Compute rolling statistics every bucket of this width.')
 
     parser.add_argument('--f1n100',
                         type=argparse.FileType('r'),
@@ -0,0 +1,125 @@
+# This file contains a simple throughput model of Compartmentalized MultiPaxos.
+#
+# Every role (e.g., proxy leaders, acceptors, replicas) is a set of
+# interchangeable processes. For every command that the protocol processes, a
+# process of a role handles some fraction of a message. For example, with n
+# proxy leaders, every proxy leader handles a 1/n fraction of every write. With
+# n replicas, every replica handles every write and a 1/n fraction of every
+# read. We call this fraction the load of a process. If a process of a role
+# spends `cost` CPU seconds handling a message and has `cores` cores to do so,
+# then the role can process at most cores / (cost * load) commands per second.
+# The peak throughput of the protocol is the throughput of its bottleneck role.
+#
+# With cost = 1 / alpha and cores = 1, the throughput of the replicas is
+# n * alpha / (n * fw + fr), which is the model plotted in plot.py.
+
+from typing import Dict, NamedTuple
+
+
+# The roles that we model, in the order that a write visits them.
+ROLES = [
+    'batchers',
+    'leaders',
+    'proxy_leaders',
+    'acceptors',
+    'replicas',
+    'proxy_replicas',
+]
+
+
+class Deployment(NamedTuple):
+    f: int
+    num_batchers: int
+    num_leaders: int
+    num_proxy_leaders: int
+    num_acceptor_groups: int
+    num_replicas: int
+    num_proxy_replicas: int
+
+    def num_acceptors_per_group(self) -> int:
+        return 2 * self.f + 1
+
+    def num_processes(self, role: str) -> int:
+        return {
+            'batchers': self.num_batchers,
+            'leaders': self.num_leaders,
+            'proxy_leaders': self.num_proxy_leaders,
+            'acceptors':
+                self.num_acceptor_groups * self.num_acceptors_per_group(),
+            'replicas': self.num_replicas,
+            'proxy_replicas': self.num_proxy_replicas,
+        }[role]
+
+    def num_active_processes(self, role: str) -> int:
+        # Only one leader is active at a time.
+        if role == 'leaders':
+            return min(1, self.num_leaders)
+        return self.num_processes(role)
+
+
+def load(role: str, d: Deployment, write_fraction: float) -> float:
+    """
+    load returns the number of messages that a single active process of `role`
+    handles per command. We assume that there are no read batchers, that
+    acceptors are not flexible, and that load is spread evenly.
+    """
+    fw = write_fraction
+    fr = 1 - write_fraction
+    if role == 'batchers':
+        return fw / d.num_batchers
+    elif role == 'leaders':
+        return fw
+    elif role == 'proxy_leaders':
+        return fw / d.num_proxy_leaders
+    elif role == 'acceptors':
+        # A write is sent to a thrifty quorum of f + 1 acceptors in one
+        # group. A read is sent to f + 1 acceptors in one group.
+        return (d.f + 1) / d.num_processes('acceptors')
+    elif role == 'replicas':
+        return fw + fr / d.num_replicas
+    elif role == 'proxy_replicas':
+        return 1 / d.num_proxy_replicas
+    else:
+        raise ValueError(f'Unknown role {role}.')
+
+
+def role_throughput(role: str, d: Deployment, write_fraction: float,
+                    cost: float, cores: float) -> float:
+    """
+    role_throughput returns the peak number of commands per second that `role`
+    can process, given that every one of its processes has `cores` cores and
+    spends `cost` CPU seconds per message.
+    """
+    l = load(role, d, write_fraction)
+    if l == 0 or cost == 0:
+        return float('inf')
+    return cores / (cost * l)
+
+
+def peak_throughput(d: Deployment, write_fraction: float,
+                    costs: Dict[str, float], cores: float) -> float:
+    """
+    peak_throughput returns the throughput of the bottleneck role. Roles
+    without a cost (e.g., batchers in a deployment without batchers) are not
+    modeled.
+    """
+    return min(
+        role_throughput(role, d, write_fraction, cost, cores)
+        for (role, cost) in costs.items()
+        if d.num_processes(role) > 0)
+
+
+def replica_throughput(alpha: float, num_replicas: int,
+                       write_fraction: float) -> float:
+    """
+    replica_throughput returns the peak throughput of `num_replicas` replicas
+    that can each process alpha messages per second.
+    """
+    d = Deployment(f=1,
+                   num_batchers=0,
+                   num_leaders=0,
+                   num_proxy_leaders=0,
+                   num_acceptor_groups=0,
+                   num_replicas=num_replicas,
+                   num_proxy_replicas=0)
+    return role_throughput('replicas', d, write_fraction, 1 / alpha, 1)
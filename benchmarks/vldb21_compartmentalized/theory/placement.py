@@ -0,0 +1,327 @@
+# This file contains a placement planner for Compartmentalized MultiPaxos.
+#
+# Deciding how many batchers, proxy leaders, acceptor groups, replicas, and
+# proxy replicas to deploy (and on which machines) is usually done by sweeping
+# over configurations by hand (see hyperparameter_plot.py). The planner instead
+# uses the throughput model in model.py. Given
+#
+#   - a cluster JSON file, whose (non-client) addresses are the machines that
+#     we can place processes on;
+#   - the CPU cost of every role, in CPU seconds per message, which we measure
+#     from the Prometheus data of past monitored runs; and
+#   - the read fraction of the workload,
+#
+# the planner starts with the smallest deployment that tolerates f failures and
+# repeatedly adds a process (or, for acceptors, a group of 2f + 1 processes) to
+# the bottleneck role until we run out of machines or the bottleneck is the
+# leader, which cannot be scaled. It then outputs the deployment, its predicted
+# throughput, and a cluster JSON file that assigns every process to a machine.
+# Use to_input to apply a plan to a MultiPaxos Input.
+#
+# For example:
+#
+#   python -m benchmarks.vldb21_compartmentalized.theory.placement \
+#       --cluster cluster.json \
+#       --f 1 \
+#       --read_fraction 0.9 \
+#       --suite_directory /tmp/2021-01-01_00:00:00.000000_monitored_run \
+#       --output_dir /tmp
+
+from . import model
+from ... import prometheus
+from ...multipaxos import multipaxos
+from typing import Dict, List, NamedTuple, Optional
+import argparse
+import collections
+import json
+import os
+import pandas as pd
+import statistics
+
+
+# The Prometheus job of every role. See multipaxos.py.
+_JOBS = {
+    'multipaxos_batcher': 'batchers',
+    'multipaxos_leader': 'leaders',
+    'multipaxos_proxy_leader': 'proxy_leaders',
+    'multipaxos_acceptor': 'acceptors',
+    'multipaxos_replica': 'replicas',
+    'multipaxos_proxy_replica': 'proxy_replicas',
+}
+
+# Roles that every deployment has. Batchers and proxy replicas are optional and
+# are only deployed if we know their cost.
+_REQUIRED_ROLES = ['leaders', 'proxy_leaders', 'acceptors', 'replicas']
+
+
+class Plan(NamedTuple):
+    deployment: model.Deployment
+    # The predicted peak throughput, in commands per second.
+    throughput: float
+    bottleneck: str
+    # The addresses of every role, in the format of a cluster JSON file.
+    cluster: Dict[str, List[str]]
+
+
+def _cores_by_role(queryer: prometheus.PrometheusQueryer) -> Dict[str, float]:
+    # We compute the CPU usage of every process between every two scrapes and
+    # take the median, which ignores startup and shutdown. The CPU usage of a
+    # role is the sum of the CPU usage of its processes.
+    df = queryer.query('process_cpu_seconds_total[100d]')
+    cores: Dict[str, float] = collections.defaultdict(float)
+    for labels in df.columns:
+        job = dict(labels).get('job')
+        if job not in _JOBS:
+            continue
+        s = df[labels].dropna().astype(float)
+        dt = s.index.to_series().diff().dt.total_seconds()
+        rates = (s.diff() / dt).dropna()
+        if len(rates) > 0:
+            cores[_JOBS[job]] += rates.median()
+    return dict(cores)
+
+
+def measure_costs(suite_directory: str) -> Dict[str, float]:
+    """
+    measure_costs returns the CPU cost of every role, in CPU seconds per
+    message, measured from the monitored benchmarks of a MultiPaxos suite. If
+    the suite has multiple monitored benchmarks, we take the median cost.
+    """
+    df = pd.read_csv(os.path.join(suite_directory, 'results.csv'))
+    costs: Dict[str, List[float]] = collections.defaultdict(list)
+    for (i, row) in df.iterrows():
+        # Benchmark directories are numbered from 1 in the order of the rows
+        # of results.csv.
+        tsdb = os.path.join(suite_directory, f'{i + 1:03}', 'prometheus_data')
+        if not os.path.exists(tsdb):
+            continue
+
+        # Dummy outputs have a throughput of -1.
+        write_throughput = max(
+            row['write_output.start_throughput_1s.median'], 0)
+        read_throughput = max(
+            row['read_output.start_throughput_1s.median'], 0)
+        throughput = write_throughput + read_throughput
+        if throughput == 0:
+            continue
+
+        d = model.Deployment(
+            f=row['f'],
+            num_batchers=row['num_batchers'],
+            num_leaders=row['num_leaders'],
+            num_proxy_leaders=row['num_proxy_leaders'],
+            num_acceptor_groups=row['num_acceptor_groups'],
+            num_replicas=row['num_replicas'],
+            num_proxy_replicas=row['num_proxy_replicas'],
+        )
+        with prometheus.PrometheusQueryer(tsdb) as queryer:
+            cores = _cores_by_role(queryer)
+        for (role, c) in cores.items():
+            if d.num_active_processes(role) == 0:
+                continue
+            messages_per_second = (
+                throughput *
+                model.load(role, d, write_throughput / throughput) *
+                d.num_active_processes(role))
+            if messages_per_second > 0:
+                costs[role].append(c / messages_per_second)
+
+    return {role: statistics.median(cs) for (role, cs) in costs.items()}
+
+
+def _grow(d: model.Deployment, role: str) -> Optional[model.Deployment]:
+    if role == 'batchers':
+        return d._replace(num_batchers=d.num_batchers + 1)
+    elif role == 'proxy_leaders':
+        return d._replace(num_proxy_leaders=d.num_proxy_leaders + 1)
+    elif role == 'acceptors':
+        return d._replace(num_acceptor_groups=d.num_acceptor_groups + 1)
+    elif role == 'replicas':
+        return d._replace(num_replicas=d.num_replicas + 1)
+    elif role == 'proxy_replicas':
+        return d._replace(num_proxy_replicas=d.num_proxy_replicas + 1)
+    else:
+        # Leaders cannot be scaled.
+        return None
+
+
+def _num_processes(d: model.Deployment) -> int:
+    return sum(d.num_processes(role) for role in model.ROLES)
+
+
+def assign_hosts(d: model.Deployment, hosts: List[str], clients: List[str],
+                 procs_per_host: int) -> Dict[str, List[str]]:
+    """
+    assign_hosts assigns every process of `d` to one of `hosts`, round robin,
+    and returns the assignment in the format of a cluster JSON file.
+    """
+    slots = [h for _ in range(procs_per_host) for h in hosts]
+    if _num_processes(d) > len(slots):
+        raise ValueError(f'Deployment {d} does not fit on {len(hosts)} hosts '
+                         f'with {procs_per_host} processes per host.')
+
+    cluster: Dict[str, List[str]] = {'clients': clients, 'read_batchers': []}
+    i = 0
+    for role in ['leaders', 'acceptors', 'replicas', 'proxy_leaders',
+                 'proxy_replicas', 'batchers']:
+        n = d.num_processes(role)
+        cluster[role] = slots[i:i + n]
+        i += n
+    return cluster
+
+
+def plan(hosts: List[str],
+         clients: List[str],
+         costs: Dict[str, float],
+         read_fraction: float,
+         f: int,
+         cores_per_proc: float = 1,
+         procs_per_host: int = 1) -> Plan:
+    """
+    plan returns the deployment with the highest predicted throughput that
+    fits on `hosts`. See the top of this file for details.
+    """
+    for role in costs:
+        if role not in model.ROLES:
+            raise ValueError(f'Unknown role {role}.')
+    for role in _REQUIRED_ROLES:
+        if role not in costs:
+            raise ValueError(f'The cost of {role} is unknown.')
+
+    write_fraction = 1 - read_fraction
+    d = model.Deployment(
+        f=f,
+        num_batchers=1 if 'batchers' in costs else 0,
+        num_leaders=f + 1,
+        num_proxy_leaders=1,
+        num_acceptor_groups=1,
+        num_replicas=f + 1,
+        num_proxy_replicas=1 if 'proxy_replicas' in costs else 0,
+    )
+    num_slots = len(hosts) * procs_per_host
+    if _num_processes(d) > num_slots:
+        raise ValueError(f'The smallest deployment {d} does not fit on '
+                         f'{len(hosts)} hosts with {procs_per_host} processes '
+                         f'per host.')
+
+    def bottleneck(d: model.Deployment) -> str:
+        return min(
+            (role for role in model.ROLES if role in costs),
+            key=lambda role: model.role_throughput(role, d, write_fraction,
+                                                   costs[role], cores_per_proc))
+
+    while True:
+        grown = _grow(d, bottleneck(d))
+        if grown is None or _num_processes(grown) > num_slots:
+            break
+        d = grown
+
+    return Plan(
+        deployment=d,
+        throughput=model.peak_throughput(d, write_fraction, costs,
+                                         cores_per_proc),
+        bottleneck=bottleneck(d),
+        cluster=assign_hosts(d, hosts, clients, procs_per_host),
+    )
+
+
+def to_input(p: Plan, input: multipaxos.Input) -> multipaxos.Input:
+    """to_input returns `input` with the deployment of `p`."""
+    d = p.deployment
+    return input._replace(
+        f=d.f,
+        num_batchers=d.num_batchers,
+        num_read_batchers=0,
+        num_leaders=d.num_leaders,
+        num_proxy_leaders=d.num_proxy_leaders,
+        num_acceptor_groups=d.num_acceptor_groups,
+        num_acceptors_per_group=d.num_acceptors_per_group(),
+        num_replicas=d.num_replicas,
+        num_proxy_replicas=d.num_proxy_replicas,
+        flexible=False,
+    )
+
+
+def main(args) -> None:
+    with open(args.cluster, 'r') as f:
+        cluster = json.load(f)[str(args.f)]
+    clients = cluster['clients']
+    hosts = sorted({
+        address for (role, addresses) in cluster.items()
+        if role != 'clients' for address in addresses
+    })
+
+    if args.costs is not None:
+        with open(args.costs, 'r') as f:
+            costs = json.load(f)
+    else:
+        costs = measure_costs(args.suite_directory)
+        costs_filename = os.path.join(args.output_dir, 'costs.json')
+        with open(costs_filename, 'w') as f:
+            json.dump(costs, f, indent=4)
+        print(f'Wrote costs to {costs_filename}.')
+
+    p = plan(hosts=hosts,
+             clients=clients,
+             costs=costs,
+             read_fraction=args.read_fraction,
+             f=args.f,
+             cores_per_proc=args.cores_per_proc,
+             procs_per_host=args.procs_per_host)
+
+    plan_filename = os.path.join(args.output_dir, 'plan.json')
+    with open(plan_filename, 'w') as f:
+        json.dump({
+            'deployment': p.deployment._asdict(),
+            'throughput': p.throughput,
+            'bottleneck': p.bottleneck,
+        }, f, indent=4)
+    print(f'Wrote plan to {plan_filename}.')
+
+    cluster_filename = os.path.join(args.output_dir, 'placement_cluster.json')
+    with open(cluster_filename, 'w') as f:
+        json.dump({str(args.f): p.cluster}, f, indent=4)
+    print(f'Wrote cluster to {cluster_filename}.')
+    print(f'{p.deployment} has a predicted peak throughput of '
+          f'{p.throughput:.0f} commands per second, bottlenecked by '
+          f'{p.bottleneck}.')
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cluster',
+                        type=str,
+                        required=True,
+                        help='Cluster JSON file of the available machines.')
+    parser.add_argument('--f', type=int, default=1, help='f')
+    parser.add_argument('--read_fraction',
+                        type=float,
+                        required=True,
+                        help='Fraction of commands that are reads.')
+    costs = parser.add_mutually_exclusive_group(required=True)
+    costs.add_argument('--costs',
+                       type=str,
+                       help='JSON file of the CPU seconds per message of '
+                            'every role.')
+    costs.add_argument('--suite_directory',
+                       type=str,
+                       help='Directory of a monitored MultiPaxos suite to '
+                            'measure costs from.')
+    parser.add_argument('--cores_per_proc',
+                        type=float,
+                        default=1,
+                        help='Cores that every process can use.')
+    parser.add_argument('--procs_per_host',
+                        type=int,
+                        default=1,
+                        help='Processes to place on every machine.')
+    parser.add_argument('--output_dir',
+                        type=str,
+                        default='.',
+                        help='Output directory.')
+    return parser
+
+
+if __name__ == '__main__':
+    parser = get_parser()
+    main(parser.parse_args())
@@ -0,0 +1,71 @@
+from . import model
+from . import placement
+import unittest
+
+
+class PlacementTest(unittest.TestCase):
+    def test_replica_throughput(self):
+        # See plot.py.
+        for n in [1, 2, 5]:
+            for fw in [0, 0.1, 1]:
+                self.assertAlmostEqual(
+                    model.replica_throughput(100, n, fw),
+                    (n * 100) / (n * fw + (1 - fw)))
+
+    def test_read_heavy(self):
+        # With mostly reads, replicas are the bottleneck, so every spare
+        # machine becomes a replica.
+        hosts = [f'10.0.0.{i}' for i in range(20)]
+        costs = {
+            'leaders': 1e-6,
+            'proxy_leaders': 1e-6,
+            'acceptors': 1e-6,
+            'replicas': 1e-5,
+        }
+        p = placement.plan(hosts=hosts,
+                           clients=['10.0.1.0'],
+                           costs=costs,
+                           read_fraction=1,
+                           f=1)
+        self.assertEqual(p.deployment.num_replicas, 20 - 2 - 1 - 3)
+        self.assertEqual(p.bottleneck, 'replicas')
+        self.assertEqual(len(p.cluster['replicas']), 14)
+        self.assertEqual(len(set(sum(p.cluster.values(), []))), 21)
+
+    def test_write_heavy(self):
+        # With only writes, we grow proxy leaders and acceptors until the
+        # leader is the bottleneck.
+        hosts = [f'10.0.0.{i}' for i in range(50)]
+        costs = {
+            'leaders': 1e-6,
+            'proxy_leaders': 4e-6,
+            'acceptors': 4e-6,
+            'replicas': 1e-7,
+            'proxy_replicas': 1e-7,
+        }
+        p = placement.plan(hosts=hosts,
+                           clients=[],
+                           costs=costs,
+                           read_fraction=0,
+                           f=1)
+        self.assertEqual(p.bottleneck, 'leaders')
+        self.assertEqual(p.deployment.num_proxy_leaders, 4)
+        self.assertEqual(p.deployment.num_acceptor_groups, 3)
+        self.assertAlmostEqual(p.throughput, 1e6)
+
+    def test_does_not_fit(self):
+        with self.assertRaises(ValueError):
+            placement.plan(hosts=['10.0.0.1'],
+                           clients=[],
+                           costs={
+                               'leaders': 1,
+                               'proxy_leaders': 1,
+                               'acceptors': 1,
+                               'replicas': 1,
+                           },
+                           read_fraction=0.5,
+                           f=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ matplotlib.use('pdf')
 font = {'size': 16}
 matplotlib.rc('font', **font)
 
+from . import model
 import argparse
 import itertools
 import matplotlib.pyplot as plt
@@ -19,7 +20,8 @@ def plot_one_throughput_vs_num_replicas(args) -> None:
     for fw in [0, 0.01, 0.02, 0.05, 0.1, 0.25, 1]:
         fr = 1 - fw
         ns = list(range(2, 31))
-        throughputs = [(n * args.alpha) / (n*fw + fr) / 1000000 for n in ns]
+        throughputs = [model.replica_throughput(args.alpha, n, fw) / 1000000
+                       for n in ns]
         ax.plot(ns, throughputs, '.-', marker=next(MARKERS),
                 label=f'{int(fr * 100)}% reads')
 
@@ -39,7 +41,7 @@ def plot_throughput_vs_num_replicas(args) -> None:
     for fw in [0, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1]:
         fr = 1 - fw
         ns = list(range(2, 31))
-        throughputs = [(n * args.alpha) / (n*fw + fr) for n in ns]
+        throughputs = [model.replica_throughput(args.alpha, n, fw) for n in ns]
         write_throughputs = [fw * t for t in throughputs]
         read_throughputs = [fr * t for t in throughputs]
         ax[0].plot(ns, throughputs, '.-', label=f'{int(fw * 100)}% writes')
@@ -64,7 +66,7 @@ def plot_throughput_vs_write_ratio(args) -> None:
     fws = [i / 100 for i in range(0, 100, 2)] + [1]
     frs = [1 - fw for fw in fws]
     for n in [1, 2, 3, 4, 5, 6, 7, 8, 9]:
-        throughputs = [(n * args.alpha) / (n*fw + fr) for (fw, fr) in zip(fws, frs)]
+        throughputs = [model.replica_throughput(args.alpha, n, fw) for fw in fws]
         write_throughputs = [fw * t for (fw, t) in zip(fws, throughputs)]
         read_throughputs = [fr * t for (fr, t) in zip(frs, throughputs)]
         ax[0].plot(frs, throughputs, '.-', label=f'{n} replicas')
@@ -0,0 +1,146 @@
+# This file contains a pool of warm JVMs that outlive individual benchmarks.
+#
+# Normally, every benchmark launches a fresh JVM for every role and pays for
+# JVM startup, heap commit, and JIT warmup. A WarmPool instead keeps one JVM
+# (running frankenpaxos.WarmMain) alive per (host, port) across the benchmarks
+# of a suite. To launch a role, the pool asks the JVM to stop the role it was
+# running and run the main method of the new role with the new flags (e.g., a
+# new --config). Consecutive benchmarks with the same topology (i.e., the same
+# processes on the same hosts and ports with the same JVM flags) thus reuse
+# the same warm JVMs. If the JVM flags of a process change (e.g., its heap
+# size), its JVM is replaced.
+#
+# Pass --warm_jvm_pool to a benchmark script to enable the pool. See
+# roles.Launcher for how it is used. Monitored benchmarks don't use the pool
+# because a warm JVM's garbage collection log doesn't end up in the output of
+# the roles it runs (see gc_log.py).
+
+from . import benchmark
+from . import host
+from . import proc
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import atexit
+import os
+import socket
+import tempfile
+import time
+
+
+class _Jvm(NamedTuple):
+    prefix: Tuple[str, ...]
+    proc: proc.Proc
+    address: Tuple[str, int]
+
+
+# A WarmProc is a role running in a warm JVM. Killing a WarmProc stops the
+# role but leaves the JVM running.
+class WarmProc(proc.Proc):
+    def __init__(self, pool: 'WarmPool', jvm: _Jvm, cmd: str) -> None:
+        self._pool = pool
+        self._jvm = jvm
+        self._cmd = cmd
+        self._killed = False
+
+    def cmd(self) -> str:
+        return self._cmd
+
+    def pid(self) -> Optional[int]:
+        return self._jvm.proc.pid()
+
+    def wait(self) -> Optional[int]:
+        return self._jvm.proc.wait()
+
+    def kill(self) -> None:
+        if not self._killed:
+            self._pool._request(self._jvm, ['stop'])
+            self._killed = True
+
+    def signal(self, sig: int) -> None:
+        # The JVM only runs this role, so we signal the JVM.
+        self._jvm.proc.signal(sig)
+
+
+class WarmPool:
+    # The control port of a JVM is two more than the port of its role. The
+    # role's Prometheus port is one more.
+    CONTROL_PORT_OFFSET = 2
+
+    def __init__(self, directory: Optional[str] = None,
+                 connect_timeout: float = 60) -> None:
+        # The output of every JVM (before any role runs in it) is written to
+        # `directory`.
+        self._directory = directory or tempfile.mkdtemp(
+            prefix='warm_jvm_pool_')
+        self._connect_timeout = connect_timeout
+        self._jvms: Dict[Tuple[str, int], _Jvm] = dict()
+        atexit.register(self.close)
+
+    def _request(self, jvm: _Jvm, lines: List[str]) -> None:
+        deadline = time.time() + self._connect_timeout
+        while True:
+            try:
+                s = socket.create_connection(jvm.address, timeout=600)
+                break
+            except OSError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.1)
+        with s:
+            s.sendall(('\n'.join(lines) + '\n\n').encode())
+            response = s.makefile().readline().strip()
+        if response != 'ok':
+            raise ValueError(f'JVM {jvm.address} failed request {lines}: '
+                             f'{response}.')
+
+    def _jvm(self, h: host.Host, port: int, prefix: List[str],
+             jar: str) -> _Jvm:
+        key = (h.ip(), port)
+        if key in self._jvms and self._jvms[key].prefix == tuple(prefix):
+            return self._jvms[key]
+        if key in self._jvms:
+            self._jvms.pop(key).proc.kill()
+
+        control_port = port + self.CONTROL_PORT_OFFSET
+        filename = os.path.join(self._directory, f'{h.ip()}_{port}')
+        p = h.popen(prefix + [
+            '-cp',
+            os.path.abspath(jar),
+            'frankenpaxos.WarmMain',
+            '--control_port',
+            str(control_port),
+        ],
+                    stdout=f'{filename}_out.txt',
+                    stderr=f'{filename}_err.txt')
+        jvm = _Jvm(prefix=tuple(prefix),
+                   proc=p,
+                   address=(h.ip(), control_port))
+        self._jvms[key] = jvm
+        return jvm
+
+    def launch(self, bench: benchmark.BenchmarkDirectory,
+               endpoint: host.Endpoint, label: str, prefix: List[str],
+               jar: str, main_class: str, args: List[str]) -> WarmProc:
+        """
+        launch runs `main_class` with `args` in a warm JVM on `endpoint`,
+        starting the JVM with command `prefix` (e.g., ['java', '-Xmx1g']) if
+        needed. Like bench.popen, the output of the role is written to
+        `label`_out.txt and `label`_err.txt.
+        """
+        jvm = self._jvm(endpoint.host, endpoint.port, prefix, jar)
+        self._request(jvm, [
+            'run',
+            bench.abspath(f'{label}_out.txt'),
+            bench.abspath(f'{label}_err.txt'),
+            main_class,
+        ] + args)
+        cmd = ' '.join(prefix + ['(warm)', main_class] + args)
+        bench.write_string(f'{label}_cmd.txt', cmd)
+        pid = jvm.proc.pid()
+        if pid:
+            bench.pids[(endpoint.host.ip(), pid)] = label
+        return WarmProc(self, jvm, cmd)
+
+    def close(self) -> None:
+        for jvm in self._jvms.values():
+            jvm.proc.kill()
+        self._jvms.clear()
@@ -0,0 +1,65 @@
+from . import benchmark
+from . import host
+from . import warm_pool
+import os
+import sys
+import tempfile
+import unittest
+
+
+# A stand-in for frankenpaxos.WarmMain that records the requests it receives
+# to requests.txt.
+FAKE_WARM_MAIN = """
+import socket
+import sys
+port = int(sys.argv[sys.argv.index('--control_port') + 1])
+server = socket.socket()
+server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+server.bind(('127.0.0.1', port))
+server.listen()
+while True:
+    (conn, _) = server.accept()
+    request = b''
+    while not request.endswith(b'\\n\\n'):
+        request += conn.recv(65536)
+    request = request.decode()
+    with open(sys.argv[1], 'a') as f:
+        f.write(request.strip().split('\\n')[0] + '\\n')
+    conn.sendall(b'ok\\n')
+    conn.close()
+"""
+
+
+class WarmPoolTest(unittest.TestCase):
+    def test_reuse(self):
+        with tempfile.TemporaryDirectory() as dir:
+            script = os.path.join(dir, 'warm_main.py')
+            with open(script, 'w') as f:
+                f.write(FAKE_WARM_MAIN)
+            requests = os.path.join(dir, 'requests.txt')
+            prefix = [sys.executable, script, requests]
+
+            pool = warm_pool.WarmPool(directory=dir)
+            endpoint = host.Endpoint(host.LocalHost(), 21000)
+            try:
+                pids = []
+                for i in range(2):
+                    path = os.path.join(dir, str(i))
+                    with benchmark.BenchmarkDirectory(path) as bench:
+                        p = pool.launch(bench, endpoint, 'acceptor_0',
+                                        prefix, 'jar', 'AcceptorMain',
+                                        ['--index', '0'])
+                        pids.append(p.pid())
+                        p.kill()
+
+                # Both benchmarks ran in the same JVM.
+                self.assertEqual(pids[0], pids[1])
+                with open(requests) as f:
+                    self.assertEqual(f.read().split(),
+                                     ['run', 'stop', 'run', 'stop'])
+            finally:
+                pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -65,27 +65,123 @@ object BenchmarkUtil {
     })
   }
 
+  // An Arrival is the time at which an open loop request is supposed to be
+  // issued, both as a wall clock time and as a System.nanoTime() timestamp.
+  case class Arrival(
+      startTime: java.time.Instant,
+      startNanos: Long
+  )
+
+  // timedFrom(arrival, f) is like timed(f), except that timing is measured
+  // from the time the request was supposed to be issued rather than from the
+  // time f is run. If a request is issued late (e.g., because the client has
+  // too many requests pending), the delay counts towards its latency. This
+  // avoids coordinated omission.
+  def timedFrom[T](
+      arrival: Arrival,
+      f: () => Future[T]
+  )(implicit execution: ExecutionContext): Future[(T, Timing)] = {
+    f().map((result) => {
+      val stopTimeNanos = System.nanoTime()
+      val stopTime = java.time.Instant.now()
+      val timing = Timing(
+        startTime = arrival.startTime,
+        stopTime = stopTime,
+        durationNanos = stopTimeNanos - arrival.startNanos
+      )
+      (result, timing)
+    })
+  }
+
+  // runArrivals(arrivals, pseudonyms, duration)(f) runs f open loop. runUntil
+  // waits for one invocation of f to finish before running f again. With
+  // runArrivals, f is instead invoked whenever a request arrives. `arrivals`
+  // is a sequence of (offset, x) pairs where offset is the number of
+  // nanoseconds after runArrivals is called at which f should be run with
+  // argument x. Arrivals must be sorted by offset. runArrivals stops once
+  // `arrivals` is exhausted or once an offset exceeds `duration`.
+  //
+  // Every invocation of f is passed an idle pseudonym from `pseudonyms`. If
+  // every pseudonym is busy when a request arrives, the request waits for a
+  // pseudonym to become idle, but its Arrival is left unchanged so that the
+  // delay is charged to it (see timedFrom).
+  //
+  // Arrivals are scheduled on a dedicated thread, so f should return quickly.
+  // The returned future is determined once every invocation of f is.
+  def runArrivals[A](
+      arrivals: Iterator[(Long, A)],
+      pseudonyms: Seq[Int],
+      duration: java.time.Duration
+  )(
+      f: (Int, Arrival, A) => Future[Unit]
+  )(implicit execution: ExecutionContext): Future[Unit] = {
+    require(pseudonyms.size > 0)
+    val idle = new java.util.concurrent.LinkedBlockingQueue[Int]()
+    pseudonyms.foreach(idle.put)
+
+    val promise = scala.concurrent.Promise[Unit]()
+    val thread = new Thread(() => {
+      val startTime = java.time.Instant.now()
+      val startNanos = System.nanoTime()
+      val durationNanos = duration.toNanos()
+      var done = false
+      while (!done && arrivals.hasNext) {
+        val (offsetNanos, x) = arrivals.next()
+        if (offsetNanos > durationNanos) {
+          done = true
+        } else {
+          val sleepNanos = startNanos + offsetNanos - System.nanoTime()
+          if (sleepNanos > 0) {
+            java.util.concurrent.TimeUnit.NANOSECONDS.sleep(sleepNanos)
+          }
+          val pseudonym = idle.take()
+          val arrival = Arrival(startTime = startTime.plusNanos(offsetNanos),
+                                startNanos = startNanos + offsetNanos)
+          f(pseudonym, arrival, x).onComplete(_ => idle.put(pseudonym))
+        }
+      }
+
+      // Wait for every pending request to finish.
+      for (_ <- pseudonyms) {
+        idle.take()
+      }
+      promise.success(())
+    })
+    thread.setDaemon(true)
+    thread.start()
+    promise.future
+  }
+
   // Benchmark clients repeatedly issue requests to a service and record the
   // latency of each request. Aggregating these latency measurements, we can
   // compute statistics like average latency. Computing the rate of the
   // requests, we can compute statistics like average throughput.
+  //
+  // Every measurement is annotated with the pseudonym that issued the request.
+  // A client process runs many closed loop pseudonyms concurrently, and
+  // benchmarks/benchmark.py needs the requests of every pseudonym to correct
+  // latencies for coordinated omission.
   class Recorder(filename: String) {
     val writer = CSVWriter.open(new java.io.File(filename))
-    writer.writeRow(Seq("start", "stop", "latency_nanos", "host", "port"))
+    writer.writeRow(
+      Seq("start", "stop", "latency_nanos", "host", "port", "pseudonym")
+    )
 
     def record(
         start: java.time.Instant,
         stop: java.time.Instant,
         latencyNanos: Long,
         host: String,
-        port: Int
+        port: Int,
+        pseudonym: Int
     ): Unit = {
       writer.writeRow(
         Seq(start.toString(),
             stop.toString(),
             latencyNanos.toString(),
             host,
-            port)
+            port,
+            pseudonym)
       )
     }
   }
@@ -96,7 +192,9 @@ object BenchmarkUtil {
   // For systems with extremely high throughput, we can collapse measurements.
   // That is, clients can report multiple measurements as a single output. This
   // loses some fidelity but decreases data size and processing time.
-  // Measurements are grouped by label.
+  // Measurements are grouped by label. A group mixes the requests of many
+  // pseudonyms, so its pseudonym is recorded as -1, and its latencies can't
+  // be corrected for coordinated omission.
   class LabeledRecorder(filename: String, groupSize: Int) {
     require(groupSize >= 1)
 
@@ -113,10 +211,13 @@ object BenchmarkUtil {
     //   - the start of the first request,
     //   - the stop time of the last request,
     //   - the number of measurements in the sample,
-    //   - the average latency of the measurements in the sample, and
-    //   - the label.
+    //   - the average latency of the measurements in the sample,
+    //   - the label, and
+    //   - the pseudonym, or -1 if measurements are grouped.
     val writer = CSVWriter.open(new java.io.File(filename))
-    writer.writeRow(Seq("start", "stop", "count", "latency_nanos", "label"))
+    writer.writeRow(
+      Seq("start", "stop", "count", "latency_nanos", "label", "pseudonym")
+    )
 
     private def resetGroup(group: Group): Unit = {
       group.count = 0
@@ -131,7 +232,8 @@ object BenchmarkUtil {
             group.stop.toString(),
             group.count.toString(),
             (group.latencyNanosSum / group.count).toString(),
-            label)
+            label,
+            -1)
       )
     }
 
@@ -139,7 +241,8 @@ object BenchmarkUtil {
         start: java.time.Instant,
         stop: java.time.Instant,
         latencyNanos: Long,
-        label: String
+        label: String,
+        pseudonym: Int
     ): Unit = {
       // If we're not grouping measurements, then we don't need to jump through
       // hoops with labelled groups. We can output right away.
@@ -149,7 +252,8 @@ object BenchmarkUtil {
               stop.toString(),
               "1",
               latencyNanos.toString(),
-              label)
+              label,
+              pseudonym)
         )
         return
       }
@@ -178,4 +282,19 @@ object BenchmarkUtil {
       }
     }
   }
+
+  // An EventRecorder records the time of events (e.g., a leader failure
+  // triggered by a benchmark driver), so that the effect of every event on
+  // latency and throughput can be computed from the recorder data. Drivers
+  // are killed rather than shut down, so every event is flushed right away.
+  class EventRecorder(filename: String) {
+    val writer = CSVWriter.open(new java.io.File(filename))
+    writer.writeRow(Seq("time", "event"))
+    writer.flush()
+
+    def record(time: java.time.Instant, event: String): Unit = {
+      writer.writeRow(Seq(time.toString(), event))
+      writer.flush()
+    }
+  }
 }
@@ -0,0 +1,83 @@
+package frankenpaxos
+
+import scala.util.Random
+
+// A Load describes how benchmark clients issue requests.
+//
+// With a ClosedLoop load, every client issues a request, waits for the
+// response, and then immediately issues another request. The offered load thus
+// depends on how fast the system responds, which hides queueing delay: when
+// the system slows down, so do the clients.
+//
+// With an OpenLoop load, requests arrive at a fixed target rate regardless of
+// how quickly the system responds. Latencies are measured from the time a
+// request arrives, not from the time it is sent, so slow responses are not
+// hidden (i.e., we avoid coordinated omission).
+sealed trait Load
+
+case object ClosedLoop extends Load
+
+sealed trait ArrivalProcess
+case object Poisson extends ArrivalProcess
+case object Constant extends ArrivalProcess
+
+case class OpenLoop(
+    targetOpsPerSecond: Double,
+    arrivalProcess: ArrivalProcess
+) extends Load {
+  require(targetOpsPerSecond > 0)
+
+  // The times, in nanoseconds since the start of the benchmark, at which
+  // requests arrive. With a Poisson arrival process, inter-arrival times are
+  // exponentially distributed. With a constant arrival process, requests are
+  // evenly spaced.
+  def arrivalOffsetsNanos(random: Random = new Random()): Iterator[Long] = {
+    val meanNanos = 1e9 / targetOpsPerSecond
+    var offsetNanos: Double = 0
+    Iterator.continually({
+      offsetNanos += (arrivalProcess match {
+        case Poisson  => -Math.log(1 - random.nextDouble()) * meanNanos
+        case Constant => meanNanos
+      })
+      offsetNanos.toLong
+    })
+  }
+}
+
+object Load {
+  def fromProto(proto: LoadProto): Load = {
+    import LoadProto.Value
+    proto.value match {
+      case Value.ClosedLoop(_) => ClosedLoop
+      case Value.OpenLoop(l) =>
+        OpenLoop(targetOpsPerSecond = l.targetOpsPerSecond,
+                 arrivalProcess = fromProto(l.arrivalProcess))
+      case Value.Empty =>
+        throw new IllegalArgumentException("Empty LoadProto encountered.")
+    }
+  }
+
+  def fromProto(proto: ArrivalProcessProto): ArrivalProcess = {
+    proto match {
+      case ArrivalProcessProto.POISSON  => Poisson
+      case ArrivalProcessProto.CONSTANT => Constant
+      case ArrivalProcessProto.Unrecognized(_) =>
+        throw new IllegalArgumentException(
+          "Unrecognized ArrivalProcessProto."
+        )
+    }
+  }
+
+  def fromFile(filename: String): Load = {
+    val source = scala.io.Source.fromFile(filename)
+    try {
+      fromProto(LoadProto.fromAscii(source.mkString))
+    } finally {
+      source.close()
+    }
+  }
+
+  // Like workloads, loads are specified on the command line as a file
+  // containing a proto.
+  implicit val read: scopt.Read[Load] = scopt.Read.reads(fromFile)
+}
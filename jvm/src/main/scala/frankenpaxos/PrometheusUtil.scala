@@ -1,15 +1,45 @@
 package frankenpaxos
 
+import io.prometheus.client.CollectorRegistry
 import io.prometheus.client.exporter.HTTPServer
+import io.prometheus.client.hotspot.ClassLoadingExports
 import io.prometheus.client.hotspot.DefaultExports
+import io.prometheus.client.hotspot.GarbageCollectorExports
+import io.prometheus.client.hotspot.MemoryPoolsExports
+import io.prometheus.client.hotspot.StandardExports
+import io.prometheus.client.hotspot.ThreadExports
+import scala.collection.mutable
 
 object PrometheusUtil {
+  // The servers started by `server`. See `reset`.
+  private val servers = mutable.Buffer[HTTPServer]()
+
   def server(host: String, port: Int): Option[HTTPServer] = {
     if (port != -1) {
       DefaultExports.initialize()
-      Some(new HTTPServer(host, port))
+      val server = new HTTPServer(host, port)
+      servers.synchronized { servers += server }
+      Some(server)
     } else {
       None
     }
   }
+
+  // reset stops every server and unregisters every collector other than the
+  // JVM collectors. WarmMain calls reset between roles, so that the next role
+  // can register its collectors and start a server on its port.
+  def reset(): Unit = {
+    servers.synchronized {
+      servers.foreach(_.stop())
+      servers.clear()
+    }
+    CollectorRegistry.defaultRegistry.clear()
+    // DefaultExports.initialize only registers its collectors once, so we
+    // register them again ourselves.
+    new StandardExports().register()
+    new MemoryPoolsExports().register()
+    new GarbageCollectorExports().register()
+    new ThreadExports().register()
+    new ClassLoadingExports().register()
+  }
 }
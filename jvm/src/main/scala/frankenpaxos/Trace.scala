@@ -0,0 +1,69 @@
+package frankenpaxos
+
+import java.nio.ByteBuffer
+import java.nio.ByteOrder
+import java.nio.file.Files
+import java.nio.file.Paths
+
+// A Trace is a recording of the commands that clients issued to some
+// production service. Benchmark clients replay traces (see
+// TraceReplayReadWriteWorkload) to benchmark protocols against a realistic
+// request mix. Traces are written by benchmarks/trace.py. See that file for a
+// description of the binary format.
+//
+// We store records column-wise in arrays, rather than as an array of case
+// classes, to keep large traces compact in memory.
+class Trace(
+    val startNanos: Long,
+    val timestampNanos: Array[Long],
+    val isWrite: Array[Boolean],
+    val keys: Array[Long],
+    val valueSizes: Array[Int]
+) {
+  require(timestampNanos.size == isWrite.size)
+  require(timestampNanos.size == keys.size)
+  require(timestampNanos.size == valueSizes.size)
+
+  def size: Int = timestampNanos.size
+
+  // The offset of record i from the start of the trace, divided by
+  // `timeCompression`.
+  def offsetNanos(i: Int, timeCompression: Double): Long =
+    ((timestampNanos(i) - startNanos) / timeCompression).toLong
+}
+
+object Trace {
+  private val Magic: Array[Byte] = "FPTRACE1".getBytes("US-ASCII")
+  private val HeaderSize: Int = Magic.size + 8
+  private val RecordSize: Int = 8 + 1 + 8 + 4
+
+  def fromFile(filename: String): Trace = {
+    val bytes = Files.readAllBytes(Paths.get(filename))
+    if (bytes.size < HeaderSize ||
+        !java.util.Arrays.equals(bytes.take(Magic.size), Magic)) {
+      throw new IllegalArgumentException(s"$filename is not a trace file.")
+    }
+    if ((bytes.size - HeaderSize) % RecordSize != 0) {
+      throw new IllegalArgumentException(
+        s"Trace $filename has a truncated record."
+      )
+    }
+
+    val buffer = ByteBuffer.wrap(bytes).order(ByteOrder.LITTLE_ENDIAN)
+    buffer.position(Magic.size)
+    val startNanos = buffer.getLong()
+
+    val n = (bytes.size - HeaderSize) / RecordSize
+    val timestampNanos = new Array[Long](n)
+    val isWrite = new Array[Boolean](n)
+    val keys = new Array[Long](n)
+    val valueSizes = new Array[Int](n)
+    for (i <- 0 until n) {
+      timestampNanos(i) = buffer.getLong()
+      isWrite(i) = buffer.get() != 0
+      keys(i) = buffer.getLong()
+      valueSizes(i) = buffer.getInt()
+    }
+    new Trace(startNanos, timestampNanos, isWrite, keys, valueSizes)
+  }
+}
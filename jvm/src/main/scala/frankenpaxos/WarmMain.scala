@@ -0,0 +1,133 @@
+package frankenpaxos
+
+import java.io.BufferedReader
+import java.io.FileOutputStream
+import java.io.InputStreamReader
+import java.io.PrintStream
+import java.net.InetSocketAddress
+import java.net.ServerSocket
+import java.net.Socket
+import scala.collection.mutable
+
+// WarmMain is a long-lived JVM that runs the main method of a role (e.g.,
+// frankenpaxos.multipaxos.AcceptorMain) again and again. Benchmarks launch a
+// fresh JVM for every role of every benchmark and pay for JVM startup, heap
+// commit, and JIT warmup every time. With WarmMain, a benchmark suite instead
+// keeps one JVM per role alive across benchmarks and resets it between them.
+// Because every run uses the same classes, code that was JIT compiled during
+// one benchmark stays compiled for the next.
+//
+// WarmMain is controlled over a line-based TCP protocol. Every connection
+// sends one request and receives one response. A request is one of
+//
+//   run                   stop
+//   <stdout file>
+//   <stderr file>
+//   <main class>
+//   <arg 1>
+//   ...
+//   <arg n>
+//
+// followed by an empty line. `run` stops the currently running role, if any,
+// and then runs the main method of the main class with the given arguments,
+// redirecting the role's output to the given files. `stop` stops the currently
+// running role. The response is `ok` or `error <message>`.
+//
+// A role is stopped by shutting down its NettyTcpTransport and Prometheus
+// server, so WarmMain only supports roles that use those.
+object WarmMain extends App {
+  case class Flags(
+      controlHost: String = "0.0.0.0",
+      controlPort: Int = -1
+  )
+
+  val parser = new scopt.OptionParser[Flags]("") {
+    help("help")
+    opt[String]("control_host").action((x, f) => f.copy(controlHost = x))
+    opt[Int]("control_port")
+      .required()
+      .action((x, f) => f.copy(controlPort = x))
+  }
+
+  val flags: Flags = parser.parse(args, Flags()) match {
+    case Some(flags) =>
+      flags
+    case None =>
+      throw new IllegalArgumentException("Could not parse flags.")
+  }
+
+  // The output streams of the currently running role.
+  private var streams: Seq[PrintStream] = Seq()
+
+  private def stop(): Unit = {
+    NettyTcpTransport.shutdownAll()
+    PrometheusUtil.reset()
+    System.out.flush()
+    System.err.flush()
+    streams.foreach(_.close())
+    streams = Seq()
+  }
+
+  private def run(
+      stdout: String,
+      stderr: String,
+      mainClass: String,
+      args: Array[String]
+  ): Unit = {
+    stop()
+    val out = new PrintStream(new FileOutputStream(stdout, true), true)
+    val err = new PrintStream(new FileOutputStream(stderr, true), true)
+    streams = Seq(out, err)
+    System.setOut(out)
+    System.setErr(err)
+    // Console.out and Console.err are inherited by the threads (e.g., the
+    // netty event loop) that the role starts.
+    Console.withOut(out) {
+      Console.withErr(err) {
+        Class
+          .forName(mainClass)
+          .getMethod("main", classOf[Array[String]])
+          .invoke(null, args)
+      }
+    }
+  }
+
+  private def handle(socket: Socket): Unit = {
+    val reader =
+      new BufferedReader(new InputStreamReader(socket.getInputStream()))
+    val lines = mutable.Buffer[String]()
+    var line = reader.readLine()
+    while (line != null && line.nonEmpty) {
+      lines += line
+      line = reader.readLine()
+    }
+
+    val response =
+      try {
+        lines.toList match {
+          case "run" :: stdout :: stderr :: mainClass :: args =>
+            run(stdout, stderr, mainClass, args.toArray)
+            "ok"
+          case "stop" :: Nil =>
+            stop()
+            "ok"
+          case _ =>
+            s"error malformed request $lines"
+        }
+      } catch {
+        case e: Throwable =>
+          e.printStackTrace()
+          s"error $e"
+      }
+
+    socket.getOutputStream().write(s"$response\n".getBytes("UTF-8"))
+    socket.close()
+  }
+
+  val server = new ServerSocket()
+  server.setReuseAddress(true)
+  server.bind(new InetSocketAddress(flags.controlHost, flags.controlPort))
+  while (true) {
+    handle(server.accept())
+  }
+}
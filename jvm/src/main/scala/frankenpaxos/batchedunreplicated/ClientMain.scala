@@ -139,7 +139,7 @@ object ClientMain extends App {
     s"${flags.outputFilePrefix}_data.csv",
     groupSize = flags.measurementGroupSize
   )
-  def run(): Future[Unit] = {
+  def run(pseudonym: Int): Future[Unit] = {
     implicit val context = transport.executionContext
     BenchmarkUtil
       .timed(() => client.propose(flags.workload.get()))
@@ -153,7 +153,8 @@ object ClientMain extends App {
             start = timing.startTime,
             stop = timing.stopTime,
             latencyNanos = timing.durationNanos,
-            label = "write"
+            label = "write",
+            pseudonym = pseudonym
           )
           Future.successful(())
       })
@@ -177,8 +178,8 @@ object ClientMain extends App {
   Thread.sleep(flags.warmupSleep.toMillis())
 
   // Run the benchmark.
-  val futures = for (_ <- 0 to flags.numClients)
-    yield BenchmarkUtil.runFor(() => run(), flags.duration)
+  val futures = for (pseudonym <- 0 to flags.numClients)
+    yield BenchmarkUtil.runFor(() => run(pseudonym), flags.duration)
   try {
     logger.info("Clients started.")
     concurrent.Await.result(Future.sequence(futures), flags.timeout)
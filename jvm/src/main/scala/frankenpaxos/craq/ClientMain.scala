@@ -2,11 +2,14 @@ package frankenpaxos.craq
 
 import frankenpaxos.Actor
 import frankenpaxos.BenchmarkUtil
+import frankenpaxos.ClosedLoop
 import frankenpaxos.FileLogger
 import frankenpaxos.Flags.durationRead
+import frankenpaxos.Load
 import frankenpaxos.LogLevel
 import frankenpaxos.NettyTcpAddress
 import frankenpaxos.NettyTcpTransport
+import frankenpaxos.OpenLoop
 import frankenpaxos.PrintLogger
 import frankenpaxos.PrometheusUtil
 import frankenpaxos.monitoring.PrometheusCollectors
@@ -41,6 +44,9 @@ object ClientMain extends App {
       numClients: Int = 1,
       outputFilePrefix: String = "",
       workload: ReadWriteWorkload = new UniformReadWriteWorkload(1, 0, 1, 0),
+      // By default, clients run closed loop. With an open loop load, requests
+      // arrive at a fixed rate.
+      load: Load = ClosedLoop,
       // Options.
       options: ClientOptions = ClientOptions.default
   )
@@ -87,6 +93,8 @@ object ClientMain extends App {
       .action((x, f) => f.copy(outputFilePrefix = x))
     opt[ReadWriteWorkload]("workload")
       .action((x, f) => f.copy(workload = x))
+    opt[Load]("load")
+      .action((x, f) => f.copy(load = x))
 
     // Options.
     opt[java.time.Duration]("options.resendClientRequestPeriod")
@@ -152,17 +160,28 @@ object ClientMain extends App {
     s"${flags.outputFilePrefix}_data.csv",
     groupSize = flags.measurementGroupSize
   )
-  def run(pseudonym: Int, workload: ReadWriteWorkload): Future[Unit] = {
+  def run(pseudonym: Int, workload: ReadWriteWorkload): Future[Unit] =
+    runCommand(pseudonym, workload)(workload.get(), arrival = None)
+
+  // runCommand issues a single command. If `arrival` is set, the command is
+  // being issued open loop, and its latency is measured from its arrival.
+  def runCommand(pseudonym: Int, workload: ReadWriteWorkload)(
+      readWrite: workload.ReadWrite,
+      arrival: Option[BenchmarkUtil.Arrival]
+  ): Future[Unit] = {
     implicit val context = transport.executionContext
-    val (f, error, label) = workload.get() match {
+    val (f, error, label) = readWrite match {
       case workload.Write(key, value) =>
         (() => client.write(pseudonym, key, value), "Write failed.", "write")
       case workload.Read(key) =>
         (() => client.read(pseudonym, key), "Read failed.", "read")
     }
 
-    BenchmarkUtil
-      .timed(f)
+    val timed = arrival match {
+      case None          => BenchmarkUtil.timed(f)
+      case Some(arrival) => BenchmarkUtil.timedFrom(arrival, f)
+    }
+    timed
       .transformWith({
         case scala.util.Failure(_) =>
           logger.debug(error)
@@ -173,7 +192,8 @@ object ClientMain extends App {
             start = timing.startTime,
             stop = timing.stopTime,
             latencyNanos = timing.durationNanos,
-            label = label
+            label = label,
+            pseudonym = pseudonym
           )
           Future.successful(())
       })
@@ -200,9 +220,44 @@ object ClientMain extends App {
   Thread.sleep(flags.warmupSleep.toMillis())
 
   // Run the benchmark.
-  val futures = for (pseudonym <- flags.numWarmupClients until
-                       flags.numWarmupClients + flags.numClients) yield {
-    BenchmarkUtil.runFor(() => run(pseudonym, flags.workload), flags.duration)
+  val futures = (flags.workload, flags.load) match {
+    // Trace replay workloads are run open loop. Every client issues the
+    // commands in its shard of the trace at the times they were recorded,
+    // using up to numClients pseudonyms to do so.
+    case (workload: TraceReplayReadWriteWorkload, _) =>
+      Seq(
+        BenchmarkUtil.runArrivals(
+          workload.replay(),
+          pseudonyms = flags.numWarmupClients until
+            flags.numWarmupClients + flags.numClients,
+          flags.duration
+        )(
+          (pseudonym, arrival, readWrite) =>
+            runCommand(pseudonym, workload)(readWrite, Some(arrival))
+        )
+      )
+
+    // Open loop loads issue requests at a fixed rate, regardless of how many
+    // requests are pending, using up to numClients pseudonyms to do so.
+    case (workload, load: OpenLoop) =>
+      Seq(
+        BenchmarkUtil.runArrivals(
+          load.arrivalOffsetsNanos().map(offset => (offset, workload.get())),
+          pseudonyms = flags.numWarmupClients until
+            flags.numWarmupClients + flags.numClients,
+          flags.duration
+        )(
+          (pseudonym, arrival, readWrite) =>
+            runCommand(pseudonym, workload)(readWrite, Some(arrival))
+        )
+      )
+
+    case _ =>
+      for (pseudonym <- flags.numWarmupClients until
+             flags.numWarmupClients + flags.numClients) yield {
+        BenchmarkUtil.runFor(() => run(pseudonym, flags.workload),
+                             flags.duration)
+      }
   }
 
   try {
@@ -1,6 +1,8 @@
 package frankenpaxos.craq
 
 // import frankenpaxos.statemachine
+import frankenpaxos.Trace
+import frankenpaxos.util
 import scala.util.Random
 
 // In Craq, clients issue reads and writes differently. Writes are sent to the
@@ -86,6 +88,80 @@ class PointSkewedReadWriteWorkload(
   }
 }
 
+// A KeyDistributionReadWriteWorkload is like a UniformReadWriteWorkload,
+// except that keys are drawn from an arbitrary key distribution (e.g.,
+// Zipfian) instead of uniformly at random.
+class KeyDistributionReadWriteWorkload(
+    distribution: util.KeyDistribution,
+    readFraction: Float,
+    writeSizeMean: Int,
+    writeSizeStd: Int
+) extends ReadWriteWorkload {
+  require(0 <= readFraction && readFraction <= 1)
+  require(writeSizeMean >= 0)
+  require(writeSizeStd >= 0)
+
+  override def toString(): String =
+    s"KeyDistributionReadWriteWorkload(" +
+      s"distribution=$distribution, readFraction=$readFraction, " +
+      s"writeSizeMean=$writeSizeMean, writeSizeStd=$writeSizeStd)"
+
+  override def get(): ReadWrite = {
+    if (Random.nextFloat() <= readFraction) {
+      Read(key = distribution.nextReadKey().toString())
+    } else {
+      val size = Math.max(
+        0,
+        (Random.nextGaussian() * writeSizeStd + writeSizeMean).round.toInt
+      )
+      Write(key = distribution.nextWriteKey().toString(),
+            value = Random.nextString(size))
+    }
+  }
+}
+
+// A TraceReplayReadWriteWorkload replays a trace of reads and writes (see
+// frankenpaxos.Trace). Clients replay traces open loop using `replay`, which
+// returns every command along with the time, in nanoseconds since the start of
+// the trace, that it should be issued. Inter-arrival times are divided by
+// `timeCompression`. When used closed loop (e.g., during warmup), `get` cycles
+// through the trace's commands, ignoring timestamps.
+class TraceReplayReadWriteWorkload(
+    traceFilename: String,
+    timeCompression: Double
+) extends ReadWriteWorkload {
+  require(timeCompression > 0)
+
+  private val trace = Trace.fromFile(traceFilename)
+  require(trace.size > 0, s"Trace $traceFilename is empty.")
+
+  // The index of the next command returned by get.
+  private var index: Int = 0
+
+  override def toString(): String =
+    s"TraceReplayReadWriteWorkload(" +
+      s"traceFilename=$traceFilename, timeCompression=$timeCompression)"
+
+  private def command(i: Int): ReadWrite = {
+    val key = trace.keys(i).toString()
+    if (trace.isWrite(i)) {
+      Write(key = key, value = Random.nextString(trace.valueSizes(i)))
+    } else {
+      Read(key = key)
+    }
+  }
+
+  override def get(): ReadWrite = synchronized {
+    val readWrite = command(index)
+    index = (index + 1) % trace.size
+    readWrite
+  }
+
+  def replay(): Iterator[(Long, ReadWrite)] =
+    (0 until trace.size).iterator
+      .map(i => (trace.offsetNanos(i, timeCompression), command(i)))
+}
+
 object ReadWriteWorkload {
   def fromProto(proto: ReadWriteWorkloadProto): ReadWriteWorkload = {
     import ReadWriteWorkloadProto.Value
@@ -107,6 +183,57 @@ object ReadWriteWorkload {
           writeSizeStd = w.writeSizeStd
         )
 
+      case Value.ZipfianReadWriteWorkload(w) =>
+        new KeyDistributionReadWriteWorkload(
+          distribution = new util.ZipfianKeyDistribution(
+            numKeys = w.numKeys,
+            theta = w.theta
+          ),
+          readFraction = w.readFraction,
+          writeSizeMean = w.writeSizeMean,
+          writeSizeStd = w.writeSizeStd
+        )
+
+      case Value.ScrambledZipfianReadWriteWorkload(w) =>
+        new KeyDistributionReadWriteWorkload(
+          distribution = new util.ScrambledZipfianKeyDistribution(
+            numKeys = w.numKeys,
+            theta = w.theta
+          ),
+          readFraction = w.readFraction,
+          writeSizeMean = w.writeSizeMean,
+          writeSizeStd = w.writeSizeStd
+        )
+
+      case Value.LatestReadWriteWorkload(w) =>
+        new KeyDistributionReadWriteWorkload(
+          distribution = new util.LatestKeyDistribution(
+            numKeys = w.numKeys,
+            theta = w.theta
+          ),
+          readFraction = w.readFraction,
+          writeSizeMean = w.writeSizeMean,
+          writeSizeStd = w.writeSizeStd
+        )
+
+      case Value.HotspotReadWriteWorkload(w) =>
+        new KeyDistributionReadWriteWorkload(
+          distribution = new util.HotspotKeyDistribution(
+            numKeys = w.numKeys,
+            hotSetFraction = w.hotSetFraction,
+            hotOperationFraction = w.hotOperationFraction
+          ),
+          readFraction = w.readFraction,
+          writeSizeMean = w.writeSizeMean,
+          writeSizeStd = w.writeSizeStd
+        )
+
+      case Value.TraceReplayReadWriteWorkload(w) =>
+        new TraceReplayReadWriteWorkload(
+          traceFilename = w.traceFilename,
+          timeCompression = w.timeCompression
+        )
+
       case Value.Empty =>
         throw new IllegalArgumentException(
           "Empty ReadWriteWorkloadProto encountered."
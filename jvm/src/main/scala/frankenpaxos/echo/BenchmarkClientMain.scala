@@ -62,7 +62,7 @@ object BenchmarkClientMain extends App {
   // Run clients.
   val recorder =
     new BenchmarkUtil.Recorder(flags.outputFile)
-  def run(): Future[Unit] = {
+  def run(pseudonym: Int): Future[Unit] = {
     implicit val context = transport.executionContext
     BenchmarkUtil
       .timed(() => client.echo())
@@ -77,7 +77,8 @@ object BenchmarkClientMain extends App {
             stop = timing.stopTime,
             latencyNanos = timing.durationNanos,
             host = flags.host,
-            port = flags.port
+            port = flags.port,
+            pseudonym = pseudonym
           )
           Future.successful(())
       })
@@ -85,8 +86,8 @@ object BenchmarkClientMain extends App {
 
   // Run the benchmark.
   implicit val context = transport.executionContext
-  val futures = for (_ <- 0 to flags.numClients)
-    yield BenchmarkUtil.runFor(() => run(), flags.duration)
+  val futures = for (pseudonym <- 0 to flags.numClients)
+    yield BenchmarkUtil.runFor(() => run(pseudonym), flags.duration)
   try {
     logger.info("Clients started.")
     concurrent.Await.result(Future.sequence(futures), flags.timeout)
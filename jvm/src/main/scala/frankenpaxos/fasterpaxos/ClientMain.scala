@@ -153,7 +153,8 @@ object ClientMain extends App {
             start = timing.startTime,
             stop = timing.stopTime,
             latencyNanos = timing.durationNanos,
-            label = "write"
+            label = "write",
+            pseudonym = pseudonym
           )
           Future.successful(())
       })
@@ -2,6 +2,7 @@ package frankenpaxos.horizontal
 
 import collection.mutable
 import frankenpaxos.Actor
+import frankenpaxos.BenchmarkUtil
 import frankenpaxos.Chan
 import frankenpaxos.Logger
 import frankenpaxos.Serializer
@@ -32,7 +33,8 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
     transport: Transport,
     logger: Logger,
     config: Config[Transport],
-    workload: DriverWorkload
+    workload: DriverWorkload,
+    eventRecorder: Option[BenchmarkUtil.EventRecorder] = None
 ) extends Actor(address, transport, logger) {
   config.checkValid()
 
@@ -67,6 +69,8 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
       failureTimer: Transport#Timer
   ) extends State
 
+  case class RandomChaosState(timers: Seq[Transport#Timer]) extends State
+
   // Fields ////////////////////////////////////////////////////////////////////
   // Leader channels.
   private val leaders: Seq[Chan[Leader[Transport]]] =
@@ -156,7 +160,7 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
       "reconfigureTimer",
       workload.period,
       () => {
-        logger.info("reconfigureTimer triggered")
+        triggered("reconfigureTimer")
         reconfigure(0, Set() ++ (0 until (2 * config.f + 1)))
         reconfigureTimer.start()
       }
@@ -188,15 +192,11 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
         period = workload.reconfigurationWarmupPeriod,
         n = workload.reconfigurationWarmupNum,
         f = () => {
-          logger.info(
-            "LeaderReconfiguration reconfiguration warmup triggered!"
-          )
+          triggered("LeaderReconfiguration reconfiguration warmup")
           reconfigure(0, randomSubset(acceptors.size, 2 * config.f + 1))
         },
         onLast = () => {
-          logger.info(
-            "LeaderReconfiguration reconfiguration warmup triggered!"
-          )
+          triggered("LeaderReconfiguration reconfiguration warmup")
           reconfigure(0, randomSubset(acceptors.size, 2 * config.f + 1))
         }
       )
@@ -207,11 +207,11 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
       period = workload.reconfigurationPeriod,
       n = workload.reconfigurationNum,
       f = () => {
-        logger.info("LeaderReconfiguration reconfiguration triggered!")
+        triggered("LeaderReconfiguration reconfiguration")
         reconfigure(0, randomSubset(acceptors.size, 2 * config.f + 1))
       },
       onLast = () => {
-        logger.info("LeaderReconfiguration reconfiguration triggered!")
+        triggered("LeaderReconfiguration reconfiguration")
         reconfigure(0, Set() ++ (0 until 2 * config.f + 1))
       }
     )
@@ -220,7 +220,7 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
       "failure",
       workload.failureDelay,
       () => {
-        logger.info("LeaderReconfiguration failure triggered!")
+        triggered("LeaderReconfiguration failure")
         acceptors(0).send(AcceptorInbound().withDie(Die()))
       }
     )
@@ -230,7 +230,7 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
       "recover",
       workload.recoverDelay,
       () => {
-        logger.info("LeaderReconfiguration recover triggered!")
+        triggered("LeaderReconfiguration recover")
         reconfigure(0, Set() ++ (1 to 2 * config.f + 1))
       }
     )
@@ -256,17 +256,13 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
         period = workload.leaderChangeWarmupPeriod,
         n = workload.leaderChangeWarmupNum,
         f = () => {
-          logger.info(
-            "LeaderFailure leader change warmup triggered!"
-          )
+          triggered("LeaderFailure leader change warmup")
           // I found that we need to let the second leader get some warmup in,
           // so we actually just change to it again and again.
           becomeLeader(1)
         },
         onLast = () => {
-          logger.info(
-            "LeaderFailure leader change warmup triggered!"
-          )
+          triggered("LeaderFailure leader change warmup")
           becomeLeader(0)
         }
       )
@@ -275,7 +271,7 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
       "failure",
       workload.failureDelay,
       () => {
-        logger.info("LeaderFailure failure triggered!")
+        triggered("LeaderFailure failure")
         leaders(0).send(LeaderInbound().withDie(Die()))
       }
     )
@@ -288,6 +284,39 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
     )
   }
 
+  private def chaosEvent(event: ChaosEventProto): Unit = {
+    event.value match {
+      case ChaosEventProto.Value.BecomeLeader(i) =>
+        triggered("RandomChaos leader change")
+        becomeLeader(i)
+      case ChaosEventProto.Value.Reconfigure(r) =>
+        triggered("RandomChaos reconfiguration")
+        reconfigure(r.index, r.member.toSet)
+      case ChaosEventProto.Value.KillLeader(i) =>
+        triggered("RandomChaos leader failure")
+        leaders(i).send(LeaderInbound().withDie(Die()))
+      case ChaosEventProto.Value.KillAcceptor(i) =>
+        triggered("RandomChaos acceptor failure")
+        acceptors(i).send(AcceptorInbound().withDie(Die()))
+      case ChaosEventProto.Value.Empty =>
+        logger.fatal("Empty ChaosEventProto encountered.")
+    }
+  }
+
+  private def randomChaos(workload: RandomChaos): RandomChaosState = {
+    RandomChaosState(
+      for ((event, i) <- workload.events.zipWithIndex) yield {
+        val t = timer(
+          s"random chaos event $i",
+          java.time.Duration.ofMillis(event.delayMs),
+          () => chaosEvent(event)
+        )
+        t.start()
+        t
+      }
+    )
+  }
+
   val state: State = workload match {
     case DoNothing =>
       DoNothingState
@@ -297,6 +326,8 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
       leaderReconfiguration(workload)
     case workload: LeaderFailure =>
       leaderFailure(workload)
+    case workload: RandomChaos =>
+      randomChaos(workload)
   }
 
   // Handlers //////////////////////////////////////////////////////////////////
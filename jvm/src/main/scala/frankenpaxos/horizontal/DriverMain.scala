@@ -1,6 +1,7 @@
 package frankenpaxos.horizontal
 
 import frankenpaxos.Actor
+import frankenpaxos.BenchmarkUtil
 import frankenpaxos.Flags.durationRead
 import frankenpaxos.LogLevel
 import frankenpaxos.NettyTcpAddress
@@ -21,7 +22,8 @@ object DriverMain extends App {
       port: Int = 9000,
       configFile: File = new File("."),
       logLevel: frankenpaxos.LogLevel = frankenpaxos.LogDebug,
-      driverWorkload: DriverWorkload = DoNothing
+      driverWorkload: DriverWorkload = DoNothing,
+      outputFilePrefix: String = ""
   )
 
   val parser = new scopt.OptionParser[Flags]("") {
@@ -33,6 +35,8 @@ object DriverMain extends App {
     opt[DriverWorkload]("driver_workload")
       .required()
       .action((x, f) => f.copy(driverWorkload = x))
+    opt[String]("output_file_prefix")
+      .action((x, f) => f.copy(outputFilePrefix = x))
   }
 
   // Parse flags.
@@ -51,6 +55,14 @@ object DriverMain extends App {
     transport = new NettyTcpTransport(logger),
     logger = logger,
     config = config,
-    workload = flags.driverWorkload
+    workload = flags.driverWorkload,
+    eventRecorder =
+      if (flags.outputFilePrefix.isEmpty) None
+      else
+        Some(
+          new BenchmarkUtil.EventRecorder(
+            s"${flags.outputFilePrefix}_events.csv"
+          )
+        )
   )
 }
@@ -49,6 +49,14 @@ case class LeaderFailure(
     failureDelay: java.time.Duration
 ) extends DriverWorkload
 
+// This workload is a random schedule of leader changes, reconfigurations, and
+// failures generated by benchmarks/chaos_schedule.py. The driver replays the
+// events at their scheduled times.
+case class RandomChaos(
+    seed: Long,
+    events: Seq[ChaosEventProto]
+) extends DriverWorkload
+
 object DriverWorkload {
   def fromProto(proto: DriverWorkloadProto): DriverWorkload = {
     import DriverWorkloadProto.Value
@@ -89,6 +97,9 @@ object DriverWorkload {
           failureDelay = java.time.Duration.ofMillis(w.failureDelayMs)
         )
 
+      case Value.RandomChaos(w) =>
+        RandomChaos(seed = w.seed, events = w.event)
+
       case Value.Empty =>
         throw new IllegalArgumentException(
           "Empty DriverWorkloadProto encountered."
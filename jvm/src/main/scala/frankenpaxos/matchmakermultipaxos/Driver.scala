@@ -2,6 +2,7 @@ package frankenpaxos.matchmakermultipaxos
 
 import collection.mutable
 import frankenpaxos.Actor
+import frankenpaxos.BenchmarkUtil
 import frankenpaxos.Chan
 import frankenpaxos.Logger
 import frankenpaxos.Serializer
@@ -29,7 +30,8 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
     transport: Transport,
     logger: Logger,
     config: Config[Transport],
-    workload: DriverWorkload
+    workload: DriverWorkload,
+    eventRecorder: Option[BenchmarkUtil.EventRecorder] = None
 ) extends Actor(address, transport, logger) {
   config.checkValid()
 
@@ -86,6 +88,8 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
       matchmakerRecoverTimer: Transport#Timer
   ) extends State
 
+  case class RandomChaosState(timers: Seq[Transport#Timer]) extends State
+
   // Fields ////////////////////////////////////////////////////////////////////
   // Leader channels.
   private val leaders: Seq[Chan[Leader[Transport]]] =
@@ -156,6 +160,11 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
     (delayTimer, t)
   }
 
+  private def triggered(event: String): Unit = {
+    logger.info(s"$event triggered!")
+    eventRecorder.foreach(_.record(java.time.Instant.now(), event))
+  }
+
   def reconfigure(leader: Int, acceptors: Set[Int]): Unit = {
     leaders(leader).send(
       LeaderInbound().withForceReconfiguration(
@@ -182,6 +191,31 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
     )
   }
 
+  private def chaosEvent(event: ChaosEventProto): Unit = {
+    event.value match {
+      case ChaosEventProto.Value.BecomeLeader(i) =>
+        triggered("RandomChaos leader change")
+        becomeLeader(i)
+      case ChaosEventProto.Value.Reconfigure(r) =>
+        triggered("RandomChaos reconfiguration")
+        reconfigure(r.index, r.member.toSet)
+      case ChaosEventProto.Value.MatchmakerReconfigure(r) =>
+        triggered("RandomChaos matchmaker reconfiguration")
+        matchmakerReconfigure(r.index, r.member.toSet)
+      case ChaosEventProto.Value.KillLeader(i) =>
+        triggered("RandomChaos leader failure")
+        leaders(i).send(LeaderInbound().withDie(Die()))
+      case ChaosEventProto.Value.KillAcceptor(i) =>
+        triggered("RandomChaos acceptor failure")
+        acceptors(i).send(AcceptorInbound().withDie(Die()))
+      case ChaosEventProto.Value.KillMatchmaker(i) =>
+        triggered("RandomChaos matchmaker failure")
+        matchmakers(i).send(MatchmakerInbound().withDie(Die()))
+      case ChaosEventProto.Value.Empty =>
+        logger.fatal("Empty ChaosEventProto encountered.")
+    }
+  }
+
   val state: State = workload match {
     case DoNothing =>
       DoNothingState
@@ -192,7 +226,7 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
           "reconfigureTimer",
           workload.period,
           () => {
-            logger.info("reconfigureTimer triggered")
+            triggered("reconfigureTimer")
             leaders(0).send(
               LeaderInbound().withForceReconfiguration(
                 ForceReconfiguration(acceptorIndex = 0 until (2 * config.f + 1))
@@ -225,15 +259,11 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
           period = workload.reconfigurationWarmupPeriod,
           n = workload.reconfigurationWarmupNum,
           f = () => {
-            logger.info(
-              "LeaderReconfiguration reconfiguration warmup triggered!"
-            )
+            triggered("LeaderReconfiguration reconfiguration warmup")
             reconfigure(0, randomSubset(acceptors.size, 2 * config.f + 1))
           },
           onLast = () => {
-            logger.info(
-              "LeaderReconfiguration reconfiguration warmup triggered!"
-            )
+            triggered("LeaderReconfiguration reconfiguration warmup")
             reconfigure(0, randomSubset(acceptors.size, 2 * config.f + 1))
           }
         )
@@ -244,11 +274,11 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
         period = workload.reconfigurationPeriod,
         n = workload.reconfigurationNum,
         f = () => {
-          logger.info("LeaderReconfiguration reconfiguration triggered!")
+          triggered("LeaderReconfiguration reconfiguration")
           reconfigure(0, randomSubset(acceptors.size, 2 * config.f + 1))
         },
         onLast = () => {
-          logger.info("LeaderReconfiguration reconfiguration triggered!")
+          triggered("LeaderReconfiguration reconfiguration")
           reconfigure(0, Set() ++ (0 until 2 * config.f + 1))
         }
       )
@@ -257,7 +287,7 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
         "failure",
         workload.failureDelay,
         () => {
-          logger.info("LeaderReconfiguration failure triggered!")
+          triggered("LeaderReconfiguration failure")
           acceptors(0).send(AcceptorInbound().withDie(Die()))
         }
       )
@@ -267,7 +297,7 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
         "recover",
         workload.recoverDelay,
         () => {
-          logger.info("LeaderReconfiguration recover triggered!")
+          triggered("LeaderReconfiguration recover")
           reconfigure(0, Set() ++ (1 to 2 * config.f + 1))
         }
       )
@@ -290,15 +320,11 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
           period = workload.reconfigurationWarmupPeriod,
           n = workload.reconfigurationWarmupNum,
           f = () => {
-            logger.info(
-              "MatchmakerReconfiguration reconfiguration warmup triggered!"
-            )
+            triggered("MatchmakerReconfiguration reconfiguration warmup")
             reconfigure(0, Set() ++ (0 until 2 * config.f + 1))
           },
           onLast = () => {
-            logger.info(
-              "MatchmakerReconfiguration reconfiguration warmup triggered!"
-            )
+            triggered("MatchmakerReconfiguration reconfiguration warmup")
             reconfigure(0, Set() ++ (0 until 2 * config.f + 1))
           }
         )
@@ -311,18 +337,14 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
           period = workload.matchmakerReconfigurationPeriod,
           n = workload.matchmakerReconfigurationNum,
           f = () => {
-            logger.info(
-              "MatchmakerReconfiguration matchmaker reconfiguration triggered!"
-            )
+            triggered("MatchmakerReconfiguration matchmaker reconfiguration")
             matchmakerReconfigure(
               0,
               randomSubset(matchmakers.size, 2 * config.f + 1)
             )
           },
           onLast = () => {
-            logger.info(
-              "MatchmakerReconfiguration matchmaker reconfiguration triggered!"
-            )
+            triggered("MatchmakerReconfiguration matchmaker reconfiguration")
             matchmakerReconfigure(0, Set() ++ (1 to 2 * config.f + 1))
           }
         )
@@ -331,7 +353,7 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
         "failure",
         workload.failureDelay,
         () => {
-          logger.info("MatchmakerReconfiguration failure triggered!")
+          triggered("MatchmakerReconfiguration failure")
           matchmakers(2 * config.f + 1).send(MatchmakerInbound().withDie(Die()))
         }
       )
@@ -341,7 +363,7 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
         "recover",
         workload.recoverDelay,
         () => {
-          logger.info("MatchmakerReconfiguration recover triggered!")
+          triggered("MatchmakerReconfiguration recover")
           matchmakerReconfigure(0, Set() ++ (0 until 2 * config.f + 1))
         }
       )
@@ -351,7 +373,7 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
         "reconfigure",
         workload.reconfigureDelay,
         () => {
-          logger.info("MatchmakerReconfiguration reconfigure triggered!")
+          triggered("MatchmakerReconfiguration reconfigure")
           reconfigure(0, Set() ++ (0 until 2 * config.f + 1))
         }
       )
@@ -376,15 +398,11 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
           period = workload.leaderChangeWarmupPeriod,
           n = workload.leaderChangeWarmupNum,
           f = () => {
-            logger.info(
-              "LeaderFailure leader change warmup triggered!"
-            )
+            triggered("LeaderFailure leader change warmup")
             becomeLeader(1)
           },
           onLast = () => {
-            logger.info(
-              "LeaderFailure leader change warmup triggered!"
-            )
+            triggered("LeaderFailure leader change warmup")
             becomeLeader(0)
           }
         )
@@ -393,7 +411,7 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
         "failure",
         workload.failureDelay,
         () => {
-          logger.info("LeaderFailure failure triggered!")
+          triggered("LeaderFailure failure")
           leaders(0).send(LeaderInbound().withDie(Die()))
         }
       )
@@ -413,15 +431,11 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
           period = workload.leaderChangeWarmupPeriod,
           n = workload.leaderChangeWarmupNum,
           f = () => {
-            logger.info(
-              "Leader change warmup triggered!"
-            )
+            triggered("Leader change warmup")
             becomeLeader(1)
           },
           onLast = () => {
-            logger.info(
-              "Leader change warmup triggered!"
-            )
+            triggered("Leader change warmup")
             becomeLeader(0)
           }
         )
@@ -433,15 +447,11 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
           period = workload.reconfigurationWarmupPeriod,
           n = workload.reconfigurationWarmupNum,
           f = () => {
-            logger.info(
-              "Reconfiguration warmup triggered!"
-            )
+            triggered("Reconfiguration warmup")
             reconfigure(0, randomSubset(acceptors.size, 2 * config.f + 1))
           },
           onLast = () => {
-            logger.info(
-              "Reconfiguration warmup triggered!"
-            )
+            triggered("Reconfiguration warmup")
             reconfigure(0, Set() ++ (0 until 2 * config.f + 1))
           }
         )
@@ -454,18 +464,14 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
           period = workload.matchmakerReconfigurationWarmupPeriod,
           n = workload.matchmakerReconfigurationWarmupNum,
           f = () => {
-            logger.info(
-              "Matchmaker reconfiguration warmup triggered!"
-            )
+            triggered("Matchmaker reconfiguration warmup")
             matchmakerReconfigure(
               0,
               randomSubset(matchmakers.size, 2 * config.f + 1)
             )
           },
           onLast = () => {
-            logger.info(
-              "Matchmaker reconfiguration warmup triggered!"
-            )
+            triggered("Matchmaker reconfiguration warmup")
             matchmakerReconfigure(0, Set() ++ (0 until 2 * config.f + 1))
           }
         )
@@ -474,7 +480,7 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
         "leader failure",
         workload.leaderFailureDelay,
         () => {
-          logger.info("Leader failure triggered!")
+          triggered("Leader failure")
           leaders(0).send(LeaderInbound().withDie(Die()))
         }
       )
@@ -484,7 +490,7 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
         "acceptor failure",
         workload.acceptorFailureDelay,
         () => {
-          logger.info("Acceptor failure triggered!")
+          triggered("Acceptor failure")
           acceptors(0).send(AcceptorInbound().withDie(Die()))
         }
       )
@@ -494,7 +500,7 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
         "matchmaker failure",
         workload.matchmakerFailureDelay,
         () => {
-          logger.info("Matchmaker failure triggered!")
+          triggered("Matchmaker failure")
           matchmakers(0).send(MatchmakerInbound().withDie(Die()))
         }
       )
@@ -504,7 +510,7 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
         "acceptor recover",
         workload.acceptorRecoverDelay,
         () => {
-          logger.info("acceptor recover triggered!")
+          triggered("acceptor recover")
           reconfigure(1, Set() ++ (1 to 2 * config.f + 1))
         }
       )
@@ -514,7 +520,7 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
         "matchmaker recover",
         workload.matchmakerRecoverDelay,
         () => {
-          logger.info("matchmaker recover triggered!")
+          triggered("matchmaker recover")
           matchmakerReconfigure(0, Set() ++ (1 to 2 * config.f + 1))
         }
       )
@@ -535,6 +541,19 @@ class Driver[Transport <: frankenpaxos.Transport[Transport]](
         acceptorRecoverTimer = acceptorRecoverTimer,
         matchmakerRecoverTimer = matchmakerRecoverTimer
       )
+
+    case workload: RandomChaos =>
+      RandomChaosState(
+        for ((event, i) <- workload.events.zipWithIndex) yield {
+          val t = timer(
+            s"random chaos event $i",
+            java.time.Duration.ofMillis(event.delayMs),
+            () => chaosEvent(event)
+          )
+          t.start()
+          t
+        }
+      )
   }
 
   // Handlers //////////////////////////////////////////////////////////////////
@@ -83,6 +83,14 @@ case class Chaos(
     matchmakerRecoverDelay: java.time.Duration
 ) extends DriverWorkload
 
+// This workload is a random schedule of leader changes, reconfigurations, and
+// failures generated by benchmarks/chaos_schedule.py. The driver replays the
+// events at their scheduled times.
+case class RandomChaos(
+    seed: Long,
+    events: Seq[ChaosEventProto]
+) extends DriverWorkload
+
 object DriverWorkload {
   def fromProto(proto: DriverWorkloadProto): DriverWorkload = {
     import DriverWorkloadProto.Value
@@ -170,6 +178,9 @@ object DriverWorkload {
             java.time.Duration.ofMillis(w.matchmakerRecoverDelayMs)
         )
 
+      case Value.RandomChaos(w) =>
+        RandomChaos(seed = w.seed, events = w.event)
+
       case Value.Empty =>
         throw new IllegalArgumentException(
           "Empty DriverWorkloadProto encountered."
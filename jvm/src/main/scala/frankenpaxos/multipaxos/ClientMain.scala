@@ -2,11 +2,14 @@ package frankenpaxos.multipaxos
 
 import frankenpaxos.Actor
 import frankenpaxos.BenchmarkUtil
+import frankenpaxos.ClosedLoop
 import frankenpaxos.FileLogger
 import frankenpaxos.Flags.durationRead
+import frankenpaxos.Load
 import frankenpaxos.LogLevel
 import frankenpaxos.NettyTcpAddress
 import frankenpaxos.NettyTcpTransport
+import frankenpaxos.OpenLoop
 import frankenpaxos.PrintLogger
 import frankenpaxos.PrometheusUtil
 import frankenpaxos.monitoring.PrometheusCollectors
@@ -77,6 +80,10 @@ object ClientMain extends App {
       readWorkload: ReadWriteWorkload = new UniformReadWriteWorkload(1, 1, 1, 0),
       writeWorkload: ReadWriteWorkload =
         new UniformReadWriteWorkload(1, 1, 1, 0),
+      // By default, clients run closed loop. With an open loop load, requests
+      // arrive at a fixed rate and are drawn from `workload`;
+      // predeterminedReadFraction is ignored.
+      load: Load = ClosedLoop,
       // Options.
       options: ClientOptions = ClientOptions.default
   )
@@ -140,6 +147,8 @@ object ClientMain extends App {
       .action((x, f) => f.copy(readWorkload = x))
     opt[ReadWriteWorkload]("write_workload")
       .action((x, f) => f.copy(writeWorkload = x))
+    opt[Load]("load")
+      .action((x, f) => f.copy(load = x))
 
     // Options.
     opt[java.time.Duration]("options.resendClientRequestPeriod")
@@ -217,9 +226,18 @@ object ClientMain extends App {
     s"${flags.outputFilePrefix}_data.csv",
     groupSize = flags.measurementGroupSize
   )
-  def run(pseudonym: Int, workload: ReadWriteWorkload): Future[Unit] = {
+  def run(pseudonym: Int, workload: ReadWriteWorkload): Future[Unit] =
+    runCommand(pseudonym, workload.get(), arrival = None)
+
+  // runCommand issues a single command. If `arrival` is set, the command is
+  // being issued open loop, and its latency is measured from its arrival.
+  def runCommand(
+      pseudonym: Int,
+      readWrite: ReadWrite,
+      arrival: Option[BenchmarkUtil.Arrival]
+  ): Future[Unit] = {
     implicit val context = transport.executionContext
-    val (f, error, label) = (workload.get(), flags.readConsistency) match {
+    val (f, error, label) = (readWrite, flags.readConsistency) match {
       case (Write(command), _) =>
         (() => client.write(pseudonym, command), "Write failed.", "write")
       case (Read(command), Linearizable) =>
@@ -234,8 +252,11 @@ object ClientMain extends App {
          "read")
     }
 
-    BenchmarkUtil
-      .timed(f)
+    val timed = arrival match {
+      case None          => BenchmarkUtil.timed(f)
+      case Some(arrival) => BenchmarkUtil.timedFrom(arrival, f)
+    }
+    timed
       .transformWith({
         case scala.util.Failure(_) =>
           logger.debug(error)
@@ -246,7 +267,8 @@ object ClientMain extends App {
             start = timing.startTime,
             stop = timing.stopTime,
             latencyNanos = timing.durationNanos,
-            label = label
+            label = label,
+            pseudonym = pseudonym
           )
           Future.successful(())
       })
@@ -289,27 +311,60 @@ object ClientMain extends App {
   Thread.sleep(flags.warmupSleep.toMillis())
 
   // Run the benchmark.
-  val futures = {
-    if (flags.predeterminedReadFraction == -1) {
-      for (pseudonym <- flags.numWarmupClients until
-             flags.numWarmupClients + flags.numClients)
-        yield
-          BenchmarkUtil.runFor(() => run(pseudonym, flags.workload),
-                               flags.duration)
-    } else {
-      val readerFraction = flags.predeterminedReadFraction.toFloat / 100
-      val numReaders = (readerFraction * flags.numClients).ceil.toInt
-      for (pseudonym <- flags.numWarmupClients until
-             flags.numWarmupClients + flags.numClients)
-        yield {
-          val workload = if (pseudonym - flags.numWarmupClients < numReaders) {
-            flags.readWorkload
-          } else {
-            flags.writeWorkload
+  val futures = (flags.workload, flags.load) match {
+    // Trace replay workloads are run open loop. Every client issues the
+    // commands in its shard of the trace at the times they were recorded,
+    // using up to numClients pseudonyms to do so.
+    case (workload: TraceReplayReadWriteWorkload, _) =>
+      Seq(
+        BenchmarkUtil.runArrivals(
+          workload.replay(),
+          pseudonyms = flags.numWarmupClients until
+            flags.numWarmupClients + flags.numClients,
+          flags.duration
+        )(
+          (pseudonym, arrival, readWrite) =>
+            runCommand(pseudonym, readWrite, Some(arrival))
+        )
+      )
+
+    // Open loop loads issue requests at a fixed rate, regardless of how many
+    // requests are pending, using up to numClients pseudonyms to do so.
+    case (workload, load: OpenLoop) =>
+      Seq(
+        BenchmarkUtil.runArrivals(
+          load.arrivalOffsetsNanos().map(offset => (offset, workload.get())),
+          pseudonyms = flags.numWarmupClients until
+            flags.numWarmupClients + flags.numClients,
+          flags.duration
+        )(
+          (pseudonym, arrival, readWrite) =>
+            runCommand(pseudonym, readWrite, Some(arrival))
+        )
+      )
+
+    case _ =>
+      if (flags.predeterminedReadFraction == -1) {
+        for (pseudonym <- flags.numWarmupClients until
+               flags.numWarmupClients + flags.numClients)
+          yield
+            BenchmarkUtil.runFor(() => run(pseudonym, flags.workload),
+                                 flags.duration)
+      } else {
+        val readerFraction = flags.predeterminedReadFraction.toFloat / 100
+        val numReaders = (readerFraction * flags.numClients).ceil.toInt
+        for (pseudonym <- flags.numWarmupClients until
+               flags.numWarmupClients + flags.numClients)
+          yield {
+            val workload =
+              if (pseudonym - flags.numWarmupClients < numReaders) {
+                flags.readWorkload
+              } else {
+                flags.writeWorkload
+              }
+            BenchmarkUtil.runFor(() => run(pseudonym, workload), flags.duration)
           }
-          BenchmarkUtil.runFor(() => run(pseudonym, workload), flags.duration)
-        }
-    }
+      }
   }
   try {
     logger.info("Clients started.")
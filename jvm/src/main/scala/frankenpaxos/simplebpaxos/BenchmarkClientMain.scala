@@ -148,7 +148,8 @@ object BenchmarkClientMain extends App {
             stop = timing.stopTime,
             latencyNanos = timing.durationNanos,
             host = flags.host,
-            port = flags.port
+            port = flags.port,
+            pseudonym = pseudonym
           )
           Future.successful(())
       })
@@ -2,11 +2,14 @@ package frankenpaxos.unreplicated
 
 import frankenpaxos.Actor
 import frankenpaxos.BenchmarkUtil
+import frankenpaxos.ClosedLoop
 import frankenpaxos.FileLogger
 import frankenpaxos.Flags.durationRead
+import frankenpaxos.Load
 import frankenpaxos.LogLevel
 import frankenpaxos.NettyTcpAddress
 import frankenpaxos.NettyTcpTransport
+import frankenpaxos.OpenLoop
 import frankenpaxos.PrintLogger
 import frankenpaxos.PrometheusUtil
 import frankenpaxos.StringWorkload
@@ -43,6 +46,9 @@ object ClientMain extends App {
       timeout: Duration = 10 seconds,
       numClients: Int = 1,
       workload: Workload = new StringWorkload(0, 0),
+      // By default, clients run closed loop. With an open loop load, requests
+      // arrive at a fixed rate, and at most numClients are pending at once.
+      load: Load = ClosedLoop,
       outputFilePrefix: String = "",
       // Options.
       options: ClientOptions = ClientOptions.default
@@ -92,6 +98,8 @@ object ClientMain extends App {
     opt[Workload]("workload")
       .required()
       .action((x, f) => f.copy(workload = x))
+    opt[Load]("load")
+      .action((x, f) => f.copy(load = x))
     opt[String]("output_file_prefix")
       .required()
       .action((x, f) => f.copy(outputFilePrefix = x))
@@ -144,10 +152,22 @@ object ClientMain extends App {
     s"${flags.outputFilePrefix}_data.csv",
     groupSize = flags.measurementGroupSize
   )
-  def run(): Future[Unit] = {
+  def run(pseudonym: Int): Future[Unit] =
+    runCommand(pseudonym, arrival = None)
+
+  // runCommand issues a single command. If `arrival` is set, the command is
+  // being issued open loop, and its latency is measured from its arrival.
+  def runCommand(
+      pseudonym: Int,
+      arrival: Option[BenchmarkUtil.Arrival]
+  ): Future[Unit] = {
     implicit val context = transport.executionContext
-    BenchmarkUtil
-      .timed(() => client.propose(flags.workload.get()))
+    val f = () => client.propose(flags.workload.get())
+    val timed = arrival match {
+      case None          => BenchmarkUtil.timed(f)
+      case Some(arrival) => BenchmarkUtil.timedFrom(arrival, f)
+    }
+    timed
       .transformWith({
         case scala.util.Failure(_) =>
           logger.debug("Request failed.")
@@ -158,7 +178,8 @@ object ClientMain extends App {
             start = timing.startTime,
             stop = timing.stopTime,
             latencyNanos = timing.durationNanos,
-            label = "write"
+            label = "write",
+            pseudonym = pseudonym
           )
           Future.successful(())
       })
@@ -182,8 +203,20 @@ object ClientMain extends App {
   Thread.sleep(flags.warmupSleep.toMillis())
 
   // Run the benchmark.
-  val futures = for (_ <- 0 to flags.numClients)
-    yield BenchmarkUtil.runFor(() => run(), flags.duration)
+  val futures = flags.load match {
+    case load: OpenLoop =>
+      Seq(
+        BenchmarkUtil.runArrivals(
+          load.arrivalOffsetsNanos().map(offset => (offset, ())),
+          pseudonyms = 0 until flags.numClients,
+          flags.duration
+        )((pseudonym, arrival, _) => runCommand(pseudonym, Some(arrival)))
+      )
+
+    case ClosedLoop =>
+      for (pseudonym <- 0 to flags.numClients)
+        yield BenchmarkUtil.runFor(() => run(pseudonym), flags.duration)
+  }
   try {
     logger.info("Clients started.")
     concurrent.Await.result(Future.sequence(futures), flags.timeout)
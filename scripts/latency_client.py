@@ -7,28 +7,212 @@
 #
 #   python latency_client.py [--host <host>] [--port <port>] [-n <n>]
 #
-# The client opens a connection to the server and then sends `n` one byte
-# messages. The client records the latency required to send the message and
-# receive a response (measured in microseconds). After sending `n` messages,
-# the client prints out the recorded latencies (again, in microseconds) to
-# standard out.
+# The client opens `--connections` connections to the server. Every connection
+# sends `n` messages of `--payload_size` bytes (16 bytes by default, the size
+# of our write workloads' values) and keeps up to `--depth` of them in flight
+# at once. The client records the latency of every message, from just before
+# the message is sent until its echo is received, using time.perf_counter_ns.
+# After every connection is done, the client prints a summary of the latencies
+# (in microseconds) and the throughput to standard out. Pass --histogram to
+# also print a latency histogram with logarithmically sized buckets (like an
+# HdrHistogram), --json to print the summary as JSON, or --print_samples to
+# print every latency.
+#
+# With --udp, every message is a datagram that starts with an 8 byte sequence
+# number. Datagrams that aren't echoed within `--timeout_ms` are counted as
+# lost.
+#
+# With `--depth 1` and the default payload size, the client measures the
+# round trip time of the network. With a large payload size and depth, it
+# measures the bandwidth of the network. Either way, it gives a floor to
+# compare the unreplicated protocol's latency and throughput to.
 
+from typing import Any, Deque, Dict, List
 import argparse
+import asyncio
+import collections
+import json
+import math
 import socket
+import struct
 import time
 
+
+class _Stats:
+    def __init__(self, warmup: int) -> None:
+        self.warmup = warmup
+        self.num_received = 0
+        self.num_lost = 0
+        self.latencies_ns: List[int] = []
+        # The time the warmup ended. Throughput is measured from then, so that
+        # neither connection setup nor warmup messages are counted.
+        self.start = time.perf_counter()
+
+    def record(self, latency_ns: int) -> None:
+        # The first `warmup` messages are not recorded.
+        self.num_received += 1
+        if self.num_received == self.warmup:
+            self.start = time.perf_counter()
+        elif self.num_received > self.warmup:
+            self.latencies_ns.append(latency_ns)
+
+
+async def _tcp_connection(args, stats: _Stats) -> None:
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    sock = writer.get_extra_info('socket')
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    payload = b'.' * args.payload_size
+    num_messages = args.warmup + args.n
+    window = asyncio.Semaphore(args.depth)
+    # TCP delivers echos in order, so the oldest send time belongs to the next
+    # echo.
+    send_times: Deque[int] = collections.deque()
+
+    async def send() -> None:
+        for _ in range(num_messages):
+            await window.acquire()
+            send_times.append(time.perf_counter_ns())
+            writer.write(payload)
+            await writer.drain()
+
+    sender = asyncio.ensure_future(send())
+    try:
+        for _ in range(num_messages):
+            await reader.readexactly(args.payload_size)
+            stats.record(time.perf_counter_ns() - send_times.popleft())
+            window.release()
+        await sender
+    finally:
+        sender.cancel()
+        writer.close()
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, stats: _Stats, window: asyncio.Semaphore) -> None:
+        self.stats = stats
+        self.window = window
+        self.send_times: Dict[int, int] = dict()
+
+    def datagram_received(self, data: bytes, addr: Any) -> None:
+        now = time.perf_counter_ns()
+        (seq,) = struct.unpack_from('!Q', data)
+        send_time = self.send_times.pop(seq, None)
+        # Late and duplicate datagrams are ignored.
+        if send_time is not None:
+            self.stats.record(now - send_time)
+            self.window.release()
+
+    def timeout(self, seq: int) -> None:
+        if self.send_times.pop(seq, None) is not None:
+            self.stats.num_lost += 1
+            self.window.release()
+
+
+async def _udp_connection(args, stats: _Stats) -> None:
+    loop = asyncio.get_event_loop()
+    window = asyncio.Semaphore(args.depth)
+    transport, protocol = await loop.create_datagram_endpoint(
+        lambda: _UdpProtocol(stats, window),
+        remote_addr=(args.host, args.port))
+    padding = b'.' * (args.payload_size - 8)
+    try:
+        for seq in range(args.warmup + args.n):
+            await window.acquire()
+            protocol.send_times[seq] = time.perf_counter_ns()
+            transport.sendto(struct.pack('!Q', seq) + padding)
+            loop.call_later(args.timeout_ms / 1000, protocol.timeout, seq)
+        # Wait for the last messages to be echoed or to time out.
+        for _ in range(args.depth):
+            await window.acquire()
+    finally:
+        transport.close()
+
+
+def summarize(latencies_ns: List[int], duration_s: float, num_lost: int,
+              payload_size: int) -> Dict[str, float]:
+    """
+    summarize summarizes the latencies (in microseconds) and throughput of a
+    run that took `duration_s` seconds. throughput_mbit is the rate at which
+    payloads were sent (and echoed) in one direction.
+    """
+    latencies_us = sorted(l / 1000 for l in latencies_ns)
+    n = len(latencies_us)
+
+    def quantile(q: float) -> float:
+        if n == 0:
+            return math.nan
+        return latencies_us[min(n - 1, int(q * n))]
+
+    throughput = n / duration_s if duration_s > 0 else math.nan
+    return {
+        'count': n,
+        'lost': num_lost,
+        'duration_s': duration_s,
+        'throughput': throughput,
+        'throughput_mbit': throughput * payload_size * 8 / 1e6,
+        'mean_us': sum(latencies_us) / n if n > 0 else math.nan,
+        'min_us': latencies_us[0] if n > 0 else math.nan,
+        'p50_us': quantile(0.5),
+        'p90_us': quantile(0.9),
+        'p99_us': quantile(0.99),
+        'p999_us': quantile(0.999),
+        'max_us': latencies_us[-1] if n > 0 else math.nan,
+    }
+
+
+def histogram(latencies_ns: List[int], precision: float = 0.1) -> str:
+    """
+    histogram returns a latency histogram with buckets that are each
+    `precision` wider than the last, along with the cumulative percentile of
+    every bucket.
+    """
+    if len(latencies_ns) == 0:
+        return ''
+    latencies_us = sorted(max(l / 1000, 1) for l in latencies_ns)
+    r = 1 + precision
+    counts: Dict[int, int] = collections.Counter(
+        int(math.log(l) / math.log(r)) for l in latencies_us)
+    lines = [f'{"bucket_us":>12} {"count":>10} {"percentile":>10}']
+    cumulative = 0
+    for bucket in sorted(counts):
+        cumulative += counts[bucket]
+        percentile = 100 * cumulative / len(latencies_us)
+        lines.append(f'{r**bucket:>12.1f} {counts[bucket]:>10} '
+                     f'{percentile:>10.3f}')
+    return '\n'.join(lines)
+
+
+async def run(args) -> Dict[str, Any]:
+    stats = _Stats(args.warmup * args.connections)
+    connection = _udp_connection if args.udp else _tcp_connection
+    await asyncio.gather(
+        *[connection(args, stats) for _ in range(args.connections)])
+    duration_s = time.perf_counter() - stats.start
+    return {
+        'stats': stats,
+        'summary': summarize(stats.latencies_ns, duration_s, stats.num_lost,
+                             args.payload_size),
+    }
+
+
 def main(args) -> None:
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.connect((args.host, args.port))
-        durations_micros = []
-        for _ in range(args.n):
-            start = time.time()
-            s.sendall(b'.')
-            s.recv(1024)
-            stop = time.time()
-            durations_micros.append((stop - start) * 1000 * 1000)
-        for d in durations_micros:
-            print(d)
+    if args.udp and args.payload_size < 8:
+        raise ValueError('UDP payloads must be at least 8 bytes to hold a '
+                         'sequence number.')
+    result = asyncio.run(run(args))
+    if args.print_samples:
+        for l in result['stats'].latencies_ns:
+            print(l / 1000)
+    if args.histogram:
+        print(histogram(result['stats'].latencies_ns))
+    if args.json:
+        print(json.dumps(result['summary']))
+    else:
+        for (k, v) in result['summary'].items():
+            print(f'{k:>16}: {v:.2f}' if isinstance(v, float) else
+                  f'{k:>16}: {v}')
+
 
 def arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
@@ -48,7 +232,57 @@ def arg_parser() -> argparse.ArgumentParser:
         '-n',
         type=int,
         default=1000,
-        help='Number of latency measurements'
+        help='Number of latency measurements per connection'
+    )
+    parser.add_argument(
+        '--warmup',
+        type=int,
+        default=100,
+        help='Number of unrecorded messages per connection'
+    )
+    parser.add_argument(
+        '--connections',
+        type=int,
+        default=1,
+        help='Number of concurrent connections'
+    )
+    parser.add_argument(
+        '--payload_size',
+        type=int,
+        default=16,
+        help='Message size in bytes'
+    )
+    parser.add_argument(
+        '--depth',
+        type=int,
+        default=1,
+        help='Number of messages in flight per connection'
+    )
+    parser.add_argument(
+        '--udp',
+        action='store_true',
+        help='Send UDP datagrams instead of using TCP'
+    )
+    parser.add_argument(
+        '--timeout_ms',
+        type=float,
+        default=1000,
+        help='Time after which a UDP datagram is considered lost'
+    )
+    parser.add_argument(
+        '--histogram',
+        action='store_true',
+        help='Print a latency histogram'
+    )
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Print the summary as JSON'
+    )
+    parser.add_argument(
+        '--print_samples',
+        action='store_true',
+        help='Print every latency (in microseconds)'
     )
     return parser
 
@@ -3,34 +3,155 @@
 #
 #   python latency_server.py [--host <host>] [--port <port>]
 #
-# The server accepts one client connection at a time and echos back any data
-# that it receives. For example, you can connect to the server using nc:
+# The server echos back any data that it receives, over TCP and over UDP on
+# the same port. For example, you can connect to the server using nc:
 #
 #   $ nc <host> <port>
 #   foo
 #   foo
+#
+# The server runs an event loop that serves any number of connections at once
+# (see latency_client.py's --connections), and it disables Nagle's algorithm
+# (TCP_NODELAY) on every connection unless passed --no_nodelay. With
+# `--processes n`, the server runs n processes that all listen on the same
+# port with SO_REUSEPORT, and the kernel spreads connections and datagrams
+# across them. This lets the server keep up with a client that uses many
+# connections.
+#
+# Every second that it echoed anything, every process prints the number of
+# messages and megabits per second that it echoed (in one direction). TCP has
+# no message boundaries, so a TCP message is `--payload_size` bytes. Paired
+# with latency_client.py, this tells us the most messages per second that a
+# pair of hosts can carry before we blame the protocol.
 
+from typing import Any, Optional
 import argparse
+import asyncio
+import multiprocessing
 import socket
+import time
+
+
+class _Counters:
+    def __init__(self) -> None:
+        self.num_connections = 0
+        self.num_bytes = 0
+        self.num_datagrams = 0
+
+
+class _TcpEchoProtocol(asyncio.Protocol):
+    def __init__(self, counters: _Counters, nodelay: bool) -> None:
+        self.counters = counters
+        self.nodelay = nodelay
+        self.transport: Optional[asyncio.Transport] = None
+
+    def connection_made(self, transport: Any) -> None:
+        self.transport = transport
+        if self.nodelay:
+            sock = transport.get_extra_info('socket')
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.counters.num_connections += 1
+
+    def data_received(self, data: bytes) -> None:
+        assert self.transport is not None
+        self.transport.write(data)
+        self.counters.num_bytes += len(data)
+
+    def connection_lost(self, exn: Optional[Exception]) -> None:
+        self.counters.num_connections -= 1
+
+
+class _UdpEchoProtocol(asyncio.DatagramProtocol):
+    def __init__(self, counters: _Counters) -> None:
+        self.counters = counters
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport: Any) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: Any) -> None:
+        assert self.transport is not None
+        self.transport.sendto(data, addr)
+        self.counters.num_bytes += len(data)
+        self.counters.num_datagrams += 1
+
+
+def _socket(args, kind: int) -> socket.socket:
+    s = socket.socket(socket.AF_INET, kind)
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if args.processes > 1:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    s.bind((args.host, args.port))
+    return s
 
-def handle_client(s: socket.socket) -> None:
+
+async def _report(args, index: int, counters: _Counters) -> None:
+    last_bytes = 0
+    last_datagrams = 0
+    last_time = time.perf_counter()
     while True:
-        data = s.recv(1024)
-        if not data:
-            return
-        s.sendall(data)
+        await asyncio.sleep(1)
+        now = time.perf_counter()
+        duration_s = now - last_time
+        num_bytes = counters.num_bytes - last_bytes
+        num_datagrams = counters.num_datagrams - last_datagrams
+        (last_bytes, last_datagrams, last_time) = (counters.num_bytes,
+                                                   counters.num_datagrams,
+                                                   now)
+        if num_bytes == 0:
+            continue
+
+        # Datagrams are messages. TCP bytes are split into payloads.
+        datagram_bytes = num_datagrams * args.payload_size
+        num_messages = (num_datagrams +
+                        max(0, num_bytes - datagram_bytes) / args.payload_size)
+        print(f'[{index}] {num_messages / duration_s:.0f} messages/s, '
+              f'{num_bytes * 8 / 1e6 / duration_s:.2f} Mbit/s, '
+              f'{counters.num_connections} connections.', flush=True)
+
+
+async def _serve(args, index: int) -> None:
+    loop = asyncio.get_event_loop()
+    counters = _Counters()
+    server = await loop.create_server(
+        lambda: _TcpEchoProtocol(counters, not args.no_nodelay),
+        sock=_socket(args, socket.SOCK_STREAM))
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _UdpEchoProtocol(counters),
+        sock=_socket(args, socket.SOCK_DGRAM))
+    print(f'[{index}] Server listening on {args.host}:{args.port}.',
+          flush=True)
+    try:
+        await _report(args, index, counters)
+    finally:
+        transport.close()
+        server.close()
+
+
+def _run(args, index: int) -> None:
+    try:
+        asyncio.run(_serve(args, index))
+    except KeyboardInterrupt:
+        pass
+
 
 def main(args) -> None:
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind((args.host, args.port))
-        s.listen()
-        print(f'Server listening on {args.host}:{args.port}.')
+    if args.processes == 1:
+        _run(args, 0)
+        return
 
-        while True:
-            conn, addr = s.accept()
-            print(f'Server accepted connection from {addr}.')
-            with conn:
-                handle_client(conn)
+    processes = [
+        multiprocessing.Process(target=_run, args=(args, i))
+        for i in range(args.processes)
+    ]
+    for p in processes:
+        p.start()
+    try:
+        for p in processes:
+            p.join()
+    except KeyboardInterrupt:
+        for p in processes:
+            p.terminate()
 
 def arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
@@ -46,6 +167,23 @@ def arg_parser() -> argparse.ArgumentParser:
         default=8000,
         help='Server port'
     )
+    parser.add_argument(
+        '--processes',
+        type=int,
+        default=1,
+        help='Number of server processes sharing the port (SO_REUSEPORT)'
+    )
+    parser.add_argument(
+        '--no_nodelay',
+        action='store_true',
+        help='Leave Nagle\'s algorithm on (i.e. don\'t set TCP_NODELAY)'
+    )
+    parser.add_argument(
+        '--payload_size',
+        type=int,
+        default=16,
+        help='TCP message size in bytes, for reporting messages per second'
+    )
     return parser
 
 if __name__ == '__main__':
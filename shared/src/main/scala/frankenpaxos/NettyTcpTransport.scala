@@ -32,7 +32,9 @@ import io.netty.util.concurrent.ScheduledFuture
 import java.net.InetSocketAddress
 import java.net.SocketAddress
 import java.util.concurrent.Callable
+import java.util.concurrent.ConcurrentHashMap
 import java.util.concurrent.TimeUnit
+import scala.collection.JavaConverters._
 import scala.concurrent.ExecutionContext
 import scala.util.Try
 
@@ -121,6 +123,24 @@ class NettyTcpTimer(
   }
 }
 
+object NettyTcpTransport {
+  // Every transport that has not been shut down. A JVM normally has a single
+  // transport that lives as long as the JVM does, but WarmMain runs one role
+  // after another in the same JVM and has to shut down the transport of the
+  // previous role before starting the next.
+  private val live = ConcurrentHashMap.newKeySet[NettyTcpTransport]()
+
+  // Shut down every live transport and wait for their channels to close.
+  def shutdownAll(): Unit = {
+    for (transport <- live.asScala) {
+      transport.eventLoop
+        .shutdownGracefully(0, 1, TimeUnit.SECONDS)
+        .syncUninterruptibly()
+    }
+    live.clear()
+  }
+}
+
 class NettyTcpTransport(private val logger: Logger)
     extends Transport[NettyTcpTransport] {
 
@@ -238,6 +258,7 @@ class NettyTcpTransport(private val logger: Logger)
   //
   // [1]: https://netty.io/wiki/user-guide-for-4.x.html
   private val eventLoop = new NioEventLoopGroup(1)
+  NettyTcpTransport.live.add(this)
 
   sealed trait ChanOrPending
   case class Chan(channel: Channel) extends ChanOrPending
@@ -405,7 +426,7 @@ class NettyTcpTransport(private val logger: Logger)
             s"are creating one."
         )
         channels((actor.address, dst)) = Pending(mutable.Buffer(bytes))
-        new Bootstrap()
+        val bootstrap = new Bootstrap()
           .group(eventLoop)
           .channel(classOf[NioSocketChannel])
           .option[java.lang.Boolean](ChannelOption.SO_KEEPALIVE, true)
@@ -426,7 +447,27 @@ class NettyTcpTransport(private val logger: Logger)
                 .addLast("bytesEncoder", new ByteArrayEncoder())
             }
           })
-          .connect(dst.socketAddress)
+
+        // If the actor has a loopback address, we bind the client socket to
+        // it, rather than letting the kernel pick one. Otherwise, every
+        // connection between two loopback addresses (e.g., 127.0.1.1 and
+        // 127.0.1.2) originates from 127.0.0.1, and an emulated network
+        // topology (see benchmarks/topology.py) can't tell which link a
+        // packet is on. Other addresses (e.g., 0.0.0.0 or an address on
+        // another interface) are left to the kernel, as before.
+        val local =
+          actor.address.socketAddress.asInstanceOf[InetSocketAddress]
+        val connected =
+          if (local.getAddress() != null &&
+              local.getAddress().isLoopbackAddress()) {
+            bootstrap.connect(
+              dst.socketAddress,
+              new InetSocketAddress(local.getAddress(), 0)
+            )
+          } else {
+            bootstrap.connect(dst.socketAddress)
+          }
+        connected
           .addListeners(
             new LogFailureFutureListener(s"Unable to connect to $dst."),
             new CloseOnFailureFutureListener(),
@@ -500,6 +541,7 @@ class NettyTcpTransport(private val logger: Logger)
   }
 
   def shutdown(): Future[_] = {
+    NettyTcpTransport.live.remove(this)
     eventLoop.shutdownGracefully()
   }
 }
@@ -0,0 +1,161 @@
+package frankenpaxos.util
+
+import scala.util.Random
+
+// A KeyDistribution determines which of `numKeys` keys (numbered 0 through
+// numKeys - 1) a key-value store workload reads and writes. Most distributions
+// don't distinguish between reads and writes, but some do. For example, a
+// LatestKeyDistribution writes keys in order and favors reading recently
+// written keys.
+trait KeyDistribution {
+  def nextReadKey(): Int
+  def nextWriteKey(): Int
+}
+
+// A ZipfianKeyDistribution draws keys from a Zipfian distribution with
+// parameter `theta` in the range (0, 1). Key 0 is the most popular, key 1 is
+// the second most popular, and so on. The larger theta, the more skewed the
+// distribution. YCSB uses a theta of 0.99 by default.
+//
+// We implement the algorithm from "Quickly Generating Billion-Record Synthetic
+// Databases" by Gray et al. which is also what YCSB uses. Constructing a
+// ZipfianKeyDistribution takes time linear in numKeys, but drawing a key takes
+// constant time.
+class ZipfianKeyDistribution(
+    numKeys: Int,
+    theta: Double,
+    random: Random = new Random()
+) extends KeyDistribution {
+  require(numKeys >= 1)
+  require(0 < theta && theta < 1)
+
+  override def toString(): String =
+    s"ZipfianKeyDistribution(numKeys=$numKeys, theta=$theta)"
+
+  private val zetaN: Double =
+    (1 to numKeys).foldLeft(0.0)((sum, i) => sum + 1 / Math.pow(i, theta))
+  private val zeta2: Double = 1 + 1 / Math.pow(2, theta)
+  private val alpha: Double = 1 / (1 - theta)
+  private val eta: Double =
+    (1 - Math.pow(2.0 / numKeys, 1 - theta)) / (1 - zeta2 / zetaN)
+
+  def next(): Int = {
+    val u = random.nextDouble()
+    val uz = u * zetaN
+    if (uz < 1) {
+      0
+    } else if (uz < 1 + Math.pow(0.5, theta)) {
+      Math.min(1, numKeys - 1)
+    } else {
+      val key = (numKeys * Math.pow(eta * u - eta + 1, alpha)).toLong
+      Math.min(key, numKeys - 1).toInt
+    }
+  }
+
+  override def nextReadKey(): Int = next()
+  override def nextWriteKey(): Int = next()
+}
+
+// A ScrambledZipfianKeyDistribution is like a ZipfianKeyDistribution, except
+// that the popular keys are scattered throughout the key space instead of
+// clustered at the low end of it. We scatter keys by hashing them with FNV-1a.
+// Because the hash is taken modulo numKeys, a handful of keys collide, so the
+// distribution is not exactly Zipfian, but it's close.
+class ScrambledZipfianKeyDistribution(
+    numKeys: Int,
+    theta: Double,
+    random: Random = new Random()
+) extends KeyDistribution {
+  override def toString(): String =
+    s"ScrambledZipfianKeyDistribution(numKeys=$numKeys, theta=$theta)"
+
+  private val zipfian = new ZipfianKeyDistribution(numKeys, theta, random)
+
+  def next(): Int = {
+    val hash = ScrambledZipfianKeyDistribution.fnv1a(zipfian.next())
+    java.lang.Long.remainderUnsigned(hash, numKeys).toInt
+  }
+
+  override def nextReadKey(): Int = next()
+  override def nextWriteKey(): Int = next()
+}
+
+object ScrambledZipfianKeyDistribution {
+  private val FnvOffsetBasis64: Long = 0xCBF29CE484222325L
+  private val FnvPrime64: Long = 1099511628211L
+
+  // The 64-bit FNV-1a hash of the eight bytes of x.
+  def fnv1a(x: Long): Long = {
+    var hash = FnvOffsetBasis64
+    var value = x
+    for (_ <- 0 until 8) {
+      hash ^= (value & 0xFF)
+      hash *= FnvPrime64
+      value >>>= 8
+    }
+    hash
+  }
+}
+
+// A LatestKeyDistribution models a workload in which recently written keys are
+// the most popular. Writes cycle through the key space in order. Reads pick a
+// key `d` keys behind the most recently written key, where `d` is drawn from a
+// Zipfian distribution. This is YCSB's "latest" distribution, adapted to a
+// fixed size key space.
+class LatestKeyDistribution(
+    numKeys: Int,
+    theta: Double,
+    random: Random = new Random()
+) extends KeyDistribution {
+  override def toString(): String =
+    s"LatestKeyDistribution(numKeys=$numKeys, theta=$theta)"
+
+  private val zipfian = new ZipfianKeyDistribution(numKeys, theta, random)
+
+  // The most recently written key.
+  private var latest: Int = 0
+
+  override def nextReadKey(): Int =
+    Math.floorMod(latest - zipfian.next(), numKeys)
+
+  override def nextWriteKey(): Int = {
+    latest = (latest + 1) % numKeys
+    latest
+  }
+}
+
+// A HotspotKeyDistribution splits the key space into a hot set of the first
+// `hotSetFraction` keys and a cold set of the remaining keys.
+// `hotOperationFraction` of all operations are to a key drawn uniformly at
+// random from the hot set. The rest are to a key drawn uniformly at random from
+// the cold set.
+class HotspotKeyDistribution(
+    numKeys: Int,
+    hotSetFraction: Double,
+    hotOperationFraction: Double,
+    random: Random = new Random()
+) extends KeyDistribution {
+  require(numKeys >= 1)
+  require(0 <= hotSetFraction && hotSetFraction <= 1)
+  require(0 <= hotOperationFraction && hotOperationFraction <= 1)
+
+  override def toString(): String =
+    s"HotspotKeyDistribution(numKeys=$numKeys, " +
+      s"hotSetFraction=$hotSetFraction, " +
+      s"hotOperationFraction=$hotOperationFraction)"
+
+  private val numHotKeys: Int =
+    Math.min(numKeys, Math.max(1, (numKeys * hotSetFraction).round.toInt))
+  private val numColdKeys: Int = numKeys - numHotKeys
+
+  def next(): Int = {
+    if (numColdKeys == 0 || random.nextDouble() < hotOperationFraction) {
+      random.nextInt(numHotKeys)
+    } else {
+      numHotKeys + random.nextInt(numColdKeys)
+    }
+  }
+
+  override def nextReadKey(): Int = next()
+  override def nextWriteKey(): Int = next()
+}
@@ -0,0 +1,78 @@
+package frankenpaxos.util
+
+import org.scalatest.FlatSpec
+import org.scalatest.Matchers
+import scala.util.Random
+
+class KeyDistributionTest extends FlatSpec with Matchers {
+  private def histogram(numKeys: Int, n: Int, f: () => Int): Array[Int] = {
+    val counts = Array.fill(numKeys)(0)
+    for (_ <- 0 until n) {
+      counts(f()) += 1
+    }
+    counts
+  }
+
+  "A ZipfianKeyDistribution" should "only return keys in range" in {
+    for (numKeys <- Seq(1, 2, 3, 10, 1000)) {
+      val d = new ZipfianKeyDistribution(numKeys, 0.99, new Random(0))
+      for (_ <- 0 until 10000) {
+        val key = d.next()
+        key should be >= 0
+        key should be < numKeys
+      }
+    }
+  }
+
+  it should "favor small keys" in {
+    val d = new ZipfianKeyDistribution(100, 0.99, new Random(0))
+    val counts = histogram(100, 100000, () => d.next())
+    counts(0) should be > counts(1)
+    counts(1) should be > counts(10)
+    counts(10) should be > counts(99)
+  }
+
+  "A ScrambledZipfianKeyDistribution" should "only return keys in range" in {
+    for (numKeys <- Seq(1, 2, 3, 10, 1000)) {
+      val d = new ScrambledZipfianKeyDistribution(numKeys, 0.99, new Random(0))
+      for (_ <- 0 until 10000) {
+        val key = d.next()
+        key should be >= 0
+        key should be < numKeys
+      }
+    }
+  }
+
+  "A LatestKeyDistribution" should "read recently written keys" in {
+    val d = new LatestKeyDistribution(100, 0.99, new Random(0))
+    for (_ <- 0 until 50) {
+      d.nextWriteKey()
+    }
+    val counts = histogram(100, 100000, () => d.nextReadKey())
+    counts(50) should be > counts(49)
+    counts(49) should be > counts(10)
+  }
+
+  it should "write keys in order" in {
+    val d = new LatestKeyDistribution(3, 0.99, new Random(0))
+    d.nextWriteKey() shouldBe 1
+    d.nextWriteKey() shouldBe 2
+    d.nextWriteKey() shouldBe 0
+  }
+
+  "A HotspotKeyDistribution" should "favor hot keys" in {
+    val d = new HotspotKeyDistribution(100, 0.1, 0.9, new Random(0))
+    val counts = histogram(100, 100000, () => d.next())
+    val hot = counts.take(10).sum
+    hot.toDouble / 100000 shouldBe 0.9 +- 0.01
+  }
+
+  it should "work with an all hot key space" in {
+    val d = new HotspotKeyDistribution(10, 1.0, 0.5, new Random(0))
+    for (_ <- 0 until 1000) {
+      val key = d.next()
+      key should be >= 0
+      key should be < 10
+    }
+  }
+}